@@ -4,12 +4,14 @@ AI Database Manager
 Manages AI-extracted resume data in the database
 """
 
-from sqlmodel import SQLModel, create_engine, Session, select, delete
-from typing import List, Optional, Dict, Any
+from sqlmodel import SQLModel, create_engine, Session, select, delete, or_
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime
 import os
 from pathlib import Path
-from app.ai_resume_schema import AIResume, AIEducation, AIExperience, AIResumeCreate
+from app.ai_resume_schema import AIResume, AIEducation, AIExperience, AIResumeSkill, AIResumeCreate
+from app.skill_normalizer import normalize_skill_fields, SKILL_NORMALIZER_VERSION
+from app.resume_search import text_search_clause
 
 class AIDatabaseManager:
     """Manages AI-extracted resume data"""
@@ -31,6 +33,12 @@ class AIDatabaseManager:
                 if not candidate_id:
                     raise ValueError("Candidate ID is required")
                 
+                # Identical content already stored: keep the existing version
+                identical_resume = self._find_identical_resume(session, file_info)
+                if identical_resume:
+                    print(f"[DB_DEBUG] Content unchanged for resume {identical_resume.id}; not creating a new version")
+                    return identical_resume
+                
                 # Get primary email for additional deduplication check
                 primary_email = resume_data.get("contact_information", {}).get("primary_email")
                 
@@ -65,6 +73,7 @@ class AIDatabaseManager:
                     # Save education and experience with validation
                     self._save_education(session, new_resume.id, education_data)
                     self._save_experience(session, new_resume.id, experience_data)
+                    self._save_skills(session, new_resume)
                     
                     # Commit the education and experience changes
                     session.commit()
@@ -98,6 +107,7 @@ class AIDatabaseManager:
                     # Save education and experience with validation
                     self._save_education(session, new_resume.id, education_data)
                     self._save_experience(session, new_resume.id, experience_data)
+                    self._save_skills(session, new_resume)
                     
                     # Commit the education and experience changes
                     session.commit()
@@ -114,6 +124,105 @@ class AIDatabaseManager:
                 session.rollback()
                 raise
     
+    def save_resumes(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Union[AIResume, Exception]]:
+        """
+        Save several AI-extracted resumes in one session and a single commit.
+
+        Each resume is written inside its own SAVEPOINT, so a resume that fails
+        validation is rolled back without affecting the rest of the batch.
+
+        Args:
+            items: (resume_data, file_info) pairs, as passed to save_resume
+
+        Returns:
+            One entry per item, in order: the saved AIResume or the exception raised for it
+        """
+        results: List[Union[AIResume, Exception]] = []
+        if not items:
+            return results
+        
+        with Session(self.engine) as session:
+            versioned_candidates = []
+            for resume_data, file_info in items:
+                try:
+                    with session.begin_nested():
+                        self._validate_resume_data(resume_data)
+                        candidate_id = resume_data["candidate_identity"]["candidate_id"]
+                        identical_resume = self._find_identical_resume(session, file_info)
+                        if identical_resume:
+                            print(f"[DB_DEBUG] Content unchanged for resume {identical_resume.id}; not creating a new version")
+                            results.append(identical_resume)
+                            continue
+                        primary_email = resume_data.get("contact_information", {}).get("primary_email")
+                        
+                        existing_resume = session.exec(
+                            select(AIResume.id).where(AIResume.candidate_id == candidate_id)
+                        ).first()
+                        if not existing_resume and primary_email:
+                            existing_resume = session.exec(
+                                select(AIResume.id).where(AIResume.primary_email == primary_email)
+                            ).first()
+                        
+                        new_resume = self._create_resume_from_data(resume_data, file_info)
+                        session.add(new_resume)
+                        session.flush()
+                        
+                        education_data = resume_data.get("education", [])
+                        experience_data = resume_data.get("work_experience", [])
+                        self._save_education(session, new_resume.id, education_data, commit=False)
+                        self._save_experience(session, new_resume.id, experience_data, commit=False)
+                        self._save_skills(session, new_resume)
+                        session.flush()
+                        self._validate_saved_data(session, new_resume.id, education_data, experience_data)
+                    
+                    if existing_resume and candidate_id not in versioned_candidates:
+                        versioned_candidates.append(candidate_id)
+                    results.append(new_resume)
+                except Exception as e:
+                    print(f"[DB_ERROR] Failed to save resume {file_info.get('original_filename')}: {e}")
+                    results.append(e)
+            
+            session.commit()
+            saved_ids = {r.id for r in results if isinstance(r, AIResume)}
+            print(f"[DB_DEBUG] Batch saved {len(saved_ids)}/{len(items)} resumes in one transaction")
+            
+            # Manage versions once per candidate that already had resumes
+            for candidate_id in versioned_candidates:
+                try:
+                    version_result = self._manage_resume_versions(session, candidate_id, None, keep_count=2)
+                    print(f"[DB_DEBUG] Version management result: {version_result}")
+                except Exception as e:
+                    print(f"[DB_DEBUG] Error managing versions: {e}")
+            
+            # Load the saved rows before the session closes; versioning may have removed some
+            for i, resume in enumerate(results):
+                if isinstance(resume, AIResume):
+                    try:
+                        session.refresh(resume)
+                    except Exception:
+                        results[i] = ValueError("Resume was superseded by a newer version in the same batch")
+        return results
+    
+    def _find_identical_resume(self, session: Session, file_info: Dict[str, Any]) -> Optional[AIResume]:
+        """Latest stored resume whose raw-bytes or normalised-text hash matches file_info"""
+        
+        conditions = []
+        if file_info.get("content_hash"):
+            conditions.append(AIResume.content_hash == file_info["content_hash"])
+        if file_info.get("text_content_hash"):
+            conditions.append(AIResume.text_content_hash == file_info["text_content_hash"])
+        if not conditions:
+            return None
+        return session.exec(
+            select(AIResume).where(or_(*conditions)).order_by(AIResume.is_latest_version.desc(), AIResume.created_at.desc())
+        ).first()
+    
+    def find_resume_by_content(self, content_hash: Optional[str] = None, text_content_hash: Optional[str] = None) -> Optional[AIResume]:
+        """Find a stored resume with identical content (raw-bytes hash or normalised-text hash)"""
+        
+        with Session(self.engine) as session:
+            return self._find_identical_resume(session, {"content_hash": content_hash, "text_content_hash": text_content_hash})
+    
     def _create_resume_from_data(self, resume_data: Dict[str, Any], file_info: Dict[str, Any]) -> AIResume:
         """Create AIResume object from extracted data"""
         
@@ -178,6 +287,7 @@ class AIDatabaseManager:
             original_filename=file_info.get("original_filename"),
             resume_file_path=file_info.get("resume_file_path"),
             content_hash=file_info.get("content_hash"),
+            text_content_hash=file_info.get("text_content_hash"),
             version_number=1,
             is_latest_version=True,
             
@@ -248,7 +358,7 @@ class AIDatabaseManager:
         
         resume.updated_at = datetime.utcnow()
     
-    def _save_education(self, session: Session, resume_id: int, education_data: List[Dict[str, Any]]):
+    def _save_education(self, session: Session, resume_id: int, education_data: List[Dict[str, Any]], commit: bool = True):
         """Save education records with validation"""
         
         try:
@@ -276,16 +386,20 @@ class AIDatabaseManager:
                     print(f"[DB_ERROR] Failed to add education record {i+1}: {e}")
                     raise
             
-            # Commit education changes
-            session.commit()
+            # Commit education changes (batch saves flush and commit once at the end)
+            if commit:
+                session.commit()
+            else:
+                session.flush()
             print(f"[DB_DEBUG] Successfully saved {len(education_data)} education records")
             
         except Exception as e:
             print(f"[DB_ERROR] Failed to save education data: {e}")
-            session.rollback()
+            if commit:
+                session.rollback()
             raise
     
-    def _save_experience(self, session: Session, resume_id: int, experience_data: List[Dict[str, Any]]):
+    def _save_experience(self, session: Session, resume_id: int, experience_data: List[Dict[str, Any]], commit: bool = True):
         """Save work experience records with validation"""
         
         try:
@@ -315,15 +429,65 @@ class AIDatabaseManager:
                     print(f"[DB_ERROR] Failed to add experience record {i+1}: {e}")
                     raise
             
-            # Commit experience changes
-            session.commit()
+            # Commit experience changes (batch saves flush and commit once at the end)
+            if commit:
+                session.commit()
+            else:
+                session.flush()
             print(f"[DB_DEBUG] Successfully saved {len(experience_data)} experience records")
             
         except Exception as e:
             print(f"[DB_ERROR] Failed to save experience data: {e}")
-            session.rollback()
+            if commit:
+                session.rollback()
             raise
     
+    def _save_skills(self, session: Session, resume: AIResume):
+        """Replace the normalised skill/certification rows for a resume"""
+        
+        session.exec(delete(AIResumeSkill).where(AIResumeSkill.resume_id == resume.id))
+        rows = normalize_skill_fields([
+            ("technical", resume.technical_skills),
+            ("hands_on", resume.hands_on_skills),
+            ("certification", resume.certifications),
+            ("license", resume.licenses),
+        ])
+        for kind, name, canonical in rows:
+            session.add(AIResumeSkill(resume_id=resume.id, kind=kind, name=name, canonical=canonical))
+        resume.skills_normalized_version = SKILL_NORMALIZER_VERSION
+        session.add(resume)
+        print(f"[DB_DEBUG] Saved {len(rows)} normalised skill rows for resume {resume.id}")
+    
+    def backfill_resume_skills(self, batch_size: int = 500) -> int:
+        """
+        Populate airesumeskill for resumes not yet normalised by the current
+        skill_normalizer version, one page of batch_size resumes at a time.
+        Resumes without any skills are marked too, so they are not revisited.
+        """
+        
+        processed = 0
+        last_id = 0
+        with Session(self.engine) as session:
+            while True:
+                resumes = session.exec(
+                    select(AIResume).where(
+                        AIResume.id > last_id,
+                        or_(AIResume.skills_normalized_version.is_(None),
+                            AIResume.skills_normalized_version < SKILL_NORMALIZER_VERSION)
+                    ).order_by(AIResume.id).limit(batch_size)
+                ).all()
+                if not resumes:
+                    break
+                last_id = resumes[-1].id
+                for resume in resumes:
+                    self._save_skills(session, resume)
+                processed += len(resumes)
+                session.commit()
+                session.expunge_all()
+        if processed:
+            print(f"[DB_DEBUG] Backfilled normalised skills for {processed} resumes")
+        return processed
+    
     def _validate_resume_data(self, resume_data: Dict[str, Any]):
         """Validate that resume data contains required fields"""
         
@@ -419,6 +583,8 @@ class AIDatabaseManager:
             for exp in existing_experience:
                 session.delete(exp)
             
+            session.exec(delete(AIResumeSkill).where(AIResumeSkill.resume_id == resume_id))
+            
             # Delete resume
             session.delete(resume)
             session.commit()
@@ -483,6 +649,7 @@ class AIDatabaseManager:
                         # Delete related records first
                         session.exec(delete(AIEducation).where(AIEducation.resume_id == resume.id))
                         session.exec(delete(AIExperience).where(AIExperience.resume_id == resume.id))
+                        session.exec(delete(AIResumeSkill).where(AIResumeSkill.resume_id == resume.id))
                         session.delete(resume)
                         removed_count += 1
             
@@ -579,12 +746,10 @@ class AIDatabaseManager:
                 if resume_path.endswith('.pdf'):
                     with open(resume_path, 'rb') as f:
                         reader = pypdf.PdfReader(f)
-                        for page in reader.pages:
-                            content += page.extract_text() + '\n'
+                        content = '\n'.join((page.extract_text() or '') for page in reader.pages)
                 elif resume_path.endswith(('.docx', '.doc')):
                     doc = Document(resume_path)
-                    for paragraph in doc.paragraphs:
-                        content += paragraph.text + '\n'
+                    content = '\n'.join(paragraph.text for paragraph in doc.paragraphs)
                 else:
                     with open(resume_path, 'r', encoding='utf-8') as f:
                         content = f.read()
@@ -668,15 +833,12 @@ class AIDatabaseManager:
         """Search resumes by text query"""
         
         with Session(self.engine) as session:
-            # Simple text search across key fields
-            statement = select(AIResume).where(
-                AIResume.first_name.ilike(f"%{query}%") |
-                AIResume.last_name.ilike(f"%{query}%") |
-                AIResume.primary_email.ilike(f"%{query}%") |
-                AIResume.technical_skills.ilike(f"%{query}%") |
-                AIResume.hands_on_skills.ilike(f"%{query}%") |
-                AIResume.previous_positions.ilike(f"%{query}%")
-            ).offset(skip).limit(limit)
+            # Ranked full-text search across key fields (ilike fallback without search_vector)
+            condition, rank = text_search_clause(AIResume, query, self.engine)
+            statement = select(AIResume).where(condition)
+            if rank is not None:
+                statement = statement.order_by(rank.desc())
+            statement = statement.order_by(AIResume.created_at.desc(), AIResume.id.desc()).offset(skip).limit(limit)
             
             return session.exec(statement).all()
     
@@ -735,6 +897,7 @@ class AIDatabaseManager:
                     # Delete related education and experience records
                     session.exec(delete(AIEducation).where(AIEducation.resume_id == resume.id))
                     session.exec(delete(AIExperience).where(AIExperience.resume_id == resume.id))
+                    session.exec(delete(AIResumeSkill).where(AIResumeSkill.resume_id == resume.id))
                     
                     # Delete the resume record
                     session.delete(resume)
@@ -5,67 +5,46 @@ Extracts resume data using AI with second validation pass
 """
 
 import os
+import re
 import json
 import hashlib
+import functools
 import tempfile
-from typing import Dict, Any, Optional, List
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, get_args
 from datetime import datetime
 import openai
 from pathlib import Path
+from app.resume_sections import segment_resume, split_experience, build_compact_resume
+from app.ai_resume_schema import AIResumeCreate
+from modules.prompt_cache import prefix_messages, record_usage, cached_input_rate
+from modules.json_repair import loads_lenient, JSONRepairError
+from modules.ai_streaming import stream_chat_completion, JSONStreamValidator, StreamAborted, StreamResult
+from modules.structured_output import create_structured, schema_from_template, template_from_prompt
+from modules.tracing import span, bind_context
 
-class AIResumeExtractor:
-    """AI-only resume extractor with validation"""
-    
-    def __init__(self):
-        # Use Grok for extraction
-        self.grok_client = openai.OpenAI(
-            api_key=os.getenv("GROK_API_KEY"),
-            base_url=os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")
-        )
-        # Use OpenAI for validation
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # Two-step process: Grok extraction, OpenAI validation
-        self.extraction_model = "grok-4-fast-reasoning"  # Grok for extraction
-        self.validation_model = "gpt-5-mini"  # OpenAI for validation
-    
-    def extract_resume_data(self, resume_content: str, filename: str, fast_mode: bool = True) -> Dict[str, Any]:
-        """Extract resume data using AI with optional validation"""
-        
-        # Dynamic context length based on resume size
-        content_length = len(resume_content)
-        max_tokens, truncated_content = self._calculate_dynamic_context(resume_content, content_length)
-        
-        # First pass: AI extraction
-        extraction_result = self._ai_extract(truncated_content, filename, max_tokens)
-        
-        # Always use OpenAI for validation, regardless of fast_mode
-        validation_result = self._ai_validate(extraction_result, truncated_content, max_tokens)
-        
-        # Combine results
-        final_result = self._combine_results(extraction_result, validation_result)
-        
-        # Ensure candidate_id is generated if missing
-        if not final_result.get("candidate_identity", {}).get("candidate_id"):
-            email = final_result.get("contact_information", {}).get("primary_email", "")
-            if email:
-                import time
-                email_hash = hashlib.md5(email.encode()).hexdigest()[:8]
-                timestamp = str(int(time.time()))
-                final_result.setdefault("candidate_identity", {})["candidate_id"] = f"email_{email_hash}_{timestamp}"
-            else:
-                # Fallback if no email
-                import time
-                final_result.setdefault("candidate_identity", {})["candidate_id"] = f"unknown_{int(time.time())}"
-        
-        return final_result
-    
-    def _ai_extract(self, resume_content: str, filename: str, max_tokens: int = 4000) -> Dict[str, Any]:
-        """First AI pass: Extract resume data"""
-        import time
-        start_time = time.time()
-        
-        prompt = f"""Extract the following information from this resume in JSON format. Be thorough and accurate. If information is not available, use "Not specified".
+EMAIL_RX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RX = re.compile(r"(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+YEAR_RX = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+# Date ranges such as "2015 - 2019", "Jan 2018 – Present", "03/2012 to 06/2016"
+DATE_RANGE_RX = re.compile(
+    r"(?:19[5-9]\d|20\d{2})\s*(?:-|–|—|to)\s*(?:[A-Za-z]{3,9}\.?\s*|\d{1,2}/)?(?:19[5-9]\d|20\d{2}|present|current|now|date)",
+    re.IGNORECASE,
+)
+EXPERIENCE_HEADING_RX = re.compile(r"^\s*(professional\s+|work\s+|relevant\s+)?(experience|employment(\s+history)?|work\s+history|career\s+history)\s*:?\s*$",
+                                   re.IGNORECASE | re.MULTILINE)
+EDUCATION_LINE_RX = re.compile(r"\b(university|college|institute|school|degree|bachelor|master|b\.?s\.?|m\.?s\.?|mba|ph\.?d)\b", re.IGNORECASE)
+MISSING_VALUES = {"", "not specified", "n/a", "none", "unknown", "null"}
+
+PARSER_SYSTEM_MESSAGE = "You are an expert resume parser. Extract information accurately and completely. Always return valid JSON format."
+
+# Static extraction prompt (system message). Identical for every resume so the
+# provider can serve it from its prompt cache; the resume follows in the user message.
+RESUME_EXTRACTION_PREFIX = PARSER_SYSTEM_MESSAGE + """
+
+Extract the following information from this resume in JSON format. Be thorough and accurate. If information is not available, use "Not specified".
 
 IMPORTANT: 
 1. For citizenship and work authorization, analyze the employment history to determine:
@@ -80,58 +59,56 @@ IMPORTANT:
 
 4. For previous_positions, extract the last 4 job titles/positions from the work experience section and list them as a comma-separated string (most recent first). Only include actual job titles, do not include "Not specified" in the list. If fewer than 4 positions exist, only list the available ones.
 
-Resume filename: {filename}
-
 Return ONLY valid JSON in this exact format:
-{{
-    "candidate_identity": {{
+{
+    "candidate_identity": {
         "first_name": "string",
         "last_name": "string",
         "candidate_id": "string (generate unique ID based on email - use format: email_hash_timestamp)"
-    }},
-    "contact_information": {{
+    },
+    "contact_information": {
         "primary_email": "string",
         "secondary_email": "string",
         "phone": "string",
         "alternative_phone": "string",
         "address": "string (full address)"
-    }},
-    "work_authorization": {{
+    },
+    "work_authorization": {
         "citizenship": "string (Determine from employment history: US Citizen if worked in USA, Canadian Citizen if worked in Canada, Mexican Citizen if worked in Mexico, or 'Not specified' if unclear)",
         "work_authorization": "string (Determine from employment history: 'US Citizen' if worked in USA, 'TN Visa' if worked in Canada/Mexico, or 'Not specified' if unclear)"
-    }},
-    "industry_recommendations": {{
+    },
+    "industry_recommendations": {
         "recommended_industries": "string (comma-separated list)"
-    }},
-    "skills_certifications": {{
+    },
+    "skills_certifications": {
         "technical_skills": "string (comma-separated list)",
         "hands_on_skills": "string (comma-separated list)",
         "certifications": "string (comma-separated list)",
         "licenses": "string (comma-separated list)"
-    }},
-    "compensation": {{
+    },
+    "compensation": {
         "current_salary": "string",
         "expected_salary": "string"
-    }},
-    "work_preferences": {{
+    },
+    "work_preferences": {
         "relocation": "string (Yes/No/Not specified)",
         "remote_work": "string (Yes/No/Not specified)",
         "homeowner_renter": "string (Homeowner/Renter/Not specified)",
         "preferred_locations": "string (comma-separated list)",
         "restricted_locations": "string (comma-separated list)"
-    }},
-    "job_search": {{
+    },
+    "job_search": {
         "previous_positions": "string (comma-separated list of last 4 actual job titles from work experience, no 'Not specified')",
         "reason_for_leaving": "string",
         "reason_for_looking": "string"
-    }},
-    "recruiter_notes": {{
+    },
+    "recruiter_notes": {
         "special_notes": "string",
         "screening_comments": "string",
         "candidate_concerns": "string"
-    }},
+    },
     "education": [
-        {{
+        {
             "degree": "string",
             "field": "string",
             "institution": "string",
@@ -139,10 +116,10 @@ Return ONLY valid JSON in this exact format:
             "end_date": "string",
             "gpa": "string",
             "honors": "string"
-        }}
+        }
     ],
     "work_experience": [
-        {{
+        {
             "position": "string",
             "company": "string",
             "industry": "string",
@@ -152,39 +129,193 @@ Return ONLY valid JSON in this exact format:
             "functions": "string (bullet points separated by •)",
             "soft_skills": "string (comma-separated list)",
             "achievements": "string"
-        }}
+        }
     ]
-}}
+}
+"""
+
+EXPERIENCE_EXTRACTION_PREFIX = PARSER_SYSTEM_MESSAGE + """
+
+Extract ALL job positions from this part of a resume's work history. For location, use "City, State" for US locations or "City, Country" for international locations; leave blank if not specified.
+
+Return ONLY valid JSON in this exact format:
+{
+    "work_experience": [
+        {
+            "position": "string",
+            "company": "string",
+            "industry": "string",
+            "location": "string",
+            "start_date": "string",
+            "end_date": "string",
+            "functions": "string (bullet points separated by •)",
+            "soft_skills": "string (comma-separated list)",
+            "achievements": "string"
+        }
+    ]
+}
+"""
+
+def _json_type(annotation: Any) -> str:
+    args = [a for a in get_args(annotation) if a is not type(None)]
+    return {str: "string", int: "integer", float: "number", bool: "boolean"}.get(args[0] if args else annotation, "string")
+
+# Response schemas derived from the prompt templates; leaf types follow the AIResumeCreate
+# columns each extracted field is stored in
+RESUME_FIELD_TYPES = {name: _json_type(annotation) for name, annotation in AIResumeCreate.__annotations__.items()}
+RESUME_EXTRACTION_TEMPLATE = template_from_prompt(RESUME_EXTRACTION_PREFIX)
+RESUME_EXTRACTION_SCHEMA = schema_from_template(RESUME_EXTRACTION_TEMPLATE, RESUME_FIELD_TYPES)
+EXPERIENCE_EXTRACTION_SCHEMA = schema_from_template(template_from_prompt(EXPERIENCE_EXTRACTION_PREFIX), RESUME_FIELD_TYPES)
+RESUME_VALIDATION_SCHEMA = schema_from_template(
+    {"validated_data": RESUME_EXTRACTION_TEMPLATE, "confidence": 0.0, "corrections": [""], "improvements": [""]},
+    RESUME_FIELD_TYPES,
+)
+
+class AIResumeExtractor:
+    """AI-only resume extractor with validation"""
+    
+    def __init__(self):
+        # Use Grok for extraction
+        self.grok_client = openai.OpenAI(
+            api_key=os.getenv("GROK_API_KEY"),
+            base_url=os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")
+        )
+        # Use OpenAI for validation
+        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        
+        # Two-step process: Grok extraction, OpenAI validation
+        self.extraction_model = "grok-4-fast-reasoning"  # Grok for extraction
+        self.validation_model = "gpt-5-mini"  # OpenAI for validation
+        
+        # Validation only runs when the deterministic checks score below this
+        self.validation_threshold = float(os.getenv("RESUME_VALIDATION_THRESHOLD", "0.85"))
+        
+        # Work histories longer than this are extracted in parallel chunks
+        self.experience_chunk_chars = int(os.getenv("RESUME_EXPERIENCE_CHUNK_CHARS", "6000"))
+        self.max_parallel_chunks = int(os.getenv("RESUME_EXTRACTION_PARALLELISM", "4"))
+        self._stats_lock = threading.Lock()
+        self.validation_stats = {"extractions": 0, "validated": 0, "skipped": 0, "validation_reasons": Counter()}
+        # Extraction token usage, including input tokens served from the provider's prompt cache
+        self.token_stats = {"ai_calls": 0, "total_uploaded": 0, "total_output": 0,
+                            "cached_input_tokens": 0, "uncached_input_tokens": 0}
+    
+    def _stream_json(self, client: Any, provider: str, name: str, schema: Dict[str, Any], **kwargs) -> StreamResult:
+        """Streamed, schema-constrained completion; a response aborted mid-stream is retried once right away"""
+        for attempt in range(2):
+            try:
+                with span("ai_request", provider=provider, model=kwargs.get("model"), request=name,
+                          attempt=attempt + 1) as ai_span:
+                    response = stream_chat_completion(
+                        functools.partial(create_structured, client.chat.completions.create, provider, name, schema),
+                        provider,
+                        JSONStreamValidator(schema["properties"]),
+                        **kwargs
+                    )
+                    ai_span.set_attribute("first_token_seconds", response.first_token_seconds or 0.0)
+                    return response
+            except StreamAborted as e:
+                if attempt:
+                    raise
+                print(f"[AI_EXTRACT] {name} response aborted ({e}); retrying")
+    
+    def extract_resume_data(self, resume_content: str, filename: str, fast_mode: bool = True) -> Dict[str, Any]:
+        """Extract resume data using AI with optional validation"""
+        
+        # Split into sections; long work histories are extracted in separate chunks
+        sections = segment_resume(resume_content)
+        experience_chunks = split_experience(sections.get("experience", ""), self.experience_chunk_chars)
+        if len(experience_chunks) > 1:
+            sections = dict(sections, experience=experience_chunks[0])
+            prompt_content = build_compact_resume(sections, len(resume_content))
+        else:
+            prompt_content = resume_content
+        
+        # Dynamic context length based on resume size
+        content_length = len(prompt_content)
+        max_tokens, truncated_content = self._calculate_dynamic_context(prompt_content, content_length, sections)
+        
+        # First pass: AI extraction (main prompt and remaining experience chunks in parallel)
+        if len(experience_chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel_chunks, len(experience_chunks))) as pool:
+                main_future = pool.submit(bind_context(self._ai_extract), truncated_content, filename, max_tokens)
+                chunk_futures = [pool.submit(bind_context(self._ai_extract_experience), chunk, filename, max_tokens)
+                                 for chunk in experience_chunks[1:]]
+                extraction_result = main_future.result()
+                chunk_results = [f.result() for f in chunk_futures]
+            self._merge_experience_chunks(extraction_result, chunk_results)
+        else:
+            extraction_result = self._ai_extract(truncated_content, filename, max_tokens)
+        
+        # Cheap deterministic checks decide whether the OpenAI validation pass is needed;
+        # fast_mode=False always validates
+        quality = self._check_extraction(extraction_result, resume_content)
+        run_validation = not fast_mode or not quality["passed"]
+        if run_validation:
+            validation_result = self._ai_validate(extraction_result, truncated_content, max_tokens)
+        else:
+            validation_result = {
+                "validated_data": extraction_result.get("data", {}),
+                "confidence": quality["score"],
+                "model": "deterministic-checks",
+                "notes": "AI validation skipped: deterministic checks passed",
+                "token_count": 0,
+                "processing_time": 0
+            }
+        self._record_validation(run_validation, quality, fast_mode)
+        
+        # Combine results
+        final_result = self._combine_results(extraction_result, validation_result)
+        final_result["quality_checks"] = quality
+        final_result["validation_skipped"] = not run_validation
+        
+        # Ensure candidate_id is generated if missing
+        if not final_result.get("candidate_identity", {}).get("candidate_id"):
+            email = final_result.get("contact_information", {}).get("primary_email", "")
+            if email:
+                import time
+                email_hash = hashlib.md5(email.encode()).hexdigest()[:8]
+                timestamp = str(int(time.time()))
+                final_result.setdefault("candidate_identity", {})["candidate_id"] = f"email_{email_hash}_{timestamp}"
+            else:
+                # Fallback if no email
+                import time
+                final_result.setdefault("candidate_identity", {})["candidate_id"] = f"unknown_{int(time.time())}"
+        
+        return final_result
+    
+    def _ai_extract(self, resume_content: str, filename: str, max_tokens: int = 4000) -> Dict[str, Any]:
+        """First AI pass: Extract resume data"""
+        import time
+        start_time = time.time()
+        
+        # Instructions and schema are a fixed prefix; only the resume varies between calls
+        prompt = f"""Resume filename: {filename}
 
 Resume content:
 {resume_content}"""
         
         try:
-            response = self.grok_client.chat.completions.create(
+            response = self._stream_json(
+                self.grok_client, "grok", "resume_extraction", RESUME_EXTRACTION_SCHEMA,
                 model=self.extraction_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert resume parser. Extract information accurately and completely. Always return valid JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=prefix_messages(RESUME_EXTRACTION_PREFIX, prompt),
                 temperature=0.1,
                 max_tokens=max_tokens  # Dynamic token limit
             )
             
-            content = response.choices[0].message.content.strip()
+            content = response.content.strip()
             print(f"[AI_EXTRACT] Raw response: {content[:200]}...")
             
             # Get token usage
-            token_usage = response.usage.total_tokens if response.usage else 0
-            print(f"[AI_EXTRACT] Token usage: {token_usage}")
+            token_usage = getattr(response.usage, "total_tokens", 0) if response.usage else 0
+            usage = record_usage(self.token_stats, response.usage, self._stats_lock)
+            print(f"[AI_EXTRACT] Token usage: {token_usage} ({usage['cached_input_tokens']} input tokens from prompt cache)")
             
-            # Try to extract JSON from response if it's wrapped in markdown
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            extraction_data = json.loads(content)
+            # Fenced, malformed or truncated JSON is repaired locally
+            with span("json_parse", request="resume_extraction", characters=len(content)):
+                extraction_data = loads_lenient(content)
+            if not isinstance(extraction_data, dict):
+                raise JSONRepairError(f"Expected a JSON object, got {type(extraction_data).__name__}")
             
             processing_time = time.time() - start_time
             return {
@@ -196,7 +327,7 @@ Resume content:
                 "processing_time": processing_time
             }
             
-        except json.JSONDecodeError as e:
+        except JSONRepairError as e:
             print(f"[AI_EXTRACT] JSON decode error: {e}")
             print(f"[AI_EXTRACT] Content: {content}")
             return {
@@ -214,6 +345,174 @@ Resume content:
                 "notes": f"AI extraction failed: {str(e)}"
             }
     
+    def _ai_extract_experience(self, experience_text: str, filename: str, max_tokens: int = 4000) -> Dict[str, Any]:
+        """Extract work_experience entries from one chunk of a long work history"""
+        
+        prompt = f"""Resume filename: {filename}
+
+Work history:
+{experience_text}"""
+        
+        try:
+            response = self._stream_json(
+                self.grok_client, "grok", "experience_extraction", EXPERIENCE_EXTRACTION_SCHEMA,
+                model=self.extraction_model,
+                messages=prefix_messages(EXPERIENCE_EXTRACTION_PREFIX, prompt),
+                temperature=0.1,
+                max_tokens=max_tokens
+            )
+            record_usage(self.token_stats, response.usage, self._stats_lock)
+            with span("json_parse", request="experience_extraction", characters=len(response.content)):
+                data = loads_lenient(response.content)
+            return {
+                "work_experience": data.get("work_experience", []) if isinstance(data, dict) else [],
+                "token_count": getattr(response.usage, "total_tokens", 0) if response.usage else 0
+            }
+        except Exception as e:
+            print(f"[AI_EXTRACT] Experience chunk extraction failed: {e}")
+            return {"work_experience": [], "token_count": 0, "error": str(e)}
+    
+    def _merge_experience_chunks(self, extraction_result: Dict[str, Any], chunk_results: List[Dict[str, Any]]):
+        """Append positions from experience chunks to the main extraction, skipping duplicates"""
+        
+        data = extraction_result.get("data")
+        if not data:
+            return
+        
+        def key(entry: Dict[str, Any]) -> tuple:
+            return tuple(str(entry.get(k) or "").strip().lower() for k in ("company", "position", "start_date"))
+        
+        merged = [e for e in (data.get("work_experience") or []) if isinstance(e, dict)]
+        seen = {key(e) for e in merged}
+        added = 0
+        for chunk in chunk_results:
+            for entry in chunk.get("work_experience") or []:
+                if isinstance(entry, dict) and key(entry) not in seen:
+                    seen.add(key(entry))
+                    merged.append(entry)
+                    added += 1
+        data["work_experience"] = merged
+        extraction_result["token_count"] = extraction_result.get("token_count", 0) + sum(c.get("token_count", 0) for c in chunk_results)
+        failed = len([c for c in chunk_results if c.get("error")])
+        extraction_result["notes"] = (f"{extraction_result.get('notes', '')}; merged {added} positions from "
+                                      f"{len(chunk_results)} experience chunks" + (f" ({failed} failed)" if failed else ""))
+        print(f"[AI_EXTRACT] Merged {added} positions from {len(chunk_results)} experience chunks")
+    
+    def _check_extraction(self, extraction_result: Dict[str, Any], resume_content: str) -> Dict[str, Any]:
+        """
+        Deterministic quality checks on an extraction.
+        
+        Checks schema completeness, that the extracted email/phone appear in the
+        resume text, date sanity in work history, and the number of extracted
+        positions against the date ranges found in the resume.
+        
+        Returns:
+            Dict with score (0.0-1.0), passed, and failed/checked check names
+        """
+        data = extraction_result.get("data") or {}
+        if not data:
+            return {"score": 0.0, "passed": False, "failed": ["no_data"], "checks": 1}
+        
+        def present(value: Any) -> bool:
+            return isinstance(value, str) and value.strip().lower() not in MISSING_VALUES
+        
+        identity = data.get("candidate_identity") or {}
+        contact = data.get("contact_information") or {}
+        experience = [e for e in (data.get("work_experience") or []) if isinstance(e, dict)]
+        text_lower = resume_content.lower()
+        failed = []
+        checks = 0
+        
+        # Schema completeness
+        for section in ("candidate_identity", "contact_information", "skills_certifications", "work_experience", "education"):
+            checks += 1
+            if section not in data:
+                failed.append(f"missing_section:{section}")
+        for field, value in (("first_name", identity.get("first_name")), ("last_name", identity.get("last_name")),
+                             ("primary_email", contact.get("primary_email"))):
+            checks += 1
+            if not present(value):
+                failed.append(f"missing_field:{field}")
+        
+        # Email / phone agreement with the resume text
+        emails_in_text = {e.lower() for e in EMAIL_RX.findall(resume_content)}
+        email = (contact.get("primary_email") or "").strip().lower()
+        if emails_in_text or present(email):
+            checks += 1
+            if not present(email) or email not in emails_in_text:
+                failed.append("email_mismatch")
+        phones_in_text = {re.sub(r"\D", "", p)[-10:] for p in PHONE_RX.findall(resume_content)}
+        phone_digits = re.sub(r"\D", "", contact.get("phone") or "")[-10:]
+        if phones_in_text and len(phone_digits) == 10:
+            checks += 1
+            if phone_digits not in phones_in_text:
+                failed.append("phone_mismatch")
+        
+        # Date sanity
+        current_year = datetime.utcnow().year
+        for i, exp in enumerate(experience):
+            checks += 1
+            start_years = [int(y) for y in YEAR_RX.findall(str(exp.get("start_date") or ""))]
+            end_text = str(exp.get("end_date") or "")
+            end_years = [int(y) for y in YEAR_RX.findall(end_text)]
+            if any(y > current_year + 1 for y in start_years + end_years) or \
+                    (start_years and end_years and start_years[0] > end_years[-1]):
+                failed.append(f"bad_dates:work_experience[{i}]")
+        
+        # Positions extracted vs. date ranges / experience heading in the text
+        checks += 1
+        date_ranges = [line for line in resume_content.splitlines()
+                       if DATE_RANGE_RX.search(line) and not EDUCATION_LINE_RX.search(line)]
+        if not experience and (date_ranges or EXPERIENCE_HEADING_RX.search(resume_content)):
+            failed.append("experience_missing")
+        elif len(date_ranges) > len(experience) + 1:
+            failed.append(f"experience_count:{len(experience)}<{len(date_ranges)}")
+        
+        # Company names should come from the resume
+        companies = [str(e.get("company")) for e in experience if present(e.get("company"))]
+        if companies:
+            checks += 1
+            unmatched = [c for c in companies if c.lower()[:20] not in text_lower]
+            if len(unmatched) > len(companies) // 2:
+                failed.append("companies_not_in_text")
+        
+        score = round(1.0 - len(failed) / max(checks, 1), 3)
+        hard_failures = [f for f in failed if f.startswith(("missing_field", "email_mismatch", "experience_missing", "no_data"))]
+        return {
+            "score": score,
+            "passed": not hard_failures and score >= self.validation_threshold,
+            "failed": failed,
+            "checks": checks
+        }
+    
+    def _record_validation(self, validated: bool, quality: Dict[str, Any], fast_mode: bool):
+        with self._stats_lock:
+            self.validation_stats["extractions"] += 1
+            if validated:
+                self.validation_stats["validated"] += 1
+                if not fast_mode:
+                    self.validation_stats["validation_reasons"]["full_validation_requested"] += 1
+                for failure in quality["failed"]:
+                    self.validation_stats["validation_reasons"][failure.split(":")[0]] += 1
+            else:
+                self.validation_stats["skipped"] += 1
+        print(f"[AI_VALIDATE] Quality score {quality['score']} ({'validating' if validated else 'skipping validation'})"
+              f"{': ' + ', '.join(quality['failed']) if quality['failed'] else ''}")
+    
+    def get_validation_stats(self) -> Dict[str, Any]:
+        """How often the validation model was called or skipped"""
+        with self._stats_lock:
+            total = self.validation_stats["extractions"]
+            return {
+                "extractions": total,
+                "validated": self.validation_stats["validated"],
+                "skipped": self.validation_stats["skipped"],
+                "skip_rate": round(self.validation_stats["skipped"] / total * 100, 1) if total else 0.0,
+                "validation_threshold": self.validation_threshold,
+                "validation_reasons": dict(self.validation_stats["validation_reasons"]),
+                "token_stats": dict(self.token_stats, cached_input_rate=cached_input_rate(self.token_stats))
+            }
+    
     def _ai_validate(self, extraction_result: Dict[str, Any], resume_content: str, max_tokens: int = 4000) -> Dict[str, Any]:
         """Second AI pass: Validate extracted data"""
         import time
@@ -254,7 +553,8 @@ Resume content:
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = self._stream_json(
+                self.openai_client, "openai", "resume_validation", RESUME_VALIDATION_SCHEMA,
                 model=self.validation_model,
                 messages=[
                     {"role": "system", "content": "You are an expert resume validator. Review and improve extracted data."},
@@ -264,11 +564,14 @@ Resume content:
                 max_tokens=max_tokens  # Dynamic token limit
             )
             
-            content = response.choices[0].message.content
-            validation_data = json.loads(content)
+            content = response.content
+            with span("json_parse", request="resume_validation", characters=len(content)):
+                validation_data = loads_lenient(content)
+            if not isinstance(validation_data, dict):
+                raise JSONRepairError(f"Expected a JSON object, got {type(validation_data).__name__}")
             
             # Get token usage
-            token_usage = response.usage.total_tokens if response.usage else 0
+            token_usage = getattr(response.usage, "total_tokens", 0) if response.usage else 0
             
             processing_time = time.time() - start_time
             return {
@@ -369,15 +672,17 @@ Resume content:
         
         return changes
     
-    def _calculate_dynamic_context(self, resume_content: str, content_length: int) -> tuple[int, str]:
+    def _calculate_dynamic_context(self, resume_content: str, content_length: int,
+                                   sections: Optional[Dict[str, str]] = None) -> tuple[int, str]:
         """Calculate dynamic context length based on resume content analysis"""
         
         # Analyze content complexity
         education_keywords = ['education', 'degree', 'bachelor', 'master', 'phd', 'university', 'college', 'certification']
         experience_keywords = ['experience', 'employment', 'work', 'position', 'company', 'manager', 'director']
         
-        education_count = sum(1 for keyword in education_keywords if keyword.lower() in resume_content.lower())
-        experience_count = sum(1 for keyword in experience_keywords if keyword.lower() in resume_content.lower())
+        content_lower = resume_content.lower()
+        education_count = sum(1 for keyword in education_keywords if keyword in content_lower)
+        experience_count = sum(1 for keyword in experience_keywords if keyword in content_lower)
         
         # Base calculations
         base_tokens = 2000
@@ -411,8 +716,12 @@ Resume content:
         max_tokens = max(max_tokens, 2000)
         max_chars = max(max_chars, 3000)
         
-        # Truncate content
-        truncated_content = resume_content[:max_chars] if len(resume_content) > max_chars else resume_content
+        # Over budget: keep the relevant sections (contact, skills, education, experience)
+        # instead of cutting off the end of the resume
+        if len(resume_content) > max_chars:
+            truncated_content = build_compact_resume(sections or segment_resume(resume_content), max_chars)
+        else:
+            truncated_content = resume_content
         
         print(f"[DYNAMIC_CONTEXT] Content: {content_length} chars, Education: {education_count}, Experience: {experience_count}")
         print(f"[DYNAMIC_CONTEXT] Using {max_tokens} tokens, {max_chars} chars")
@@ -5,6 +5,7 @@ Defines the database schema for AI-extracted resume data with second validation
 """
 
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, ForeignKey, Integer
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import json
@@ -63,9 +64,11 @@ class AIResume(SQLModel, table=True):
     # File Information
     original_filename: Optional[str] = Field(default=None, max_length=255)
     resume_file_path: Optional[str] = Field(default=None, max_length=500)
-    content_hash: Optional[str] = Field(default=None, max_length=64)
+    content_hash: Optional[str] = Field(default=None, max_length=64, index=True)
+    text_content_hash: Optional[str] = Field(default=None, max_length=64, index=True)  # Whitespace/case-normalised text
     version_number: int = Field(default=1)
     is_latest_version: bool = Field(default=True)
+    skills_normalized_version: Optional[int] = Field(default=None, index=True)  # skill_normalizer version of airesumeskill rows
     
     # System Metadata
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -113,6 +116,16 @@ class AIExperience(SQLModel, table=True):
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class AIResumeSkill(SQLModel, table=True):
+    """Normalised skills, certifications and licenses (one row per canonical entry)"""
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    resume_id: int = Field(sa_column=Column(Integer, ForeignKey("airesume.id", ondelete="CASCADE"), nullable=False, index=True))
+    
+    kind: str = Field(max_length=20)  # technical, hands_on, certification, license
+    name: str = Field(max_length=200)  # as extracted
+    canonical: str = Field(max_length=200, index=True)  # see skill_normalizer.canonicalize_skill
+
 class AIResumeCreate(SQLModel):
     """Schema for creating new AI-extracted resumes"""
     
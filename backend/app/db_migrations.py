@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Database Migrations
+Applies the idempotent SQL files in app/migrations/ in filename order.
+SQLModel.metadata.create_all only creates missing tables; these files add the
+columns and indexes that existing databases need.
+"""
+
+from pathlib import Path
+from typing import List
+from sqlalchemy import text
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def run_migrations(engine) -> List[str]:
+    """
+    Apply pending migrations and record them in schema_migrations.
+
+    Args:
+        engine: SQLAlchemy engine for the application database
+
+    Returns:
+        List of migration versions applied in this call
+    """
+    if engine.dialect.name != "postgresql":
+        print(f"[MIGRATIONS] Skipping SQL migrations for dialect '{engine.dialect.name}'")
+        return []
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(255) PRIMARY KEY, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    newly_applied = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        version = path.stem
+        if version in applied:
+            continue
+        sql = path.read_text(encoding="utf-8")
+        try:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(sql)
+                conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+            newly_applied.append(version)
+            print(f"[MIGRATIONS] Applied {version}")
+        except Exception as e:
+            # Later migrations may depend on this one; stop and retry on next startup
+            print(f"[MIGRATIONS] Failed to apply {version}: {e}")
+            break
+    return newly_applied
@@ -1,7 +1,8 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, RedirectResponse, StreamingResponse, PlainTextResponse
 from sqlmodel import SQLModel, create_engine, Session, select, Field, delete, or_, func
+from sqlalchemy import case, literal
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Tuple
 import os
@@ -13,7 +14,6 @@ import time
 import zipfile
 import shutil
 import glob
-import uuid
 import hashlib
 import re
 import asyncio
@@ -31,14 +31,28 @@ sys.path.insert(0, str(current_dir))
 
 # Import AI resume system
 try:
-    from app.ai_resume_schema import AIResume, AIEducation, AIExperience, AIResumeCreate, AIResumeResponse
+    from app.ai_resume_schema import AIResume, AIEducation, AIExperience, AIResumeSkill, AIResumeCreate, AIResumeResponse
+    from app.skill_normalizer import canonicalize_skill
     from app.ai_resume_extractor import AIResumeExtractor
     from app.ai_database_manager import AIDatabaseManager
+    from app.upload_pipeline import ResumeUploadPipeline
     AI_RESUME_SYSTEM_AVAILABLE = True
 except ImportError as e:
     print(f"AI resume system not available: {e}")
     AI_RESUME_SYSTEM_AVAILABLE = False
 
+from app.db_migrations import run_migrations
+from app.resume_search import (text_search_clause, first_number, rank_sort_key, keyset_condition,
+                               cursor_from_row, decode_cursor)
+from modules.tracing import start_span, record_span, render_prometheus, get_tracing_stats
+from modules.logging_setup import get_logger, get_logging_stats
+
+# Request-path logging (levels, rotation and sampling are configured in modules/logging_setup.py)
+upload_log = get_logger("upload")
+ai_extraction_log = get_logger("ai_extraction")
+versioning_log = get_logger("versioning")
+db_log = get_logger("db")
+
 # Import document processing libraries
 try:
     import pypdf
@@ -49,17 +63,36 @@ except ImportError as e:
     print(f"Document processing libraries not available: {e}")
     DOCUMENT_PROCESSING_AVAILABLE = False
 
+# Shared, cached document text extraction (also used by job processing and matching)
+try:
+    from modules.document_text import get_document_text_service
+    DOCUMENT_TEXT_SERVICE_AVAILABLE = True
+except ImportError as e:
+    print(f"Document text service not available: {e}")
+    DOCUMENT_TEXT_SERVICE_AVAILABLE = False
+
+# Incremental Google Drive job file sync (manifest + change tokens)
+try:
+    from modules.drive_sync import DriveSync, PyDrive2Backend
+    DRIVE_SYNC_AVAILABLE = True
+except ImportError as e:
+    print(f"Drive sync not available: {e}")
+    DRIVE_SYNC_AVAILABLE = False
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/ai_job_platform")
-engine = create_engine(DATABASE_URL, echo=True)
+# SQL statement echo is a debugging aid; it logs every query of every request
+engine = create_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "false").lower() == "true")
 
 # Initialize AI resume system
 if AI_RESUME_SYSTEM_AVAILABLE:
     ai_extractor = AIResumeExtractor()
     ai_db_manager = AIDatabaseManager(DATABASE_URL)
+    upload_pipeline = ResumeUploadPipeline(ai_extractor, ai_db_manager)
 else:
     ai_extractor = None
     ai_db_manager = None
+    upload_pipeline = None
 
 # Location heuristics for citizenship/work authorization inference
 US_STATE_ABBREVIATIONS = {
@@ -527,13 +560,21 @@ class Certifications(SQLModel, table=True):
 
 class JobMatch(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    resume_id: int
-    job_id: int
+    resume_id: Optional[int] = None
+    job_id: Optional[int] = None
     rating: float
     hard_no: bool = False
     disqualifiers: Optional[str] = None
     reasons: Optional[str] = None
     created_at: datetime = datetime.utcnow()
+    # Match cache key: (resume content hash, job criteria hash, model, prompt version)
+    cache_key: Optional[str] = Field(default=None, max_length=64, unique=True, index=True)
+    resume_content_hash: Optional[str] = Field(default=None, max_length=64)
+    job_criteria_hash: Optional[str] = Field(default=None, max_length=64)
+    job_ref: Optional[str] = Field(default=None, max_length=64)
+    model: Optional[str] = Field(default=None, max_length=100)
+    prompt_version: Optional[str] = Field(default=None, max_length=64)
+    result_json: Optional[str] = None
 
 class ProcessingSession(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -911,8 +952,8 @@ class ReprocessRequest(BaseModel):
 
 class JobMatchResponse(BaseModel):
     id: int
-    resume_id: int
-    job_id: int
+    resume_id: Optional[int] = None
+    job_id: Optional[int] = None
     rating: float
     hard_no: bool
     disqualifiers: Optional[str] = None
@@ -1140,9 +1181,9 @@ def manage_resume_versions(session: Session, candidate_id: str, new_resume_path:
                         resume.resume_file_path = str(new_path)
                         session.add(resume)
                         renamed_count += 1
-                        print(f"[VERSIONING] Renamed {old_path.name} to {new_filename}")
+                        versioning_log.info("Renamed %s to %s", old_path.name, new_filename)
                     except Exception as e:
-                        print(f"[VERSIONING] Error renaming {old_path.name}: {e}")
+                        versioning_log.warning("Error renaming %s: %s", old_path.name, e)
         
         # Delete old resume files and database entries
         deleted_count = 0
@@ -1151,19 +1192,20 @@ def manage_resume_versions(session: Session, candidate_id: str, new_resume_path:
                 # Delete the file
                 if resume.resume_file_path and os.path.exists(resume.resume_file_path):
                     os.unlink(resume.resume_file_path)
-                    print(f"[VERSIONING] Deleted old file: {resume.resume_file_path}")
+                    versioning_log.info("Deleted old file: %s", resume.resume_file_path)
                 
                 # Delete related education and experience records
                 session.exec(delete(AIEducation).where(AIEducation.resume_id == resume.id))
                 session.exec(delete(AIExperience).where(AIExperience.resume_id == resume.id))
+                session.exec(delete(AIResumeSkill).where(AIResumeSkill.resume_id == resume.id))
                 
                 # Delete the resume record
                 session.delete(resume)
                 deleted_count += 1
-                print(f"[VERSIONING] Deleted old resume record: {resume.id}")
+                versioning_log.info("Deleted old resume record: %s", resume.id)
                 
             except Exception as e:
-                print(f"[VERSIONING] Error deleting resume {resume.id}: {e}")
+                versioning_log.warning("Error deleting resume %s: %s", resume.id, e)
         
         session.commit()
         
@@ -1176,7 +1218,7 @@ def manage_resume_versions(session: Session, candidate_id: str, new_resume_path:
         
     except Exception as e:
         session.rollback()
-        print(f"[VERSIONING] Error managing versions for {candidate_id}: {e}")
+        versioning_log.warning("Error managing versions for %s: %s", candidate_id, e)
         return {"kept": 0, "deleted": 0, "renamed": 0, "error": str(e)}
 
 def cleanup_old_resumes(session: Session, keep_count: int = 3):
@@ -1460,9 +1502,9 @@ def cleanup_old_candidate_versions(session: Session, candidate_id: str, max_vers
             session.delete(version)
             removed_count += 1
             
-            print(f"[CLEANUP] Removed old version {version.version_number} for candidate {candidate_id}")
+            versioning_log.info("Removed old version %s for candidate %s", version.version_number, candidate_id)
         except Exception as e:
-            print(f"[CLEANUP] Error removing version {version.version_number}: {e}")
+            versioning_log.warning("Error removing version %s: %s", version.version_number, e)
     
     session.commit()
     return {'removed_count': removed_count, 'kept_versions': max_versions}
@@ -2047,64 +2089,64 @@ def call_configured_ai_agent(agent: str, model: str, prompt: str) -> str:
         
         # Check if model is GPT-5 variant
         if model and "gpt-5" in model.lower():
-            print(f"[DEBUG] Detected GPT-5 model: {model}, sending without parameters")
+            ai_extraction_log.debug("Detected GPT-5 model: %s, sending without parameters", model)
             try:
                 # For GPT-5 models, send only basic prompt without any parameters
                 response = client.chat.completions.create(
                     model=model,
                     messages=messages
                 )
-                print(f"[DEBUG] GPT-5 basic call succeeded")
+                ai_extraction_log.debug("GPT-5 basic call succeeded")
             except Exception as gpt5_e:
-                print(f"[DEBUG] GPT-5 basic call failed: {gpt5_e}")
+                ai_extraction_log.warning("GPT-5 basic call failed: %s", gpt5_e)
                 raise
         else:
             # For other models, use standard parameters
             try:
-                print(f"[DEBUG] Using standard parameters for {model}")
+                ai_extraction_log.debug("Using standard parameters for %s", model)
                 response = client.chat.completions.create(
                     model=model or "gpt-5-mini",
                     messages=messages,
                     max_tokens=2000,
                     temperature=0.1
                 )
-                print(f"[DEBUG] Standard parameters succeeded")
+                ai_extraction_log.debug("Standard parameters succeeded")
             except Exception as inner_e:
                 inner_err = str(inner_e).lower()
-                print(f"[DEBUG] Standard parameters failed: {inner_err}")
+                ai_extraction_log.warning("Standard parameters failed: %s", inner_err)
                 
                 # Fallback to max_completion_tokens for newer models
                 try:
-                    print(f"[DEBUG] Trying max_completion_tokens fallback...")
+                    ai_extraction_log.debug("Trying max_completion_tokens fallback...")
                     response = client.chat.completions.create(
                         model=model or "gpt-5-mini",
                         messages=messages,
                         max_completion_tokens=2000,
                         temperature=0.1
                     )
-                    print(f"[DEBUG] max_completion_tokens fallback succeeded")
+                    ai_extraction_log.debug("max_completion_tokens fallback succeeded")
                 except Exception as fallback_e:
                     fallback_err = str(fallback_e).lower()
-                    print(f"[DEBUG] max_completion_tokens fallback also failed: {fallback_err}")
+                    ai_extraction_log.warning("max_completion_tokens fallback also failed: %s", fallback_err)
                     raise
         
         # Extract response text robustly
         response_text = ""
         try:
             response_text = response.choices[0].message.content.strip()
-            print(f"[DEBUG] Response content extracted: {len(response_text)} chars")
-            print(f"[DEBUG] Response content preview: {repr(response_text[:100])}")
+            ai_extraction_log.debug("Response content extracted: %s chars", len(response_text))
+            ai_extraction_log.debug("Response content preview: %r", response_text[:100])
         except Exception as e:
-            print(f"[DEBUG] Failed to extract content: {e}")
+            ai_extraction_log.warning("Failed to extract content: %s", e)
             try:
                 response_text = getattr(response.choices[0], "text", "").strip()
-                print(f"[DEBUG] Fallback text extraction: {len(response_text)} chars")
+                ai_extraction_log.debug("Fallback text extraction: %s chars", len(response_text))
             except Exception as e2:
-                print(f"[DEBUG] Fallback text extraction failed: {e2}")
+                ai_extraction_log.warning("Fallback text extraction failed: %s", e2)
                 response_text = str(response)
-                print(f"[DEBUG] Using str(response): {len(response_text)} chars")
+                ai_extraction_log.debug("Using str(response): %s chars", len(response_text))
         
-        print(f"[DEBUG] Final response_text length: {len(response_text)}")
+        ai_extraction_log.debug("Final response_text length: %s", len(response_text))
         return response_text
         
     except Exception as e:
@@ -2120,7 +2162,7 @@ def extract_resume_with_ai(content: str, filename: str) -> Dict[str, Any]:
         agent, model = load_ai_agent_config()
         config_duration = time.time() - config_start
         
-        print(f"[AI_EXTRACTION] [{filename}] Config loaded in {config_duration:.2f}s")
+        ai_extraction_log.debug("[%s] Config loaded in %.2fs", filename, config_duration)
         
         # Human-like resume evaluation prompt for job matching
         extraction_prompt = f"""You are a professional recruiter evaluating this resume for job matching. Extract key information as a human would:
@@ -2204,16 +2246,16 @@ IMPORTANT:
 - Extract ALL education entries including degrees, certifications, and training"""
         
         prompt_prep_duration = time.time() - start_time
-        print(f"[AI_EXTRACTION] [{filename}] Prompt prepared in {prompt_prep_duration:.2f}s")
+        ai_extraction_log.debug("[%s] Prompt prepared in %.2fs", filename, prompt_prep_duration)
         
         # Call AI agent with timeout
         ai_start = time.time()
-        print(f"[AI_EXTRACTION] [{filename}] Calling {agent}/{model}...")
+        ai_extraction_log.debug("[%s] Calling %s/%s...", filename, agent, model)
         
         ai_response = call_configured_ai_agent(agent, model, extraction_prompt)
         
         ai_duration = time.time() - ai_start
-        print(f"[AI_EXTRACTION] [{filename}] AI response received in {ai_duration:.2f}s")
+        ai_extraction_log.debug("[%s] AI response received in %.2fs", filename, ai_duration)
         
         # Parse AI response
         parse_start = time.time()
@@ -2222,48 +2264,48 @@ IMPORTANT:
             import re
             
             # Debug: Log the raw AI response
-            print(f"[AI_EXTRACTION] [{filename}] Raw AI response: {ai_response[:500]}...")
+            ai_extraction_log.debug("[%s] Raw AI response: %s...", filename, ai_response[:500])
             
             # Look for JSON in the response
             json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
             if json_match:
                 json_str = json_match.group()
-                print(f"[AI_EXTRACTION] [{filename}] Extracted JSON: {json_str[:300]}...")
+                ai_extraction_log.debug("[%s] Extracted JSON: %s...", filename, json_str[:300])
                 extracted_data = json.loads(json_str)
             else:
-                print(f"[AI_EXTRACTION] [{filename}] Using full response as JSON")
+                ai_extraction_log.debug("[%s] Using full response as JSON", filename)
                 extracted_data = json.loads(ai_response)
             
             parse_duration = time.time() - parse_start
-            print(f"[AI_EXTRACTION] [{filename}] JSON parsed in {parse_duration:.2f}s")
+            ai_extraction_log.debug("[%s] JSON parsed in %.2fs", filename, parse_duration)
             
             # Debug: Log extracted fields
-            print(f"[AI_EXTRACTION] [{filename}] Extracted fields:")
-            print(f"[AI_EXTRACTION] [{filename}] - candidate_name: {extracted_data.get('candidate_name', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - first_name: {extracted_data.get('first_name', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - last_name: {extracted_data.get('last_name', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - email: {extracted_data.get('email', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - phone: {extracted_data.get('phone', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - seniority_level: {extracted_data.get('seniority_level', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - work_authorization: {extracted_data.get('work_authorization', 'NOT_FOUND')}")
-            print(f"[AI_EXTRACTION] [{filename}] - citizenship: {extracted_data.get('citizenship', 'NOT_FOUND')}")
+            ai_extraction_log.debug("[%s] Extracted fields:", filename)
+            ai_extraction_log.debug("[%s] - candidate_name: %s", filename, extracted_data.get('candidate_name', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - first_name: %s", filename, extracted_data.get('first_name', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - last_name: %s", filename, extracted_data.get('last_name', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - email: %s", filename, extracted_data.get('email', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - phone: %s", filename, extracted_data.get('phone', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - seniority_level: %s", filename, extracted_data.get('seniority_level', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - work_authorization: %s", filename, extracted_data.get('work_authorization', 'NOT_FOUND'))
+            ai_extraction_log.debug("[%s] - citizenship: %s", filename, extracted_data.get('citizenship', 'NOT_FOUND'))
             
             # Fallback: Extract names from candidate_name if not provided
             candidate_name = extracted_data.get('candidate_name', '')
             if candidate_name and not extracted_data.get('first_name') and not extracted_data.get('last_name'):
-                print(f"[AI_EXTRACTION] [{filename}] Extracting names from candidate_name: {candidate_name}")
+                ai_extraction_log.debug("[%s] Extracting names from candidate_name: %s", filename, candidate_name)
                 name_parts = candidate_name.strip().split()
                 if len(name_parts) >= 2:
                     extracted_data['first_name'] = name_parts[0]
                     extracted_data['last_name'] = ' '.join(name_parts[1:])
-                    print(f"[AI_EXTRACTION] [{filename}] Extracted first_name: {extracted_data['first_name']}, last_name: {extracted_data['last_name']}")
+                    ai_extraction_log.debug("[%s] Extracted first_name: %s, last_name: %s", filename, extracted_data['first_name'], extracted_data['last_name'])
                 elif len(name_parts) == 1:
                     extracted_data['first_name'] = name_parts[0]
                     extracted_data['last_name'] = ''
-                    print(f"[AI_EXTRACTION] [{filename}] Single name found: {extracted_data['first_name']}")
+                    ai_extraction_log.debug("[%s] Single name found: %s", filename, extracted_data['first_name'])
             
         except json.JSONDecodeError as e:
-            print(f"[AI_EXTRACTION] [{filename}] JSON parsing failed: {e}")
+            ai_extraction_log.warning("[%s] JSON parsing failed: %s", filename, e)
             
             # Quick fallback with minimal prompt
             fallback_start = time.time()
@@ -2281,10 +2323,10 @@ IMPORTANT:
                     extracted_data = json.loads(fallback_response)
                     
                 fallback_duration = time.time() - fallback_start
-                print(f"[AI_EXTRACTION] [{filename}] Fallback successful in {fallback_duration:.2f}s")
+                ai_extraction_log.debug("[%s] Fallback successful in %.2fs", filename, fallback_duration)
                 
             except json.JSONDecodeError as e2:
-                print(f"[AI_EXTRACTION] [{filename}] Fallback failed: {e2}")
+                ai_extraction_log.warning("[%s] Fallback failed: %s", filename, e2)
                 extracted_data = {
                     "candidate_name": "Unknown",
                     "email": None,
@@ -2312,7 +2354,7 @@ IMPORTANT:
             'parse_duration': round(time.time() - parse_start, 2)
         }
         
-        print(f"[AI_EXTRACTION] [{filename}] COMPLETED in {total_duration:.2f}s total")
+        ai_extraction_log.info("[%s] COMPLETED in %.2fs total", filename, total_duration)
         return {
             'success': True,
             'data': extracted_data,
@@ -2322,7 +2364,7 @@ IMPORTANT:
         
     except Exception as e:
         error_duration = time.time() - start_time
-        print(f"[AI_EXTRACTION] [{filename}] ERROR after {error_duration:.2f}s: {e}")
+        ai_extraction_log.error("[%s] ERROR after %.2fs: %s", filename, error_duration, e)
         return {
             'success': False,
             'error': str(e),
@@ -2480,7 +2522,7 @@ def populate_normalized_tables(session: Session, resume_id: int, extracted_data:
         # Populate ResumeExperience (check both 'work_experience' and 'experience' keys)
         work_exp_data = extracted_data.get('work_experience') or extracted_data.get('experience')
         if work_exp_data:
-            print(f"[NORMALIZED_TABLES] Processing {len(work_exp_data)} work experience entries")
+            db_log.debug("Processing %s work experience entries", len(work_exp_data))
             for exp in work_exp_data:
                 # Parse boolean fields properly
                 is_current = exp.get('is_current_position', False)
@@ -2528,13 +2570,13 @@ def populate_normalized_tables(session: Session, resume_id: int, extracted_data:
                     is_current_position=is_current
                 )
                 session.add(resume_exp)
-                print(f"[NORMALIZED_TABLES] Added work experience: {resume_exp.company_name} - {resume_exp.position_title}")
+                db_log.debug("Added work experience: %s - %s", resume_exp.company_name, resume_exp.position_title)
         else:
-            print(f"[NORMALIZED_TABLES] No work experience data found in extracted_data")
+            db_log.debug("No work experience data found in extracted_data")
         
         # Populate ResumeEducation
         if 'education' in extracted_data and extracted_data['education']:
-            print(f"[NORMALIZED_TABLES] Processing {len(extracted_data['education'])} education entries")
+            db_log.debug("Processing %s education entries", len(extracted_data['education']))
             for edu in extracted_data['education']:
                 gpa_value = edu.get('gpa')
                 if gpa_value and isinstance(gpa_value, str) and gpa_value.lower() in ['unknown', 'n/a', 'not available']:
@@ -2554,13 +2596,13 @@ def populate_normalized_tables(session: Session, resume_id: int, extracted_data:
                     gpa=gpa_value
                 )
                 session.add(resume_edu)
-                print(f"[NORMALIZED_TABLES] Added education: {resume_edu.institution_name} - {resume_edu.degree_level}")
+                db_log.debug("Added education: %s - %s", resume_edu.institution_name, resume_edu.degree_level)
         else:
-            print(f"[NORMALIZED_TABLES] No education data found in extracted_data")
+            db_log.debug("No education data found in extracted_data")
         
         # Populate ResumeSkills
         if 'skills' in extracted_data and extracted_data['skills']:
-            print(f"[NORMALIZED_TABLES] Processing {len(extracted_data['skills'])} skills entries")
+            db_log.debug("Processing %s skills entries", len(extracted_data['skills']))
             for skill in extracted_data['skills']:
                 # Handle both string and object skill formats
                 if isinstance(skill, str):
@@ -2590,9 +2632,9 @@ def populate_normalized_tables(session: Session, resume_id: int, extracted_data:
                         is_certified=skill.get('is_certified', False)
                     )
                 session.add(resume_skill)
-                print(f"[NORMALIZED_TABLES] Added skill: {resume_skill.skill_name}")
+                db_log.debug("Added skill: %s", resume_skill.skill_name)
         else:
-            print(f"[NORMALIZED_TABLES] No skills data found in extracted_data")
+            db_log.debug("No skills data found in extracted_data")
         
         # Populate Projects
         if 'projects' in extracted_data and extracted_data['projects']:
@@ -2641,10 +2683,10 @@ def enhanced_resume_processing(file_path: str, filename: str, session_id: str, u
         # Use pre-extracted content if available, otherwise extract text content
         if pre_extracted_content:
             extracted_text = pre_extracted_content
-            print(f"[PROCESSING] Using pre-extracted content for {filename} ({len(extracted_text)} chars)")
+            upload_log.debug("Using pre-extracted content for %s (%s chars)", filename, len(extracted_text))
         else:
             extracted_text = extract_resume_content(file_path, filename)
-            print(f"[PROCESSING] Extracted content for {filename} ({len(extracted_text)} chars)")
+            upload_log.debug("Extracted content for %s (%s chars)", filename, len(extracted_text))
         
         if not extracted_text or extracted_text.startswith('[Error'):
             return {
@@ -2703,22 +2745,31 @@ def enhanced_resume_processing(file_path: str, filename: str, session_id: str, u
 # Resume processing functions
 def extract_text_from_pdf(file_path: str) -> str:
     """Extract text from PDF file"""
+    if DOCUMENT_TEXT_SERVICE_AVAILABLE:
+        try:
+            return get_document_text_service().extract(file_path).strip()
+        except Exception as e:
+            print(f"Error extracting text from PDF {file_path}: {e}")
+            return f"[Error extracting PDF content: {e}]"
     if not DOCUMENT_PROCESSING_AVAILABLE:
         return "[PDF processing not available - libraries not installed]"
     
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = pypdf.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            return "\n".join((page.extract_text() or "") for page in pdf_reader.pages).strip()
     except Exception as e:
         print(f"Error extracting text from PDF {file_path}: {e}")
         return f"[Error extracting PDF content: {e}]"
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX file"""
+    if DOCUMENT_TEXT_SERVICE_AVAILABLE:
+        try:
+            return get_document_text_service().extract(file_path)
+        except Exception as e:
+            print(f"Error extracting text from DOCX {file_path}: {e}")
+            return f"[Error extracting DOCX content: {e}]"
     if not DOCUMENT_PROCESSING_AVAILABLE:
         return "[DOCX processing not available - libraries not installed]"
     
@@ -2730,15 +2781,18 @@ def extract_text_from_docx(file_path: str) -> str:
 
 def extract_text_from_doc(file_path: str) -> str:
     """Extract text from DOC file"""
+    if DOCUMENT_TEXT_SERVICE_AVAILABLE:
+        try:
+            return get_document_text_service().extract(file_path).strip()
+        except Exception as e:
+            print(f"Error extracting text from DOC {file_path}: {e}")
+            return f"[Error extracting DOC content: {e}]"
     if not DOCUMENT_PROCESSING_AVAILABLE:
         return "[DOC processing not available - libraries not installed]"
     
     try:
         doc = docx.Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
     except Exception as e:
         print(f"Error extracting text from DOC {file_path}: {e}")
         return f"[Error extracting DOC content: {e}]"
@@ -2884,6 +2938,21 @@ def get_mtb_filename():
     filename = f"MasterTrackingBoard_{current_date}.csv"
     return os.path.join(output_dir, filename)
 
+def sync_drive_job_files(drive, folder_id: str, job_ids: List[str], jobs_dir: str, report_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Download job files from a Drive folder, fetching only new or changed files.
+
+    Returns the DriveSync result (per-job results and totals), or None when the
+    full parallel_download_and_report fallback was used.
+    """
+    if DRIVE_SYNC_AVAILABLE:
+        try:
+            return DriveSync(PyDrive2Backend(drive), folder_id, jobs_dir).sync(job_ids, report_path)
+        except Exception as e:
+            print(f"[DRIVE_SYNC] Incremental sync failed, falling back to full download: {e}")
+    parallel_download_and_report(drive, folder_id, job_ids, jobs_dir, report_path)
+    return None
+
 def get_download_report_filename():
     """Get the download report filename"""
     from datetime import datetime, date
@@ -2921,6 +2990,17 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    run_migrations(engine)
+    if ai_db_manager:
+        try:
+            ai_db_manager.backfill_resume_skills()
+        except Exception as e:
+            db_log.warning("Skill backfill failed: %s", e)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if upload_pipeline:
+        upload_pipeline.shutdown()
 
 # Root endpoint
 @app.get("/")
@@ -2946,8 +3026,8 @@ async def health_check():
     }
 
 @app.get("/api/ai/verify")
-async def verify_ai_connection():
-    """Verify AI API connection and return test response"""
+async def verify_ai_connection(force: bool = False):
+    """Verify AI API connection and return test response (force=true re-probes instead of using cached health)"""
     try:
         # Load AI agent configuration
         agent, model = load_ai_agent_config()
@@ -2959,8 +3039,10 @@ async def verify_ai_connection():
         
         # Use configured AI agent for verification
         if config and hasattr(config, 'test_ai_agent'):
-            # Test the AI agent first to make sure it's working
-            success, test_response = config.test_ai_agent(agent, model)
+            from modules.provider_health import check_provider, record_success, record_failure
+
+            # Check the AI agent first; the live probe only runs when its cached health has expired
+            success, test_response = check_provider(agent, model, force=force)
             if not success:
                 return {
                     "success": False,
@@ -2973,6 +3055,7 @@ async def verify_ai_connection():
             # Use custom AI call for verification
             try:
                 ai_response = call_configured_ai_agent(agent, model, test_prompt)
+                record_success(agent, model)
                 return {
                     "success": True,
                     "api_key_configured": True,
@@ -2982,6 +3065,7 @@ async def verify_ai_connection():
                     "timestamp": datetime.now().isoformat()
                 }
             except Exception as e:
+                record_failure(agent, model, e)
                 return {
                     "success": False,
                     "error": str(e),
@@ -3213,118 +3297,81 @@ async def extract_resume_ai(
 async def upload_resumes(
     resume_files: List[UploadFile] = File(...),
     use_ai_extraction: bool = Form(True),
+    background: bool = Form(False),
     session: Session = Depends(get_session)
 ):
-    """Upload resume files with AI-only extraction and validation"""
+    """
+    Upload resume files with AI-only extraction and validation.
+
+    Files are processed concurrently by the upload pipeline. With background=true the
+    batch_id is returned immediately and progress is available from
+    /api/resumes/upload/{batch_id} and /api/resumes/upload/{batch_id}/stream.
+    """
     try:
-        # Generate unique session ID for this upload batch
-        session_id = str(uuid.uuid4())
-        uploaded_resumes = []
+        if not upload_pipeline:
+            raise HTTPException(status_code=503, detail="AI resume system not available")
         
-        # Process files with AI-only extraction
-        for resume_file in resume_files:
+        batch = upload_pipeline.create_batch([resume_file.filename for resume_file in resume_files])
+        
+        # Save uploaded files permanently (original filename for the current resume)
+        data_dir = get_data_dir()
+        resume_dir = Path(f"{data_dir}/resume")
+        resume_dir.mkdir(parents=True, exist_ok=True)
+        
+        saved_files = []
+        for index, resume_file in enumerate(resume_files):
             try:
-                # Read file content
                 content = await resume_file.read()
-                
-                # Save uploaded file permanently
-                data_dir = get_data_dir()
-                resume_dir = Path(f"{data_dir}/resume")
-                resume_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Use original filename for the current resume
                 permanent_path = resume_dir / resume_file.filename
-                
-                # Save file permanently
-                with open(permanent_path, 'wb') as f:
-                    f.write(content)
-                
-                # Extract text content
-                resume_content = ""
-                try:
-                    if permanent_path.suffix.lower() == '.pdf':
-                        import pypdf
-                        with open(permanent_path, 'rb') as f:
-                            reader = pypdf.PdfReader(f)
-                            for page in reader.pages:
-                                resume_content += page.extract_text() + "\n"
-                    elif permanent_path.suffix.lower() in ['.doc', '.docx']:
-                        import docx
-                        doc = docx.Document(permanent_path)
-                        for paragraph in doc.paragraphs:
-                            resume_content += paragraph.text + "\n"
-                    else:
-                        # For txt and other text files
-                        with open(permanent_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            resume_content = f.read()
-                except Exception as e:
-                    raise Exception(f"Failed to extract text from {resume_file.filename}: {str(e)}")
-                
-                # Use AI-only extraction
-                if not ai_extractor:
-                    raise Exception("AI resume system not available")
-                extraction_result = ai_extractor.extract_resume_data(resume_content, resume_file.filename, fast_mode=True)
-                
-                if extraction_result.get("error"):
-                    uploaded_resumes.append({
-                        "filename": resume_file.filename,
-                        "status": "error",
-                        "message": extraction_result["error"]
-                    })
-                    # Clean up file if extraction failed
-                    try:
-                        os.unlink(permanent_path)
-                    except:
-                        pass
-                    continue
-                
-                # Save to AI database
-                file_info = {
-                    "original_filename": resume_file.filename,
-                    "resume_file_path": str(permanent_path),
-                    "content_hash": hashlib.md5(content).hexdigest()
-                }
-                
-                if not ai_db_manager:
-                    raise Exception("AI database manager not available")
-                
-                # Pass the extracted data directly
-                extracted_data = extraction_result.get("data", {})
-                print(f"[UPLOAD_DEBUG] Extracted data keys: {list(extracted_data.keys())}")
-                print(f"[UPLOAD_DEBUG] Candidate identity: {extracted_data.get('candidate_identity', {})}")
-                
-                saved_resume = ai_db_manager.save_resume(extracted_data, file_info)
-                
-                uploaded_resumes.append({
-                    "filename": resume_file.filename,
-                    "status": "success",
-                    "resume_id": saved_resume.id,
-                    "candidate_id": saved_resume.candidate_id,
-                    "extraction_confidence": extraction_result.get("extraction_confidence", 0.0),
-                    "validation_confidence": extraction_result.get("validation_confidence", 0.0),
-                    "token_count": extraction_result.get("total_tokens", 0),
-                    "saved_path": str(permanent_path)
-                })
-                
+                await asyncio.to_thread(permanent_path.write_bytes, content)
+                saved_files.append((index, resume_file.filename, str(permanent_path), hashlib.md5(content).hexdigest()))
             except Exception as e:
-                uploaded_resumes.append({
-                    "filename": resume_file.filename,
-                    "status": "error",
-                    "message": str(e)
-                })
+                batch.update(index, status="error", message=str(e))
+        
+        if background:
+            upload_pipeline.start(batch, saved_files)
+            return {
+                "success": True,
+                "session_id": batch.batch_id,
+                "batch_id": batch.batch_id,
+                "status": "processing",
+                "total_files": len(resume_files),
+                "status_url": f"/api/resumes/upload/{batch.batch_id}",
+                "stream_url": f"/api/resumes/upload/{batch.batch_id}/stream"
+            }
         
+        await upload_pipeline.run(batch, saved_files)
+        result = batch.summary()
         return {
             "success": True,
-            "session_id": session_id,
-            "uploaded_resumes": uploaded_resumes,
-            "total_files": len(resume_files),
-            "successful_uploads": len([r for r in uploaded_resumes if r["status"] == "success"]),
-            "failed_uploads": len([r for r in uploaded_resumes if r["status"] == "error"])
+            "session_id": batch.batch_id,
+            "uploaded_resumes": result["uploaded_resumes"],
+            "total_files": result["total_files"],
+            "successful_uploads": result["successful_uploads"],
+            "failed_uploads": result["failed_uploads"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.get("/api/resumes/upload/{batch_id}")
+async def get_upload_batch_status(batch_id: str):
+    """Per-file status of an upload batch"""
+    batch = upload_pipeline.get_batch(batch_id) if upload_pipeline else None
+    if not batch:
+        raise HTTPException(status_code=404, detail="Upload batch not found")
+    return batch.summary()
+
+@app.get("/api/resumes/upload/{batch_id}/stream")
+async def stream_upload_batch_status(batch_id: str):
+    """Stream per-file status changes of an upload batch as NDJSON"""
+    batch = upload_pipeline.get_batch(batch_id) if upload_pipeline else None
+    if not batch:
+        raise HTTPException(status_code=404, detail="Upload batch not found")
+    return StreamingResponse(upload_pipeline.stream(batch), media_type="application/x-ndjson")
+
 # AI Resume API Endpoints
 if AI_RESUME_SYSTEM_AVAILABLE:
     @app.get("/api/ai-resumes")
@@ -3332,6 +3379,11 @@ if AI_RESUME_SYSTEM_AVAILABLE:
         """Get all AI-extracted resumes"""
         return ai_db_manager.get_resumes(skip=skip, limit=limit)
 
+    @app.get("/api/ai-resumes/validation-stats")
+    async def get_ai_resume_validation_stats():
+        """How often the validation model was run or skipped by the deterministic checks"""
+        return ai_extractor.get_validation_stats()
+
     @app.get("/api/ai-resumes/{resume_id}")
     async def get_ai_resume(resume_id: int):
         """Get AI-extracted resume by ID"""
@@ -3414,28 +3466,29 @@ async def process_single_file(file):
             file_start_time = time.time()
             individual_session = None
             step_times = {}
+            upload_span = start_span("resume_upload", file=file.filename)
             
             try:
-                print(f"[UPLOAD_LOG] 🚀 Starting processing for: {file.filename}")
+                upload_log.info("🚀 Starting processing for: %s", file.filename)
                 step_start = time.time()
                 
                 # Step 1: Create individual database session for this file
-                print(f"[UPLOAD_LOG] 📊 Step 1/8: Setting up database session for {file.filename}")
+                upload_log.debug("📊 Step 1/8: Setting up database session for %s", file.filename)
                 individual_session = Session(engine)
-                step_times['db_setup'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ Database session ready for {file.filename} ({step_times['db_setup']:.2f}s)")
+                step_times['db_setup'] = record_span('db_setup', step_start, parent=upload_span)
+                upload_log.debug("✅ Database session ready for %s (%.2fs)", file.filename, step_times['db_setup'])
                 
                 # Step 2: Read and validate file content
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 📖 Step 2/8: Reading file content for {file.filename}")
+                upload_log.debug("📖 Step 2/8: Reading file content for %s", file.filename)
                 content = await file.read()
-                print(f"[UPLOAD_LOG] 📄 File {file.filename} content length: {len(content)} bytes")
-                step_times['file_read'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ File content read for {file.filename} ({step_times['file_read']:.2f}s)")
+                upload_log.debug("📄 File %s content length: %s bytes", file.filename, len(content))
+                step_times['file_read'] = record_span('file_read', step_start, parent=upload_span)
+                upload_log.debug("✅ File content read for %s (%.2fs)", file.filename, step_times['file_read'])
                 
                 # Step 3: Extract text content from file for validation
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 🔤 Step 3/8: Extracting text content for {file.filename}")
+                upload_log.debug("🔤 Step 3/8: Extracting text content for %s", file.filename)
                 
                 # Save file temporarily for content extraction
                 temp_file_path = f"/tmp/temp_{file.filename}"
@@ -3462,24 +3515,24 @@ async def process_single_file(file):
                 except:
                     pass
                 
-                print(f"[UPLOAD_LOG] 🔤 Content extracted using {encoding_used}")
-                step_times['content_decode'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ Content extracted for {file.filename} ({step_times['content_decode']:.2f}s)")
+                upload_log.debug("🔤 Content extracted using %s", encoding_used)
+                step_times['content_decode'] = record_span('text_extraction', step_start, parent=upload_span)
+                upload_log.debug("✅ Content extracted for %s (%.2fs)", file.filename, step_times['content_decode'])
                 
                 # Store content_str for later use in processing steps
                 extracted_content_str = content_str
                 
                 # Step 4: Validate if this is actually a resume file
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 🔍 Step 4/8: Validating resume content for {file.filename}")
-                print(f"[UPLOAD_LOG] 🔍 Content length: {len(extracted_content_str)} characters")
-                print(f"[UPLOAD_LOG] 🔍 Content preview: {extracted_content_str[:200]}...")
+                upload_log.debug("🔍 Step 4/8: Validating resume content for %s", file.filename)
+                upload_log.debug("🔍 Content length: %s characters", len(extracted_content_str))
+                upload_log.debug("🔍 Content preview: %s...", extracted_content_str[:200])
                 
                 is_valid_resume = is_resume_file(file.filename, extracted_content_str)
                 if not is_valid_resume:
-                    print(f"[UPLOAD_LOG] ❌ File {file.filename} is not a resume - skipping processing")
-                    print(f"[UPLOAD_LOG] ❌ Validation failed - content may not contain enough resume indicators")
-                    step_times['validation'] = time.time() - step_start
+                    upload_log.warning("⚠️ File %s is not a resume - skipping processing", file.filename)
+                    upload_log.info("⚠️ Validation failed - content may not contain enough resume indicators")
+                    step_times['validation'] = record_span('validation', step_start, parent=upload_span)
                     return {
                         "filename": file.filename,
                         "status": "skipped",
@@ -3489,21 +3542,21 @@ async def process_single_file(file):
                         "step_times": step_times
                     }
                 
-                step_times['validation'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ Resume validation passed for {file.filename} ({step_times['validation']:.2f}s)")
+                step_times['validation'] = record_span('validation', step_start, parent=upload_span)
+                upload_log.debug("✅ Resume validation passed for %s (%.2fs)", file.filename, step_times['validation'])
                 
                 # Step 5: Save original file
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 💾 Step 5/8: Saving original file for {file.filename}")
+                upload_log.debug("💾 Step 5/8: Saving original file for %s", file.filename)
                 original_path = save_resume_file(content, file.filename, session_id)
-                print(f"[UPLOAD_LOG] 📁 File {file.filename} saved to: {original_path}")
-                step_times['file_save'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ Original file saved for {file.filename} ({step_times['file_save']:.2f}s)")
+                upload_log.debug("📁 File %s saved to: %s", file.filename, original_path)
+                step_times['file_save'] = record_span('file_save', step_start, parent=upload_span)
+                upload_log.debug("✅ Original file saved for %s (%.2fs)", file.filename, step_times['file_save'])
                 
                 # Step 6: Process and extract content with AI
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 🤖 Step 6/8: AI processing and content extraction for {file.filename}")
-                print(f"[UPLOAD_LOG] 🤖 Using AI extraction: {use_ai_extraction}")
+                upload_log.debug("🤖 Step 6/8: AI processing and content extraction for %s", file.filename)
+                upload_log.debug("🤖 Using AI extraction: %s", use_ai_extraction)
                 
                 # Use the already extracted content_str from validation step
                 # This avoids re-extracting the same content
@@ -3514,31 +3567,31 @@ async def process_single_file(file):
                 file_size = len(content)
                 file_type = file.filename.split('.')[-1].lower()
                 
-                step_times['ai_processing'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ AI processing completed for {file.filename} ({step_times['ai_processing']:.2f}s)")
-                print(f"[UPLOAD_LOG] 📊 Processing status: {processing_result.get('status')}")
-                print(f"[UPLOAD_LOG] 📄 Extracted content length: {len(extracted_content)} chars")
-                print(f"[UPLOAD_LOG] 🤖 AI extraction method: {extracted_data.get('extraction_method', 'unknown')}")
+                step_times['ai_processing'] = record_span('ai_processing', step_start, parent=upload_span)
+                upload_log.debug("✅ AI processing completed for %s (%.2fs)", file.filename, step_times['ai_processing'])
+                upload_log.debug("📊 Processing status: %s", processing_result.get('status'))
+                upload_log.debug("📄 Extracted content length: %s chars", len(extracted_content))
+                upload_log.debug("🤖 AI extraction method: %s", extracted_data.get('extraction_method', 'unknown'))
                 
                 if extracted_data.get('extraction_method') == 'ai':
-                    print(f"[UPLOAD_LOG] 🎯 AI extraction successful - extracted {len(extracted_data)} data fields")
+                    upload_log.debug("🎯 AI extraction successful - extracted %s data fields", len(extracted_data))
                 else:
-                    print(f"[UPLOAD_LOG] ⚠️ Using fallback extraction method")
+                    upload_log.warning("⚠️ Using fallback extraction method")
                 
                 # Step 7: Generate content hash and process extracted data
                 step_start = time.time()
-                print(f"[UPLOAD_LOG] 🔑 Step 7/8: Generating content hash and processing data for {file.filename}")
+                upload_log.debug("🔑 Step 7/8: Generating content hash and processing data for %s", file.filename)
                 content_hash = generate_content_hash(extracted_content)
-                print(f"[UPLOAD_LOG] 🔑 Content hash generated: {content_hash[:16]}...")
+                upload_log.debug("🔑 Content hash generated: %s...", content_hash[:16])
                 
                 # Use AI-extracted data or fallback to regex
                 if use_ai_extraction and 'candidate_name' in extracted_data:
-                    print(f"[UPLOAD_LOG] 🎯 Using AI-extracted data for {file.filename}")
-                    print(f"[UPLOAD_LOG] 👤 Extracted candidate_name: {extracted_data.get('candidate_name', 'Not found')}")
-                    print(f"[UPLOAD_LOG] 📧 Extracted email: {extracted_data.get('email', 'Not found')}")
-                    print(f"[UPLOAD_LOG] 📞 Extracted phone: {extracted_data.get('phone', 'Not found')}")
-                    print(f"[UPLOAD_LOG] 🏢 Extracted company: {extracted_data.get('current_company', 'Not found')}")
-                    print(f"[UPLOAD_LOG] 💼 Extracted position: {extracted_data.get('current_position', 'Not found')}")
+                    upload_log.debug("🎯 Using AI-extracted data for %s", file.filename)
+                    upload_log.debug("👤 Extracted candidate_name: %s", extracted_data.get('candidate_name', 'Not found'))
+                    upload_log.debug("📧 Extracted email: %s", extracted_data.get('email', 'Not found'))
+                    upload_log.debug("📞 Extracted phone: %s", extracted_data.get('phone', 'Not found'))
+                    upload_log.debug("🏢 Extracted company: %s", extracted_data.get('current_company', 'Not found'))
+                    upload_log.debug("💼 Extracted position: %s", extracted_data.get('current_position', 'Not found'))
                     
                     # Validate and convert data types
                     extracted_data = validate_and_convert_data(extracted_data)
@@ -3648,7 +3701,7 @@ async def process_single_file(file):
                     citizenship = citizenship or None
                     work_authorization = work_authorization or None
                 else:
-                    print(f"[UPLOAD_LOG] File {file.filename} falling back to regex extraction")
+                    upload_log.debug("File %s falling back to regex extraction", file.filename)
                     # Fallback to regex extraction
                     candidate_info = extract_candidate_identifier(extracted_content, file.filename)
                     candidate_name = candidate_info['candidate_name']
@@ -3679,47 +3732,47 @@ async def process_single_file(file):
                 
                 # Generate candidate ID
                 candidate_id = generate_candidate_id(email, phone, candidate_name)
-                print(f"[UPLOAD_LOG] 🆔 Generated candidate_id: {candidate_id}")
+                upload_log.debug("🆔 Generated candidate_id: %s", candidate_id)
                 
                 # Step 8: Handle versioning and deduplication
-                print(f"[UPLOAD_LOG] 🔄 Step 8/8: Checking versioning and deduplication for {file.filename}")
-                print(f"[UPLOAD_LOG] 🔍 Checking for existing candidate: {candidate_id}")
+                upload_log.debug("🔄 Step 8/8: Checking versioning and deduplication for %s", file.filename)
+                upload_log.debug("🔍 Checking for existing candidate: %s", candidate_id)
                 versioning_result = handle_resume_versioning(individual_session, candidate_id, content_hash, {
                     'filename': file.filename,
                     'content': extracted_content,
                     'extracted_data': extracted_data
                 })
-                step_times['data_processing'] = time.time() - step_start
-                print(f"[UPLOAD_LOG] ✅ Data processing completed for {file.filename} ({step_times['data_processing']:.2f}s)")
+                step_times['data_processing'] = record_span('data_processing', step_start, parent=upload_span)
+                upload_log.debug("✅ Data processing completed for %s (%.2fs)", file.filename, step_times['data_processing'])
                 
                 action = versioning_result['action']
-                print(f"[UPLOAD_LOG] 🎯 Versioning decision: {action}")
+                upload_log.debug("🎯 Versioning decision: %s", action)
                 
                 if action in ['no_changes', 'no_significant_changes']:
                     content_comparison = versioning_result.get('content_comparison', {})
-                    print(f"[UPLOAD_LOG] 📊 Content comparison: {content_comparison.get('change_percentage', 0)}% change detected")
-                    print(f"[UPLOAD_LOG] ℹ️ Changes detected: {content_comparison.get('changes_detected', [])}")
+                    upload_log.debug("📊 Content comparison: %s%% change detected", content_comparison.get('change_percentage', 0))
+                    upload_log.debug("ℹ️ Changes detected: %s", content_comparison.get('changes_detected', []))
                 elif action == 'new_version':
-                    print(f"[UPLOAD_LOG] 📝 Creating new version: {versioning_result['version_number']}")
+                    upload_log.debug("📝 Creating new version: %s", versioning_result['version_number'])
                     if 'cleanup_result' in versioning_result:
                         cleanup = versioning_result['cleanup_result']
-                        print(f"[UPLOAD_LOG] 🧹 Cleanup: Removed {cleanup.get('removed_count', 0)} old versions")
+                        upload_log.info("🧹 Cleanup: Removed %s old versions", cleanup.get('removed_count', 0))
                 elif action == 'create_new':
-                    print(f"[UPLOAD_LOG] ✨ Creating new candidate record")
+                    upload_log.debug("✨ Creating new candidate record")
                 elif action == 'update_existing':
-                    print(f"[UPLOAD_LOG] 🔄 Updating existing record")
+                    upload_log.debug("🔄 Updating existing record")
                 
                 # Handle different versioning actions
                 if versioning_result['action'] in ['no_changes', 'no_significant_changes']:
                     # No changes or no significant changes - mark as processed but don't update database
-                    print(f"[UPLOAD_LOG] ⏭️ Skipping database update - no changes detected for {file.filename}")
+                    upload_log.debug("⏭️ Skipping database update - no changes detected for %s", file.filename)
                     total_time = time.time() - file_start_time
-                    print(f"[UPLOAD_LOG] 🏁 Processing completed for {file.filename} in {total_time:.2f}s")
+                    upload_log.info("🏁 Processing completed for %s in %.2fs", file.filename, total_time)
                     
                     # Print step timing summary
-                    print(f"[UPLOAD_LOG] ⏱️ Step timing summary for {file.filename}:")
+                    upload_log.debug("⏱️ Step timing summary for %s:", file.filename)
                     for step, duration in step_times.items():
-                        print(f"[UPLOAD_LOG]   - {step}: {duration:.2f}s")
+                        upload_log.debug("  - %s: %.2fs", step, duration)
                     
                     return {
                         "filename": file.filename,
@@ -3736,12 +3789,12 @@ async def process_single_file(file):
                 
                 if versioning_result['action'] == 'update_existing':
                     # Update existing record with new AI-extracted data
-                    print(f"[UPLOAD_LOG] 💾 Updating existing resume record for {file.filename}")
+                    upload_log.debug("💾 Updating existing resume record for %s", file.filename)
                     existing_resume = versioning_result['existing_resume']
-                    print(f"[UPLOAD_LOG] 📝 Existing resume ID: {existing_resume.id}, Version: {existing_resume.version_number}")
+                    upload_log.debug("📝 Existing resume ID: %s, Version: %s", existing_resume.id, existing_resume.version_number)
                     
                     # Update all fields with new AI-extracted data
-                    print(f"[UPLOAD_LOG] 🔄 Updating resume fields...")
+                    upload_log.debug("🔄 Updating resume fields...")
                     existing_resume.filename = file.filename
                     existing_resume.content = extracted_content
                     existing_resume.candidate_name = candidate_name
@@ -3815,23 +3868,25 @@ async def process_single_file(file):
                     existing_resume.file_type = file_type
                     existing_resume.updated_at = datetime.now()
                     
+                    step_start = time.time()
                     individual_session.add(existing_resume)
                     individual_session.flush()
-                    print(f"[UPLOAD_LOG] ✅ Main resume record updated for {file.filename}")
+                    upload_log.debug("✅ Main resume record updated for %s", file.filename)
                     
                     # Update normalized tables
-                    print(f"[UPLOAD_LOG] 📊 Updating normalized tables for {file.filename}")
+                    upload_log.debug("📊 Updating normalized tables for %s", file.filename)
                     populate_normalized_tables(individual_session, existing_resume.id, extracted_data)
                     individual_session.commit()
-                    print(f"[UPLOAD_LOG] ✅ Database commit successful for {file.filename}")
+                    step_times['db_write'] = record_span('db_write', step_start, parent=upload_span)
+                    upload_log.debug("✅ Database commit successful for %s", file.filename)
                     
                     total_time = time.time() - file_start_time
-                    print(f"[UPLOAD_LOG] 🏁 Processing completed for {file.filename} in {total_time:.2f}s")
+                    upload_log.info("🏁 Processing completed for %s in %.2fs", file.filename, total_time)
                     
                     # Print step timing summary
-                    print(f"[UPLOAD_LOG] ⏱️ Step timing summary for {file.filename}:")
+                    upload_log.debug("⏱️ Step timing summary for %s:", file.filename)
                     for step, duration in step_times.items():
-                        print(f"[UPLOAD_LOG]   - {step}: {duration:.2f}s")
+                        upload_log.debug("  - %s: %.2fs", step, duration)
                     
                     return {
                         "filename": file.filename,
@@ -3848,8 +3903,8 @@ async def process_single_file(file):
                     }
                 
                 # Create new resume record with versioning info and enhanced fields
-                print(f"[UPLOAD_LOG] ✨ Creating new resume record for {file.filename}")
-                print(f"[UPLOAD_LOG] 📝 Version: {versioning_result['version_number']}, Latest: {versioning_result['is_latest_version']}")
+                upload_log.debug("✨ Creating new resume record for %s", file.filename)
+                upload_log.debug("📝 Version: %s, Latest: %s", versioning_result['version_number'], versioning_result['is_latest_version'])
                 new_resume = Resume(
                     filename=file.filename,
                     content=extracted_content,
@@ -3940,20 +3995,22 @@ async def process_single_file(file):
                     file_type=file.filename.split('.')[-1].lower()
                 )
                 
+                step_start = time.time()
                 individual_session.add(new_resume)
                 individual_session.flush()  # Get the resume ID
-                print(f"[UPLOAD_LOG] ✅ New resume record created with ID: {new_resume.id}")
+                upload_log.debug("✅ New resume record created with ID: %s", new_resume.id)
                 
                 # Populate normalized tables with AI-extracted data
                 if use_ai_extraction and extracted_data:
-                    print(f"[UPLOAD_LOG] 📊 Populating normalized tables for {file.filename}")
+                    upload_log.debug("📊 Populating normalized tables for %s", file.filename)
                     populate_normalized_tables(individual_session, new_resume.id, extracted_data)
                     individual_session.commit()  # Commit the normalized table entries
-                    print(f"[UPLOAD_LOG] ✅ Normalized tables populated and committed for {file.filename}")
+                    upload_log.debug("✅ Normalized tables populated and committed for %s", file.filename)
                 else:
-                    print(f"[UPLOAD_LOG] ⏭️ Skipping normalized tables - no AI extraction data")
+                    upload_log.debug("⏭️ Skipping normalized tables - no AI extraction data")
                     individual_session.commit()
-                    print(f"[UPLOAD_LOG] ✅ Database commit successful for {file.filename}")
+                    upload_log.debug("✅ Database commit successful for %s", file.filename)
+                step_times['db_write'] = record_span('db_write', step_start, parent=upload_span)
                 
                 # Prepare response data
                 response_data = {
@@ -3975,22 +4032,22 @@ async def process_single_file(file):
                     "message": f"Resume {versioning_result['action']} - Version {versioning_result['version_number']}"
                 }
                 
-                print(f"[UPLOAD_LOG] File {file.filename} response data prepared:")
-                print(f"[UPLOAD_LOG]   - action: {response_data['action']}")
-                print(f"[UPLOAD_LOG]   - candidate_id: {response_data['candidate_id']}")
-                print(f"[UPLOAD_LOG]   - version_number: {response_data['version_number']}")
-                print(f"[UPLOAD_LOG]   - ai_extraction_used: {response_data['ai_extraction_used']}")
-                print(f"[UPLOAD_LOG]   - extraction_method: {response_data['extraction_method']}")
-                print(f"[UPLOAD_LOG]   - content_length: {response_data['content_length']}")
-                print(f"[UPLOAD_LOG]   - has_extracted_data: {response_data['extracted_data'] is not None}")
+                upload_log.debug("File %s response data prepared:", file.filename)
+                upload_log.debug("  - action: %s", response_data['action'])
+                upload_log.debug("  - candidate_id: %s", response_data['candidate_id'])
+                upload_log.debug("  - version_number: %s", response_data['version_number'])
+                upload_log.debug("  - ai_extraction_used: %s", response_data['ai_extraction_used'])
+                upload_log.debug("  - extraction_method: %s", response_data['extraction_method'])
+                upload_log.debug("  - content_length: %s", response_data['content_length'])
+                upload_log.debug("  - has_extracted_data: %s", response_data['extracted_data'] is not None)
                 
                 file_duration = time.time() - file_start_time
-                print(f"[UPLOAD_LOG] 🏁 Processing completed for {file.filename} in {file_duration:.2f}s")
+                upload_log.info("🏁 Processing completed for %s in %.2fs", file.filename, file_duration)
                 
                 # Print step timing summary
-                print(f"[UPLOAD_LOG] ⏱️ Step timing summary for {file.filename}:")
+                upload_log.debug("⏱️ Step timing summary for %s:", file.filename)
                 for step, duration in step_times.items():
-                    print(f"[UPLOAD_LOG]   - {step}: {duration:.2f}s")
+                    upload_log.debug("  - %s: %.2fs", step, duration)
                 
                 # Add step times to response
                 response_data["processing_time"] = file_duration
@@ -3999,24 +4056,25 @@ async def process_single_file(file):
                 return response_data
                 
             except Exception as e:
+                upload_span.record_exception(e)
                 file_duration = time.time() - file_start_time
-                print(f"[UPLOAD_LOG] ❌ ERROR processing {file.filename} after {file_duration:.2f}s")
-                print(f"[UPLOAD_LOG] ❌ Error type: {type(e).__name__}")
-                print(f"[UPLOAD_LOG] ❌ Error message: {str(e)}")
+                upload_log.error("❌ ERROR processing %s after %.2fs", file.filename, file_duration)
+                upload_log.error("❌ Error type: %s", type(e).__name__)
+                upload_log.error("❌ Error message: %s", str(e))
                 
                 # Print partial step timing if available
                 if step_times:
-                    print(f"[UPLOAD_LOG] ⏱️ Partial step timing for {file.filename}:")
+                    upload_log.debug("⏱️ Partial step timing for %s:", file.filename)
                     for step, duration in step_times.items():
-                        print(f"[UPLOAD_LOG]   - {step}: {duration:.2f}s")
+                        upload_log.debug("  - %s: %.2fs", step, duration)
                 
                 # Rollback individual session if it exists
                 if individual_session:
                     try:
                         individual_session.rollback()
-                        print(f"[UPLOAD_LOG] 🔄 Individual session rolled back successfully for {file.filename}")
+                        upload_log.debug("🔄 Individual session rolled back successfully for %s", file.filename)
                     except Exception as rollback_error:
-                        print(f"[UPLOAD_LOG] ❌ Rollback error for {file.filename}: {rollback_error}")
+                        upload_log.error("❌ Rollback error for %s: %s", file.filename, rollback_error)
                 
                 return {
                     "filename": file.filename,
@@ -4027,13 +4085,14 @@ async def process_single_file(file):
                     "step_times": step_times
                 }
             finally:
+                upload_span.end()
                 # Always close the individual session
                 if individual_session:
                     try:
                         individual_session.close()
-                        print(f"[UPLOAD_LOG] 🔒 Individual session closed for {file.filename}")
+                        upload_log.debug("🔒 Individual session closed for %s", file.filename)
                     except Exception as close_error:
-                        print(f"[UPLOAD_LOG] ❌ Session close error for {file.filename}: {close_error}")
+                        upload_log.error("❌ Session close error for %s: %s", file.filename, close_error)
         
 # Legacy code removed - using AI-only extraction now
 
@@ -4482,193 +4541,200 @@ async def search_resumes(
     # Pagination
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     session: Session = Depends(get_session)
 ):
-    """Advanced resume search with multiple filters"""
+    """Advanced resume search with multiple filters
+
+    Supports offset pagination (skip/limit) and keyset pagination: pass the
+    next_cursor from a previous response as cursor to fetch the following page.
+    """
     try:
-        # Start with base query for latest versions only
         # Use AIResume table since that's where the data is stored
-        if AI_RESUME_SYSTEM_AVAILABLE:
-            query = select(AIResume).where(AIResume.is_latest_version == True)
-        else:
-            query = select(Resume).where(Resume.is_latest_version == True)
+        R = AIResume if AI_RESUME_SYSTEM_AVAILABLE else Resume
+        conditions = [R.is_latest_version == True]
+        ignored_filters = []
+        
+        def column(filter_name: str, *names: str):
+            """First of the named columns that exists on the searched table."""
+            for col_name in names:
+                col = getattr(R, col_name, None)
+                if col is not None:
+                    return col
+            ignored_filters.append(filter_name)
+            return None
         
-        # Apply basic filters
-        if name:
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.where(
-                    or_(
-                        AIResume.first_name.ilike(f"%{name}%"),
-                        AIResume.last_name.ilike(f"%{name}%"),
-                        func.concat(AIResume.first_name, ' ', AIResume.last_name).ilike(f"%{name}%")
-                    )
-                )
-            else:
-                query = query.where(
-                    or_(
-                        Resume.first_name.ilike(f"%{name}%"),
-                        Resume.last_name.ilike(f"%{name}%"),
-                        func.concat(Resume.first_name, ' ', Resume.last_name).ilike(f"%{name}%")
-                    )
-                )
-        if email:
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.where(
-                    or_(
-                        AIResume.primary_email.ilike(f"%{email}%"),
-                        AIResume.secondary_email.ilike(f"%{email}%")
-                    )
-                )
+        def add_ilike_any(filter_name: str, value: str, *names: str):
+            cols = [getattr(R, n) for n in names if getattr(R, n, None) is not None]
+            if cols:
+                conditions.append(or_(*[c.ilike(f"%{value}%") for c in cols]))
             else:
-                query = query.where(
-                    or_(
-                        Resume.primary_email.ilike(f"%{email}%"),
-                        Resume.secondary_email.ilike(f"%{email}%")
-                    )
-                )
-        if phone:
-            query = query.where(
+                ignored_filters.append(filter_name)
+        
+        def add_compare(filter_name: str, value, op: str, *names: str, numeric_text: bool = False):
+            col = column(filter_name, *names)
+            if col is None:
+                return
+            if numeric_text:
+                # Salary columns are free text ("$85,000"); compare their first number
+                col = first_number(col)
+            conditions.append(col >= value if op == ">=" else col <= value if op == "<=" else col == value)
+        
+        # Apply basic filters (compiled once; the same conditions drive results and counts)
+        if name:
+            conditions.append(
                 or_(
-                    Resume.phone.ilike(f"%{phone}%"),
-                    Resume.alternative_phone.ilike(f"%{phone}%")
+                    R.first_name.ilike(f"%{name}%"),
+                    R.last_name.ilike(f"%{name}%"),
+                    func.concat(R.first_name, ' ', R.last_name).ilike(f"%{name}%")
                 )
             )
+        if email:
+            add_ilike_any("email", email, "primary_email", "secondary_email", "email", "alternate_email")
+        if phone:
+            add_ilike_any("phone", phone, "phone", "alternative_phone", "alternate_phone")
         if location or current_location:
             loc = location or current_location
-            query = query.where(Resume.address.ilike(f"%{loc}%"))
+            add_ilike_any("location", loc, "address", "location")
         if years_experience_min:
-            query = query.where(Resume.years_experience >= years_experience_min)
+            add_compare("years_experience_min", years_experience_min, ">=", "years_experience")
         if years_experience_max:
-            query = query.where(Resume.years_experience <= years_experience_max)
+            add_compare("years_experience_max", years_experience_max, "<=", "years_experience")
         if seniority_level:
-            query = query.where(Resume.seniority_level == seniority_level)
+            add_compare("seniority_level", seniority_level, "==", "seniority_level")
         if career_level:
-            query = query.where(Resume.career_level == career_level)
+            add_compare("career_level", career_level, "==", "career_level")
         if management_experience is not None:
-            query = query.where(Resume.management_experience == management_experience)
+            add_compare("management_experience", management_experience, "==", "management_experience")
         if willing_to_relocate is not None or relocation_willing is not None:
             relocate = willing_to_relocate or relocation_willing
-            query = query.where(Resume.relocation == str(relocate).lower())
+            add_compare("willing_to_relocate", str(relocate).lower(), "==", "relocation")
         if willing_to_travel is not None:
-            query = query.where(Resume.willing_to_travel == willing_to_travel)
+            add_compare("willing_to_travel", willing_to_travel, "==", "willing_to_travel")
         if remote_work_preference:
-            query = query.where(Resume.remote_work.ilike(f"%{remote_work_preference}%"))
+            add_ilike_any("remote_work_preference", remote_work_preference, "remote_work", "remote_work_preference")
         if work_authorization:
-            query = query.where(Resume.work_authorization.ilike(f"%{work_authorization}%"))
+            add_ilike_any("work_authorization", work_authorization, "work_authorization")
         
         # Skills and qualifications filters
         if technical_skills:
-            skills_list = [skill.strip() for skill in technical_skills.split(',')]
-            for skill in skills_list:
-                query = query.where(Resume.technical_skills.ilike(f"%{skill}%"))
+            for skill in [skill.strip() for skill in technical_skills.split(',') if skill.strip()]:
+                add_ilike_any("technical_skills", skill, "technical_skills")
         if certifications:
-            certs_list = [cert.strip() for cert in certifications.split(',')]
-            for cert in certs_list:
-                query = query.where(Resume.certifications.ilike(f"%{cert}%"))
+            for cert in [cert.strip() for cert in certifications.split(',') if cert.strip()]:
+                add_ilike_any("certifications", cert, "certifications")
         if licenses:
-            query = query.where(Resume.licenses.ilike(f"%{licenses}%"))
+            add_ilike_any("licenses", licenses, "licenses")
         if education_level:
-            query = query.where(Resume.education_level == education_level)
+            add_compare("education_level", education_level, "==", "education_level")
         
         # Location filters
         if preferred_locations:
-            locations_list = [loc.strip() for loc in preferred_locations.split(',')]
-            for loc in locations_list:
-                query = query.where(Resume.preferred_locations.ilike(f"%{loc}%"))
+            for loc in [loc.strip() for loc in preferred_locations.split(',') if loc.strip()]:
+                add_ilike_any("preferred_locations", loc, "preferred_locations")
         if restricted_locations:
-            restricted_list = [loc.strip() for loc in restricted_locations.split(',')]
-            for loc in restricted_list:
-                query = query.where(~Resume.restricted_locations.ilike(f"%{loc}%"))
+            col = column("restricted_locations", "restricted_locations")
+            if col is not None:
+                for loc in [loc.strip() for loc in restricted_locations.split(',') if loc.strip()]:
+                    conditions.append(~col.ilike(f"%{loc}%"))
         
         # Salary filters
         if current_salary_min:
-            query = query.where(Resume.current_salary >= current_salary_min)
+            add_compare("current_salary_min", current_salary_min, ">=", "current_salary", numeric_text=True)
         if current_salary_max:
-            query = query.where(Resume.current_salary <= current_salary_max)
+            add_compare("current_salary_max", current_salary_max, "<=", "current_salary", numeric_text=True)
         if expected_salary_min:
-            query = query.where(Resume.expected_salary >= expected_salary_min)
+            add_compare("expected_salary_min", expected_salary_min, ">=", "expected_salary", numeric_text=True)
         if expected_salary_max:
-            query = query.where(Resume.expected_salary <= expected_salary_max)
+            add_compare("expected_salary_max", expected_salary_max, "<=", "expected_salary", numeric_text=True)
         
         # Industry and company filters
         if industry_experience:
-            query = query.where(Resume.recommended_industries.ilike(f"%{industry_experience}%"))
+            add_ilike_any("industry_experience", industry_experience, "recommended_industries", "industry_experience")
         if current_company:
-            query = query.where(Resume.current_company.ilike(f"%{current_company}%"))
+            add_ilike_any("current_company", current_company, "current_company")
         
         # AI search filters
+        search_rank = None
         if semantic_query:
-            # For now, search in key fields - can be enhanced with AI later
-            query = query.where(
-                or_(
-                    Resume.technical_skills.ilike(f"%{semantic_query}%"),
-                    Resume.hands_on_skills.ilike(f"%{semantic_query}%"),
-                    Resume.previous_positions.ilike(f"%{semantic_query}%"),
-                    Resume.recommended_industries.ilike(f"%{semantic_query}%")
-                )
-            )
+            # Ranked full-text search (falls back to ilike without the search_vector column)
+            search_condition, search_rank = text_search_clause(R, semantic_query, session)
+            conditions.append(search_condition)
         # job_fit_score filtering skipped - requires job requirements context
         
-        # Apply sorting
-        if sort_by == "experience":
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.order_by(AIResume.years_experience.desc())
-            else:
-                query = query.order_by(Resume.years_experience.desc())
+        # Sort keys (all in one direction, id last) so pages can be keyset-paginated
+        descending = True
+        if sort_by == "experience" and getattr(R, "years_experience", None) is not None:
+            sort_keys = [func.coalesce(R.years_experience, -1), R.id]
         elif sort_by == "salary":
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.order_by(AIResume.current_salary.desc())
-            else:
-                query = query.order_by(Resume.current_salary.desc())
-        elif sort_by == "date":
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.order_by(AIResume.created_at.desc())
-            else:
-                query = query.order_by(Resume.created_at.desc())
+            sort_keys = [func.coalesce(R.current_salary, ''), R.id]
         elif sort_by == "name":
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.order_by(AIResume.first_name.asc(), AIResume.last_name.asc())
-            else:
-                query = query.order_by(Resume.first_name.asc(), Resume.last_name.asc())
-        else:  # relevance
-            if AI_RESUME_SYSTEM_AVAILABLE:
-                query = query.order_by(AIResume.created_at.desc())
-            else:
-                query = query.order_by(Resume.created_at.desc())
+            sort_keys = [func.coalesce(R.first_name, ''), func.coalesce(R.last_name, ''), R.id]
+            descending = False
+        elif sort_by not in ("date", "experience") and search_rank is not None:  # relevance
+            sort_keys = [rank_sort_key(search_rank), R.created_at, R.id]
+        else:  # date / relevance
+            sort_keys = [R.created_at, R.id]
+        
+        page_conditions = list(conditions)
+        if cursor:
+            try:
+                cursor_values = decode_cursor(cursor, sort_by or "relevance")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if len(cursor_values) != len(sort_keys):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            page_conditions.append(keyset_condition(sort_keys, cursor_values, descending))
+        
+        # One query returns the page plus the number of matching rows (window count)
+        query = select(
+            R,
+            func.count().over().label("matching_count"),
+            *[key.label(f"sort_key_{i}") for i, key in enumerate(sort_keys)]
+        ).where(*page_conditions)
+        query = query.order_by(*[key.desc() if descending else key.asc() for key in sort_keys])
+        if not cursor:
+            query = query.offset(skip)
+        query = query.limit(limit)
         
-        # Apply pagination
-        query = query.offset(skip).limit(limit)
+        rows = session.exec(query).all()
+        resumes = [row[0] for row in rows]
         
-        # Execute query
-        resumes = session.exec(query).all()
+        if rows:
+            matching_count = rows[0][1]
+            # The window count is taken before OFFSET; cursor pages skip in WHERE instead
+            remaining = matching_count - len(rows) - (0 if cursor else skip)
+        else:
+            matching_count = None
+            remaining = 0
         
-        # Get total count for pagination (with same filters)
-        if AI_RESUME_SYSTEM_AVAILABLE:
-            count_query = select(func.count(AIResume.id)).where(AIResume.is_latest_version == True)
+        # Total for the whole result set: the window count already is the total for
+        # offset pages; cursor pages (and empty pages) count from the same conditions.
+        if matching_count is not None and not cursor:
+            total_count = matching_count
         else:
-            count_query = select(func.count(Resume.id)).where(Resume.is_latest_version == True)
-        # Apply same filters to count query
-        if name:
-            count_query = count_query.where(
-                or_(
-                    Resume.first_name.ilike(f"%{name}%"),
-                    Resume.last_name.ilike(f"%{name}%"),
-                    func.concat(Resume.first_name, ' ', Resume.last_name).ilike(f"%{name}%")
-                )
-            )
-        # Add other filters to count query as needed...
+            total_count = session.exec(select(func.count()).select_from(R).where(*conditions)).one()
         
-        total_count = session.exec(count_query).one()
+        next_cursor = None
+        if rows and remaining > 0:
+            # Sort-key values follow the model and the window count in each row
+            next_cursor = cursor_from_row(sort_by or "relevance", rows[-1], 2, len(sort_keys))
         
-        return {
+        response = {
             "resumes": resumes,
             "total_count": total_count,
             "skip": skip,
             "limit": limit,
-            "has_more": skip + len(resumes) < total_count,
-            "sort_by": sort_by
+            "has_more": remaining > 0,
+            "sort_by": sort_by,
+            "next_cursor": next_cursor
         }
+        if ignored_filters:
+            response["ignored_filters"] = ignored_filters
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
@@ -4685,21 +4751,17 @@ async def semantic_search_resumes(
         # This can be enhanced with actual AI/ML models later
         
         # Search in multiple fields for semantic matches
-        search_query = select(Resume).where(Resume.is_latest_version == True)
-        
-        # Search across key fields
-        search_conditions = or_(
-            Resume.technical_skills.ilike(f"%{query}%"),
-            Resume.hands_on_skills.ilike(f"%{query}%"),
-            Resume.previous_positions.ilike(f"%{query}%"),
-            Resume.recommended_industries.ilike(f"%{query}%"),
-            Resume.certifications.ilike(f"%{query}%"),
-            Resume.special_notes.ilike(f"%{query}%"),
-            func.concat(Resume.first_name, ' ', Resume.last_name).ilike(f"%{query}%")
-        )
+        # Use AIResume table since that's where the data is stored
+        search_model = AIResume if AI_RESUME_SYSTEM_AVAILABLE else Resume
+        search_query = select(search_model).where(search_model.is_latest_version == True)
+        
+        # Ranked full-text search across key fields (ilike fallback without search_vector)
+        search_conditions, search_rank = text_search_clause(search_model, query, session)
         
         search_query = search_query.where(search_conditions)
-        search_query = search_query.order_by(Resume.created_at.desc())
+        if search_rank is not None:
+            search_query = search_query.order_by(search_rank.desc())
+        search_query = search_query.order_by(search_model.created_at.desc())
         search_query = search_query.limit(limit)
         
         resumes = session.exec(search_query).all()
@@ -4714,6 +4776,69 @@ async def semantic_search_resumes(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
 
+def _skill_matches(canonical_column, canonical: str):
+    """Stored canonical skill equal to canonical or containing it as whole words ("plc" in "siemen s7 plc")"""
+    # Canonical forms contain only [a-z0-9+#. ], so no LIKE wildcards need escaping
+    return or_(
+        canonical_column == canonical,
+        canonical_column.like(f"{canonical} %"),
+        canonical_column.like(f"% {canonical}"),
+        canonical_column.like(f"% {canonical} %"),
+    )
+
+def _skills_match_ai_resumes(session: Session, required_skills_list: List[str], preferred_skills_list: List[str], limit: int) -> Dict[str, Any]:
+    """Rank AI resumes by canonical required/preferred skill overlap in SQL (airesumeskill)"""
+    required = list(dict.fromkeys(c for c in (canonicalize_skill(s) for s in required_skills_list) if c))
+    preferred = [c for c in dict.fromkeys(canonicalize_skill(s) for s in preferred_skills_list) if c and c not in required]
+    if not required:
+        raise HTTPException(status_code=400, detail="At least one required skill is needed")
+    
+    S = AIResumeSkill
+    # Per resume: how many of the requested skills any of its stored skills matches
+    required_hits = sum((func.max(case((_skill_matches(S.canonical, c), 1), else_=0)) for c in required), literal(0))
+    preferred_hits = sum((func.max(case((_skill_matches(S.canonical, c), 1), else_=0)) for c in preferred), literal(0))
+    overlap = (
+        select(S.resume_id, required_hits.label("required_matches"), preferred_hits.label("preferred_matches"))
+        .where(or_(*[_skill_matches(S.canonical, c) for c in required + preferred]))
+        .group_by(S.resume_id)
+        .having(required_hits == len(required))
+        .subquery()
+    )
+    score = overlap.c.required_matches * 100.0 / len(required)
+    if preferred:
+        score = score + overlap.c.preferred_matches * 20.0 / len(preferred)
+    
+    rows = session.exec(
+        select(
+            AIResume.id, AIResume.candidate_id, AIResume.first_name, AIResume.last_name,
+            AIResume.primary_email, AIResume.phone, AIResume.address, AIResume.technical_skills,
+            AIResume.hands_on_skills, AIResume.certifications, AIResume.previous_positions,
+            AIResume.recommended_industries, AIResume.created_at,
+            overlap.c.required_matches, overlap.c.preferred_matches, score.label("skills_match_score"),
+            func.count().over().label("matching_count")
+        )
+        .join(overlap, overlap.c.resume_id == AIResume.id)
+        .where(AIResume.is_latest_version == True)
+        .order_by(score.desc(), AIResume.created_at.desc(), AIResume.id.desc())
+        .limit(limit)
+    ).all()
+    
+    resumes = []
+    for row in rows:
+        item = dict(row._mapping)
+        item.pop("matching_count", None)
+        item["skills_match_score"] = min(float(item["skills_match_score"] or 0), 100)
+        item["required_skills_matched"] = item.pop("required_matches")
+        item["preferred_skills_matched"] = item.pop("preferred_matches")
+        resumes.append(item)
+    
+    return {
+        "resumes": resumes,
+        "total_count": rows[0].matching_count if rows else 0,
+        "required_skills": required_skills_list,
+        "preferred_skills": preferred_skills_list
+    }
+
 @app.get("/api/resumes/skills-match")
 async def skills_match_resumes(
     required_skills: str,
@@ -4726,6 +4851,9 @@ async def skills_match_resumes(
         required_skills_list = [skill.strip() for skill in required_skills.split(',')]
         preferred_skills_list = [skill.strip() for skill in preferred_skills.split(',')] if preferred_skills else []
         
+        if AI_RESUME_SYSTEM_AVAILABLE:
+            return _skills_match_ai_resumes(session, required_skills_list, preferred_skills_list, limit)
+        
         # Start with base query
         query = select(Resume).where(Resume.is_latest_version == True)
         
@@ -4768,6 +4896,8 @@ async def skills_match_resumes(
             "preferred_skills": preferred_skills_list
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Skills matching failed: {str(e)}")
 
@@ -5439,6 +5569,82 @@ async def get_smart_cache_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get smart cache stats: {str(e)}")
 
+@app.get("/api/document-text-stats")
+async def get_document_text_stats():
+    """Document text cache hits and per-engine extraction timings (this API process)"""
+    if not DOCUMENT_TEXT_SERVICE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Document text service not available")
+    return {
+        "success": True,
+        "document_text_stats": get_document_text_service().get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/llm-http-stats")
+async def get_llm_http_stats():
+    """Resume matcher LLM transport: connection pool settings, retries and per-provider latency histograms"""
+    try:
+        from modules.llm_http import get_llm_transport
+        stats = get_llm_transport().get_stats()
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=f"LLM HTTP transport not available: {e}")
+    return {
+        "success": True,
+        "llm_http_stats": stats,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/ai-gateway-stats")
+async def get_ai_gateway_stats():
+    """Job processing AI gateway: circuit breaker state, latency percentiles, hedge and failover counts per provider"""
+    try:
+        from modules.ai_gateway import get_gateway_stats
+        stats = get_gateway_stats()
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=f"AI gateway not available: {e}")
+    return {
+        "success": True,
+        "ai_gateway_stats": stats,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/provider-health")
+async def get_provider_health():
+    """Cached AI provider health per agent/model, with probe and cache hit counts"""
+    try:
+        from modules.provider_health import get_health_snapshot
+        snapshot = get_health_snapshot()
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=f"Provider health registry not available: {e}")
+    return {
+        "success": True,
+        "provider_health": snapshot,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: duration histograms of the traced pipeline stages (this API process)"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/tracing-stats")
+async def get_tracing_stats_endpoint():
+    """Span exporter settings and counts, with per-stage duration totals"""
+    return {
+        "success": True,
+        "tracing_stats": get_tracing_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/logging-stats")
+async def get_logging_stats_endpoint():
+    """Log level, format, rotation and payload sampling settings, and records dropped by the log queue"""
+    return {
+        "success": True,
+        "logging_stats": get_logging_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/api/smart-cache/clear")
 async def clear_smart_cache(cache_type: str = Form(None)):
     """Clear smart cache with optional type specification"""
@@ -6453,28 +6659,20 @@ async def download_drive_files(
         # Create report path in the jobs directory
         report_path = os.path.join(jobs_dir, "download_report.csv")
         
-        # Check for existing files and skip if unchanged
-        existing_files = {}
-        if os.path.exists(report_path):
-            try:
-                import pandas as pd
-                existing_report = pd.read_csv(report_path)
-                existing_files = dict(zip(existing_report['JobID'], existing_report['FileID']))
-                print(f"Found {len(existing_files)} existing files in previous download")
-            except Exception as e:
-                print(f"Could not read existing report: {e}")
-        
-        # Use the existing parallel_download_and_report function
-        # This handles the actual Google Drive file search and download logic
+        # Sync the job files: unchanged files (per the Drive sync manifest) are skipped
         try:
-            parallel_download_and_report(drive, folder_id, job_ids, jobs_dir, report_path)
+            sync_result = await asyncio.to_thread(sync_drive_job_files, drive, folder_id, job_ids, jobs_dir, report_path)
             
             # Read the report to get actual results
             downloaded_count = 0
             skipped_count = 0
             download_results = []
             
-            if os.path.exists(report_path):
+            if sync_result is not None:
+                downloaded_count = sync_result["totals"]["downloaded"]
+                skipped_count = sync_result["totals"]["skipped"]
+                download_results = sync_result["results"]
+            elif os.path.exists(report_path):
                 import pandas as pd
                 report_df = pd.read_csv(report_path)
                 
@@ -6533,9 +6731,12 @@ async def download_drive_files(
 async def copy_local_files(
     job_ids: List[str] = Form(...),
     source_folder: str = Form(...),
-    destination_folder: str = Form(default="")
+    destination_folder: str = Form(default=""),
+    incremental: bool = Form(default=True),
+    verify_hash: bool = Form(default=False),
+    hardlink: bool = Form(default=False)
 ):
-    """Copy local files by Job ID"""
+    """Copy local files by Job ID (incremental by default: unchanged files are skipped)"""
     try:
         from modules.file_operations import copy_files_with_numbers
         import os
@@ -6550,33 +6751,30 @@ async def copy_local_files(
         # Create destination directory if it doesn't exist
         os.makedirs(destination_folder, exist_ok=True)
         
-        # Copy files using the existing function
-        copy_files_with_numbers(source_folder, destination_folder, job_ids)
-        
-        # Check if log files were created to determine success
-        log_copied_path = os.path.join(destination_folder, "log_copied_files_local.txt")
-        log_missing_path = os.path.join(destination_folder, "log_missing_numbers.txt")
-        
-        copied_files = []
-        missing_files = []
-        
-        # Read copied files log
-        if os.path.exists(log_copied_path):
-            with open(log_copied_path, 'r', encoding='utf-8') as f:
-                copied_files = [line.strip() for line in f.readlines() if line.strip()]
+        # Copy files using the existing function (runs in a thread: it blocks on file I/O)
+        manifest = await asyncio.to_thread(
+            copy_files_with_numbers, source_folder, destination_folder, job_ids,
+            incremental=incremental, verify_hash=verify_hash, link=hardlink
+        )
         
-        # Read missing files log
-        if os.path.exists(log_missing_path):
-            with open(log_missing_path, 'r', encoding='utf-8') as f:
-                missing_files = [line.strip() for line in f.readlines() if line.strip()]
+        # Files come from the run manifest: the copy log only lists files transferred in this
+        # run, so an incremental re-run that skipped unchanged files would report none
+        manifest = manifest or {}
+        files = manifest.get("files", {})
+        copied_files = sorted(name for name, info in files.items() if info.get("action") in ("copied", "linked", "skipped"))
+        failed_files = sorted(name for name, info in files.items() if info.get("action") == "failed")
+        missing_files = manifest.get("missing", [])
         
         return {
             "status": "success",
             "message": f"File copy operation completed for {len(job_ids)} job IDs",
             "destination_folder": destination_folder,
             "copied_files": copied_files,
+            "failed_files": failed_files,
             "missing_files": missing_files,
             "destination_path": destination_folder,
+            "totals": manifest.get("totals", {}),
+            "manifest_path": os.path.join(destination_folder, "copy_manifest.json"),
             "open_directory": True  # Flag to show open directory button
         }
         
@@ -6618,8 +6816,9 @@ async def test_ai_agent(agent: str = Form(...), model: str = Form(None)):
         if agent.lower() not in available_agents:
             raise HTTPException(status_code=400, detail=f"Invalid agent. Available: {available_agents}")
         
-        # Use the test function from config with optional model override
-        success, message = config.test_ai_agent(agent.lower(), model)
+        # Explicit test: always probe, and refresh the cached provider health with the result
+        from modules.provider_health import check_provider
+        success, message = check_provider(agent.lower(), model, force=True)
         
         return {
             "success": success,
@@ -6761,7 +6960,7 @@ async def run_pipeline(
         elif pipeline_type == "full_pipeline":
             # Pipeline: MTB > Drive Copy > AI Agent > Final Optimize (Same as original main.py option 7)
             from modules.mtb_processor import master_tracking_board_activities
-            from modules.gdrive_operations import authenticate_drive, extract_folder_id, parallel_download_and_report
+            from modules.gdrive_operations import authenticate_drive, extract_folder_id
             from modules.enhanced_job_processor import EnhancedJobProcessor
             from modules.final_optimizer import FinalOptimizer
             
@@ -6792,7 +6991,7 @@ async def run_pipeline(
                 os.makedirs(folder_path, exist_ok=True)
                 
                 # Download files from Google Drive
-                drive_result = parallel_download_and_report(drive, fid, job_ids, folder_path, report_path)
+                drive_result = sync_drive_job_files(drive, fid, job_ids, folder_path, report_path)
             else:
                 raise HTTPException(status_code=500, detail="Could not authenticate with Google Drive")
             
@@ -7166,11 +7365,13 @@ async def download_missing_job_files(
         report_path = os.path.join(jobs_dir, "download_report.csv")
         
         # Download missing files
-        parallel_download_and_report(drive, folder_id, missing_job_ids, jobs_dir, report_path)
+        sync_result = await asyncio.to_thread(sync_drive_job_files, drive, folder_id, missing_job_ids, jobs_dir, report_path)
         
         # Count downloaded files
         downloaded_count = 0
-        if os.path.exists(report_path):
+        if sync_result is not None:
+            downloaded_count = sync_result["totals"]["downloaded"]
+        elif os.path.exists(report_path):
             try:
                 import pandas as pd
                 report_df = pd.read_csv(report_path)
@@ -7240,10 +7441,12 @@ async def process_job_files(
             report_path = os.path.join(jobs_dir, "download_report.csv")
             
             # Download missing files
-            parallel_download_and_report(drive, folder_id, missing_job_ids, jobs_dir, report_path)
+            sync_result = await asyncio.to_thread(sync_drive_job_files, drive, folder_id, missing_job_ids, jobs_dir, report_path)
             
             # Count downloaded files
-            if os.path.exists(report_path):
+            if sync_result is not None:
+                downloaded_count = sync_result["totals"]["downloaded"]
+            elif os.path.exists(report_path):
                 try:
                     import pandas as pd
                     report_df = pd.read_csv(report_path)
@@ -0,0 +1,18 @@
+-- Resume/job match cache stored in jobmatch
+-- Rows written by the matchers are keyed on
+-- (resume content hash, job criteria hash, model, prompt version)
+-- and do not necessarily reference resume/job table ids.
+
+ALTER TABLE jobmatch ALTER COLUMN resume_id DROP NOT NULL;
+ALTER TABLE jobmatch ALTER COLUMN job_id DROP NOT NULL;
+
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS cache_key VARCHAR(64);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS resume_content_hash VARCHAR(64);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS job_criteria_hash VARCHAR(64);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS job_ref VARCHAR(64);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS model VARCHAR(100);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS prompt_version VARCHAR(64);
+ALTER TABLE jobmatch ADD COLUMN IF NOT EXISTS result_json TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_jobmatch_cache_key ON jobmatch (cache_key);
+CREATE INDEX IF NOT EXISTS ix_jobmatch_resume_content_hash ON jobmatch (resume_content_hash, job_ref);
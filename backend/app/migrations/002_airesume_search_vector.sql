@@ -0,0 +1,32 @@
+-- Full-text search for AI resumes
+-- search_vector is a generated column (not mapped in the ORM); app/resume_search.py
+-- queries it with websearch_to_tsquery + ts_rank_cd. Trigram indexes keep the
+-- remaining substring (ilike) filters index-assisted.
+
+ALTER TABLE airesume ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(technical_skills, '') || ' ' || coalesce(certifications, '') || ' ' || coalesce(licenses, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(hands_on_skills, '') || ' ' || coalesce(previous_positions, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(recommended_industries, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(special_notes, '') || ' ' || coalesce(address, '')), 'D')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_airesume_search_vector ON airesume USING GIN (search_vector);
+
+-- pg_trgm may be unavailable to non-superusers; full-text search works without it
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS ix_airesume_first_name_trgm ON airesume USING GIN (first_name gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_airesume_last_name_trgm ON airesume USING GIN (last_name gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_airesume_primary_email_trgm ON airesume USING GIN (primary_email gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_airesume_technical_skills_trgm ON airesume USING GIN (technical_skills gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_airesume_hands_on_skills_trgm ON airesume USING GIN (hands_on_skills gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_airesume_previous_positions_trgm ON airesume USING GIN (previous_positions gin_trgm_ops);
+EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+    RAISE NOTICE 'pg_trgm not available; skipping trigram indexes';
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_airesume_latest_created ON airesume (is_latest_version, created_at DESC, id DESC);
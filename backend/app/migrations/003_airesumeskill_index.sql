@@ -0,0 +1,5 @@
+-- Normalised skills lookup for /api/resumes/skills-match
+-- airesumeskill is created by SQLModel.metadata.create_all; rows are backfilled
+-- from airesume by AIDatabaseManager.backfill_resume_skills on startup.
+
+CREATE INDEX IF NOT EXISTS ix_airesumeskill_canonical_resume ON airesumeskill (canonical, resume_id);
@@ -0,0 +1,8 @@
+-- Content-hash dedupe for resume uploads
+-- content_hash is the MD5 of the uploaded bytes; text_content_hash is the SHA-256 of
+-- the normalised extracted text. Both are looked up before AI extraction runs.
+
+ALTER TABLE airesume ADD COLUMN IF NOT EXISTS text_content_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS ix_airesume_content_hash ON airesume (content_hash);
+CREATE INDEX IF NOT EXISTS ix_airesume_text_content_hash ON airesume (text_content_hash);
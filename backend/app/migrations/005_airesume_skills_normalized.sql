@@ -0,0 +1,19 @@
+-- Normalised skills bookkeeping and whole-word skill matching
+-- skills_normalized_version records which skill_normalizer version produced a
+-- resume's airesumeskill rows (NULL: not normalised yet), so the startup backfill
+-- only visits new resumes and resumes normalised by an older version.
+
+ALTER TABLE airesume ADD COLUMN IF NOT EXISTS skills_normalized_version INTEGER;
+
+CREATE INDEX IF NOT EXISTS ix_airesume_skills_normalized_version ON airesume (skills_normalized_version);
+
+-- /api/resumes/skills-match also matches requested skills inside longer canonical
+-- skills ("plc" in "siemen s7 plc"); a trigram index keeps those LIKE filters indexed
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS ix_airesumeskill_canonical_trgm ON airesumeskill USING GIN (canonical gin_trgm_ops);
+EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+    RAISE NOTICE 'pg_trgm not available; skipping trigram index';
+END
+$$;
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Resume Search
+Ranked full-text search over AI resumes using the generated airesume.search_vector
+column (see migrations/002_airesume_search_vector.sql), with an ilike fallback for
+databases where the column is not available.
+"""
+
+import json
+import base64
+import threading
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import Float, Numeric, case, cast, func, inspect, literal_column, or_, tuple_
+
+# Fields covered by search_vector; also used by the ilike fallback
+SEARCH_FIELDS = (
+    "first_name", "last_name", "primary_email", "technical_skills", "certifications", "licenses",
+    "hands_on_skills", "previous_positions", "recommended_industries", "special_notes",
+)
+
+SEARCH_CONFIG = "english"
+
+_vector_support = {}
+_vector_lock = threading.Lock()
+
+
+def search_vector_available(bind: Any, table_name: str = "airesume") -> bool:
+    """Return True if the table has the generated search_vector column (checked once per engine)."""
+    engine = bind.get_bind() if hasattr(bind, "get_bind") else getattr(bind, "engine", bind)
+    if engine is None or engine.dialect.name != "postgresql":
+        return False
+    key = (id(engine), table_name)
+    with _vector_lock:
+        if key not in _vector_support:
+            try:
+                columns = {c["name"] for c in inspect(engine).get_columns(table_name)}
+                _vector_support[key] = "search_vector" in columns
+            except Exception as e:
+                print(f"[SEARCH] Could not inspect {table_name}: {e}")
+                _vector_support[key] = False
+        return _vector_support[key]
+
+
+def text_search_clause(model: Any, query_text: str, bind: Any = None) -> Tuple[Any, Optional[Any]]:
+    """
+    Build a search condition and rank expression for a free-text query.
+
+    Args:
+        model: Resume model class (AIResume or legacy Resume)
+        query_text: User query (web-search syntax: quoted phrases, OR, -exclude)
+        bind: Session or engine used to detect search_vector support
+
+    Returns:
+        Tuple of (where_condition, rank_expression); rank_expression is None
+        when falling back to ilike matching
+    """
+    table_name = model.__tablename__
+    if bind is not None and search_vector_available(bind, table_name):
+        vector = literal_column(f"{table_name}.search_vector")
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query_text)
+        return vector.op("@@")(tsquery), func.ts_rank_cd(vector, tsquery)
+
+    pattern = f"%{query_text}%"
+    conditions = [getattr(model, name).ilike(pattern) for name in SEARCH_FIELDS if hasattr(model, name)]
+    if hasattr(model, "first_name") and hasattr(model, "last_name"):
+        conditions.append(func.concat(model.first_name, " ", model.last_name).ilike(pattern))
+    return or_(*conditions), None
+
+
+def first_number(column: Any) -> Any:
+    """
+    First number in a free-text column ("$85,000 - $95,000" → 85000) as NUMERIC.
+
+    Text without a number ("N/A.") yields NULL instead of a cast error.
+    """
+    number = func.regexp_replace(func.substring(column, r"[0-9][0-9,]*(?:\.[0-9]+)?"), ",", "", "g")
+    # The pattern only matches digits with an optional fraction, so the cast cannot fail
+    return case((number.op("~")(r"^[0-9]+(\.[0-9]+)?$"), cast(number, Numeric)), else_=None)
+
+
+def rank_sort_key(rank: Any) -> Any:
+    """
+    ts_rank_cd is float4; order on it as float8 so the value stored in a cursor
+    (a JSON float) compares equal to the row it came from.
+    """
+    return cast(rank, Float(53))
+
+
+# ---------------------------
+# Keyset pagination cursors
+# ---------------------------
+
+def keyset_condition(sort_keys: Sequence[Any], cursor_values: Sequence[Any], descending: bool) -> Any:
+    """Rows strictly after the cursor row in (sort_keys) order."""
+    key_tuple = tuple_(*sort_keys)
+    return key_tuple < tuple_(*cursor_values) if descending else key_tuple > tuple_(*cursor_values)
+
+
+def cursor_from_row(sort_by: str, row: Sequence[Any], first_key_index: int, key_count: int) -> str:
+    """Cursor for the page that follows row, whose sort-key values start at first_key_index."""
+    return encode_cursor(sort_by, [row[first_key_index + i] for i in range(key_count)])
+
+
+def encode_cursor(sort_by: str, values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row on a page as an opaque cursor."""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({"dt": value.isoformat()})
+        else:
+            encoded.append(value)
+    raw = json.dumps({"s": sort_by, "v": encoded}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different sort order
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if data.get("s") != sort_by:
+        raise ValueError("Cursor was issued for a different sort order")
+    values = []
+    for value in data.get("v") or []:
+        if isinstance(value, dict) and "dt" in value:
+            values.append(datetime.fromisoformat(value["dt"]))
+        else:
+            values.append(value)
+    return values
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Resume Section Segmenter
+Splits resume text into contact, summary, experience, education, skills and
+certification sections so extraction prompts can carry only the relevant text,
+and splits long work histories into entry-aligned chunks for parallel extraction.
+"""
+
+import re
+from typing import Dict, List
+
+# Section name → heading phrases (matched against short, heading-like lines)
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "career summary", "executive summary", "about me", "highlights",
+                "qualifications summary", "summary of qualifications"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience",
+                   "professional background", "career experience", "experience summary"),
+    "education": ("education", "education and training", "academic background", "academic qualifications",
+                  "education & training", "training", "professional development"),
+    "skills": ("skills", "technical skills", "core competencies", "competencies", "key skills",
+               "areas of expertise", "expertise", "technical proficiencies", "computer skills",
+               "skills and abilities", "skills & abilities", "core skills"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "licenses & certifications", "certifications & licenses",
+                       "professional certifications", "accreditations"),
+    "other": ("references", "interests", "hobbies", "volunteer", "volunteer experience", "activities",
+              "affiliations", "professional affiliations", "memberships", "awards", "publications",
+              "languages", "additional information"),
+}
+
+_HEADING_LOOKUP = {phrase: name for name, phrases in SECTION_HEADINGS.items() for phrase in phrases}
+_HEADING_CLEAN_RX = re.compile(r"[^a-z& ]+")
+_DATE_RANGE_RX = re.compile(
+    r"(?:19[5-9]\d|20\d{2})\s*(?:-|–|—|to)\s*(?:[A-Za-z]{3,9}\.?\s*|\d{1,2}/)?(?:19[5-9]\d|20\d{2}|present|current|now|date)",
+    re.IGNORECASE,
+)
+
+# Order (and budget priority) of sections in a compact extraction prompt
+PROMPT_SECTION_ORDER = ("contact", "skills", "certifications", "education", "experience", "summary", "other")
+
+
+def _heading_name(line: str) -> str:
+    """Return the section name if the line looks like a section heading, else ''."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60:
+        return ""
+    cleaned = " ".join(_HEADING_CLEAN_RX.sub(" ", stripped.lower()).split())
+    return _HEADING_LOOKUP.get(cleaned, "")
+
+
+def segment_resume(resume_text: str) -> Dict[str, str]:
+    """
+    Split resume text into sections.
+
+    Text before the first recognised heading is treated as the contact block.
+    Repeated headings of the same kind are concatenated.
+
+    Returns:
+        Dict of section name → text for the sections present
+    """
+    sections: Dict[str, List[str]] = {}
+    current = "contact"
+    for line in (resume_text or "").splitlines():
+        name = _heading_name(line)
+        if name:
+            current = name
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
+
+
+def split_experience(experience_text: str, max_chars: int) -> List[str]:
+    """
+    Split a work-history section into chunks of at most ~max_chars.
+
+    Chunk boundaries fall on lines that start a new position (a line carrying a
+    date range, or the title line just above it), so entries are not cut in half.
+    """
+    if len(experience_text) <= max_chars:
+        return [experience_text] if experience_text.strip() else []
+
+    lines = experience_text.splitlines()
+    starts = set()
+    for i, line in enumerate(lines):
+        if _DATE_RANGE_RX.search(line):
+            # The title/company usually sits on the line just above the dates
+            starts.add(i - 1 if i > 0 and lines[i - 1].strip() and not _DATE_RANGE_RX.search(lines[i - 1]) else i)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for i, line in enumerate(lines):
+        if current and i in starts and size + len(line) > max_chars:
+            chunks.append("\n".join(current).strip())
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+        # Hard split for entries larger than a whole chunk
+        if size > max_chars * 1.5:
+            chunks.append("\n".join(current).strip())
+            current, size = [], 0
+    if current and "\n".join(current).strip():
+        chunks.append("\n".join(current).strip())
+    return chunks
+
+
+def build_compact_resume(sections: Dict[str, str], max_chars: int) -> str:
+    """
+    Rebuild resume text from sections, in extraction-priority order, within max_chars.
+
+    Contact, skills, certifications and education are kept whole where possible;
+    experience takes the remaining budget and unrecognised sections come last.
+    """
+    ordered = [name for name in PROMPT_SECTION_ORDER if sections.get(name)]
+    ordered += [name for name in sections if name not in ordered]
+    parts = []
+    remaining = max_chars
+    for name in ordered:
+        body = sections[name]
+        block = body if name == "contact" else f"{name.upper()}\n{body}"
+        if len(block) > remaining:
+            if remaining < 200:
+                break
+            block = block[:remaining]
+        parts.append(block)
+        remaining -= len(block) + 2
+    return "\n\n".join(parts)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Skill Normalizer
+Splits the comma-separated skill/certification strings produced by AI extraction
+and maps each entry to a canonical form ("PLCs", "PLC programming" → "plc"), so
+skills can be stored in airesumeskill and matched on whole canonical words
+("plc" matches "siemens s7 plc").
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Synonyms and spelled-out forms → canonical skill (keys are already normalised)
+SKILL_SYNONYMS: Dict[str, str] = {
+    "plc": "plc",
+    "plc programming": "plc",
+    "programmable logic controller": "plc",
+    "allen bradley plc": "plc",
+    "vfd": "vfd",
+    "variable frequency drive": "vfd",
+    "variable speed drive": "vfd",
+    "hmi": "hmi",
+    "human machine interface": "hmi",
+    "scada": "scada",
+    "dcs": "dcs",
+    "distributed control system": "dcs",
+    "autocad": "autocad",
+    "auto cad": "autocad",
+    "microsoft excel": "excel",
+    "ms excel": "excel",
+    "excel": "excel",
+    "microsoft office": "ms office",
+    "ms office": "ms office",
+    "sap": "sap",
+    "sap pm": "sap pm",
+    "sap plant maintenance": "sap pm",
+    "cmms": "cmms",
+    "computerized maintenance management system": "cmms",
+    "msha": "msha",
+    "msha part 46": "msha",
+    "msha part 48": "msha",
+    "msha certified": "msha",
+    "osha": "osha",
+    "osha 10": "osha 10",
+    "osha 10 hour": "osha 10",
+    "osha 30": "osha 30",
+    "osha 30 hour": "osha 30",
+    "six sigma": "six sigma",
+    "6 sigma": "six sigma",
+    "lean": "lean manufacturing",
+    "lean manufacturing": "lean manufacturing",
+    "root cause analysis": "rca",
+    "rca": "rca",
+    "preventive maintenance": "preventive maintenance",
+    "preventative maintenance": "preventive maintenance",
+    "pm": "preventive maintenance",
+    "predictive maintenance": "predictive maintenance",
+    "pe": "professional engineer",
+    "p e": "professional engineer",
+    "professional engineer": "professional engineer",
+    "pmp": "pmp",
+    "project management professional": "pmp",
+    "iso 9001": "iso 9001",
+    "iso9001": "iso 9001",
+    "iso 9000": "iso 9001",
+    "iso9000": "iso 9001",
+    "cdl": "cdl",
+    "commercial driver license": "cdl",
+    "commercial drivers license": "cdl",
+}
+
+# Words whose trailing "s" is not a plural
+_KEEP_TRAILING_S = {"process", "analysis", "gas", "systems thinking", "logistics", "mathematics", "physics",
+                    "electronics", "hydraulics", "pneumatics", "robotics", "ms", "dcs", "sas", "gis", "aws", "ops",
+                    "solidworks", "windows", "sales"}
+
+_SPLIT_RX = re.compile(r"[,;\n\r•|]+|\s+/\s+")
+_STRIP_RX = re.compile(r"[^A-Za-z0-9+#. ]+")
+
+SKILL_KINDS = ("technical", "hands_on", "certification", "license")
+
+# Bumped whenever canonicalize_skill changes; resumes normalised by an older
+# version are re-normalised by AIDatabaseManager.backfill_resume_skills
+SKILL_NORMALIZER_VERSION = 2
+
+
+def _singular(word: str) -> str:
+    """Singular of one word as written (case preserved), returned lowercase."""
+    # Acronym plurals: "PLCs" → "plc", "VFDs" → "vfd"
+    if len(word) >= 3 and word.endswith("s") and word[:-1].isupper() and word[:-1].isalpha():
+        return word[:-1].lower()
+    word_lower = word.lower()
+    # All-caps acronyms ("CSS", "GIS") and short words ("gas", "ops") are kept as they are
+    if word.isupper() or len(word) <= 3 or word_lower in _KEEP_TRAILING_S:
+        return word_lower
+    word = word_lower
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def canonicalize_skill(name: str) -> str:
+    """
+    Canonical form of a single skill or certification name.
+
+    Strips punctuation and parenthetical notes, lowercases and singularises each
+    word (all-caps acronyms and short words are not singularised), then applies
+    SKILL_SYNONYMS.
+    """
+    if not name:
+        return ""
+    # Case is kept until singularisation so acronyms ("CSS") are not treated as plurals
+    value = re.sub(r"\(.*?\)", " ", name)
+    value = value.replace("-", " ").replace("_", " ")
+    value = _STRIP_RX.sub(" ", value)
+    value = " ".join(value.split()).strip(" .")
+    if not value:
+        return ""
+    if value.lower() in SKILL_SYNONYMS:
+        return SKILL_SYNONYMS[value.lower()]
+    singular = " ".join(_singular(w) for w in value.split())
+    return SKILL_SYNONYMS.get(singular, singular)
+
+
+def split_skills(text: str) -> List[str]:
+    """Split a comma/semicolon/bullet separated skill string into trimmed entries."""
+    if not text:
+        return []
+    return [part.strip(" -*\t") for part in _SPLIT_RX.split(text) if part and part.strip(" -*\t")]
+
+
+def normalize_skill_fields(fields: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    """
+    Normalise (kind, raw_text) pairs into unique (kind, name, canonical) rows.
+
+    Args:
+        fields: Pairs such as ("technical", resume.technical_skills)
+
+    Returns:
+        List of (kind, original_name, canonical_name), de-duplicated per kind
+    """
+    rows = []
+    seen = set()
+    for kind, text in fields:
+        for entry in split_skills(text or ""):
+            canonical = canonicalize_skill(entry)
+            if not canonical or (kind, canonical) in seen:
+                continue
+            seen.add((kind, canonical))
+            rows.append((kind, entry[:200], canonical[:200]))
+    return rows
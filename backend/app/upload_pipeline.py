@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Resume Upload Pipeline
+Processes multi-file resume uploads concurrently: text extraction runs in a process
+pool, AI extraction runs in worker threads with bounded concurrency, and database
+saves are grouped into batched transactions. Every upload gets a batch ID whose
+per-file status can be polled or streamed while the batch is still running.
+"""
+
+import os
+import json
+import time
+import hashlib
+import uuid
+import asyncio
+import functools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from modules.tracing import span, bind_context
+
+try:
+    from modules.document_text import extract_document_text
+    DOCUMENT_TEXT_SERVICE_AVAILABLE = True
+except ImportError:
+    DOCUMENT_TEXT_SERVICE_AVAILABLE = False
+
+# Per-file states, in pipeline order
+FILE_STATES = ("queued", "deduplicating", "extracting_text", "extracting_ai", "saving", "success", "error")
+
+# Normalised text shorter than this (scanned or image-only documents) is not hashed,
+# otherwise every textless upload would dedupe onto the first one
+MIN_HASHED_TEXT_CHARS = int(os.getenv("MIN_HASHED_TEXT_CHARS", "200"))
+
+
+def normalized_text_hash(text: str) -> Optional[str]:
+    """
+    SHA-256 of extracted resume text with case and whitespace normalised, or None
+    when there is too little text for the hash to identify a resume.
+    """
+    normalized = " ".join((text or "").lower().split())
+    if len(normalized) < MIN_HASHED_TEXT_CHARS:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def extract_resume_text(path: str) -> str:
+    """
+    Extract plain text from a saved resume file (PDF, Word or text).
+
+    Module-level so it can run in a ProcessPoolExecutor worker. Uses the shared
+    document text service (cached by content hash) when it is importable.
+    """
+    if DOCUMENT_TEXT_SERVICE_AVAILABLE:
+        return extract_document_text(path)
+    suffix = Path(path).suffix.lower()
+    if suffix == ".pdf":
+        import pypdf
+        with open(path, "rb") as f:
+            reader = pypdf.PdfReader(f)
+            return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+    if suffix in (".doc", ".docx"):
+        import docx
+        return "".join(paragraph.text + "\n" for paragraph in docx.Document(path).paragraphs)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+class UploadBatch:
+    """Status of one upload batch; updated on the event loop thread only."""
+
+    def __init__(self, batch_id: str, filenames: List[str]):
+        self.batch_id = batch_id
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.files: List[Dict[str, Any]] = [{"filename": name, "status": "queued"} for name in filenames]
+        self.events: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+        # (hash kind, hash) -> future of the first file in this batch with that content;
+        # resolves to the resume it was saved as (or matched), None if it failed
+        self.first_by_hash: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def update(self, index: int, **fields: Any) -> None:
+        self.files[index].update(fields)
+        self.events.append(dict(self.files[index], index=index, timestamp=datetime.utcnow().isoformat()))
+        self._notify()
+
+    def finish(self) -> None:
+        self.finished_at = datetime.utcnow()
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake every waiter, then start a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def summary(self) -> Dict[str, Any]:
+        """Batch result in the same shape as the synchronous /api/resumes/upload response."""
+        successful = len([f for f in self.files if f["status"] == "success"])
+        deduplicated = len([f for f in self.files if f.get("deduplicated")])
+        failed = len([f for f in self.files if f["status"] == "error"])
+        return {
+            "success": True,
+            "session_id": self.batch_id,
+            "batch_id": self.batch_id,
+            "status": "completed" if self.done else "processing",
+            "uploaded_resumes": self.files,
+            "total_files": len(self.files),
+            "successful_uploads": successful,
+            "failed_uploads": failed,
+            "deduplicated_uploads": deduplicated,
+            "pending_files": len(self.files) - successful - failed,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ResumeUploadPipeline:
+    """
+    Concurrent resume upload engine shared by all upload requests.
+
+    Stages per file: content-hash lookup (raw bytes before text extraction, then
+    normalised text; a match reuses the stored extraction and makes no AI calls,
+    and a later file in the same batch waits for the first with that hash) →
+    text extraction (process pool) → AI extraction (thread pool, at most
+    ai_concurrency calls in flight across all batches) → DB save (a single writer
+    that commits up to db_batch_size resumes per transaction).
+    """
+
+    def __init__(self, extractor: Any, db_manager: Any, ai_concurrency: Optional[int] = None,
+                 text_workers: Optional[int] = None, db_batch_size: Optional[int] = None,
+                 db_flush_seconds: float = 0.5, max_batches: int = 50):
+        """
+        Args:
+            extractor: AIResumeExtractor instance
+            db_manager: AIDatabaseManager instance
+            ai_concurrency: Maximum concurrent AI extractions (RESUME_UPLOAD_AI_CONCURRENCY, default 4)
+            text_workers: Text extraction processes (RESUME_UPLOAD_TEXT_WORKERS, default min(4, CPUs))
+            db_batch_size: Maximum resumes per DB transaction (RESUME_UPLOAD_DB_BATCH, default 8)
+            db_flush_seconds: How long the writer waits to fill a DB batch
+            max_batches: Number of batches kept in the status registry
+        """
+        self.extractor = extractor
+        self.db_manager = db_manager
+        self.ai_concurrency = ai_concurrency or int(os.getenv("RESUME_UPLOAD_AI_CONCURRENCY", "4"))
+        self.text_workers = text_workers or int(os.getenv("RESUME_UPLOAD_TEXT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.db_batch_size = db_batch_size or int(os.getenv("RESUME_UPLOAD_DB_BATCH", "8"))
+        self.db_flush_seconds = db_flush_seconds
+        self.max_batches = max_batches
+
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._ai_executor = ThreadPoolExecutor(max_workers=self.ai_concurrency, thread_name_prefix="resume-ai")
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resume-db")
+        self.batches: "OrderedDict[str, UploadBatch]" = OrderedDict()
+        self.dedupe_stats = {"files": 0, "raw_hash_hits": 0, "text_hash_hits": 0, "batch_hash_hits": 0}
+
+    # ----------------------------
+    # Batch registry
+    # ----------------------------
+    def create_batch(self, filenames: List[str]) -> UploadBatch:
+        batch = UploadBatch(str(uuid.uuid4()), filenames)
+        self.batches[batch.batch_id] = batch
+        # Drop the oldest finished batches once the registry is full
+        for batch_id in [b for b, v in self.batches.items() if v.done][:max(0, len(self.batches) - self.max_batches)]:
+            del self.batches[batch_id]
+        return batch
+
+    def get_batch(self, batch_id: str) -> Optional[UploadBatch]:
+        return self.batches.get(batch_id)
+
+    def start(self, batch: UploadBatch, files: List[Tuple[int, str, str, str]]) -> asyncio.Task:
+        """Run the batch in the background; returns the task."""
+        batch.task = asyncio.create_task(self.run(batch, files))
+        return batch.task
+
+    async def stream(self, batch: UploadBatch, keepalive_seconds: float = 15.0) -> AsyncIterator[str]:
+        """Yield NDJSON lines: one per file status change, then a final summary line."""
+        sent = 0
+        while True:
+            while sent < len(batch.events):
+                yield json.dumps(dict(batch.events[sent], type="file"), default=str) + "\n"
+                sent += 1
+            if batch.done:
+                break
+            before = len(batch.events)
+            await batch.wait_for_change(keepalive_seconds)
+            if len(batch.events) == before and not batch.done:
+                yield json.dumps({"type": "keepalive", "batch_id": batch.batch_id}) + "\n"
+        yield json.dumps(dict(batch.summary(), type="summary"), default=str) + "\n"
+
+    # ----------------------------
+    # Pipeline
+    # ----------------------------
+    async def run(self, batch: UploadBatch, files: List[Tuple[int, str, str, str]]) -> UploadBatch:
+        """
+        Process saved upload files.
+
+        Args:
+            batch: Batch returned by create_batch
+            files: (index, original_filename, saved_path, content_hash) per file still to process
+        """
+        started = time.time()
+        queue: asyncio.Queue = asyncio.Queue()
+        writer = asyncio.create_task(self._db_writer(batch, queue))
+        try:
+            await asyncio.gather(*(self._process_file(batch, queue, *entry) for entry in files))
+        finally:
+            await queue.put(None)
+            await writer
+            batch.finish()
+        summary = batch.summary()
+        print(f"[UPLOAD] Batch {batch.batch_id}: {summary['successful_uploads']}/{summary['total_files']} saved "
+              f"in {time.time() - started:.1f}s")
+        return batch
+
+    async def _process_file(self, batch: UploadBatch, queue: asyncio.Queue, index: int, filename: str,
+                            saved_path: str, content_hash: str) -> None:
+        loop = asyncio.get_running_loop()
+        owned: List[asyncio.Future] = []
+        resume = None
+        try:
+            with span("resume_upload", file=filename):
+                self.dedupe_stats["files"] += 1
+                batch.update(index, status="deduplicating")
+                existing = await self._find_in_batch(batch, "content_hash", content_hash, owned)
+                if existing:
+                    resume = existing
+                    self.dedupe_stats["batch_hash_hits"] += 1
+                    self._reuse_existing(batch, index, existing, saved_path, "content_hash")
+                    return
+                existing = await self._find_existing(content_hash=content_hash)
+                if existing:
+                    resume = existing
+                    self.dedupe_stats["raw_hash_hits"] += 1
+                    self._reuse_existing(batch, index, existing, saved_path, "content_hash")
+                    return
+
+                batch.update(index, status="extracting_text")
+                try:
+                    resume_content = await self._extract_text(saved_path)
+                except Exception as e:
+                    raise Exception(f"Failed to extract text from {filename}: {str(e)}")
+
+                text_hash = normalized_text_hash(resume_content)
+                existing = await self._find_in_batch(batch, "text_content_hash", text_hash, owned) if text_hash else None
+                if existing:
+                    resume = existing
+                    self.dedupe_stats["batch_hash_hits"] += 1
+                    self._reuse_existing(batch, index, existing, saved_path, "text_content_hash")
+                    return
+                existing = await self._find_existing(text_content_hash=text_hash) if text_hash else None
+                if existing:
+                    resume = existing
+                    self.dedupe_stats["text_hash_hits"] += 1
+                    self._reuse_existing(batch, index, existing, saved_path, "text_content_hash")
+                    return
+
+                batch.update(index, status="extracting_ai")
+                extraction_result = await loop.run_in_executor(
+                    self._ai_executor,
+                    bind_context(functools.partial(self.extractor.extract_resume_data, resume_content, filename, fast_mode=True)),
+                )
+                if extraction_result.get("error"):
+                    self._remove_file(saved_path)
+                    batch.update(index, status="error", message=extraction_result["error"])
+                    return
+
+                file_info = {
+                    "original_filename": filename,
+                    "resume_file_path": saved_path,
+                    "content_hash": content_hash,
+                    "text_content_hash": text_hash,
+                }
+                batch.update(index, status="saving")
+                saved = loop.create_future()
+                await queue.put((index, extraction_result, file_info, saved))
+                resume = await saved
+        except Exception as e:
+            batch.update(index, status="error", message=str(e))
+        finally:
+            for first in owned:
+                if not first.done():
+                    first.set_result(resume)
+
+    @staticmethod
+    async def _find_in_batch(batch: UploadBatch, kind: str, key: str, owned: List[asyncio.Future]) -> Optional[Any]:
+        """
+        Resume of an earlier file in the batch with the same hash, waiting for it to finish.
+
+        The first file with a hash claims it (the future is added to owned and must
+        be resolved by the caller) and gets None, as does a file whose predecessor failed.
+        """
+        first = batch.first_by_hash.get((kind, key))
+        if first is None:
+            first = batch.first_by_hash[(kind, key)] = asyncio.get_running_loop().create_future()
+            owned.append(first)
+            return None
+        return await first
+
+    async def _find_existing(self, **hashes: str) -> Optional[Any]:
+        try:
+            with span("cache_lookup", cache="content_hash", key=next(iter(hashes), "")) as lookup:
+                existing = await asyncio.to_thread(self.db_manager.find_resume_by_content, **hashes)
+                lookup.set_attribute("hit", existing is not None)
+                return existing
+        except Exception as e:
+            print(f"[UPLOAD] Content-hash lookup failed, extracting normally: {e}")
+            return None
+
+    def _reuse_existing(self, batch: UploadBatch, index: int, existing: Any, saved_path: str, matched_on: str) -> None:
+        """Report a stored resume with identical content instead of extracting it again."""
+        existing_path = existing.resume_file_path
+        if existing_path and existing_path != saved_path and os.path.exists(existing_path):
+            # The stored copy is kept; the duplicate upload is not needed
+            self._remove_file(saved_path)
+        elif not existing_path or not os.path.exists(existing_path):
+            existing_path = saved_path
+        batch.update(
+            index,
+            status="success",
+            resume_id=existing.id,
+            candidate_id=existing.candidate_id,
+            extraction_confidence=existing.ai_extraction_confidence or 0.0,
+            validation_confidence=existing.ai_validation_confidence or 0.0,
+            token_count=0,
+            saved_path=existing_path,
+            deduplicated=True,
+            matched_on=matched_on,
+        )
+
+    async def _extract_text(self, path: str) -> str:
+        loop = asyncio.get_running_loop()
+        pool = self._get_process_pool()
+        with span("text_extraction", process_pool=pool is not None) as extraction:
+            if pool is not None:
+                try:
+                    text = await loop.run_in_executor(pool, extract_resume_text, path)
+                    extraction.set_attribute("characters", len(text))
+                    return text
+                except BrokenProcessPool as e:
+                    print(f"[UPLOAD] Text extraction pool failed, falling back to threads: {e}")
+                    self._process_pool = None
+            text = await asyncio.to_thread(extract_resume_text, path)
+            extraction.set_attribute("characters", len(text))
+            return text
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._process_pool is None and self.text_workers > 0:
+            try:
+                # spawn: the API process runs DB/HTTP threads that must not be forked
+                self._process_pool = ProcessPoolExecutor(max_workers=self.text_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+            except Exception as e:
+                print(f"[UPLOAD] Process pool unavailable, extracting text in threads: {e}")
+                self.text_workers = 0
+        return self._process_pool
+
+    async def _db_writer(self, batch: UploadBatch, queue: asyncio.Queue) -> None:
+        """Collect extracted resumes and save them in batched transactions."""
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            item = await queue.get()
+            if item is None:
+                break
+            pending = [item]
+            deadline = loop.time() + self.db_flush_seconds
+            while len(pending) < self.db_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                pending.append(item)
+            await self._flush(batch, pending)
+
+    async def _flush(self, batch: UploadBatch,
+                     pending: List[Tuple[int, Dict[str, Any], Dict[str, Any], asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        items = [(result.get("data", {}), file_info) for _, result, file_info, _ in pending]
+        try:
+            with span("db_write", resumes=len(items)):
+                saved = await loop.run_in_executor(self._db_executor, self.db_manager.save_resumes, items)
+        except Exception as e:
+            saved = [e] * len(pending)
+
+        for (index, extraction_result, file_info, done), outcome in zip(pending, saved):
+            done.set_result(None if isinstance(outcome, Exception) else outcome)
+            if isinstance(outcome, Exception):
+                batch.update(index, status="error", message=str(outcome))
+                continue
+            batch.update(
+                index,
+                status="success",
+                resume_id=outcome.id,
+                candidate_id=outcome.candidate_id,
+                extraction_confidence=extraction_result.get("extraction_confidence", 0.0),
+                validation_confidence=extraction_result.get("validation_confidence", 0.0),
+                token_count=extraction_result.get("total_tokens", 0),
+                validation_skipped=extraction_result.get("validation_skipped", False),
+                saved_path=file_info["resume_file_path"],
+            )
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def shutdown(self) -> None:
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+        self._ai_executor.shutdown(wait=False, cancel_futures=True)
+        self._db_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,5 @@
+"""
+Pipeline Benchmarks
+Synthetic MTB/document/resume generators and an end-to-end benchmark runner
+(python -m benchmarks.run) with per-stage throughput, latency and memory.
+"""
@@ -0,0 +1,262 @@
+"""
+Synthetic Benchmark Data
+Deterministic MasterTrackingBoard CSVs, job description/notes documents (PDF
+and DOCX), resumes and AI extraction results shaped like the production data,
+so every stage can run at any scale without customer files. The same seed and
+scale always produce the same corpus.
+"""
+
+import os
+import csv
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+MTB_COLUMNS = [
+    "JobID", "Company", "Position", "Industry/Segment", "City", "State", "Country",
+    "Salary", "Bonus", "Received (m/d/y)", "Conditional Fee", "Internal",
+    "Client Rating", "CAT", "Visa", "HR/HM", "CM", "Pipeline #",
+    "Pipeline Candidates", "Notes",
+]
+
+COMPANIES = ["Summit Cement", "Granite Ridge Aggregates", "Lakeside Lime", "Prairie Ready Mix",
+             "Blue Mesa Materials", "Ironwood Quarries", "Northstar Cement", "Coastal Aggregates",
+             "Redrock Magnesia", "Cascade Concrete"]
+POSITIONS = ["Plant Manager", "Process Engineer", "Quarry Manager", "Maintenance Manager",
+             "Production Supervisor", "Kiln Operator", "Electrical Supervisor", "Quality Control Manager",
+             "Environmental Manager", "Reliability Engineer", "Operations Director", "Mobile Equipment Mechanic"]
+SEGMENTS = ["Cement", "Aggregates", "RMX", "Lime", "Magnesium"]
+LOCATIONS = [("Austin", "TX"), ("Denver", "CO"), ("Phoenix", "AZ"), ("Birmingham", "AL"),
+             ("Tampa", "FL"), ("Salt Lake City", "UT"), ("Louisville", "KY"), ("Kansas City", "MO"),
+             ("Charlotte", "NC"), ("Boise", "ID"), ("Reno", "NV"), ("Columbus", "OH")]
+CATEGORIES = ["A", "B", "C", "D"]
+VISAS = ["None", "None", "None", "H1B", "TN"]
+PEOPLE = ["J. Alvarez", "M. Chen", "S. Patel", "K. Johnson", "R. Okafor", "L. Novak"]
+SKILLS = ["SAP PM", "DCS", "PLC troubleshooting", "root cause analysis", "MSHA Part 46",
+          "preventive maintenance", "kiln optimization", "crusher operation", "Six Sigma",
+          "budget management", "environmental permitting", "AutoCAD", "vibration analysis"]
+DEGREES = ["BS Chemical Engineering", "BS Mechanical Engineering", "BS Electrical Engineering",
+           "BS Mining Engineering", "Associate Degree", "High School Diploma"]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Drew", "Avery", "Quinn"]
+LAST_NAMES = ["Garcia", "Smith", "Nguyen", "Brown", "Kowalski", "Haddad", "Moreno", "Fischer", "Ito", "Reyes"]
+
+
+def job_id(index: int) -> str:
+    return str(8000 + index)
+
+
+def mtb_rows(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """MTB rows; about 2% are ".1" duplicates of an existing job, as in the real board."""
+    rng = random.Random(f"mtb:{seed}")
+    rows = []
+    for i in range(count):
+        city, state = rng.choice(LOCATIONS)
+        low = rng.randrange(70, 180, 5)
+        salary = rng.choice([f"${low}K-${low + rng.randrange(10, 40, 5)}K",
+                             f"{low},000 - {low + 20},000 DOE", f"${low},000"])
+        bonus_low = rng.randrange(5, 20, 5)
+        jid = job_id(i)
+        if i and rng.random() < 0.02:
+            jid = f"{job_id(rng.randrange(i))}.1"
+        rows.append({
+            "JobID": jid,
+            "Company": rng.choice(COMPANIES),
+            "Position": rng.choice(POSITIONS),
+            "Industry/Segment": rng.choice(SEGMENTS),
+            "City": city,
+            "State": state,
+            "Country": "USA",
+            "Salary": salary,
+            "Bonus": rng.choice([f"{bonus_low}%", f"{bonus_low}-{bonus_low + 5}%", ""]),
+            "Received (m/d/y)": f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.choice([2024, 2025])}",
+            "Conditional Fee": rng.choice(["20%", "25%", "22-25%"]),
+            "Internal": rng.choice(["Yes", "No"]),
+            "Client Rating": str(rng.randint(1, 5)),
+            "CAT": rng.choice(CATEGORIES),
+            "Visa": rng.choice(VISAS),
+            "HR/HM": rng.choice(PEOPLE),
+            "CM": rng.choice(["AB", "CD", "EF"]),
+            "Pipeline #": str(rng.randint(0, 12)),
+            "Pipeline Candidates": ", ".join(rng.sample(FIRST_NAMES, rng.randint(0, 3))),
+            "Notes": rng.choice(["", "Relocation assistance available", "Urgent - client wants slate in 2 weeks",
+                                 "Night shift rotation", "Must have cement kiln experience"]),
+        })
+    return rows
+
+
+def write_mtb_csv(path: str, rows: List[Dict[str, str]]) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MTB_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def job_paragraphs(row: Dict[str, str], rng: random.Random, paragraphs: int) -> List[str]:
+    skills = rng.sample(SKILLS, 4)
+    lines = [
+        f"{row['Company']} is hiring a {row['Position']} for its {row['Industry/Segment']} operation "
+        f"in {row['City']}, {row['State']}.",
+        f"Requirements: {rng.choice(DEGREES)}; {rng.randint(3, 15)}+ years in {row['Industry/Segment'].lower()} "
+        f"or heavy industry; experience with {', '.join(skills)}.",
+        f"Responsibilities: lead the {rng.choice(['production', 'maintenance', 'quality', 'process'])} team, "
+        "own safety and MSHA compliance, drive uptime and cost targets, and report to the plant leadership.",
+        f"Compensation: {row['Salary']} base" + (f" plus {row['Bonus']} bonus" if row["Bonus"] else "") + ".",
+    ]
+    while len(lines) < paragraphs:
+        lines.append(f"Additional duty: {rng.choice(SKILLS)} across shifts, supporting capital projects and "
+                     "continuous improvement initiatives in a 24/7 operating environment.")
+    return lines
+
+
+def note_paragraphs(row: Dict[str, str], rng: random.Random) -> List[str]:
+    return [
+        f"HR notes for job {row['JobID']} ({row['Position']}).",
+        f"Hiring manager {row['HR/HM']} prefers candidates within {rng.choice([50, 100, 250])} miles.",
+        f"Visa sponsorship: {row['Visa']}. {row['Notes']}",
+    ]
+
+
+def _write_pdf(path: str, title: str, paragraphs: List[str], per_page: int = 6) -> None:
+    import fitz  # PyMuPDF
+    doc = fitz.open()
+    pages = [paragraphs[i:i + per_page] for i in range(0, len(paragraphs), per_page)] or [[]]
+    for n, chunk in enumerate(pages):
+        page = doc.new_page()
+        text = (title + "\n\n" if n == 0 else "") + "\n\n".join(chunk)
+        page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def _write_docx(path: str, title: str, paragraphs: List[str]) -> None:
+    from docx import Document
+    doc = Document()
+    doc.add_heading(title, level=1)
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    doc.save(path)
+
+
+def write_document(path_stem: str, kind: str, title: str, paragraphs: List[str]) -> str:
+    """
+    Write a PDF or DOCX document; falls back to .txt when the writer library
+    (PyMuPDF / python-docx) is not installed. Returns the path written.
+    """
+    try:
+        if kind == "pdf":
+            _write_pdf(path_stem + ".pdf", title, paragraphs)
+            return path_stem + ".pdf"
+        if kind == "docx":
+            _write_docx(path_stem + ".docx", title, paragraphs)
+            return path_stem + ".docx"
+    except ImportError:
+        pass
+    with open(path_stem + ".txt", "w", encoding="utf-8") as f:
+        f.write(title + "\n\n" + "\n\n".join(paragraphs))
+    return path_stem + ".txt"
+
+
+def write_job_documents(folder: str, rows: List[Dict[str, str]], seed: int = 0, paragraphs: int = 8,
+                        notes_share: float = 0.3) -> List[str]:
+    """One description per job (PDF and DOCX alternating) plus notes files for notes_share of jobs."""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(f"docs:{seed}")
+    paths = []
+    for i, row in enumerate(rows):
+        safe_title = row["Position"].replace("/", "-")
+        stem = os.path.join(folder, f"{row['JobID']} {row['Company']} {safe_title}")
+        paths.append(write_document(stem, "pdf" if i % 2 == 0 else "docx",
+                                    f"{row['Position']} - {row['Company']}", job_paragraphs(row, rng, paragraphs)))
+        if rng.random() < notes_share:
+            paths.append(write_document(os.path.join(folder, f"{row['JobID']} notes"), "docx",
+                                        f"Notes {row['JobID']}", note_paragraphs(row, rng)))
+    return paths
+
+
+def resume_paragraphs(index: int, rng: random.Random) -> List[str]:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    city, state = rng.choice(LOCATIONS)
+    segment = rng.choice(SEGMENTS)
+    years = rng.randint(2, 25)
+    lines = [
+        name,
+        f"{city}, {state} | candidate{index}@example.com | US Citizen",
+        f"Summary: {years} years in {segment.lower()} and heavy industry operations, including kiln, quarry, "
+        "crushing and ready-mix plants. Focused on safety, reliability and cost.",
+        f"Education: {rng.choice(DEGREES)}",
+        f"Skills: {', '.join(rng.sample(SKILLS, 5))}",
+    ]
+    start = 2025 - years
+    for _ in range(rng.randint(2, 4)):
+        end = min(2025, start + rng.randint(2, 8))
+        lines.append(f"{rng.choice(POSITIONS)}, {rng.choice(COMPANIES)} ({start}-{end}): managed "
+                     f"{rng.randint(5, 80)} staff, improved uptime by {rng.randint(3, 20)}%, led "
+                     f"{rng.choice(SKILLS)} program and MSHA compliance.")
+        start = end
+    return lines
+
+
+def write_resumes(folder: str, count: int, seed: int = 0) -> List[str]:
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(f"resumes:{seed}")
+    return [write_document(os.path.join(folder, f"resume_{i:05d}"), "pdf" if i % 2 == 0 else "docx",
+                           "Resume", resume_paragraphs(i, rng))
+            for i in range(count)]
+
+
+def ai_extraction(row: Dict[str, str], seed: int = 0) -> Dict[str, Any]:
+    """An AI job-extraction result in the JobProcessor template's shape."""
+    rng = random.Random(f"ai:{seed}:{row['JobID']}")
+    return {
+        "required_education": {"degree_level": rng.choice(["Bachelor's", "Associate", "High School"]),
+                               "field_of_study": rng.choice(["Chemical Engineering", "Mechanical Engineering", ""]),
+                               "required_coursework": []},
+        "required_experience": {"total_years_relevant": str(rng.randint(2, 15)),
+                                "specific_industry_experience": [row["Industry/Segment"]],
+                                "function_specific_experience": rng.sample(SKILLS, 2)},
+        "core_technical_skills": {"tools_systems_software_machinery": rng.sample(SKILLS, 3),
+                                  "hands_on_expertise": rng.sample(SKILLS, 2)},
+        "required_soft_skills": {"communication_teamwork_problem_solving_leadership": ["leadership"],
+                                 "traits_for_success": ["ownership"]},
+        "certifications_and_licenses": {"professional_certifications": [], "mandatory_licenses": []},
+        "dealbreakers_disqualifiers": rng.choice([[], ["No relocation"], ["Requires US citizenship"]]),
+        "key_deliverables_responsibilities": ["Safety", "Uptime", "Cost control"],
+        "industry_plant_environment": {"facility_operational_model": "24/7",
+                                       "safety_culture_regulatory_setting": ["MSHA"]},
+        "bonus_criteria": {"culture_fit_work_style": "", "language_requirements": [],
+                           "travel_shift_remote_flexibility": rng.choice(["", "Rotating shifts"])},
+    }
+
+
+def write_corpus(workdir: str, scale: int, seed: int = 0, documents: Optional[int] = None,
+                 resumes: int = 50, paragraphs: int = 8) -> Dict[str, Any]:
+    """
+    Generate (or reuse) the corpus for a scale/seed under workdir.
+
+    Returns paths: mtb_csv, jobs_folder, documents, resumes_folder, resumes, plus the MTB rows.
+    """
+    documents = scale if documents is None else min(documents, scale)
+    root = os.path.join(workdir, f"corpus_s{scale}_d{documents}_r{resumes}_seed{seed}")
+    manifest_path = os.path.join(root, "manifest.json")
+    rows = mtb_rows(scale, seed)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["rows"] = rows
+        print(f"[BENCH] Reusing corpus {root}")
+        return manifest
+
+    print(f"[BENCH] Generating corpus: {scale} MTB rows, {documents} job documents, {resumes} resumes")
+    manifest = {
+        "mtb_csv": write_mtb_csv(os.path.join(root, "MTB", "MasterTrackingBoard.csv"), rows),
+        "jobs_folder": os.path.join(root, "jobs"),
+        "resumes_folder": os.path.join(root, "resumes"),
+    }
+    manifest["documents"] = write_job_documents(manifest["jobs_folder"], rows[:documents], seed, paragraphs)
+    manifest["resumes"] = write_resumes(manifest["resumes_folder"], resumes, seed)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    manifest["rows"] = rows
+    return manifest
@@ -0,0 +1,225 @@
+"""
+Benchmark Harness
+Per-stage measurement (throughput, p50/p95 item latency, peak RSS), the result
+format shared by runs and baselines, and the regression check against a
+stored baseline.
+"""
+
+import os
+import sys
+import time
+import json
+import platform
+import contextlib
+import resource
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Baselines shipped with the repo, one file per scale
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {"throughput_per_s": True, "p50_ms": False, "p95_ms": False, "peak_rss_mb": False}
+
+
+class StageSkipped(Exception):
+    """A stage cannot run in this environment (missing dependency, no stub server, no input)."""
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process from /proc (Linux); None elsewhere."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Lifetime peak RSS (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RSSSampler:
+    """Samples this process's RSS in a background thread to find a stage's peak."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb = current_rss_mb() or 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak_mb:
+                self.peak_mb = rss
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        rss = current_rss_mb()
+        if rss is None:
+            # No /proc: fall back to the lifetime peak, which is at least the stage peak
+            self.peak_mb = max_rss_mb()
+        elif rss > self.peak_mb:
+            self.peak_mb = rss
+
+
+class StageRecorder:
+    """Collects per-item latencies while a stage runs; thread-safe."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.notes: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def timed(self, fn: Callable[..., Any], ok: Callable[[Any], bool] = lambda result: True) -> Callable[..., Any]:
+        """Wrap fn so every call's latency is recorded (exceptions count as errors and re-raise)."""
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.add(time.perf_counter() - started, ok=False)
+                raise
+            self.add(time.perf_counter() - started, ok=ok(result))
+            return result
+        return wrapper
+
+
+def run_stage(name: str, stage: Callable[[StageRecorder], int], quiet: bool = True) -> Dict[str, Any]:
+    """
+    Run one stage and summarise it.
+
+    stage(recorder) does the work, records per-item latencies on the recorder
+    and returns the number of items processed. With quiet, the production
+    code's console output is discarded so terminal I/O does not skew timings.
+    """
+    recorder = StageRecorder()
+    children_before = max_rss_mb(resource.RUSAGE_CHILDREN)
+    print(f"[BENCH] {name}: running")
+    try:
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()), \
+                RSSSampler() as rss:
+            started = time.perf_counter()
+            items = stage(recorder)
+            seconds = time.perf_counter() - started
+    except StageSkipped as e:
+        print(f"[BENCH] {name}: skipped ({e})")
+        return {"status": "skipped", "reason": str(e)}
+    except Exception as e:
+        print(f"[BENCH] {name}: failed ({type(e).__name__}: {e})")
+        return {"status": "failed", "reason": f"{type(e).__name__}: {e}"}
+
+    children_peak = max_rss_mb(resource.RUSAGE_CHILDREN)
+    result = {
+        "status": "ok",
+        "items": items,
+        "errors": recorder.errors,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(items / seconds, 2) if seconds > 0 else None,
+        "p50_ms": _ms(percentile(recorder.latencies, 0.5)),
+        "p95_ms": _ms(percentile(recorder.latencies, 0.95)),
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        # Worker processes (document extraction) are not in this process's RSS
+        "children_peak_rss_mb": round(children_peak, 1) if children_peak > children_before else None,
+    }
+    if recorder.notes:
+        result["notes"] = recorder.notes
+    print(f"[BENCH] {name}: {items} items in {seconds:.2f}s, {result['throughput_per_s']}/s, "
+          f"p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, peak RSS {result['peak_rss_mb']}MB"
+          + (f", {recorder.errors} errors" if recorder.errors else ""))
+    return result
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def environment() -> Dict[str, Any]:
+    """Machine description stored with every result, so baselines are compared like for like."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def make_report(scale: int, seed: int, settings: Dict[str, Any], stages: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "scale": scale,
+        "seed": seed,
+        "environment": environment(),
+        "settings": settings,
+        "stages": stages,
+    }
+
+
+def baseline_path(scale: int) -> str:
+    return os.path.join(BASELINE_DIR, f"scale_{scale}.json")
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of report against baseline: a stage that ran in both whose
+    throughput dropped, or whose latency or peak RSS grew, by more than tolerance.
+    """
+    regressions = []
+    if baseline.get("environment", {}).get("machine") != report["environment"]["machine"]:
+        print("[BENCH] Warning: baseline was recorded on a different machine type; comparison is indicative only")
+    for name, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or previous.get("status") != "ok" or current.get("status") != "ok":
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
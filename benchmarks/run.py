@@ -0,0 +1,181 @@
+"""
+Pipeline Benchmark Runner
+Generates a synthetic corpus, starts the AI stub server, runs the pipeline
+stages and reports throughput, p50/p95 latency and peak RSS per stage,
+compared against the stored baseline for the scale.
+
+Usage (from the repository root):
+    python -m benchmarks.run --scale 1000
+    python -m benchmarks.run --scale 50000 --documents 2000 --stages mtb_filter,json_optimization
+    python -m benchmarks.run --scale 1000 --stub-latency-ms 1500 --stub-jitter-ms 400
+    python -m benchmarks.run --scale 1000 --stub-url http://127.0.0.1:8765   # e.g. a replay-mode stub
+    python -m benchmarks.run --scale 1000 --save-baseline
+"""
+
+import os
+import sys
+import time
+import shlex
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from typing import Dict, List, Optional
+
+from .generators import write_corpus
+from .harness import run_stage, make_report, baseline_path, load_baseline, save_report, compare
+from .stages import STAGES, BenchContext
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_SCRIPT = os.path.join(REPO_ROOT, "scripts", "ai_stub_server.py")
+
+# Path each provider's base URL keeps after the stub's provider prefix
+STUB_PROVIDER_PATHS = {
+    "grok": "/v1",
+    "openai": "/v1",
+    "deepseek": "/v1",
+    "qwen": "/compatible-mode/v1",
+    "zai": "/api/paas/v4",
+    "gemini": "",
+}
+STUB_API_KEYS = ["GROK_API_KEY", "XAI_API_KEY", "OPENAI_API_KEY", "DEEPSEEK_API_KEY",
+                 "DASHSCOPE_API_KEY", "ZAI_API_KEY", "GEMINI_API_KEY"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub(args: argparse.Namespace) -> subprocess.Popen:
+    """Start scripts/ai_stub_server.py on a free port and wait until it answers /health."""
+    port = _free_port()
+    command = [sys.executable, STUB_SCRIPT, "--port", str(port),
+               "--latency-ms", str(args.stub_latency_ms), "--jitter-ms", str(args.stub_jitter_ms),
+               "--seed", str(args.seed)] + shlex.split(args.stub_args or "")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/health", timeout=1).read()
+            process.url = url
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"AI stub server did not start ({' '.join(command)})")
+
+
+def point_clients_at(url: str) -> None:
+    """Route every provider's base URL to the stub; placeholder keys where none is configured."""
+    for provider, path in STUB_PROVIDER_PATHS.items():
+        os.environ[f"{provider.upper()}_BASE_URL"] = f"{url}/{provider}{path}"
+    os.environ["XAI_BASE_URL"] = os.environ["GROK_BASE_URL"]
+    for key in STUB_API_KEYS:
+        os.environ.setdefault(key, "benchmark-stub")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmarks on synthetic data")
+    parser.add_argument("--scale", type=int, default=1000, help="MTB rows (100 to 50,000)")
+    parser.add_argument("--documents", type=int, default=None,
+                        help="Jobs that get description documents (default: all rows)")
+    parser.add_argument("--resumes", type=int, default=50, help="Synthetic resumes to match")
+    parser.add_argument("--ai-jobs", type=int, default=200, help="Maximum jobs sent through job_processing")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the board in mtb_filter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "recruiter_bench"),
+                        help="Corpus and run output directory (corpora are reused across runs)")
+    parser.add_argument("--agent", default="grok", help="AI agent JobProcessor uses (routed to the stub)")
+    parser.add_argument("--match-provider", default="none",
+                        help="Unified matcher scoring: none (rule-based) or openai/gemini/grok via the stub")
+    parser.add_argument("--match-model", default="stub-model")
+    parser.add_argument("--no-stub", action="store_true", help="Do not start the AI stub server")
+    parser.add_argument("--stub-url", default=None, help="Use an already running stub server")
+    parser.add_argument("--stub-latency-ms", type=float, default=800.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--stub-args", default="", help="Extra ai_stub_server.py arguments, e.g. \"--error-rate 0.02\"")
+    parser.add_argument("--output", default=None, help="Result file (default: <workdir>/results_<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Baseline to compare with (default: baselines/scale_<N>.json)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression per metric")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the scale's baseline")
+    parser.add_argument("--no-fail", action="store_true", help="Exit 0 even when regressions are found")
+    parser.add_argument("--verbose", action="store_true", help="Show the production code's console output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in selected if s not in STAGES]
+    if unknown:
+        print(f"[BENCH] Unknown stage(s): {', '.join(unknown)}")
+        return 2
+
+    corpus = write_corpus(args.workdir, args.scale, args.seed, args.documents, args.resumes)
+
+    stub = None
+    stub_url = args.stub_url
+    needs_ai = "job_processing" in selected or ("matching" in selected and args.match_provider != "none")
+    if needs_ai and not stub_url and not args.no_stub:
+        stub = start_stub(args)
+        stub_url = stub.url
+        print(f"[BENCH] AI stub server at {stub_url}")
+
+    ctx = BenchContext(corpus, args.workdir, args.seed, args.repeat, args.ai_jobs,
+                       args.agent, stub_url, args.match_provider, args.match_model)
+    # Environment must be in place before the production modules (and config) are imported
+    os.environ["DATA_DIR"] = ctx.data_dir
+    sys.path.insert(0, REPO_ROOT)
+    if stub_url:
+        point_clients_at(stub_url)
+
+    results: Dict[str, Dict] = {}
+    try:
+        for name in STAGES:
+            if name in selected:
+                results[name] = run_stage(name, lambda recorder, fn=STAGES[name]: fn(ctx, recorder),
+                                          quiet=not args.verbose)
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    settings = {
+        "documents": len(corpus["documents"]), "resumes": len(corpus["resumes"]), "ai_jobs": args.ai_jobs,
+        "repeat": args.repeat, "agent": args.agent, "match_provider": args.match_provider,
+        "stub": stub_url and {"latency_ms": args.stub_latency_ms, "jitter_ms": args.stub_jitter_ms,
+                              "args": args.stub_args, "external": bool(args.stub_url)},
+    }
+    report = make_report(args.scale, args.seed, settings, results)
+    output = args.output or os.path.join(args.workdir, f"results_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    save_report(report, output)
+    print(f"[BENCH] Results written to {output}")
+
+    path = args.baseline or baseline_path(args.scale)
+    baseline = load_baseline(path)
+    regressions: List[str] = []
+    if baseline is None:
+        print(f"[BENCH] No baseline at {path}")
+    else:
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[BENCH] REGRESSION {line}")
+        if not regressions:
+            print(f"[BENCH] No regressions beyond {args.tolerance:.0%} against {path}")
+
+    if args.save_baseline:
+        save_report(report, path)
+        print(f"[BENCH] Baseline saved to {path}")
+    return 1 if regressions and not args.no_fail else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Benchmark Stages
+The pipeline stages in production order. Each stage imports the production
+module it measures lazily (a missing dependency skips the stage instead of
+aborting the run), records one latency per item and returns the item count.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .generators import ai_extraction
+from .harness import StageRecorder, StageSkipped
+
+
+class BenchContext:
+    """Corpus, settings and the outputs later stages consume from earlier ones."""
+
+    def __init__(self, corpus: Dict[str, Any], workdir: str, seed: int, repeat: int, ai_jobs: int,
+                 agent: str, stub_url: Optional[str], match_provider: str, match_model: str):
+        self.corpus = corpus
+        self.rows: List[Dict[str, str]] = corpus["rows"]
+        self.workdir = workdir
+        self.seed = seed
+        self.repeat = repeat
+        self.ai_jobs = ai_jobs
+        self.agent = agent
+        self.stub_url = stub_url
+        self.match_provider = match_provider
+        self.match_model = match_model
+        # DATA_DIR for the run: production code writes outputs, caches and MTB copies here
+        self.data_dir = os.path.join(workdir, f"run_{int(time.time())}")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.filtered_job_ids: Optional[List[str]] = None
+        self.optimized_json: Optional[str] = None
+
+    def documented_job_ids(self) -> List[str]:
+        """Job IDs that have documents, restricted to the MTB filter's result when it ran."""
+        documented = {os.path.basename(p).split(" ", 1)[0] for p in self.corpus["documents"]}
+        ids = self.filtered_job_ids if self.filtered_job_ids is not None else [r["JobID"] for r in self.rows]
+        return [jid for jid in ids if jid in documented]
+
+
+def _require(import_fn: Callable[[], Any], what: str) -> Any:
+    try:
+        return import_fn()
+    except ImportError as e:
+        raise StageSkipped(f"{what} unavailable: {e}")
+
+
+def mtb_filter(ctx: BenchContext, recorder: StageRecorder) -> int:
+    """MasterTrackingBoard filtering and job ID extraction; one latency per full pass over the board."""
+    def load():
+        from modules.mtb_processor import master_tracking_board_activities
+        return master_tracking_board_activities
+    activities = recorder.timed(_require(load, "MTB processor"), ok=bool)
+    job_ids: List[str] = []
+    for _ in range(ctx.repeat):
+        job_ids = activities(ctx.corpus["mtb_csv"], cat="A,B,C", salary_min="60000", extract_job_ids=True)
+    if not job_ids:
+        raise RuntimeError("MTB filter returned no job IDs (see the stage output with --verbose)")
+    ctx.filtered_job_ids = [str(jid) for jid in job_ids]
+    recorder.notes["job_ids_selected"] = len(job_ids)
+    return len(ctx.rows) * ctx.repeat
+
+
+def document_extraction(ctx: BenchContext, recorder: StageRecorder) -> int:
+    """
+    Cold text extraction of every job document (one latency per document), then
+    the process-pool prefetcher's throughput over the same files as a note.
+    """
+    def load():
+        from modules.document_text import DocumentTextService
+        from modules.text_combiner import DocumentPrefetcher
+        return DocumentTextService, DocumentPrefetcher
+    DocumentTextService, DocumentPrefetcher = _require(load, "Document text service")
+    paths = ctx.corpus["documents"]
+    service = DocumentTextService(use_disk_cache=False, max_memory_entries=1)
+    extract = recorder.timed(service.extract, ok=bool)
+    chars = sum(len(extract(path)) for path in paths)
+    recorder.notes["characters"] = chars
+
+    prefetcher = DocumentPrefetcher()
+    started = time.perf_counter()
+    prefetcher.start(paths)
+    for path in paths:
+        prefetcher.get(path)
+    seconds = time.perf_counter() - started
+    prefetcher.shutdown()
+    recorder.notes["prefetch_workers"] = prefetcher.max_workers
+    recorder.notes["prefetch_throughput_per_s"] = round(len(paths) / seconds, 2) if seconds > 0 else None
+    return len(paths)
+
+
+def job_processing(ctx: BenchContext, recorder: StageRecorder) -> int:
+    """JobProcessor.run() against the stub AI server; one latency per job."""
+    if not ctx.stub_url:
+        raise StageSkipped("no AI stub server (use --stub or --stub-url)")
+
+    def load():
+        from modules.job_processor import JobProcessor
+        return JobProcessor
+    JobProcessor = _require(load, "JobProcessor")
+    job_ids = ctx.documented_job_ids()[:ctx.ai_jobs]
+    if not job_ids:
+        raise StageSkipped("no job IDs with documents")
+
+    processor = JobProcessor(job_ids, folder_path=ctx.corpus["jobs_folder"], csv_path=ctx.corpus["mtb_csv"],
+                             ai_agent=ctx.agent, cache_dir=os.path.join(ctx.data_dir, "cache"))
+    processor._process_job = recorder.timed(processor._process_job, ok=bool)
+    cwd = os.getcwd()
+    os.chdir(ctx.data_dir)  # run() also writes to a relative "output" folder
+    try:
+        output = processor.run()
+    finally:
+        os.chdir(cwd)
+    recorder.notes["token_stats"] = dict(processor.token_stats)
+    recorder.notes["output"] = output
+    return len(job_ids)
+
+
+def json_optimization(ctx: BenchContext, recorder: StageRecorder) -> int:
+    """JsonOptimizer.optimize_job() for every MTB row with a synthetic AI extraction; writes the jobs JSON."""
+    def load():
+        from modules.json_optimizer import JsonOptimizer
+        return JsonOptimizer
+    optimizer = _require(load, "JSON optimizer")(input_file=ctx.corpus["mtb_csv"])
+    optimize = recorder.timed(optimizer.optimize_job, ok=bool)
+    inputs = [(ai_extraction(row, ctx.seed), row) for row in ctx.rows]
+    jobs = [optimize(ai_data, row, row["JobID"]) for ai_data, row in inputs]
+
+    ctx.optimized_json = os.path.join(ctx.data_dir, "output", "jobs_bench_optimized.json")
+    os.makedirs(os.path.dirname(ctx.optimized_json), exist_ok=True)
+    with open(ctx.optimized_json, "w", encoding="utf-8") as f:
+        json.dump({"jobs": jobs}, f)
+    return len(jobs)
+
+
+def matching(ctx: BenchContext, recorder: StageRecorder) -> int:
+    """Unified resume matcher over every resume against the optimized jobs; one latency per resume."""
+    if not ctx.optimized_json:
+        raise StageSkipped("needs the jobs JSON from json_optimization")
+    if ctx.match_provider != "none" and not ctx.stub_url:
+        raise StageSkipped(f"match provider '{ctx.match_provider}' needs the AI stub server")
+
+    def load():
+        from modules import ai_resume_matcher_unified
+        return ai_resume_matcher_unified
+    unified = _require(load, "Unified resume matcher")
+    jobs_df = unified.load_jobs(ctx.optimized_json, ctx.corpus["mtb_csv"])
+    client = None if ctx.match_provider == "none" else unified.make_client(ctx.match_provider, ctx.match_model)
+    output_dir = Path(ctx.data_dir) / "matches"
+    run = recorder.timed(unified.run_for_resume, ok=lambda result: result.get("status") in ("ok", "no_fit"))
+    outcomes: Dict[str, int] = {}
+    for resume in ctx.corpus["resumes"]:
+        status = run(Path(resume), jobs_df, client, output_dir).get("status")
+        outcomes[status] = outcomes.get(status, 0) + 1
+    recorder.notes["outcomes"] = outcomes
+    recorder.notes["jobs"] = len(jobs_df)
+    return len(ctx.corpus["resumes"])
+
+
+# Production order; later stages consume earlier stages' outputs
+STAGES: Dict[str, Callable[[BenchContext, StageRecorder], int]] = {
+    "mtb_filter": mtb_filter,
+    "document_extraction": document_extraction,
+    "job_processing": job_processing,
+    "json_optimization": json_optimization,
+    "matching": matching,
+}
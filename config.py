@@ -179,6 +179,35 @@ DEFAULT_JOBID_TXT = "A_AA_jobids.txt"
 # Parallel processing settings
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))  # Default to 8 workers if not specified
 
+# AI gateway: ordered failover, hedged requests and per-provider circuit breakers
+AI_FAILOVER_ORDER = [a.strip().lower() for a in os.getenv("AI_FAILOVER_ORDER", "grok,openai,gemini,deepseek,qwen,zai").split(",") if a.strip()]
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "2"))  # seconds
+AI_HEDGE_MAX_DELAY = float(os.getenv("AI_HEDGE_MAX_DELAY", "60"))  # used until enough latencies are observed
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "3"))  # consecutive failures that open a breaker
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "60"))
+
+# Connection settings per OpenAI-compatible agent: (API key name, base URL, model env var, default model)
+AI_AGENT_SETTINGS = {
+    "grok": ("GROK_API_KEY", GROK_BASE_URL, "GROK_MODEL", GROK_MODEL),
+    "gemini": ("GEMINI_API_KEY", GEMINI_BASE_URL, "GEMINI_MODEL", GEMINI_MODEL),
+    "deepseek": ("DEEPSEEK_API_KEY", DEEPSEEK_BASE_URL, "DEEPSEEK_MODEL", DEEPSEEK_MODEL),
+    "openai": ("OPENAI_API_KEY", OPENAI_BASE_URL, "OPENAI_MODEL", OPENAI_MODEL),
+    "qwen": ("DASHSCOPE_API_KEY", QWEN_BASE_URL, "QWEN_MODEL", QWEN_MODEL),
+    "zai": ("ZAI_API_KEY", ZAI_BASE_URL, "ZAI_MODEL", ZAI_MODEL),
+}
+
+def resolve_ai_agent(ai_agent, api_key=None, model_override=None):
+    """
+    Resolve the connection settings of an AI agent at call time.
+
+    Returns:
+        tuple: (api_key, base_url, model); api_key is empty if none is configured
+    """
+    key_name, base_url, model_env, default_model = AI_AGENT_SETTINGS[ai_agent.lower()]
+    model = model_override or os.getenv(model_env, default_model).strip()
+    return api_key or load_api_key(key_name), base_url, model
+
 # Other settings
 def test_ai_agent(ai_agent, model_override=None):
     """
@@ -0,0 +1,315 @@
+"""
+AI Gateway
+Runs one logical AI request against the configured providers: hedges a slow
+request with a second one after a p95-based delay and takes the first valid
+answer, skips providers whose circuit breaker is open, and fails over in
+config.AI_FAILOVER_ORDER when a provider errors. Breakers and latency samples
+are process-wide, so every processor and worker thread shares what the others
+have observed. Outcomes also feed the provider health registry, so a run
+that starts soon after real traffic skips the connectivity probe.
+"""
+
+import time
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from openai import OpenAI
+
+import config
+from .provider_health import record_success as health_success, record_failure as health_failure
+from .ai_streaming import StreamAborted, StreamStalled
+from .tracing import span, bind_context
+
+# Latency samples kept per provider, and how many are needed before p95 drives the hedge delay
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+def is_rejected_answer(error: Exception) -> bool:
+    """The provider answered but the answer was unusable (aborted stream, unparsable JSON); a stall is an outage."""
+    return isinstance(error, ValueError) and not isinstance(error, StreamStalled)
+
+
+class AIGatewayError(RuntimeError):
+    """Every provider attempt for a request failed (or all breakers are open)."""
+
+    def __init__(self, message: str, errors: Optional[List[Tuple[str, Exception]]] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+    @property
+    def bad_answers_only(self) -> bool:
+        """True if every provider answered but the answers were rejected (aborted stream, unparsable JSON)."""
+        return bool(self.errors) and all(is_rejected_answer(e) for _, e in self.errors)
+
+    @property
+    def partial(self) -> str:
+        """Text received by the most recent aborted stream, or "" if no attempt streamed anything."""
+        for _, e in reversed(self.errors):
+            if isinstance(e, StreamAborted) and e.partial:
+                return e.partial
+        return ""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests flow. After failure_threshold consecutive failures it opens
+    and rejects requests for reset_timeout seconds, then lets a single probe
+    through (half-open); the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class LatencyWindow:
+    """Recent successful-call latencies of one provider."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyWindow] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+
+
+def _breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(config.AI_BREAKER_FAILURES, config.AI_BREAKER_RESET_SECONDS)
+        return _breakers[provider]
+
+
+def _latency(provider: str) -> LatencyWindow:
+    with _registry_lock:
+        return _latencies.setdefault(provider, LatencyWindow())
+
+
+def _count(provider: str, event: str) -> None:
+    with _registry_lock:
+        counts = _counters.setdefault(provider, {})
+        counts[event] = counts.get(event, 0) + 1
+
+
+def _record_error(provider: str, error: Exception) -> None:
+    if is_rejected_answer(error):
+        # The provider answered, but the answer was rejected: not an outage
+        _breaker(provider).record_success()
+        _count(provider, "rejected_answers")
+    else:
+        _breaker(provider).record_failure()
+        _count(provider, "failures")
+
+
+def _record_outcome(provider: str, future: Any) -> None:
+    """Breaker and latency bookkeeping for a request whose answer was not used."""
+    try:
+        _, seconds = future.result()
+    except Exception as e:
+        _record_error(provider, e)
+        return
+    _breaker(provider).record_success()
+    _latency(provider).add(seconds)
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait for provider before hedging: its observed p95, clamped to the configured range."""
+    p95 = _latency(provider).percentile(0.95)
+    if p95 is None:
+        return config.AI_HEDGE_MAX_DELAY
+    return min(config.AI_HEDGE_MAX_DELAY, max(config.AI_HEDGE_MIN_DELAY, p95))
+
+
+def get_gateway_stats() -> Dict[str, Any]:
+    """Breaker state, latency percentiles and request/hedge/failover counts per provider."""
+    with _registry_lock:
+        providers = sorted(set(_breakers) | set(_latencies) | set(_counters))
+    stats = {}
+    for provider in providers:
+        latency = _latency(provider)
+        breaker = _breaker(provider)
+        stats[provider] = {
+            "breaker": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "samples": len(latency),
+            "p50_seconds": latency.percentile(0.5),
+            "p95_seconds": latency.percentile(0.95),
+            "hedge_delay_seconds": hedge_delay(provider),
+            "counts": dict(_counters.get(provider, {})),
+        }
+    return stats
+
+
+class AIGateway:
+    """
+    Hedging, failover-capable front for one primary AI agent.
+
+    call(request) runs request(client, provider, model); the request function
+    performs the completion and raises if the answer is unusable, so only a
+    valid answer wins a hedge race.
+    """
+
+    def __init__(self, primary: str, client: Optional[Any] = None, model: Optional[str] = None,
+                 failover: Optional[List[str]] = None, hedge: Optional[bool] = None, max_workers: int = 16):
+        self.primary = primary.lower()
+        self.hedge = config.AI_HEDGE_ENABLED if hedge is None else hedge
+        order = failover if failover is not None else config.AI_FAILOVER_ORDER
+        self._clients: Dict[str, Tuple[Any, str]] = {}
+        if client is not None:
+            self._clients[self.primary] = (client, model)
+        self.providers = [self.primary] + [p for p in order if p != self.primary and self._configured(p)]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-gateway")
+        self._lock = threading.Lock()
+
+    def _configured(self, provider: str) -> bool:
+        """Failover providers need an API key; unknown agents are ignored."""
+        if provider not in config.AI_AGENT_SETTINGS:
+            return False
+        return bool(config.resolve_ai_agent(provider)[0])
+
+    def _client(self, provider: str) -> Tuple[Any, str]:
+        with self._lock:
+            if provider not in self._clients:
+                api_key, base_url, model = config.resolve_ai_agent(provider)
+                self._clients[provider] = (OpenAI(api_key=api_key, base_url=base_url), model)
+            return self._clients[provider]
+
+    def _run(self, request: Callable[[Any, str, str], Any], provider: str, kind: str) -> Tuple[Any, float]:
+        client, model = self._client(provider)
+        started = time.monotonic()
+        with span("ai_attempt", provider=provider, model=model, kind=kind):
+            result = request(client, provider, model)
+        return result, time.monotonic() - started
+
+    def _submit(self, request: Callable[[Any, str, str], Any], provider: str, kind: str,
+                pending: Dict[Any, str]) -> bool:
+        if not _breaker(provider).allow():
+            _count(provider, "breaker_skipped")
+            return False
+        _count(provider, kind)
+        # Attempts run as children of the caller's span (ai_request), hedges included
+        pending[self._executor.submit(bind_context(self._run), request, provider, kind)] = provider
+        return True
+
+    def call(self, request: Callable[[Any, str, str], Any], label: str = "") -> Tuple[str, Any]:
+        """
+        Run request until one provider returns a valid answer.
+
+        Returns:
+            (provider that answered, request's return value)
+
+        Raises:
+            AIGatewayError: Every attempted provider failed, or none was available
+        """
+        tag = f"[AI_GATEWAY]{' ' + label if label else ''}"
+        queue = list(self.providers)
+        pending: Dict[Any, str] = {}
+        errors: List[Tuple[str, Exception]] = []
+        hedged = False
+
+        def launch(kind: str) -> bool:
+            while queue:
+                if self._submit(request, queue.pop(0), kind, pending):
+                    return True
+            return False
+
+        if not launch("requests"):
+            raise AIGatewayError("No AI provider available (all circuit breakers open)")
+        first_provider = next(iter(pending.values()))
+
+        while pending:
+            timeout = hedge_delay(first_provider) if self.hedge and not hedged else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slower than this provider's p95: race a second request on the next provider
+                # (or the same one when it is the only provider available)
+                hedged = True
+                if launch("hedges") or self._submit(request, first_provider, "hedges", pending):
+                    print(f"{tag} {first_provider} slower than {timeout:.1f}s; hedging on {list(pending.values())[-1]}")
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    _record_error(provider, e)
+                    if not is_rejected_answer(e):
+                        health_failure(provider, self._clients[provider][1], e)
+                    errors.append((provider, e))
+                    print(f"{tag} {provider} failed: {e}")
+                    continue
+                _breaker(provider).record_success()
+                _latency(provider).add(seconds)
+                _count(provider, "wins")
+                health_success(provider, self._clients[provider][1])
+                # A slower in-flight duplicate keeps running; its answer is discarded, but its
+                # latency still counts so p95 is not biased towards the winners
+                for loser, loser_provider in pending.items():
+                    loser.add_done_callback(functools.partial(_record_outcome, loser_provider))
+                return provider, result
+            if not pending and launch("failovers"):
+                print(f"{tag} failing over to {list(pending.values())[-1]}")
+
+        raise AIGatewayError("All AI providers failed: " + "; ".join(f"{p}: {e}" for p, e in errors), errors)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
@@ -0,0 +1,278 @@
+"""
+AI Response Record/Replay
+Cassettes of provider responses keyed by a hash of the request, synthetic
+responses shaped by the request's JSON schema or prompt template, and latency
+and fault injection. Used by scripts/ai_stub_server.py so the processors,
+resume matchers and resume extractor can be benchmarked end to end without
+live provider calls: point their *_BASE_URL settings at the stub server.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Request fields that do not change the answer and must not change the cassette key
+VOLATILE_FIELDS = {"stream", "stream_options", "user", "prompt_cache_key", "timeout", "metadata", "store"}
+
+FAULTS = ("rate_limit", "server_error", "stall", "malformed")
+
+
+def request_key(provider: str, endpoint: str, body: Dict[str, Any]) -> str:
+    """Stable hash of a request: provider, endpoint and the body without volatile fields."""
+    canonical = {k: v for k, v in (body or {}).items() if k not in VOLATILE_FIELDS}
+    extra = canonical.get("extra_body")
+    if isinstance(extra, dict):
+        canonical["extra_body"] = {k: v for k, v in extra.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps([provider or "", endpoint, canonical], sort_keys=True,
+                         separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """Directory of recorded responses, one JSON file per request key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            self.stats[event] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        entry = dict(entry, key=key, recorded_at=datetime.now().isoformat())
+        tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._path(key))
+        self._count("recorded")
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+
+def example_from_schema(schema: Dict[str, Any]) -> Any:
+    """Smallest value that satisfies a (strict, structured-output style) JSON schema."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    for combinator in ("anyOf", "oneOf"):
+        if combinator in schema:
+            options = [s for s in schema[combinator] if s.get("type") != "null"] or schema[combinator]
+            return example_from_schema(options[0])
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {k: example_from_schema(v) for k, v in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [example_from_schema(schema.get("items", {"type": "string"}))]
+    if kind == "string":
+        return "synthetic"
+    if kind in ("number", "integer"):
+        return 0
+    if kind == "boolean":
+        return False
+    return None
+
+
+def request_text(body: Dict[str, Any]) -> str:
+    """Prompt text of an OpenAI chat or Gemini generateContent request."""
+    parts = []
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+        elif content:
+            parts.append(str(content))
+    for item in body.get("contents") or []:
+        parts.extend(p.get("text", "") for p in item.get("parts", []) if isinstance(p, dict))
+    return "\n".join(parts)
+
+
+def _prompt_template(text: str) -> Optional[Any]:
+    """The JSON template embedded in a prompt, if the text between the outer braces parses."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+def synthetic_content(body: Dict[str, Any]) -> str:
+    """
+    Deterministic response text for a request: an instance of its json_schema
+    response_format, else the JSON template embedded in its prompt, else {}.
+    """
+    response_format = body.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    if response_format.get("type") == "json_schema" and schema:
+        return json.dumps(example_from_schema(schema))
+    template = _prompt_template(request_text(body))
+    return json.dumps(template if template is not None else {})
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+def chat_completion(model: str, content: str, prompt_tokens: int, finish_reason: str = "stop") -> Dict[str, Any]:
+    """Non-streaming chat.completion body."""
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-stub-{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                     "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens,
+                  "prompt_tokens_details": {"cached_tokens": 0}},
+    }
+
+
+def chat_completion_chunks(completion: Dict[str, Any], chunk_chars: int = 16,
+                           include_usage: bool = False) -> Iterator[Dict[str, Any]]:
+    """chat.completion.chunk objects that stream a chat.completion body."""
+    content = completion["choices"][0]["message"].get("content") or ""
+    base = {"id": completion.get("id", "chatcmpl-stub"), "object": "chat.completion.chunk",
+            "created": completion.get("created", int(time.time())), "model": completion.get("model")}
+    yield dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+    for i in range(0, len(content), chunk_chars):
+        yield dict(base, choices=[{"index": 0, "delta": {"content": content[i:i + chunk_chars]},
+                                   "finish_reason": None}])
+    yield dict(base, choices=[{"index": 0, "delta": {},
+                               "finish_reason": completion["choices"][0].get("finish_reason") or "stop"}])
+    if include_usage and completion.get("usage"):
+        yield dict(base, choices=[], usage=completion["usage"])
+
+
+def gemini_response(content: str, prompt_tokens: int) -> Dict[str, Any]:
+    """generateContent response body."""
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": content}]}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": estimate_tokens(content),
+                          "totalTokenCount": prompt_tokens + estimate_tokens(content)},
+    }
+
+
+def response_content(response: Dict[str, Any]) -> str:
+    """Text of a chat.completion or generateContent response body."""
+    try:
+        return response["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        pass
+    try:
+        return response["candidates"][0]["content"]["parts"][0]["text"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+
+def replace_content(response: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """Copy of a chat.completion or generateContent response body with its text replaced."""
+    response = json.loads(json.dumps(response))
+    if response.get("choices"):
+        response["choices"][0]["message"]["content"] = content
+    elif response.get("candidates"):
+        response["candidates"][0]["content"]["parts"] = [{"text": content}]
+    return response
+
+
+def malformed(content: str) -> str:
+    """A degraded copy of content: prose around the JSON and the end cut off."""
+    return "Sure! Here is the JSON you asked for:\n```json\n" + content[:max(1, len(content) // 2)]
+
+
+class StubBehaviour:
+    """
+    Latency and fault injection for the stub server.
+
+    Each decision is drawn from a generator seeded by (seed, request key,
+    attempt number), so a run is reproducible regardless of thread scheduling
+    and a retried request gets a fresh draw.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, first_token_ms: Optional[float] = None,
+                 tokens_per_second: float = 0.0, rate_limit_rate: float = 0.0, error_rate: float = 0.0,
+                 stall_rate: float = 0.0, malformed_rate: float = 0.0, stall_seconds: float = 600.0,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.rates = {"rate_limit": rate_limit_rate, "server_error": error_rate,
+                      "stall": stall_rate, "malformed": malformed_rate}
+        self.stall_seconds = stall_seconds
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {"requests": 0}
+
+    def rng(self, key: str) -> random.Random:
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+            self.stats["requests"] += 1
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+
+    def fault(self, rng: random.Random) -> Optional[str]:
+        draw = rng.random()
+        for fault in FAULTS:
+            draw -= self.rates[fault]
+            if draw < 0:
+                with self._lock:
+                    self.stats[fault] = self.stats.get(fault, 0) + 1
+                return fault
+        return None
+
+    def latency(self, rng: random.Random, recorded: Optional[float] = None, streaming: bool = False) -> float:
+        """
+        Seconds before the response (before the first chunk when streaming). A
+        recorded latency replaces the configured mean.
+        """
+        if recorded is not None:
+            base = recorded * 1000
+        elif streaming and self.first_token_ms is not None:
+            base = self.first_token_ms
+        else:
+            base = self.latency_ms
+        return max(0.0, base + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def chunk_delay(self, chunk_chars: int) -> float:
+        """Seconds between streamed chunks at the configured token rate."""
+        if not self.tokens_per_second:
+            return 0.0
+        return estimate_tokens("x" * chunk_chars) / self.tokens_per_second
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, distinct_requests=len(self._attempts))
+
+
+def sse_lines(chunks: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Server-sent event lines of a chat completion stream."""
+    for chunk in chunks:
+        yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+    yield b"data: [DONE]\n\n"
@@ -11,19 +11,45 @@ Drop-in replacement for your existing AIResumeMatcher.
 
 import os
 import json
-import tempfile
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
-import docx
-import PyPDF2
 from openai import OpenAI
 import config
+from .prompt_packer import PromptPacker, RESUME_SUMMARY_CACHE, merge_ranked
+from .match_cache import get_match_cache, hash_text, hash_job_criteria, prompt_version_for, make_cache_key
+from .document_text import get_document_text_service, DocumentTextError
+from .json_repair import loads_lenient, JSONRepairError
+from .prompt_cache import prefix_messages, prompt_cache_kwargs, record_usage
+from .provider_health import check_provider
+from .logging_setup import get_logger, log_payload, sample_payloads
+import threading
 import time
-import subprocess
-import shutil
 import re
 import difflib
 
+logger = get_logger("resume_matcher")
+
+# Fixed head of every shortlist user prompt (follows the system prompt in the cacheable prefix)
+SHORTLIST_INSTRUCTIONS = """
+You will analyze the candidate and job subset given below.
+
+### Instructions
+1) Evaluate only the jobs provided below.
+2) Score each job using the 100-point rubric.
+3) Select the top six jobs (or fewer if fewer are viable), and return:
+   - First: the JSON object per the schema in the system prompt.
+   - Second: a Markdown report:
+     - Title: “Top 6 Job Matches (Ready for HR Submission)”
+     - A table with columns: JobID | Company | Position | Industry | Location | Fit Score | Why Fit | Risks/Gaps | Education Fit | Visa/Other
+     - A “Submission Notes” bullet list (3–5 bullets).
+
+Rules:
+- Do not invent data; only use the resume and the jobs array below.
+- Always include the actual jobId (accept jobId or jobid field).
+- If a strict degree requirement is not met and the job text says it’s non-negotiable, set Education Fit = “Miss” and penalize accordingly.
+- Keep the Markdown concise and easy to scan for HR.
+"""
+
 class AIResumeMatcher:
     """
     Class for matching resumes to jobs using AI.
@@ -79,7 +105,7 @@ class AIResumeMatcher:
 
         # Validate model before initializing client
         if self.ai_agent == "openai":
-            success, message = config.test_ai_agent("openai")
+            success, message = check_provider("openai", self.model)
             if not success:
                 raise ValueError(f"OpenAI model validation failed: {message}")
 
@@ -92,6 +118,20 @@ class AIResumeMatcher:
         # Install the optimized system prompt
         self.system_prompt = self._build_system_prompt()
 
+        # Token-budget packer for the jobs sent with each model call. The response is a
+        # fixed-size shortlist, so output tokens do not grow with the number of jobs.
+        self.prompt_packer = PromptPacker(model=self.model, max_output_tokens=3500,
+                                          base_output_tokens=3500, output_tokens_per_job=0)
+
+        # Persistent resume/job match cache (invalidated by resume, job, model or prompt changes)
+        self.prompt_version = prompt_version_for("shortlist6", self.system_prompt)
+        self.match_cache = get_match_cache()
+
+        # Provider token usage, including input tokens served from the provider's prompt cache
+        self.token_stats = {"ai_calls": 0, "total_uploaded": 0, "total_output": 0,
+                            "cached_input_tokens": 0, "uncached_input_tokens": 0}
+        self._stats_lock = threading.Lock()
+
     # ----------------------------
     # Prompts
     # ----------------------------
@@ -178,191 +218,43 @@ Required Markdown (return this SECOND):
         else:
             resume_excerpt = resume_text or ""
 
-        return f"""
-You will analyze the following candidate and job subset.
-
+        # Static instructions come first so the prompt prefix stays identical across calls
+        return f"""{SHORTLIST_INSTRUCTIONS}
 ### Candidate (Resume Excerpt)
 {resume_excerpt}
 
 ### Jobs Subset (JSON Array)
 {json.dumps(jobs_subset, indent=2)}
-
-### Instructions
-1) Evaluate only the jobs provided above.
-2) Score each job using the 100-point rubric.
-3) Select the top six jobs (or fewer if fewer are viable), and return:
-   - First: the JSON object per the schema in the system prompt.
-   - Second: a Markdown report:
-     - Title: “Top 6 Job Matches (Ready for HR Submission)”
-     - A table with columns: JobID | Company | Position | Industry | Location | Fit Score | Why Fit | Risks/Gaps | Education Fit | Visa/Other
-     - A “Submission Notes” bullet list (3–5 bullets).
-
-Rules:
-- Do not invent data; only use the resume and the jobs array above.
-- Always include the actual jobId (accept jobId or jobid field).
-- If a strict degree requirement is not met and the job text says it’s non-negotiable, set Education Fit = “Miss” and penalize accordingly.
-- Keep the Markdown concise and easy to scan for HR.
 """
 
     # ----------------------------
     # Resume text extraction
     # ----------------------------
     def extract_text_from_resume(self, file_path: str) -> str:
+        """Extract resume text via the shared (cached) document text service."""
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
-
-        if ext == '.pdf':
-            return self._extract_text_from_pdf(file_path)
-        elif ext in ['.docx', '.doc']:
-            return self._extract_text_from_docx(file_path)
-        elif ext == '.txt':
-            return self._extract_text_from_txt(file_path)
-        else:
+        if ext not in ('.pdf', '.docx', '.doc', '.txt'):
             raise ValueError(f"Unsupported file format: {ext}")
 
-    def _extract_text_from_pdf(self, file_path: str) -> str:
-        text = ""
-        repaired_path: Optional[str] = None
-        repair_method: Optional[str] = None
-        stderr_val = ""
-        try:
-            with open(file_path, 'rb') as f:
-                try:
-                    import io, contextlib
-                    stderr_buf = io.StringIO()
-                    with contextlib.redirect_stderr(stderr_buf):
-                        pdf_reader = PyPDF2.PdfReader(f)
-                    stderr_val = stderr_buf.getvalue().strip()
-                except Exception as initial_e:
-                    try:
-                        f.seek(0)
-                        import io, contextlib
-                        stderr_buf = io.StringIO()
-                        with contextlib.redirect_stderr(stderr_buf):
-                            pdf_reader = PyPDF2.PdfReader(f, strict=False)
-                        stderr_val = stderr_buf.getvalue().strip()
-                    except Exception:
-                        repaired = False
-                        try:
-                            try:
-                                import pikepdf  # type: ignore
-                            except Exception:
-                                pikepdf = None  # type: ignore
-
-                            if pikepdf:
-                                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                                tmp_path = tmp.name
-                                tmp.close()
-                                try:
-                                    pikepdf.Pdf.open(file_path).save(tmp_path)
-                                    repaired = True
-                                    repaired_path = tmp_path
-                                    repair_method = "pikepdf"
-                                except Exception:
-                                    try:
-                                        os.unlink(tmp_path)
-                                    except Exception:
-                                        pass
-                                    repaired = False
-
-                            if not repaired and shutil.which("qpdf"):
-                                tmp2 = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                                tmp2_path = tmp2.name
-                                tmp2.close()
-                                try:
-                                    res = subprocess.run(["qpdf", "--linearize", file_path, tmp2_path], capture_output=True, text=True)
-                                    if res.returncode == 0:
-                                        repaired = True
-                                        repaired_path = tmp2_path
-                                        repair_method = "qpdf"
-                                    else:
-                                        try:
-                                            os.unlink(tmp2_path)
-                                        except Exception:
-                                            pass
-                                except Exception:
-                                    try:
-                                        os.unlink(tmp2_path)
-                                    except Exception:
-                                        pass
-
-                            if repaired and repaired_path:
-                                with open(repaired_path, "rb") as rf:
-                                    import io, contextlib
-                                    stderr_buf = io.StringIO()
-                                    with contextlib.redirect_stderr(stderr_buf):
-                                        pdf_reader = PyPDF2.PdfReader(rf)
-                                    stderr_val = stderr_buf.getvalue().strip()
-                            else:
-                                raise initial_e
-                        except Exception:
-                            raise initial_e
-
-                for page_num in range(len(pdf_reader.pages)):
-                    try:
-                        page_text = pdf_reader.pages[page_num].extract_text() or ""
-                    except Exception:
-                        page_text = ""
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            try:
-                import re as _re
-                with open(file_path, 'rb') as f:
-                    raw = f.read()
-                matches = _re.findall(rb'[\x20-\x7E]{20,}', raw)
-                chunks = [m.decode('latin-1', errors='ignore') for m in matches[:80]]
-                text = "\n".join(chunks).strip()
-            except Exception as e2:
-                if repaired_path:
-                    try:
-                        os.unlink(repaired_path)
-                    except Exception:
-                        pass
-                raise ValueError(f"Error extracting text from PDF: {e2}")
-
         try:
-            self._last_pdf_processing = {
-                "file": os.path.basename(file_path),
-                "repaired_path": repaired_path,
-                "repair_method": repair_method,
-                "stderr_warnings": stderr_val,
-                "extracted_length": len(text) if text else 0
-            }
-        except Exception:
-            self._last_pdf_processing = {}
-
-        if repaired_path:
-            try:
-                os.unlink(repaired_path)
-            except Exception:
-                pass
-
-        if not text.strip():
-            raise ValueError("PDF text extraction failed (possibly scanned or corrupted).")
-        return text + "\n"
-
-    def _extract_text_from_docx(self, file_path: str) -> str:
-        text = ""
-        try:
-            doc = docx.Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        except Exception as e:
-            raise ValueError(f"Error extracting text from DOCX: {str(e)}")
+            info = get_document_text_service().extract_with_info(file_path, raw_fallback=True)
+        except DocumentTextError as e:
+            raise ValueError(f"Error extracting text from {ext.lstrip('.').upper()}: {e}")
+        self._last_pdf_processing = {
+            "file": os.path.basename(file_path),
+            "engine": info["engine"],
+            "cached": info["cached"],
+            "extracted_length": len(info["text"]),
+        } if ext == '.pdf' else {}
+
+        text = info["text"]
+        if ext == '.pdf':
+            if not text.strip():
+                raise ValueError("PDF text extraction failed (possibly scanned or corrupted).")
+            return text + "\n"
         return text
 
-    def _extract_text_from_txt(self, file_path: str) -> str:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    return f.read()
-            except Exception as e:
-                raise ValueError(f"Error extracting text from TXT: {str(e)}")
-
     # ----------------------------
     # Job pre-filtering
     # ----------------------------
@@ -380,6 +272,19 @@ Rules:
             "raw": job
         }
 
+    # Raw job keys already represented by the normalized fields above
+    _NORMALIZED_RAW_KEYS = {"jobId", "jobid", "jobTitle", "position", "clientName", "company", "industry",
+                            "industry/Segment", "segment", "city", "state", "location", "matchCriteria"}
+
+    def _prompt_job_payload(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized job for the prompt, without repeating fields duplicated in 'raw'."""
+        payload = {k: v for k, v in job.items() if k != "raw"}
+        extra = {k: v for k, v in (job.get("raw") or {}).items()
+                 if k not in self._NORMALIZED_RAW_KEYS and v not in (None, "", [], {})}
+        if extra:
+            payload["details"] = extra
+        return payload
+
     def _pre_filter_jobs(self, jobs_data: Any, resume_text: str, target_size: int = 20) -> List[Dict[str, Any]]:
         """
         Thin jobs to ~target_size by industry/function/education/seniority/keywords.
@@ -623,13 +528,19 @@ Rules:
     # Model call + parsing
     # ----------------------------
     def _call_model_with_retry(self, user_prompt, max_completion_tokens=3500, temp=0.2):
+        response = self._create_completion(user_prompt, max_completion_tokens, temp)
+        record_usage(self.token_stats, getattr(response, "usage", None), self._stats_lock)
+        return response
+
+    def _create_completion(self, user_prompt, max_completion_tokens=3500, temp=0.2):
+        # System prompt first and unchanged between calls: it is the provider-cacheable prefix
+        messages = prefix_messages(self.system_prompt, user_prompt)
+        cache_kwargs = prompt_cache_kwargs(self.ai_agent, self.system_prompt)
         try:
             return self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
+                **cache_kwargs,
                 temperature=temp,
                 max_tokens=max_completion_tokens
             )
@@ -639,10 +550,8 @@ Rules:
                 try:
                     return self.client.chat.completions.create(
                         model=self.model,
-                        messages=[
-                            {"role": "system", "content": self.system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
+                        messages=messages,
+                        **cache_kwargs,
                         temperature=temp,
                         max_completion_tokens=max_completion_tokens
                     )
@@ -651,10 +560,8 @@ Rules:
                     if "unsupported value" in inner2_err and "temperature" in inner2_err:
                         return self.client.chat.completions.create(
                             model=self.model,
-                            messages=[
-                                {"role": "system", "content": self.system_prompt},
-                                {"role": "user", "content": user_prompt}
-                            ],
+                            messages=messages,
+                            **cache_kwargs,
                             max_completion_tokens=max_completion_tokens
                         )
                     else:
@@ -662,10 +569,8 @@ Rules:
             elif "unsupported value" in inner_err and "temperature" in inner_err:
                 return self.client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
+                    messages=messages,
+                    **cache_kwargs,
                     max_tokens=max_completion_tokens
                 )
             else:
@@ -698,6 +603,14 @@ Rules:
                         return json.loads(candidate)
                     except Exception:
                         break
+        # Malformed or truncated: repair locally instead of asking the model again
+        try:
+            parsed = loads_lenient(text[start:])
+        except JSONRepairError:
+            return None
+        if isinstance(parsed, dict):
+            logger.debug("Repaired malformed JSON block from model output")
+            return parsed
         return None
 
     def _extract_markdown_after_json(self, text: str) -> str:
@@ -790,7 +703,7 @@ Rules:
                 else:
                     filtered = [jobs_data] if _job_matches_mtb(jobs_data) else []
                 filtered_jobs_input = filtered
-                print(f"[DEBUG] Filtered jobs count after MTB filter: {len(filtered_jobs_input)}")
+                logger.debug("Filtered jobs count after MTB filter: %s", len(filtered_jobs_input))
             except Exception as e:
                 print(f"[WARNING] Error applying MTB jobId filter: {e}")
                 filtered_jobs_input = jobs_data
@@ -799,33 +712,146 @@ Rules:
         subset = self._pre_filter_jobs(filtered_jobs_input, resume_text, target_size=20)
         print(f"[{datetime.utcnow().isoformat()}] Model input subset size: {len(subset)}")
 
-        # 2) Build prompt and call model
-        user_prompt = self._make_user_prompt(resume_text, subset)
+        # 2) Reuse cached results for unchanged resume/job pairs; only new or changed
+        #    jobs are sent to the model
+        resume_summary = RESUME_SUMMARY_CACHE.get(resume_text)
+        job_payloads = [self._prompt_job_payload(j) for j in subset]
+        resume_hash = hash_text(resume_text)
+        pair_keys = []
+        for payload in job_payloads:
+            job_hash = hash_job_criteria(payload)
+            pair_keys.append((job_hash, make_cache_key(resume_hash, job_hash, self.model, self.prompt_version)))
+        cached = self.match_cache.get_many(k for _, k in pair_keys)
+        cached_shortlist = []
+        cached_rejected = []
+        candidate_info = None
+        for i, (_, key) in enumerate(pair_keys):
+            hit = (cached.get(key) or {}).get("result")
+            if not hit:
+                continue
+            if hit.get("shortlisted"):
+                cached_shortlist.append(hit.get("item") or {})
+                candidate_info = candidate_info or hit.get("candidate")
+            else:
+                cached_rejected.append(i)
+        to_score = [i for i, (_, key) in enumerate(pair_keys) if key not in cached]
+        if to_score and len(cached_shortlist) < 6:
+            # Previously rejected jobs compete again when the shortlist has room
+            to_score = sorted(set(to_score) | set(cached_rejected))
+        if cached:
+            print(f"[MATCH_CACHE] {len(cached)} cached pair(s), {len(to_score)} job(s) to score")
+
+        # 3) Pack jobs into as few calls as the model context allows, sending a cached
+        #    compact resume summary instead of the raw resume text
+        batches = self.prompt_packer.pack(
+            [self.system_prompt, self._make_user_prompt(resume_summary, [])], [job_payloads[i] for i in to_score]
+        ) if to_score else []
+        if batches:
+            logger.debug("Packed %s jobs into %s call(s) (~%s input tokens)", len(to_score), len(batches),
+                         self.prompt_packer.last_stats.get('input_tokens', 0))
+
+        batch_results = []
+        last_content = ""
+        last_error = None
+        for batch in batches:
+            batch_indexes = [to_score[i] for i in batch]
+            batch_jobs = [job_payloads[i] for i in batch_indexes]
+            user_prompt = self._make_user_prompt(resume_summary, batch_jobs)
+            content, error = self._complete_shortlist(
+                user_prompt, max_completion_tokens=self.prompt_packer.output_budget(len(batch_jobs))
+            )
+            if error:
+                last_error = error
+                continue
+            last_content = content
+            parsed = self._extract_first_json_object(content)
+            if parsed is None:
+                print("[WARNING] No valid JSON block parsed from batch output; skipping batch.")
+                continue
+            batch_results.append((parsed, self._extract_markdown_after_json(content)))
+            self._store_batch_matches(parsed, [(job_payloads[i], pair_keys[i]) for i in batch_indexes], resume_hash)
+
+        if batches and not batch_results:
+            if last_content:
+                print("[WARNING] No valid JSON block parsed from model output; generating fallback.")
+                # Fallback: write entire content as Markdown
+                return json.dumps({"warning": "No JSON parsed", "raw_preview": last_content[:2000]}, indent=2), last_content
+            return last_error
+
+        # 4) Merge per-batch and cached shortlists (a single fresh batch keeps the model's own Markdown)
+        if len(batch_results) == 1 and not cached_shortlist:
+            parsed_json, md_part = batch_results[0]
+        else:
+            parsed_json = dict(batch_results[0][0]) if batch_results else {"candidate": candidate_info or {}}
+            parsed_json["shortlist"] = merge_ranked(
+                [cached_shortlist] + [r[0].get("shortlist") or [] for r in batch_results], score_key="score_total", id_key="jobId"
+            )
+            excluded = []
+            for r, _ in batch_results:
+                excluded.extend(((r.get("notes") or {}).get("excluded_examples")) or [])
+            parsed_json["notes"] = {"excluded_examples": excluded}
+            md_part = ""
 
-        # Debug: Log prompt size and save sample to file
-        try:
-            prompt_len = len(user_prompt)
-            prompt_chars = len(user_prompt.encode('utf-8'))
-            print(f"[DEBUG] Prompt size: {prompt_len} chars, {prompt_chars} bytes")
-
-            # Save prompt sample to debug file
-            ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-            debug_fn = os.path.join("output", f"prompt_debug_{ts}.log")
-            os.makedirs("output", exist_ok=True)
-            with open(debug_fn, "w", encoding="utf-8") as df:
-                df.write("=== PROMPT HEAD (first 500 chars) ===\n")
-                df.write(user_prompt[:500] + "\n\n")
-                df.write("=== PROMPT TAIL (last 500 chars) ===\n")
-                df.write(user_prompt[-500:] if len(user_prompt) > 500 else user_prompt)
-                df.write("\n\n=== SYSTEM PROMPT ===\n")
-                df.write(self.system_prompt)
-            print(f"[DEBUG] Saved prompt sample to {debug_fn}")
-        except Exception as e:
-            print(f"[DEBUG] Error saving prompt debug info: {e}")
+        # Guarantee shortlist length <= 6
+        if isinstance(parsed_json.get("shortlist"), list) and len(parsed_json["shortlist"]) > 6:
+            parsed_json["shortlist"] = parsed_json["shortlist"][:6]
 
-        response = self._call_model_with_retry(user_prompt)
+        # 5) If Markdown missing or empty, generate from JSON
+        if not md_part.strip():
+            md_part = self._markdown_from_json(parsed_json)
+
+        # Return both blocks as strings
+        json_block = json.dumps(parsed_json, indent=2, ensure_ascii=False)
+        return json_block, md_part
+
+    def _store_batch_matches(self, parsed: Dict[str, Any], jobs: List[Tuple[Dict[str, Any], Tuple[str, str]]], resume_hash: str) -> None:
+        """Cache the outcome of one scored batch: shortlisted jobs with their entry, the rest as not shortlisted."""
+        shortlisted = {str(item.get("jobId", item.get("jobid", ""))): item
+                       for item in (parsed.get("shortlist") or []) if isinstance(item, dict)}
+        excluded = {str(e.get("jobId", "")): e.get("reason", "")
+                    for e in ((parsed.get("notes") or {}).get("excluded_examples") or []) if isinstance(e, dict)}
+        entries = []
+        for payload, (job_hash, key) in jobs:
+            jid = str(payload.get("jobId", ""))
+            item = shortlisted.get(jid)
+            try:
+                rating = float(item.get("score_total") or 0) if item else 0.0
+            except (TypeError, ValueError):
+                rating = 0.0
+            entries.append({
+                "cache_key": key,
+                "resume_content_hash": resume_hash,
+                "job_criteria_hash": job_hash,
+                "job_ref": jid,
+                "model": self.model,
+                "prompt_version": self.prompt_version,
+                "rating": rating,
+                "hard_no": False,
+                "disqualifiers": [],
+                "reasons": [item.get("why_fit", "")] if item else ([excluded[jid]] if excluded.get(jid) else ["not shortlisted"]),
+                "result": {"shortlisted": True, "item": item, "candidate": parsed.get("candidate")} if item else {"shortlisted": False},
+            })
+        self.match_cache.put_many(entries)
+
+    def _complete_shortlist(self, user_prompt: str, max_completion_tokens: int = 3500) -> Tuple[str, Optional[Tuple[str, str]]]:
+        """
+        Call the model for one packed prompt, with diagnostics and empty-response retries.
+
+        Returns:
+            Tuple of (content, error) where error is a (json_block, markdown) pair when
+            no content could be obtained, otherwise None
+        """
+        # Prompt size at debug level; prompt samples go to the sampled, rotating payload log
+        logger.debug("Shortlist prompt", extra={"prompt_chars": len(user_prompt), "agent": self.ai_agent})
+        log_payload("matcher_prompt", {
+            "prompt_head": user_prompt[:500],
+            "prompt_tail": user_prompt[-500:],
+            "system_prompt": self.system_prompt,
+        }, sample_payloads(), agent=self.ai_agent, model=getattr(self, "model", "unknown"), prompt_chars=len(user_prompt))
+
+        response = self._call_model_with_retry(user_prompt, max_completion_tokens=max_completion_tokens)
  
-        # 3) Extract content (robust + diagnostics + retry)
+        # Extract content (robust + diagnostics + retry)
         content = ""
  
         def _extract_content_from_response(resp) -> str:
@@ -859,22 +885,12 @@ Rules:
  
         content = _extract_content_from_response(response)
  
-        # If empty, save raw response for debugging and retry with alternative params
+        # If empty, keep the raw response (always, it is a failure) and retry with alternative params
         if not content.strip():
-            try:
-                ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-                debug_fn = os.path.join("output", f"ai_response_debug_{ts}.log")
-                os.makedirs("output", exist_ok=True)
-                with open(debug_fn, "w", encoding="utf-8") as df:
-                    df.write("=== RESPONSE REPR ===\n")
-                    df.write(repr(response) + "\n\n")
-                    df.write("=== RESPONSE STR ===\n")
-                    df.write(str(response) + "\n\n")
-                    df.write("=== TRUNCATED PROMPT (first 10000 chars) ===\n")
-                    df.write(user_prompt[:10000])
-                print(f"[DEBUG] Saved raw model response to {debug_fn}")
-            except Exception as e:
-                print(f"[DEBUG] Could not save raw response: {e}")
+            log_payload("matcher_empty_response", {
+                "response_repr": repr(response),
+                "truncated_prompt": user_prompt[:10000],
+            }, True, agent=self.ai_agent, model=getattr(self, "model", "unknown"))
  
             # Retry strategies (reduce token budget / adjust temperature)
             retry_attempts = [
@@ -884,14 +900,14 @@ Rules:
             ]
             for r in retry_attempts:
                 try:
-                    print(f"[DEBUG] Empty response; retrying with max_completion_tokens={r['max_tokens']} temp={r['temp']}")
+                    logger.warning("Empty response; retrying with max_completion_tokens=%s temp=%s", r['max_tokens'], r['temp'])
                     response = self._call_model_with_retry(user_prompt, max_completion_tokens=r["max_tokens"], temp=r["temp"])
                     content = _extract_content_from_response(response)
                     if content and content.strip():
-                        print("[DEBUG] Retry succeeded and produced content")
+                        logger.debug("Retry succeeded and produced content")
                         break
                 except Exception as ex:
-                    print(f"[DEBUG] Retry failed: {ex}")
+                    logger.warning("Retry failed: %s", ex)
  
             # Final clarifying attempt: ask the model explicitly to output the JSON block only.
             if not content.strip():
@@ -899,43 +915,24 @@ Rules:
                     clarifying_prompt = user_prompt + "\n\nPlease now OUTPUT ONLY the required JSON object (no explanation, no markdown). " \
                                             "If fewer than six matches exist, return the JSON with a shorter shortlist.\n\n" \
                                             "Return immediately with the JSON object only."
-                    print("[DEBUG] Performing final clarifying call to coax visible output from model.")
+                    logger.debug("Performing final clarifying call to coax visible output from model.")
                     response = self._call_model_with_retry(clarifying_prompt, max_completion_tokens=800, temp=0.0)
                     content = _extract_content_from_response(response)
                     if content and content.strip():
-                        print("[DEBUG] Clarifying call produced content")
+                        logger.debug("Clarifying call produced content")
                 except Exception as ex:
-                    print(f"[DEBUG] Clarifying call failed: {ex}")
+                    logger.warning("Clarifying call failed: %s", ex)
  
         if not content.strip():
-            msg = f"[ERROR] Empty response from {self.ai_agent.upper()} (model={getattr(self, 'model', 'unknown')}). See output/ai_response_debug_*.log for raw response."
+            msg = f"[ERROR] Empty response from {self.ai_agent.upper()} (model={getattr(self, 'model', 'unknown')}). See the debug payload log (matcher_empty_response) for the raw response."
             print(msg)
             try:
                 raw_preview = str(response)[:1000]
             except Exception:
                 raw_preview = ""
-            return json.dumps({"error": msg, "raw_response_preview": raw_preview}, indent=2), msg
+            return "", (json.dumps({"error": msg, "raw_response_preview": raw_preview}, indent=2), msg)
 
-        # 4) Parse JSON first block, then Markdown second block
-        parsed_json = self._extract_first_json_object(content)
-        md_part = self._extract_markdown_after_json(content)
-
-        if parsed_json is None:
-            print("[WARNING] No valid JSON block parsed from model output; generating fallback.")
-            # Fallback: write entire content as Markdown
-            return json.dumps({"warning": "No JSON parsed", "raw_preview": content[:2000]}, indent=2), content
-
-        # Guarantee shortlist length <= 6
-        if isinstance(parsed_json.get("shortlist"), list) and len(parsed_json["shortlist"]) > 6:
-            parsed_json["shortlist"] = parsed_json["shortlist"][:6]
-
-        # 5) If Markdown missing or empty, generate from JSON
-        if not md_part.strip():
-            md_part = self._markdown_from_json(parsed_json)
-
-        # Return both blocks as strings
-        json_block = json.dumps(parsed_json, indent=2, ensure_ascii=False)
-        return json_block, md_part
+        return content, None
 
     # ----------------------------
     # Public processing helpers
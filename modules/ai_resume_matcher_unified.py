@@ -20,7 +20,7 @@ What this does
 Dependencies (install these)
 ----------------------------
     pip install --upgrade pip
-    pip install pandas pydantic tqdm python-docx docx2txt pypdf pdfminer.six rapidfuzz tenacity python-dotenv
+    pip install pandas pydantic tqdm python-docx docx2txt pypdf pdfminer.six rapidfuzz httpx python-dotenv
     # Optional (any one of these Drive stacks is fine):
     pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib
     pip install pydrive2
@@ -55,6 +55,7 @@ import json
 import csv
 import math
 import time
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
@@ -71,31 +72,32 @@ class BaseModel:
 def Field(**kwargs):
     return kwargs.get('default_factory', lambda: kwargs.get('default'))() if 'default_factory' in kwargs else kwargs.get('default')
 from tqdm import tqdm
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from rapidfuzz import fuzz
 
-# Resume parsing deps
 try:
-    import docx2txt
-except ImportError:
-    docx2txt = None
+    from modules.prompt_packer import PromptPacker, RESUME_SUMMARY_CACHE
+    from modules.match_cache import get_match_cache, hash_text, hash_job_criteria, prompt_version_for, make_cache_key
+except ImportError:  # running as a standalone script from modules/
+    from prompt_packer import PromptPacker, RESUME_SUMMARY_CACHE
+    from match_cache import get_match_cache, hash_text, hash_job_criteria, prompt_version_for, make_cache_key
 
+# LLM calls: shared keep-alive HTTP transport (retries transient failures only)
 try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
+    from modules.llm_http import get_llm_transport
+except ImportError:  # running as a standalone script from modules/
+    from llm_http import get_llm_transport
 
+# Cached-prefix token accounting (SYSTEM_PROMPT is sent first and never varies)
 try:
-    import fitz  # PyMuPDF
-    def pdfminer_extract_text(path):
-        doc = fitz.open(path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text
-except ImportError:
-    pdfminer_extract_text = None
+    from modules.prompt_cache import prefix_key, record_usage
+except ImportError:  # running as a standalone script from modules/
+    from prompt_cache import prefix_key, record_usage
+
+# Resume parsing: shared, cached document text service
+try:
+    from modules.document_text import extract_document_text
+except ImportError:  # running as a standalone script from modules/
+    from document_text import extract_document_text
 
 # Legacy .doc support removed (no textract). .doc files are no longer supported.
 
@@ -415,12 +417,21 @@ class CandidateOverview(BaseModel):
 # LLM Providers
 # ---------------------------
 
+# Generation speed assumed when sizing request timeouts for packed multi-job calls
+LLM_OUTPUT_TOKENS_PER_SECOND = float(os.getenv("LLM_OUTPUT_TOKENS_PER_SECOND", "40"))
+
 class LLMBase:
     name = "base"
+    timeout = 30  # seconds before any output tokens are accounted for
     def __init__(self, model: str):
         self.model = model
-    def score(self, system_prompt: str, user_prompt: str) -> str:
+        self.token_stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+    def score(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> str:
         raise NotImplementedError
+    def request_timeout(self, max_tokens: Optional[int]) -> float:
+        """Transport timeout that leaves time to generate max_tokens completion tokens"""
+        return self.timeout + (max_tokens or 0) / LLM_OUTPUT_TOKENS_PER_SECOND
 
 class OpenAIClient(LLMBase):
     name = "openai"
@@ -431,9 +442,7 @@ class OpenAIClient(LLMBase):
         if not self.api_key:
             raise RuntimeError("OPENAI_API_KEY not set")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(Exception))
-    def score(self, system_prompt: str, user_prompt: str) -> str:
-        import requests
+    def score(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> str:
         url = f"{self.base_url}/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
         payload = {
@@ -441,16 +450,18 @@ class OpenAIClient(LLMBase):
             "messages": [{"role": "system", "content": system_prompt},
                          {"role": "user", "content": user_prompt}],
             "temperature": 0.0,
-            "response_format": {"type": "json_object"}
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": f"recruiter-{prefix_key(system_prompt)}"
         }
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
-        if r.status_code >= 400:
-            raise RuntimeError(f"OpenAI error {r.status_code}: {r.text[:300]}")
-        data = r.json()
+        if max_tokens:
+            payload["max_completion_tokens"] = max_tokens
+        data = get_llm_transport().post_json(self.name, url, payload, headers=headers, timeout=self.request_timeout(max_tokens))
+        record_usage(self.token_stats, data.get("usage"), self._stats_lock)
         return data["choices"][0]["message"]["content"]
 
 class GeminiClient(LLMBase):
     name = "gemini"
+    timeout = 60
     def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None):
         super().__init__(model)
         self.api_key = api_key or os.getenv("GEMINI_API_KEY") or ""
@@ -458,9 +469,7 @@ class GeminiClient(LLMBase):
         if not self.api_key:
             raise RuntimeError("GEMINI_API_KEY not set")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(Exception))
-    def score(self, system_prompt: str, user_prompt: str) -> str:
-        import requests
+    def score(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> str:
         base = self.base_url or "https://generativelanguage.googleapis.com"
         url = f"{base}/v1beta/models/{self.model}:generateContent?key={self.api_key}"
         payload = {
@@ -472,10 +481,10 @@ class GeminiClient(LLMBase):
                 "responseMimeType": "application/json"
             }
         }
-        r = requests.post(url, json=payload, timeout=60)
-        if r.status_code >= 400:
-            raise RuntimeError(f"Gemini error {r.status_code}: {r.text[:300]}")
-        data = r.json()
+        if max_tokens:
+            payload["generationConfig"]["maxOutputTokens"] = max_tokens
+        data = get_llm_transport().post_json(self.name, url, payload, timeout=self.request_timeout(max_tokens))
+        record_usage(self.token_stats, data.get("usageMetadata"), self._stats_lock)
         try:
             text = data["candidates"][0]["content"]["parts"][0]["text"]
             return text
@@ -491,9 +500,7 @@ class GrokClient(LLMBase):
         if not self.api_key:
             raise RuntimeError("XAI_API_KEY not set")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), retry=retry_if_exception_type(Exception))
-    def score(self, system_prompt: str, user_prompt: str) -> str:
-        import requests
+    def score(self, system_prompt: str, user_prompt: str, max_tokens: Optional[int] = None) -> str:
         url = f"{self.base_url}/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
         payload = {
@@ -502,10 +509,10 @@ class GrokClient(LLMBase):
                          {"role": "user", "content": user_prompt}],
             "temperature": 0.0
         }
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
-        if r.status_code >= 400:
-            raise RuntimeError(f"Grok error {r.status_code}: {r.text[:300]}")
-        data = r.json()
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        data = get_llm_transport().post_json(self.name, url, payload, headers=headers, timeout=self.request_timeout(max_tokens))
+        record_usage(self.token_stats, data.get("usage"), self._stats_lock)
         return data["choices"][0]["message"]["content"]
 
 def make_client(provider: str, model: str) -> Optional[LLMBase]:
@@ -525,33 +532,15 @@ def make_client(provider: str, model: str) -> Optional[LLMBase]:
 # ---------------------------
 
 def extract_text_from_pdf(path: Path) -> str:
-    # Attempt with PyMuPDF first as it's often more robust
-    if pdfminer_extract_text:
-        try:
-            return normalize_ws(pdfminer_extract_text(str(path)))
-        except Exception as e:
-            print(f"  - PyMuPDF failed on {path.name}: {e}")
-
-    # Fallback to pypdf
-    if PdfReader is not None:
-        try:
-            text = ""
-            with open(path, "rb") as f:
-                reader = PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-            return normalize_ws(text)
-        except Exception as e:
-            print(f"  - pypdf failed on {path.name}: {e}")
-    
-    print(f"  - Could not extract text from PDF: {path.name}")
-    return ""
+    try:
+        return normalize_ws(extract_document_text(str(path)))
+    except Exception as e:
+        print(f"  - Could not extract text from PDF {path.name}: {e}")
+        return ""
 
 def extract_text_from_docx(path: Path) -> str:
-    if not docx2txt:
-        return ""
     try:
-        text = docx2txt.process(str(path))
+        text = extract_document_text(str(path))
         # Aggressively remove control characters and normalize
         if text:
             # Remove null bytes
@@ -561,7 +550,7 @@ def extract_text_from_docx(path: Path) -> str:
             return normalize_ws(text)
         return ""
     except Exception as e:
-        print(f"  - docx2txt failed on {path.name}: {e}")
+        print(f"  - DOCX extraction failed on {path.name}: {e}")
         return ""
 
 
@@ -940,20 +929,42 @@ Rules:
   * 30%: Functional fit (skills, certifications, tools: PLCs, VFDs, SAP, ISO9000, MSHA/OSHA, etc.).
   * 20%: Seniority/years alignment (too junior/senior reduces score).
   * 10%: Location/relocation and travel requirements alignment.
-- Return only JSON using this schema:
+- Score every job in "jobs_to_score". Return only JSON using this schema, one item per job:
   {
-    "jobid": "<jobid>",
-    "rating": <0-100 number>,
-    "hard_no": <true|false>,
-    "disqualifiers": ["..."],
-    "reasons": ["..."]
+    "results": [
+      {
+        "jobid": "<jobid>",
+        "rating": <0-100 number>,
+        "hard_no": <true|false>,
+        "disqualifiers": ["..."],
+        "reasons": ["..."]
+      }
+    ]
   }
 If unsure, be conservative.
 """
 
-def make_user_prompt(resume_text: str, overview: 'CandidateOverview', job_rows: List[Dict[str, Any]]) -> str:
+def job_prompt_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "jobid": str(row.get("jobid")),
+        "company": row.get("company"),
+        "position": row.get("position"),
+        "industry": row.get("industry/Segment"),
+        "city": row.get("city"),
+        "state": row.get("state"),
+        "country": row.get("country"),
+        "salary_min": row.get("salary_min"),
+        "salary_max": row.get("salary_max"),
+        "bonusPercent": row.get("bonusPercent") or row.get("bonus") or row.get("bonus_raw"),
+        "visa": row.get("visa"),
+        "hrNotes": (row.get("hrNotes") or "")[:1200],
+        "criteria": row.get("criteria_json")
+    }
+
+def make_user_prompt(resume_text: str, overview: 'CandidateOverview', job_rows: List[Dict[str, Any]],
+                     resume_summary: Optional[str] = None) -> str:
     max_resume_chars = 12000
-    rtext = resume_text[:max_resume_chars]
+    rtext = resume_summary if resume_summary is not None else resume_text[:max_resume_chars]
     ov = {
         "name": overview.name,
         "location": overview.location,
@@ -961,27 +972,12 @@ def make_user_prompt(resume_text: str, overview: 'CandidateOverview', job_rows:
         "total_years_experience": overview.total_years_experience,
         "recent_roles": overview.recent_roles[:4]
     }
-    jobs = []
-    for row in job_rows:
-        jobs.append({
-            "jobid": str(row.get("jobid")),
-            "company": row.get("company"),
-            "position": row.get("position"),
-            "industry": row.get("industry/Segment"),
-            "city": row.get("city"),
-            "state": row.get("state"),
-            "country": row.get("country"),
-            "salary_min": row.get("salary_min"),
-            "salary_max": row.get("salary_max"),
-            "bonusPercent": row.get("bonusPercent") or row.get("bonus") or row.get("bonus_raw"),
-            "visa": row.get("visa"),
-            "hrNotes": (row.get("hrNotes") or "")[:1200],
-            "criteria": row.get("criteria_json")
-        })
+    jobs = [job_prompt_payload(row) for row in job_rows]
     payload = {"candidate_overview": ov, "resume_text": rtext, "jobs_to_score": jobs}
-    return json.dumps(payload, ensure_ascii=False)
+    return json.dumps(payload, ensure_ascii=False, default=str)
 
-def llm_score_batch(client: Optional['LLMBase'], resume_text: str, overview: 'CandidateOverview', jobs_batch: List[Dict[str, Any]]) -> List['CandidateJobScore']:
+def llm_score_batch(client: Optional['LLMBase'], resume_text: str, overview: 'CandidateOverview', jobs_batch: List[Dict[str, Any]],
+                    resume_summary: Optional[str] = None, max_tokens: Optional[int] = None) -> List['CandidateJobScore']:
     if client is None:
         out = []
         for row in jobs_batch:
@@ -990,8 +986,8 @@ def llm_score_batch(client: Optional['LLMBase'], resume_text: str, overview: 'Ca
             out.append(CandidateJobScore(jobid=jobid, rating=float(score), hard_no=(score < 20), reasons=["rules-only heuristic"], disqualifiers=[]))
         return out
 
-    user_prompt = make_user_prompt(resume_text, overview, jobs_batch)
-    raw = client.score(SYSTEM_PROMPT, user_prompt)
+    user_prompt = make_user_prompt(resume_text, overview, jobs_batch, resume_summary=resume_summary)
+    raw = client.score(SYSTEM_PROMPT, user_prompt, max_tokens=max_tokens)
     results: List[Dict[str, Any]] = []
     try:
         js = json.loads(raw)
@@ -1089,28 +1085,74 @@ def run_for_resume(resume_path: Path, jobs_df: pd.DataFrame, client: Optional['L
         safe_mkdir(rec_dir)
         (rec_dir / "report.md").write_text("# Candidate Report\n\n" + format_overview_md(overview) + "\n\n_No recommendations._\n", encoding="utf-8")
         return {"resume": resume_path.name, "status": "no_fit"}
-    batch_size = 12
+    shortlisted_rows = shortlisted.to_dict("records")
+    resume_summary = RESUME_SUMMARY_CACHE.get(text)
+    score_map: Dict[str, 'CandidateJobScore'] = {}
+    if client is not None:
+        # Reuse cached results for unchanged resume/job pairs; only new or changed
+        # pairs are sent to the model.
+        cache = get_match_cache()
+        resume_hash = hash_text(text)
+        prompt_version = prompt_version_for("unified", SYSTEM_PROMPT)
+        pair_keys = {}
+        for r in shortlisted_rows:
+            job_hash = hash_job_criteria(job_prompt_payload(r))
+            pair_keys[str(r["jobid"])] = (job_hash, make_cache_key(resume_hash, job_hash, client.model, prompt_version))
+        cached = cache.get_many(k for _, k in pair_keys.values())
+        for jid, (_, key) in pair_keys.items():
+            hit = cached.get(key)
+            if hit:
+                score_map[jid] = CandidateJobScore(jobid=jid, rating=float(hit.get("rating") or 0.0), hard_no=bool(hit.get("hard_no")),
+                                                   disqualifiers=hit.get("disqualifiers") or [], reasons=hit.get("reasons") or [])
+        to_score = [r for r in shortlisted_rows if str(r["jobid"]) not in score_map]
+        if cached:
+            print(f"  Match cache: {len(shortlisted_rows) - len(to_score)} cached, {len(to_score)} to score")
+
+        # Pack as many jobs per call as the model context allows; the resume is
+        # sent as a cached compact summary rather than raw text.
+        packer = PromptPacker(model=client.model)
+        fixed_prompt = make_user_prompt(text, overview, [], resume_summary=resume_summary)
+        batches = packer.pack([SYSTEM_PROMPT, fixed_prompt], [job_prompt_payload(r) for r in to_score]) if to_score else []
+        if batches:
+            print(f"  Scoring {len(to_score)} jobs in {len(batches)} call(s) "
+                  f"(~{packer.last_stats.get('input_tokens', 0)} input tokens)")
+        new_entries = []
+        for batch in batches:
+            batch_rows = [to_score[i] for i in batch]
+            batch_ids = {str(r["jobid"]) for r in batch_rows}
+            # The completion limit and transport timeout grow with the number of packed jobs
+            for s in llm_score_batch(client, text, overview, batch_rows, resume_summary=resume_summary,
+                                     max_tokens=packer.output_budget(len(batch_rows))):
+                if s.jobid not in batch_ids:
+                    continue
+                score_map[s.jobid] = s
+                job_hash, key = pair_keys[s.jobid]
+                new_entries.append({
+                    "cache_key": key, "resume_content_hash": resume_hash, "job_criteria_hash": job_hash,
+                    "job_ref": s.jobid, "model": client.model, "prompt_version": prompt_version,
+                    "rating": s.rating, "hard_no": s.hard_no, "disqualifiers": s.disqualifiers, "reasons": s.reasons,
+                })
+        cache.put_many(new_entries)
+    else:
+        for s in llm_score_batch(client, text, overview, shortlisted_rows):
+            score_map[s.jobid] = s
     records = []
-    for i in range(0, len(shortlisted), batch_size):
-        batch_rows = shortlisted.iloc[i:i+batch_size].to_dict("records")
-        scored = llm_score_batch(client, text, overview, batch_rows)
-        score_map = {s.jobid: s for s in scored}
-        for r in batch_rows:
-            jid = str(r["jobid"])
-            s = score_map.get(jid)
-            if s:
-                r["rating"] = s.rating
-                r["hard_no"] = s.hard_no
-                r["llm_disq"] = s.disqualifiers
-                r["llm_reasons"] = s.reasons
-            else:
-                r["rating"] = heuristic_score(text, pd.Series(r))
-                r["hard_no"] = False
-                r["llm_disq"] = []
-                r["llm_reasons"] = ["LLM returned no item; used heuristic"]
-            if jid in disq:
-                r.setdefault("prefilter_disq", disq[jid])
-            records.append(r)
+    for r in shortlisted_rows:
+        jid = str(r["jobid"])
+        s = score_map.get(jid)
+        if s:
+            r["rating"] = s.rating
+            r["hard_no"] = s.hard_no
+            r["llm_disq"] = s.disqualifiers
+            r["llm_reasons"] = s.reasons
+        else:
+            r["rating"] = heuristic_score(text, pd.Series(r))
+            r["hard_no"] = False
+            r["llm_disq"] = []
+            r["llm_reasons"] = ["LLM returned no item; used heuristic"]
+        if jid in disq:
+            r.setdefault("prefilter_disq", disq[jid])
+        records.append(r)
     df = pd.DataFrame(records)
     df["rating"] = pd.to_numeric(df["rating"], errors="coerce").fillna(0.0)
     df = df.sort_values("rating", ascending=False)
@@ -1271,6 +1313,10 @@ def main(drive_service: Optional[Any] = None):
         })
 
     pd.DataFrame(summary_rows).to_csv(out_dir / "aggregate_summary.csv", index=False, encoding="utf-8")
+    if client is not None and client.token_stats.get("ai_calls"):
+        stats = client.token_stats
+        print(f"LLM calls: {stats['ai_calls']}, input tokens: {stats['total_uploaded']:,} "
+              f"({stats['cached_input_tokens']:,} from prompt cache), output tokens: {stats['total_output']:,}")
     print("\nDone. See 'output/' for reports.")
 
 if __name__ == "__main__":
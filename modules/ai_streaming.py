@@ -0,0 +1,281 @@
+"""
+Streaming AI Completions
+Streams chat completions and inspects the JSON as it arrives, so a degenerate
+response (prose instead of JSON, whitespace or repetition loops, off-schema
+keys, runaway length) is aborted after a few hundred tokens instead of after
+the full completion. Separate first-token, token-gap (stall) and total
+deadlines replace the single five-minute wait.
+"""
+
+import os
+import time
+import queue
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+# Providers that return token usage in the final chunk when asked via stream_options
+STREAM_USAGE_PROVIDERS = {"openai", "grok", "deepseek", "qwen"}
+
+# Characters allowed after the root JSON value closes before the stream is cut off
+TRAILING_LIMIT = 200
+
+
+class StreamAborted(ValueError):
+    """The streamed response was abandoned early; partial holds the text received so far."""
+
+    def __init__(self, reason: str, partial: str = ""):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial
+
+
+class StreamStalled(StreamAborted):
+    """No tokens arrived within the first-token, stall or total deadline."""
+
+
+class JSONStreamValidator:
+    """
+    Incremental structural check of a streamed JSON object.
+
+    Tracks string/escape state and nesting depth character by character, collects
+    top-level keys as they complete, and raises StreamAborted as soon as the text
+    can no longer become the expected object.
+    """
+
+    def __init__(self, expected_keys: Optional[Iterable[str]] = None, max_chars: Optional[int] = None,
+                 max_prefix_chars: int = 200, repeat_window: int = 600, max_repeat_unit: int = 50):
+        self.expected_keys = set(expected_keys) if expected_keys is not None else None
+        self.max_chars = max_chars or int(os.getenv("AI_STREAM_MAX_CHARS", "60000"))
+        self.max_prefix_chars = max_prefix_chars
+        self.repeat_window = repeat_window
+        self.max_repeat_unit = max_repeat_unit
+        self.chars = 0
+        self.depth = 0
+        self.started = False
+        self.complete = False
+        self.trailing_chars = 0
+        self.known_keys = []
+        self.unknown_keys = []
+        self._prefix = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key = None
+        self._tail = ""
+        self._next_repeat_check = repeat_window
+
+    def feed(self, delta: str) -> None:
+        for c in delta:
+            self._feed_char(c)
+        self.chars += len(delta)
+        self._tail = (self._tail + delta)[-self.repeat_window:]
+        if self.chars > self.max_chars:
+            raise StreamAborted(f"response exceeded {self.max_chars} characters")
+        if self.chars >= self._next_repeat_check:
+            self._next_repeat_check = self.chars + self.repeat_window // 4
+            unit = self._repeating_unit()
+            if unit is not None:
+                raise StreamAborted(f"degenerate repetition of {unit!r}")
+
+    def _feed_char(self, c: str) -> None:
+        if self.complete:
+            if not c.isspace():
+                self.trailing_chars += 1
+            return
+        if not self.started:
+            if c in "{[":
+                self.started = True
+                self.depth = 1
+                self._expect_key = c == "{"
+                return
+            self._prefix.append(c)
+            if len("".join(self._prefix).strip()) > self.max_prefix_chars:
+                raise StreamAborted(f"no JSON object in the first {self.max_prefix_chars} characters")
+            return
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                if self._key is not None:
+                    self._end_key("".join(self._key))
+            elif self._key is not None:
+                self._key.append(c)
+            return
+        if c == '"':
+            self._in_string = True
+            if self.depth == 1 and self._expect_key:
+                self._key = []
+        elif c in "{[":
+            self.depth += 1
+        elif c in "}]":
+            self.depth -= 1
+            if self.depth == 0:
+                self.complete = True
+        elif c == "," and self.depth == 1:
+            self._expect_key = True
+
+    def _end_key(self, key: str) -> None:
+        self._key = None
+        self._expect_key = False
+        if self.expected_keys is None:
+            return
+        if key in self.expected_keys:
+            self.known_keys.append(key)
+        else:
+            self.unknown_keys.append(key)
+            # Tolerate the odd extra field; abort once the object is mostly off-schema
+            if len(self.unknown_keys) >= 3 and len(self.unknown_keys) > len(self.known_keys):
+                raise StreamAborted(f"off-schema keys: {', '.join(self.unknown_keys[:5])}")
+
+    def _repeating_unit(self) -> Optional[str]:
+        """The unit the last repeat_window characters consist of, if they are one short unit repeated."""
+        tail = self._tail
+        if len(tail) < self.repeat_window:
+            return None
+        for size in range(1, self.max_repeat_unit + 1):
+            unit = tail[-size:]
+            if (unit * (len(tail) // size + 1))[-len(tail):] == tail:
+                return unit
+        return None
+
+
+class StreamResult:
+    """Text and metadata of one completed (or early-finished) streamed completion."""
+
+    def __init__(self, content: str, usage: Any = None, finish_reason: Optional[str] = None,
+                 first_token_seconds: Optional[float] = None, seconds: float = 0.0, streamed: bool = True):
+        self.content = content
+        self.usage = usage
+        self.finish_reason = finish_reason
+        self.first_token_seconds = first_token_seconds
+        self.seconds = seconds
+        self.streamed = streamed
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("AI_STREAMING", "on").lower() not in ("0", "off", "false", "no")
+
+
+def _chunk_parts(chunk: Any):
+    """(content delta, finish_reason, usage) of one chat.completion.chunk."""
+    usage = getattr(chunk, "usage", None)
+    choices = getattr(chunk, "choices", None) or []
+    if not choices:
+        return "", None, usage
+    delta = getattr(choices[0], "delta", None)
+    return (getattr(delta, "content", None) or ""), getattr(choices[0], "finish_reason", None), usage
+
+
+def _close(stream: Any) -> None:
+    try:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    except Exception:
+        pass
+
+
+def stream_chat_completion(create: Callable[..., Any], provider: Optional[str] = None,
+                           validator: Optional[JSONStreamValidator] = None,
+                           first_token_timeout: Optional[float] = None, stall_timeout: Optional[float] = None,
+                           total_timeout: Optional[float] = None, **kwargs) -> StreamResult:
+    """
+    Run create(**kwargs, stream=True) and collect the streamed text.
+
+    create is chat.completions.create or a wrapper with the same signature (e.g.
+    create_structured bound to a provider and schema). With AI_STREAMING=off the
+    call is made without streaming and the validator runs on the full text.
+
+    Raises:
+        StreamStalled: First-token, token-gap or total deadline exceeded
+        StreamAborted: The validator rejected the partial response
+    """
+    first_token_timeout = first_token_timeout or float(os.getenv("AI_FIRST_TOKEN_TIMEOUT", "120"))
+    stall_timeout = stall_timeout or float(os.getenv("AI_STREAM_STALL_TIMEOUT", "30"))
+    total_timeout = total_timeout or float(os.getenv("AI_TOTAL_TIMEOUT", "300"))
+    started = time.monotonic()
+
+    if not streaming_enabled():
+        response = create(timeout=total_timeout, **kwargs)
+        content = response.choices[0].message.content or ""
+        if validator:
+            validator.feed(content)
+        return StreamResult(content, getattr(response, "usage", None), response.choices[0].finish_reason,
+                            None, time.monotonic() - started, streamed=False)
+
+    if (provider or "").lower() in STREAM_USAGE_PROVIDERS:
+        kwargs.setdefault("stream_options", {"include_usage": True})
+    chunks: "queue.Queue" = queue.Queue()
+    opened = {}
+    abandoned = threading.Event()
+
+    def pump():
+        try:
+            # create() blocks until the response headers arrive, so it runs here too: a provider
+            # that stalls before the headers is cut off by the first-token deadline. The HTTP
+            # read timeout is only a backstop; the deadlines below are enforced on the chunk queue.
+            stream = create(stream=True, timeout=total_timeout, **kwargs)
+            opened["stream"] = stream
+            if abandoned.is_set():
+                _close(stream)
+                return
+            for chunk in stream:
+                chunks.put(("chunk", chunk))
+            chunks.put(("done", None))
+        except Exception as e:
+            chunks.put(("error", e))
+
+    threading.Thread(target=pump, daemon=True).start()
+
+    parts = []
+    usage = None
+    finish_reason = None
+    first_token = None
+    drained = False
+    try:
+        while True:
+            remaining = total_timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise StreamStalled(f"no complete response after {total_timeout:.0f}s", "".join(parts))
+            wait = min(remaining, stall_timeout if first_token is not None else first_token_timeout)
+            try:
+                kind, item = chunks.get(timeout=wait)
+            except queue.Empty:
+                if first_token is None:
+                    raise StreamStalled(f"no tokens after {wait:.1f}s")
+                raise StreamStalled(f"stream stalled: no tokens for {wait:.1f}s", "".join(parts))
+            if kind == "error":
+                drained = True
+                raise item
+            if kind == "done":
+                drained = True
+                break
+            delta, chunk_finish, chunk_usage = _chunk_parts(item)
+            usage = chunk_usage or usage
+            finish_reason = chunk_finish or finish_reason
+            if not delta:
+                continue
+            if first_token is None:
+                # Role-only and empty keep-alive chunks do not count as the first token
+                first_token = time.monotonic() - started
+            parts.append(delta)
+            if validator:
+                try:
+                    validator.feed(delta)
+                except StreamAborted as e:
+                    e.partial = "".join(parts)
+                    raise
+                if validator.complete and validator.trailing_chars > TRAILING_LIMIT:
+                    # The object is finished; whatever follows it is not needed
+                    break
+    finally:
+        if not drained:
+            # Closed here if the stream is already open, otherwise by pump() once create() returns
+            abandoned.set()
+            if "stream" in opened:
+                _close(opened["stream"])
+
+    return StreamResult("".join(parts), usage, finish_reason, first_token, time.monotonic() - started)
@@ -0,0 +1,448 @@
+"""
+Document Text Extraction Service
+Single PDF/DOCX/TXT text extractor shared by job processing, resume upload and
+matching. Extracted text is cached by the SHA-256 of the file bytes (in memory and
+under DATA_DIR/cache/document_text), so each document is parsed once no matter
+how many pipelines read it. Engines are tried fastest-first and timed per engine.
+Engines yield text page by page (paragraph by paragraph for DOCX); pages are
+joined once, and optional page/character caps stop reading oversized documents
+before their whole text is materialised.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    fitz = None
+    PYMUPDF_AVAILABLE = False
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    pypdf = None
+    PYPDF_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PyPDF2 = None
+    PYPDF2_AVAILABLE = False
+
+try:
+    from pdfminer.high_level import extract_pages as pdfminer_extract_pages
+    from pdfminer.layout import LTTextContainer
+    PDFMINER_AVAILABLE = True
+except ImportError:
+    pdfminer_extract_pages = None
+    LTTextContainer = None
+    PDFMINER_AVAILABLE = False
+
+try:
+    import docx
+    PYTHON_DOCX_AVAILABLE = True
+except ImportError:
+    docx = None
+    PYTHON_DOCX_AVAILABLE = False
+
+try:
+    import docx2txt
+    DOCX2TXT_AVAILABLE = True
+except ImportError:
+    docx2txt = None
+    DOCX2TXT_AVAILABLE = False
+
+# Bump when engine output changes so cached text is re-extracted
+ENGINE_VERSION = "2"
+
+# Default caps for every extraction (0 = unlimited)
+DEFAULT_MAX_PAGES = int(os.getenv("DOCUMENT_MAX_PAGES", "0"))
+DEFAULT_MAX_CHARS = int(os.getenv("DOCUMENT_MAX_CHARS", "0"))
+
+
+class DocumentTextError(ValueError):
+    """Raised when every extraction engine failed for a document."""
+
+
+# ---------------------------
+# Engines
+# ---------------------------
+
+def _pdf_pymupdf(path: str) -> Iterator[str]:
+    with fitz.open(path) as doc:
+        for page in doc:
+            yield page.get_text("text")
+
+
+def _pdf_pypdf(path: str) -> Iterator[str]:
+    with open(path, "rb") as f:
+        reader = pypdf.PdfReader(f, strict=False)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+def _pdf_pypdf2(path: str) -> Iterator[str]:
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f, strict=False)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+def _pdf_pdfminer(path: str) -> Iterator[str]:
+    for layout in pdfminer_extract_pages(path):
+        yield "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+
+
+def _pdf_repaired(path: str) -> Iterator[str]:
+    """Rewrite a damaged PDF with pikepdf or qpdf, then read it with pypdf/PyPDF2."""
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    tmp.close()
+    try:
+        repaired = False
+        try:
+            import pikepdf  # type: ignore
+            pikepdf.Pdf.open(path).save(tmp.name)
+            repaired = True
+        except Exception:
+            if shutil.which("qpdf"):
+                res = subprocess.run(["qpdf", "--linearize", path, tmp.name], capture_output=True, text=True)
+                repaired = res.returncode == 0
+        if not repaired:
+            raise DocumentTextError("PDF repair not possible (pikepdf/qpdf unavailable or failed)")
+        yield from (_pdf_pypdf(tmp.name) if PYPDF_AVAILABLE else _pdf_pypdf2(tmp.name))
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+
+
+def _pdf_raw_strings(path: str) -> Iterator[str]:
+    """Last resort: printable byte runs from the raw file (scanned/corrupt PDFs)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    for m in re.findall(rb"[\x20-\x7E]{20,}", raw)[:80]:
+        yield m.decode("latin-1", errors="ignore")
+
+
+def _docx_python_docx(path: str) -> Iterator[str]:
+    """Paragraphs, table cells, headers and footers (non-empty lines)."""
+    document = docx.Document(path)
+    for p in document.paragraphs:
+        if p.text.strip():
+            yield p.text.strip()
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for p in cell.paragraphs:
+                    if p.text.strip():
+                        yield p.text.strip()
+    for section in getattr(document, "sections", []):
+        if getattr(section, "header", None):
+            for p in section.header.paragraphs:
+                if p.text.strip():
+                    yield f"Header: {p.text.strip()}"
+    for section in getattr(document, "sections", []):
+        if getattr(section, "footer", None):
+            for p in section.footer.paragraphs:
+                if p.text.strip():
+                    yield f"Footer: {p.text.strip()}"
+
+
+def _docx_docx2txt(path: str) -> Iterator[str]:
+    yield docx2txt.process(path) or ""
+
+
+def _text_file(path: str) -> Iterator[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f.read()
+    except UnicodeDecodeError:
+        with open(path, "r", encoding="latin-1") as f:
+            yield f.read()
+
+
+def join_pages(pages: Iterable[str], max_pages: int = 0, max_chars: int = 0) -> Tuple[str, int, bool]:
+    """
+    Join streamed pages once, stopping at the page or character cap.
+
+    Pages after the cap are never read: the generator is closed, which also
+    releases the open document.
+
+    Returns:
+        (text, pages read, truncated)
+    """
+    parts: List[str] = []
+    size = 0
+    truncated = False
+    try:
+        for index, page in enumerate(pages):
+            if max_pages and index >= max_pages:
+                truncated = True
+                break
+            if max_chars and size + len(page) > max_chars:
+                if max_chars > size:
+                    parts.append(page[:max_chars - size])
+                truncated = True
+                break
+            parts.append(page)
+            size += len(page) + 1
+    finally:
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+    return "\n".join(parts), len(parts), truncated
+
+
+# Fastest engine first; unavailable engines are skipped
+ENGINE_CHAINS: Dict[str, List[Tuple[str, Callable[[str], Iterator[str]], bool]]] = {
+    ".pdf": [
+        ("pymupdf", _pdf_pymupdf, PYMUPDF_AVAILABLE),
+        ("pypdf", _pdf_pypdf, PYPDF_AVAILABLE),
+        ("pypdf2", _pdf_pypdf2, PYPDF2_AVAILABLE),
+        ("pdfminer", _pdf_pdfminer, PDFMINER_AVAILABLE),
+        ("repair", _pdf_repaired, PYPDF_AVAILABLE or PYPDF2_AVAILABLE),
+    ],
+    ".docx": [
+        ("python-docx", _docx_python_docx, PYTHON_DOCX_AVAILABLE),
+        ("docx2txt", _docx_docx2txt, DOCX2TXT_AVAILABLE),
+    ],
+    ".txt": [("text", _text_file, True)],
+}
+ENGINE_CHAINS[".doc"] = ENGINE_CHAINS[".docx"]
+ENGINE_CHAINS[".md"] = ENGINE_CHAINS[".txt"]
+
+# Reading these directly is as cheap as reading a cache entry
+UNCACHED_EXTENSIONS = {".txt", ".md"}
+
+
+class DocumentTextService:
+    """
+    Content-addressed, thread-safe document text extractor.
+
+    Text is keyed on (SHA-256 of the file bytes, extension, ENGINE_VERSION); a
+    (path, size, mtime) memo avoids re-hashing unchanged files. Plain-text files
+    are read directly.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = 256, use_disk_cache: bool = True):
+        """
+        Args:
+            cache_dir: Directory for the on-disk text cache (defaults to DATA_DIR/cache/document_text)
+            max_memory_entries: Number of extracted texts kept in memory
+            use_disk_cache: Persist extracted text so other processes and restarts reuse it
+        """
+        self.cache_dir = cache_dir or os.path.join(os.getenv("DATA_DIR", "/app/data"), "cache", "document_text")
+        self.max_memory_entries = max_memory_entries
+        self.use_disk_cache = use_disk_cache
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "engines": {}}
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def extract(self, path: str, raw_fallback: bool = False,
+                max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+        """
+        Extract text from a document.
+
+        Args:
+            path: File path (.pdf, .docx, .doc, .txt, .md)
+            raw_fallback: For PDFs, return printable byte runs when every engine fails
+            max_pages: Stop after this many pages/paragraphs (defaults to DOCUMENT_MAX_PAGES, 0 = all)
+            max_chars: Stop after this many characters (defaults to DOCUMENT_MAX_CHARS, 0 = all)
+
+        Returns:
+            Extracted text ("" when engines ran but the document has no text layer)
+
+        Raises:
+            DocumentTextError: Unsupported type, or every engine raised
+        """
+        return self.extract_with_info(path, raw_fallback, max_pages, max_chars)["text"]
+
+    def extract_with_info(self, path: str, raw_fallback: bool = False,
+                          max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Like extract(), also returning the engine used, content hash, and whether it was cached or truncated."""
+        ext = os.path.splitext(path)[1].lower()
+        chain = ENGINE_CHAINS.get(ext)
+        if chain is None:
+            raise DocumentTextError(f"Unsupported file format: {ext}")
+        max_pages = DEFAULT_MAX_PAGES if max_pages is None else max_pages
+        max_chars = DEFAULT_MAX_CHARS if max_chars is None else max_chars
+
+        use_cache = ext not in UNCACHED_EXTENSIONS
+        content_hash = self.file_hash(path) if use_cache else None
+        key = f"{content_hash}{ext}.v{ENGINE_VERSION}"
+        # Capped extractions that stopped early are cached under their own key
+        capped_key = f"{key}.p{max_pages}.c{max_chars}" if (max_pages or max_chars) else key
+        if use_cache:
+            cached = self._get_cached(capped_key) if capped_key != key else None
+            if cached is None:
+                cached = self._get_cached(key)
+                if cached is not None and max_pages and cached.get("pages", max_pages + 1) > max_pages:
+                    # A full text cannot be cut by page count after the fact
+                    cached = None
+            if cached is not None:
+                text = cached["text"]
+                truncated = bool(cached.get("truncated"))
+                if max_chars and len(text) > max_chars:
+                    text, truncated = text[:max_chars], True
+                return dict(cached, text=text, truncated=truncated, content_hash=content_hash, cached=True)
+            with self._lock:
+                self.stats["misses"] += 1
+
+        text, engine, errors, pages, truncated = "", None, [], 0, False
+        for name, func, available in chain:
+            if not available:
+                continue
+            started = time.perf_counter()
+            try:
+                text, pages, truncated = join_pages(func(path), max_pages, max_chars)
+            except Exception as e:
+                self._record_engine(name, time.perf_counter() - started, ok=False)
+                errors.append(f"{name}: {e}")
+                continue
+            self._record_engine(name, time.perf_counter() - started, ok=bool(text.strip()))
+            engine = name
+            if text.strip():
+                break
+
+        if engine is None and ext == ".pdf" and raw_fallback:
+            text, pages, truncated = join_pages(_pdf_raw_strings(path), max_pages, max_chars)
+            # Not cached: a later caller without raw_fallback should still see the failure
+            return {"text": text, "engine": "raw_strings", "truncated": truncated,
+                    "content_hash": content_hash, "cached": False}
+        if engine is None:
+            raise DocumentTextError(
+                f"Could not extract text from {os.path.basename(path)}: " + ("; ".join(errors) or "no extraction engine available")
+            )
+
+        entry = {"text": text, "engine": engine, "pages": pages, "truncated": truncated}
+        if use_cache:
+            self._put_cached(capped_key if truncated else key, entry)
+        return dict(entry, content_hash=content_hash, cached=False)
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of the file bytes, memoised on (path, size, mtime)."""
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if memo_key in self._file_hashes:
+                return self._file_hashes[memo_key]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        with self._lock:
+            if len(self._file_hashes) > 10000:
+                self._file_hashes.clear()
+            self._file_hashes[memo_key] = value
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit counts and per-engine call/success/timing metrics."""
+        with self._lock:
+            engines = {}
+            for name, s in self.stats["engines"].items():
+                engines[name] = dict(s, avg_ms=round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+                                     total_ms=round(s["total_ms"], 1))
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                "memory_hits": self.stats["memory_hits"],
+                "disk_hits": self.stats["disk_hits"],
+                "misses": self.stats["misses"],
+                "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0,
+                "engines": engines,
+            }
+
+    # ----------------------------
+    # Cache
+    # ----------------------------
+    def _record_engine(self, name: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            s = self.stats["engines"].setdefault(name, {"calls": 0, "successes": 0, "failures": 0, "total_ms": 0.0})
+            s["calls"] += 1
+            s["successes" if ok else "failures"] += 1
+            s["total_ms"] += seconds * 1000
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+        if not self.use_disk_cache:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"[DOC_TEXT] Ignoring unreadable cache entry {path}: {e}")
+            return None
+        self._remember(key, entry)
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        return entry
+
+    def _put_cached(self, key: str, entry: Dict[str, Any]) -> None:
+        self._remember(key, entry)
+        if not self.use_disk_cache:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[DOC_TEXT] Could not write cache entry {path}: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+
+_service: Optional[DocumentTextService] = None
+_service_lock = threading.Lock()
+
+
+def get_document_text_service() -> DocumentTextService:
+    """Process-wide DocumentTextService."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = DocumentTextService()
+        return _service
+
+
+def extract_document_text(path: str, raw_fallback: bool = False,
+                          max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """Extract text with the shared service (see DocumentTextService.extract)."""
+    return get_document_text_service().extract(path, raw_fallback=raw_fallback, max_pages=max_pages, max_chars=max_chars)
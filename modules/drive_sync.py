@@ -0,0 +1,344 @@
+"""
+Google Drive Incremental Sync
+Downloads job files from a Drive folder into a local directory, keeping a JSON
+manifest (file ID, md5Checksum, modifiedTime, local path) next to the files.
+After the first full listing, the folder is kept current from the Drive changes
+feed (a stored page token), so repeat runs list only what changed and download
+only files whose checksum or modified time differ from the local copy.
+"""
+
+import os
+import csv
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import sanitize_filename
+from .job_document_index import JOB_NUMBER_RX, is_notes_file
+
+MANIFEST_FILENAME = "drive_sync_manifest.json"
+
+GOOGLE_DOC_MIME = "application/vnd.google-apps.document"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+REPORT_COLUMNS = ["JobID", "Status", "Regular Files", "Notes Files", "FileID", "Downloaded", "Skipped", "Error"]
+
+
+class PyDrive2Backend:
+    """Drive access through an authenticated PyDrive2 GoogleDrive (as returned by authenticate_drive)."""
+
+    def __init__(self, drive: Any):
+        self.drive = drive
+
+    @property
+    def service(self):
+        return self.drive.auth.service
+
+    @staticmethod
+    def _normalize(item: Dict[str, Any]) -> Dict[str, Any]:
+        labels = item.get("labels") or {}
+        return {
+            "id": item.get("id"),
+            "name": item.get("title") or item.get("name") or "file",
+            "md5": item.get("md5Checksum"),
+            "modified": item.get("modifiedDate") or item.get("modifiedTime"),
+            "mime": item.get("mimeType", ""),
+            "parents": [p.get("id") if isinstance(p, dict) else p for p in item.get("parents") or []],
+            "trashed": bool(labels.get("trashed") or item.get("trashed")),
+        }
+
+    def list_folder(self, folder_id: str) -> List[Dict[str, Any]]:
+        items = self.drive.ListFile({
+            'q': f"'{folder_id}' in parents and trashed=false",
+            'maxResults': 1000,
+            'supportsAllDrives': True,
+            'includeItemsFromAllDrives': True,
+        }).GetList()
+        return [self._normalize(item) for item in items]
+
+    def start_page_token(self) -> str:
+        return self.service.changes().getStartPageToken(supportsAllDrives=True).execute()["startPageToken"]
+
+    def list_changes(self, page_token: str) -> Tuple[List[Dict[str, Any]], str]:
+        """All changes since page_token, and the token to resume from next time."""
+        changes = []
+        while True:
+            resp = self.service.changes().list(pageToken=page_token, maxResults=1000, supportsAllDrives=True,
+                                               includeItemsFromAllDrives=True).execute()
+            for item in resp.get("items", []):
+                file = self._normalize(item["file"]) if item.get("file") else None
+                changes.append({"id": item.get("fileId"), "removed": bool(item.get("deleted")), "file": file})
+            if resp.get("newStartPageToken"):
+                return changes, resp["newStartPageToken"]
+            page_token = resp["nextPageToken"]
+
+    def download(self, file: Dict[str, Any], dest_path: str) -> None:
+        handle = self.drive.CreateFile({'id': file["id"]})
+        if file.get("mime") == GOOGLE_DOC_MIME:
+            handle.GetContentFile(dest_path, mimetype=DOCX_MIME)
+        else:
+            handle.GetContentFile(dest_path)
+
+
+class LocalFakeDrive:
+    """
+    Directory-backed stand-in for Drive, for tests and offline runs.
+
+    Folder IDs are subdirectory names under root ("" for root itself), file IDs
+    are paths relative to root, and change tokens are snapshots of the tree.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.calls = {"list_folder": 0, "list_changes": 0, "download": 0}
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            parent = os.path.relpath(dirpath, self.root)
+            parent = "" if parent == "." else parent
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                with open(path, "rb") as f:
+                    md5 = hashlib.md5(f.read()).hexdigest()
+                file_id = os.path.join(parent, name)
+                files[file_id] = {
+                    "id": file_id, "name": name, "md5": md5,
+                    "modified": datetime.utcfromtimestamp(os.path.getmtime(path)).isoformat() + "Z",
+                    "mime": "", "parents": [parent], "trashed": False,
+                }
+        return files
+
+    def _new_token(self, snapshot: Dict[str, Dict[str, Any]]) -> str:
+        with self._lock:
+            token = str(len(self._snapshots) + 1)
+            self._snapshots[token] = snapshot
+        return token
+
+    def list_folder(self, folder_id: str) -> List[Dict[str, Any]]:
+        self.calls["list_folder"] += 1
+        return [f for f in self._scan().values() if folder_id in f["parents"]]
+
+    def start_page_token(self) -> str:
+        return self._new_token(self._scan())
+
+    def list_changes(self, page_token: str) -> Tuple[List[Dict[str, Any]], str]:
+        self.calls["list_changes"] += 1
+        if page_token not in self._snapshots:
+            raise ValueError(f"Unknown page token {page_token}")
+        before, now = self._snapshots[page_token], self._scan()
+        changes = [{"id": fid, "removed": False, "file": f} for fid, f in now.items() if before.get(fid) != f]
+        changes += [{"id": fid, "removed": True, "file": None} for fid in before if fid not in now]
+        return changes, self._new_token(now)
+
+    def download(self, file: Dict[str, Any], dest_path: str) -> None:
+        self.calls["download"] += 1
+        shutil.copy2(os.path.join(self.root, file["id"]), dest_path)
+
+
+class DriveSync:
+    """Incrementally mirrors the job files of one Drive folder into local_dir."""
+
+    def __init__(self, backend: Any, folder_id: str, local_dir: str, manifest_path: Optional[str] = None,
+                 max_workers: int = 4):
+        self.backend = backend
+        self.folder_id = folder_id
+        self.local_dir = local_dir
+        self.manifest_path = manifest_path or os.path.join(local_dir, MANIFEST_FILENAME)
+        self.max_workers = max_workers
+        self.manifest = self._load_manifest()
+
+    # ----------------------------
+    # Manifest
+    # ----------------------------
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                manifest.setdefault("folders", {})
+                manifest.setdefault("files", {})
+                return manifest
+            except Exception as e:
+                print(f"[DRIVE_SYNC] Ignoring unreadable manifest {self.manifest_path}: {e}")
+        return {"folders": {}, "files": {}}
+
+    def _save_manifest(self) -> None:
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ----------------------------
+    # Listing
+    # ----------------------------
+    def refresh_listing(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring the folder's remote file index up to date.
+
+        Uses the stored change token when there is one; falls back to a full listing
+        on the first run or when the token is rejected (expired or revoked).
+        """
+        folder = self.manifest["folders"].get(self.folder_id)
+        if folder and folder.get("page_token"):
+            try:
+                changes, token = self.backend.list_changes(folder["page_token"])
+                remote = folder["remote"]
+                for change in changes:
+                    file = change.get("file")
+                    in_folder = (file is not None and not change.get("removed") and not file.get("trashed")
+                                 and self.folder_id in file.get("parents", []))
+                    if in_folder and file.get("mime") != FOLDER_MIME:
+                        remote[change["id"]] = file
+                    else:
+                        remote.pop(change["id"], None)
+                folder.update(page_token=token, listed_at=datetime.now().isoformat(), mode="changes")
+                print(f"[DRIVE_SYNC] Applied {len(changes)} changes; {len(remote)} files in folder")
+                return remote
+            except Exception as e:
+                print(f"[DRIVE_SYNC] Change feed unavailable ({e}); doing a full listing")
+
+        # Take the token before listing so changes made during the listing are not lost
+        try:
+            token = self.backend.start_page_token()
+        except Exception as e:
+            print(f"[DRIVE_SYNC] Could not get a change token ({e}); next run will list the folder again")
+            token = None
+        remote = {f["id"]: f for f in self.backend.list_folder(self.folder_id) if f.get("mime") != FOLDER_MIME}
+        self.manifest["folders"][self.folder_id] = {
+            "page_token": token, "remote": remote, "listed_at": datetime.now().isoformat(), "mode": "full",
+        }
+        print(f"[DRIVE_SYNC] Listed {len(remote)} files in folder {self.folder_id}")
+        return remote
+
+    # ----------------------------
+    # Download
+    # ----------------------------
+    def _local_name(self, file: Dict[str, Any]) -> str:
+        name = sanitize_filename(file["name"])
+        if file.get("mime") == GOOGLE_DOC_MIME and not name.lower().endswith(".docx"):
+            name += ".docx"
+        return name
+
+    def _same_content(self, file: Dict[str, Any]) -> bool:
+        local = self.manifest["files"].get(file["id"])
+        if not local or not os.path.exists(local.get("local_path", "")):
+            return False
+        if file.get("md5") and local.get("md5"):
+            return file["md5"] == local["md5"]
+        return bool(file.get("modified")) and file.get("modified") == local.get("modified")
+
+    def _is_current(self, file: Dict[str, Any]) -> bool:
+        dest_path = os.path.join(self.local_dir, self._local_name(file))
+        return self._same_content(file) and self.manifest["files"][file["id"]]["local_path"] == dest_path
+
+    def _rename(self, file: Dict[str, Any]) -> bool:
+        """Move an unchanged local copy to the file's current Drive name; False when it must be re-fetched."""
+        local = self.manifest["files"][file["id"]]
+        dest_path = os.path.join(self.local_dir, self._local_name(file))
+        try:
+            os.replace(local["local_path"], dest_path)
+        except OSError as e:
+            print(f"[DRIVE_SYNC] Could not rename {local['local_path']} to {dest_path}: {e}")
+            return False
+        local.update(local_path=dest_path, name=file["name"])
+        return True
+
+    def _download(self, file: Dict[str, Any]) -> Dict[str, Any]:
+        dest_path = os.path.join(self.local_dir, self._local_name(file))
+        tmp_path = f"{dest_path}.part"
+        try:
+            self.backend.download(file, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return {"id": file["id"], "local_path": dest_path, "md5": file.get("md5"),
+                    "modified": file.get("modified"), "name": file["name"],
+                    "downloaded_at": datetime.now().isoformat()}
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return {"id": file["id"], "error": str(e)}
+
+    def sync(self, job_ids: List[str], report_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Download the files of job_ids that are missing locally or changed on Drive.
+
+        Args:
+            job_ids: Job IDs to sync (files are matched on whole numbers in their names)
+            report_path: Optional CSV report in the download_report.csv format
+
+        Returns:
+            Dict with per-job results and downloaded/skipped/failed totals
+        """
+        os.makedirs(self.local_dir, exist_ok=True)
+        remote = self.refresh_listing()
+
+        wanted = {str(j).strip() for j in job_ids}
+        files_by_job: Dict[str, List[Dict[str, Any]]] = {}
+        for file in remote.values():
+            for number in set(JOB_NUMBER_RX.findall(file["name"])):
+                if number in wanted:
+                    files_by_job.setdefault(number, []).append(file)
+
+        to_fetch = {}
+        for files in files_by_job.values():
+            for file in files:
+                if self._is_current(file):
+                    continue
+                if not (self._same_content(file) and self._rename(file)):
+                    to_fetch[file["id"]] = file
+
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(to_fetch)))) as executor:
+                for outcome in executor.map(self._download, to_fetch.values()):
+                    outcomes[outcome["id"]] = outcome
+                    if "error" not in outcome:
+                        self.manifest["files"][outcome["id"]] = outcome
+        self._save_manifest()
+
+        results = []
+        totals = {"downloaded": 0, "skipped": 0, "failed": 0, "jobs_without_files": 0}
+        for job_id in dict.fromkeys(str(j).strip() for j in job_ids):
+            files = sorted(files_by_job.get(job_id, []), key=lambda f: f["name"])
+            regular = [self._local_name(f) for f in files if not is_notes_file(f["name"])]
+            notes = [self._local_name(f) for f in files if is_notes_file(f["name"])]
+            downloaded = [f["id"] for f in files if f["id"] in outcomes and "error" not in outcomes[f["id"]]]
+            errors = [outcomes[f["id"]]["error"] for f in files if "error" in outcomes.get(f["id"], {})]
+            skipped = len(files) - len(downloaded) - len(errors)
+            if not files:
+                status = "No files found"
+                totals["jobs_without_files"] += 1
+            elif errors:
+                status = "Failed"
+            elif regular:
+                status = "Downloaded successfully"
+            else:
+                status = "Downloaded notes only"
+            totals["downloaded"] += len(downloaded)
+            totals["skipped"] += skipped
+            totals["failed"] += len(errors)
+            results.append({
+                "JobID": job_id, "Status": status,
+                "Regular Files": "; ".join(regular), "Notes Files": "; ".join(notes),
+                "FileID": "; ".join(f["id"] for f in files),
+                "Downloaded": len(downloaded), "Skipped": skipped, "Error": "; ".join(errors),
+            })
+
+        if report_path:
+            with open(report_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(results)
+
+        print(f"[DRIVE_SYNC] {totals['downloaded']} downloaded, {totals['skipped']} unchanged, "
+              f"{totals['failed']} failed, {totals['jobs_without_files']} jobs without files")
+        return {"results": results, "totals": totals,
+                "listing_mode": self.manifest["folders"][self.folder_id].get("mode")}
@@ -8,6 +8,8 @@ import sys
 import json
 import time
 import datetime
+import threading
+import functools
 from typing import List, Dict, Any, Optional
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -15,10 +17,61 @@ from openai import OpenAI
 
 # Import the smart cache manager
 from .smart_cache_manager import SmartCacheManager
-from .text_combiner import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+from .text_combiner import DocumentPrefetcher
+from .job_document_index import get_job_document_index
+from .tracing import span
 from .json_optimizer import JsonOptimizer
+from .json_repair import loads_lenient, JSONRepairError
+from .ai_gateway import AIGateway, AIGatewayError
+from .provider_health import check_provider
+from .ai_streaming import stream_chat_completion, JSONStreamValidator
+from .structured_output import create_structured, schema_from_template, template_from_prompt
+from .prompt_cache import prefix_messages, prompt_cache_kwargs, record_usage, cached_input_rate
 import config
 
+# Static prompt prefixes, byte-identical across calls so providers can cache them
+JOB_DESCRIPTION_PROMPT_PREFIX = """Extract structured data from this job description. Return ONLY valid JSON with these exact fields:
+{
+  "required_education": {
+    "degree_level": "string",
+    "field_of_study": "string", 
+    "required_coursework": ["array of strings"]
+  },
+  "required_experience": {
+    "total_years_relevant": "string",
+    "specific_industry_experience": ["array of strings"],
+    "function_specific_experience": ["array of strings"]
+  },
+  "core_technical_tools_systems": ["array of strings"],
+  "core_technical_hands_on_expertise": ["array of strings"],
+  "required_soft_skills_communication": ["array of strings"],
+  "required_soft_skills_traits": ["array of strings"],
+  "professional_certifications": ["array of strings"],
+  "mandatory_licenses": ["array of strings"],
+  "dealbreakers_disqualifiers": ["array of strings"],
+  "key_deliverables_responsibilities": ["array of strings"],
+  "facility_operational_model": "string",
+  "safety_culture_regulatory_setting": ["array of strings"],
+  "culture_fit_work_style": "string",
+  "language_requirements": ["array of strings"],
+  "travel_shift_remote_flexibility": "string"
+}
+"""
+
+HR_NOTES_PROMPT_PREFIX = """Extract key information from these HR notes. Return ONLY valid JSON with these exact fields:
+{
+  "hr_notes_key_requirements": "string",
+  "internal_notes": "string",
+  "additional_context": "string"
+}
+"""
+
+# Response schemas for providers with structured output, derived from the templates above
+RESPONSE_SCHEMAS = {
+    "job_description": schema_from_template(template_from_prompt(JOB_DESCRIPTION_PROMPT_PREFIX)),
+    "notes": schema_from_template(template_from_prompt(HR_NOTES_PROMPT_PREFIX)),
+}
+
 class EnhancedJobProcessor:
     def __init__(self, job_ids_to_process: List[str], folder_path: str = None, 
                  csv_path: str = None, ai_agent: str = config.DEFAULT_AI_AGENT, 
@@ -54,11 +107,21 @@ class EnhancedJobProcessor:
         else:
             self.csv = csv_path
         
+        # Job ID → document filenames, shared across worker threads (rescanned when the folder changes)
+        self.doc_index = get_job_document_index(self.folder)
+        
+        # Extracts job documents in worker processes ahead of the AI stage (started in run())
+        self.prefetcher = DocumentPrefetcher(getattr(config, 'EXTRACTION_WORKERS', None))
+        
         # Initialize AI client
         self.client = None
         self.model = None
         self._initialize_ai_client()
         
+        # Hedging, circuit breakers and failover across the configured agents
+        self.gateway = AIGateway(self.ai_agent, self.client, self.model,
+                                 max_workers=getattr(config, 'MAX_WORKERS', 8) * 3)
+        
         # Processing statistics
         self.processing_stats = {
             "total_jobs": len(job_ids_to_process),
@@ -70,6 +133,11 @@ class EnhancedJobProcessor:
             "successful_jobs": 0,
             "failed_jobs": 0
         }
+        
+        # Provider token usage, including input tokens served from the provider's prompt cache
+        self.token_stats = {"ai_calls": 0, "total_uploaded": 0, "total_output": 0,
+                            "cached_input_tokens": 0, "uncached_input_tokens": 0}
+        self._stats_lock = threading.Lock()
     
     def _initialize_ai_client(self):
         """Initialize the AI client based on the selected AI agent"""
@@ -107,9 +175,9 @@ class EnhancedJobProcessor:
         if not api_key:
             raise ValueError(f"No API key found for {self.ai_agent.upper()}. Please add it to credentials/api_keys.txt or set the {self.ai_agent.upper()}_API_KEY environment variable.")
 
-        # Test the AI agent before proceeding with job processing
-        print(f"Testing {self.ai_agent.upper()} connection before starting job processing...")
-        success, message = config.test_ai_agent(self.ai_agent)
+        # Check the AI agent before proceeding with job processing (probes only if the cached health has expired)
+        print(f"Checking {self.ai_agent.upper()} connection before starting job processing...")
+        success, message = check_provider(self.ai_agent, model)
         if not success:
             raise ValueError(f"AI agent test failed: {message}")
         
@@ -121,7 +189,7 @@ class EnhancedJobProcessor:
     
     def _extract_text_from_files(self, file_list: List[str], job_id: str) -> str:
         """Extract text content from a list of files"""
-        text_content = ""
+        texts = []
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         
         for doc in file_list:
@@ -131,103 +199,34 @@ class EnhancedJobProcessor:
                     print(f"[{timestamp}] [Job {job_id}] Warning: File {path} does not exist locally. Skipping.")
                     continue
                 
-                file_lower = doc.lower()
-                if file_lower.endswith('.docx'):
-                    text_content += extract_text_from_docx(path) + "\n\n"
-                elif file_lower.endswith('.pdf'):
-                    text_content += extract_text_from_pdf(path) + "\n\n"
-                elif file_lower.endswith('.txt'):
-                    with open(path, "r", encoding="utf-8") as rd:
-                        text_content += rd.read() + "\n\n"
-                else:
-                    # Try as text file with latin-1 encoding
-                    with open(path, "r", encoding="latin-1") as rd:
-                        text_content += rd.read() + "\n\n"
+                texts.append(self.prefetcher.get(path))
             except Exception as e:
                 print(f"[{timestamp}] [Job {job_id}] Error reading file {path}: {e}")
         
-        return text_content.strip()
+        return "\n\n".join(texts).strip()
     
     def _process_with_ai(self, job_id: str, text_content: str, content_type: str = "job_description") -> Dict:
         """Process text content with AI"""
         print(f"[AI PROCESSING] Processing {content_type} for job {job_id}")
         
-        # Adaptive prompting based on content type
+        # Adaptive prompting based on content type. The instructions and schema are a
+        # fixed prefix (system message); only the job content varies between calls.
         if content_type == "job_description":
+            prompt_prefix = JOB_DESCRIPTION_PROMPT_PREFIX
             if len(text_content.strip()) < 2000:
-                prompt = f"""Extract structured data from this job description. Return ONLY valid JSON with these exact fields:
-{{
-  "required_education": {{
-    "degree_level": "string",
-    "field_of_study": "string", 
-    "required_coursework": ["array of strings"]
-  }},
-  "required_experience": {{
-    "total_years_relevant": "string",
-    "specific_industry_experience": ["array of strings"],
-    "function_specific_experience": ["array of strings"]
-  }},
-  "core_technical_tools_systems": ["array of strings"],
-  "core_technical_hands_on_expertise": ["array of strings"],
-  "required_soft_skills_communication": ["array of strings"],
-  "required_soft_skills_traits": ["array of strings"],
-  "professional_certifications": ["array of strings"],
-  "mandatory_licenses": ["array of strings"],
-  "dealbreakers_disqualifiers": ["array of strings"],
-  "key_deliverables_responsibilities": ["array of strings"],
-  "facility_operational_model": "string",
-  "safety_culture_regulatory_setting": ["array of strings"],
-  "culture_fit_work_style": "string",
-  "language_requirements": ["array of strings"],
-  "travel_shift_remote_flexibility": "string"
-}}
-
-Job Description for Job ID '{job_id}' (MINIMAL CONTENT - extract all available information):
+                prompt = f"""Job Description for Job ID '{job_id}' (MINIMAL CONTENT - extract all available information):
 ----------------------
 {text_content}
 ----------------------"""
             else:
-                prompt = f"""Extract structured data from this job description. Return ONLY valid JSON with these exact fields:
-{{
-  "required_education": {{
-    "degree_level": "string",
-    "field_of_study": "string", 
-    "required_coursework": ["array of strings"]
-  }},
-  "required_experience": {{
-    "total_years_relevant": "string",
-    "specific_industry_experience": ["array of strings"],
-    "function_specific_experience": ["array of strings"]
-  }},
-  "core_technical_tools_systems": ["array of strings"],
-  "core_technical_hands_on_expertise": ["array of strings"],
-  "required_soft_skills_communication": ["array of strings"],
-  "required_soft_skills_traits": ["array of strings"],
-  "professional_certifications": ["array of strings"],
-  "mandatory_licenses": ["array of strings"],
-  "dealbreakers_disqualifiers": ["array of strings"],
-  "key_deliverables_responsibilities": ["array of strings"],
-  "facility_operational_model": "string",
-  "safety_culture_regulatory_setting": ["array of strings"],
-  "culture_fit_work_style": "string",
-  "language_requirements": ["array of strings"],
-  "travel_shift_remote_flexibility": "string"
-}}
-
-Job Description for Job ID '{job_id}':
+                prompt = f"""Job Description for Job ID '{job_id}':
 ----------------------
 {text_content}
 ----------------------"""
         
         elif content_type == "notes":
-            prompt = f"""Extract key information from these HR notes. Return ONLY valid JSON with these exact fields:
-{{
-  "hr_notes_key_requirements": "string",
-  "internal_notes": "string",
-  "additional_context": "string"
-}}
-
-HR Notes for Job ID '{job_id}':
+            prompt_prefix = HR_NOTES_PROMPT_PREFIX
+            prompt = f"""HR Notes for Job ID '{job_id}':
 ----------------------
 {text_content}
 ----------------------"""
@@ -239,26 +238,44 @@ HR Notes for Job ID '{job_id}':
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_completion_tokens=4000
-                )
+                # Streamed: degenerate/off-schema output and stalls abort within seconds
+                def request(client, provider, model):
+                    response = stream_chat_completion(
+                        functools.partial(create_structured, client.chat.completions.create,
+                                          provider, content_type, RESPONSE_SCHEMAS[content_type]),
+                        provider,
+                        JSONStreamValidator(RESPONSE_SCHEMAS[content_type]["properties"]),
+                        model=model,
+                        messages=prefix_messages(prompt_prefix, prompt),
+                        max_completion_tokens=4000,
+                        **prompt_cache_kwargs(provider, prompt_prefix)
+                    )
+                    record_usage(self.token_stats, response.usage, self._stats_lock)
+                    # Malformed or truncated JSON is repaired locally rather than re-requested
+                    with span("json_parse", characters=len(response.content)):
+                        ai_data = loads_lenient(response.content)
+                    if not isinstance(ai_data, dict):
+                        raise JSONRepairError(f"Expected a JSON object, got {type(ai_data).__name__}")
+                    return ai_data
                 
-                ai_response = response.choices[0].message.content.strip()
-                ai_data = json.loads(ai_response)
+                # Hedged after the provider's p95 latency; fails over to the next configured agent
+                with span("ai_request", content_type=content_type, attempt=attempt + 1) as ai_span:
+                    provider, ai_data = self.gateway.call(request, f"[Job {job_id}]")
+                    ai_span.set_attribute("provider", provider)
                 
                 self.processing_stats["ai_calls_made"] += 1
-                print(f"[AI PROCESSING] Successfully processed {content_type} for job {job_id}")
+                print(f"[AI PROCESSING] Successfully processed {content_type} for job {job_id} ({provider})")
                 return ai_data
                 
-            except json.JSONDecodeError as e:
+            except AIGatewayError as e:
+                # Aborted or unparsable answers are retried at once; provider outages back off
                 if attempt < max_retries - 1:
-                    print(f"[AI PROCESSING] JSON decode error for {job_id}, attempt {attempt + 1}: {e}")
-                    time.sleep(2)
+                    print(f"[AI PROCESSING] AI request failed for {job_id}, attempt {attempt + 1}: {e}")
+                    if not e.bad_answers_only:
+                        time.sleep(2)
                     continue
                 else:
-                    raise Exception(f"Failed to parse AI response as JSON after {max_retries} attempts: {e}")
+                    raise Exception(f"AI processing failed after {max_retries} attempts: {e}")
             except Exception as e:
                 if attempt < max_retries - 1:
                     print(f"[AI PROCESSING] Error for {job_id}, attempt {attempt + 1}: {e}")
@@ -269,6 +286,14 @@ HR Notes for Job ID '{job_id}':
         
         return {}
     
+    def _process_single_job_traced(self, job_id: str) -> Optional[Dict]:
+        """_process_single_job as the root span of the job's trace"""
+        with span("job_processing", job_id=job_id, agent=self.ai_agent) as job_span:
+            result = self._process_single_job(job_id)
+            if result is None:
+                job_span.status = "error"
+            return result
+    
     def _process_single_job(self, job_id: str) -> Optional[Dict]:
         """Process a single job with smart caching"""
         start_time = time.time()
@@ -276,19 +301,15 @@ HR Notes for Job ID '{job_id}':
         print(f"[{timestamp}] [Job {job_id}] Starting enhanced processing with smart caching")
         
         try:
-            # Find all documents for this job
-            all_docs = [f for f in os.listdir(self.folder) if job_id in f]
+            # Find all documents for this job, separated into job description and notes documents
+            jd_docs, notes_docs = self.doc_index.split(job_id)
             
-            if not all_docs:
+            if not jd_docs and not notes_docs:
                 print(f"[{timestamp}] [Job {job_id}] No documents found")
                 self.processing_stats["jobs_without_files"] += 1
                 self.processing_stats["failed_jobs"] += 1
                 return None
             
-            # Separate job description and notes documents
-            jd_docs = [doc for doc in all_docs if 'note' not in doc.lower()]
-            notes_docs = [doc for doc in all_docs if 'note' in doc.lower()]
-            
             job_file = os.path.join(self.folder, jd_docs[0]) if jd_docs else None
             notes_file = os.path.join(self.folder, notes_docs[0]) if notes_docs else None
             
@@ -306,13 +327,14 @@ HR Notes for Job ID '{job_id}':
             # Optimize the result
             if job_file and os.path.exists(job_file):
                 optimizer = JsonOptimizer(input_file=self.csv)
-                optimized_data = optimizer.optimize_job(
-                    combined_result, 
-                    mtb_data or {}, 
-                    job_id, 
-                    "",  # notes will be handled separately
-                    combined_result.get('hr_notes_key_requirements', '')
-                )
+                with span("optimize"):
+                    optimized_data = optimizer.optimize_job(
+                        combined_result, 
+                        mtb_data or {}, 
+                        job_id, 
+                        "",  # notes will be handled separately
+                        combined_result.get('hr_notes_key_requirements', '')
+                    )
             else:
                 optimized_data = combined_result
             
@@ -335,14 +357,11 @@ HR Notes for Job ID '{job_id}':
         """Wrapper function for AI processing that can be called by Smart Cache Manager"""
         try:
             # Extract text content
-            if content_type == "job_description":
-                jd_docs = [os.path.basename(file_path)]
-                text_content = self._extract_text_from_files(jd_docs, job_id)
-            elif content_type == "notes":
-                notes_docs = [os.path.basename(file_path)]
-                text_content = self._extract_text_from_files(notes_docs, job_id)
-            else:
+            if content_type not in ("job_description", "notes"):
                 raise ValueError(f"Unknown content type: {content_type}")
+            with span("text_extraction", content_type=content_type) as extraction:
+                text_content = self._extract_text_from_files([os.path.basename(file_path)], job_id)
+                extraction.set_attribute("characters", len(text_content))
             
             if not text_content.strip():
                 print(f"[AI PROCESSING] No content extracted for {content_type} in job {job_id}")
@@ -375,6 +394,15 @@ HR Notes for Job ID '{job_id}':
     
     def run(self) -> str:
         """Run the enhanced job processing with smart caching"""
+        try:
+            return self._run_jobs()
+        finally:
+            # The extraction process pool and idle gateway threads would otherwise outlive
+            # the run in the long-running API (also when processing raises)
+            self.prefetcher.shutdown()
+            self.gateway.shutdown()
+    
+    def _run_jobs(self) -> str:
         print(f"\n🚀 Starting Enhanced Job Processing with Smart Cache Manager")
         print(f"📊 Processing {len(self.job_ids)} jobs with {self.ai_agent} AI agent")
         print(f"💾 Using hybrid caching with configurable policies")
@@ -385,10 +413,18 @@ HR Notes for Job ID '{job_id}':
         # Process jobs in parallel for better performance
         max_workers = min(4, len(self.job_ids))  # Limit concurrent jobs
         
+        # Parse job documents in worker processes while the job threads wait on AI calls
+        try:
+            prefetched = self.prefetcher.start([os.path.join(self.folder, f) for job_id in self.job_ids for f in self.doc_index.documents(job_id)])
+            if prefetched:
+                print(f"📄 Prefetching text for {prefetched} documents using {self.prefetcher.max_workers} processes")
+        except OSError as e:
+            print(f"Document prefetch skipped: {e}")
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all jobs for processing
             future_to_job = {
-                executor.submit(self._process_single_job, job_id): job_id 
+                executor.submit(self._process_single_job_traced, job_id): job_id 
                 for job_id in self.job_ids
             }
             
@@ -481,6 +517,8 @@ HR Notes for Job ID '{job_id}':
         print(f"📁 Jobs with Files: {self.processing_stats['jobs_with_files']}")
         print(f"📄 Jobs without Files: {self.processing_stats['jobs_without_files']}")
         print(f"🤖 AI Calls Made: {self.processing_stats['ai_calls_made']}")
+        print(f"⚡ Input Tokens from Provider Prompt Cache: {self.token_stats['cached_input_tokens']:,} "
+              f"({cached_input_rate(self.token_stats):.1f}%)")
         
         # Print smart cache statistics
         self.cache_manager.print_cache_statistics()
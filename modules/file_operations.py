@@ -1,61 +1,149 @@
 import os
 import re
+import json
 import shutil
+import hashlib
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
 
 from .utils import sanitize_filename
 
-def copy_files_with_numbers(source_dir: str, destination_dir: str, numbers_to_find: list[str]) -> None:
+MANIFEST_FILENAME = "copy_manifest.json"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_unchanged(src: os.stat_result, src_path: str, dest_path: str, verify_hash: bool) -> bool:
+    """True if dest_path already holds the same file: same size and mtime, or same SHA-256 when verify_hash."""
+    try:
+        dest = os.stat(dest_path)
+    except OSError:
+        return False
+    if dest.st_size != src.st_size:
+        return False
+    # copy2 preserves mtime, so an unchanged copy has the source's mtime (2s slack for FAT/SMB shares)
+    if abs(dest.st_mtime - src.st_mtime) < 2:
+        return True
+    return verify_hash and _file_sha256(src_path) == _file_sha256(dest_path)
+
+
+def _transfer_file(src_path: str, dest_path: str, incremental: bool, verify_hash: bool, link: bool) -> Dict[str, Any]:
+    """Copy (or hard-link) one file; returns its manifest entry."""
+    st = os.stat(src_path)
+    entry = {"source": src_path, "size": st.st_size, "mtime": st.st_mtime}
+    try:
+        if incremental and _is_unchanged(st, src_path, dest_path, verify_hash):
+            entry["action"] = "skipped"
+            return entry
+        if link:
+            try:
+                if os.path.lexists(dest_path):
+                    os.unlink(dest_path)
+                os.link(src_path, dest_path)
+                entry["action"] = "linked"
+                return entry
+            except OSError:
+                pass  # Different filesystem or links not supported: copy instead
+        shutil.copy2(src_path, dest_path)
+        entry["action"] = "copied"
+    except Exception as e:
+        entry["action"] = "failed"
+        entry["error"] = str(e)
+    return entry
+
+
+def copy_files_with_numbers(source_dir: str, destination_dir: str, numbers_to_find: list[str],
+                            incremental: bool = False, verify_hash: bool = False, link: bool = False,
+                            max_workers: int = 8) -> Optional[Dict[str, Any]]:
     """
     Copy files from source_dir to destination_dir if their names contain any of the numbers in numbers_to_find.
-    
+
     Args:
         source_dir: Source directory path
         destination_dir: Destination directory path
         numbers_to_find: List of job ID numbers to search for in filenames
-        
+        incremental: Skip files whose destination copy already has the same size and mtime
+        verify_hash: In incremental mode, also compare SHA-256 when size matches but mtime differs
+        link: Hard-link instead of copying when source and destination share a filesystem
+        max_workers: Number of files transferred in parallel
+
     Returns:
-        None
+        The run manifest (also written to copy_manifest.json in destination_dir), or None on invalid input
     """
     if not os.path.isdir(source_dir):
         print(f"Error: Source directory '{source_dir}' not found.")
-        return
+        return None
 
     if not numbers_to_find:
         print("Error: No job IDs provided.")
-        return
+        return None
 
     os.makedirs(destination_dir, exist_ok=True)
-    
+
     # Create a pattern that matches whole job IDs, not as part of larger numbers
     pattern = re.compile(rf"(?<!\d)({'|'.join(map(re.escape, numbers_to_find))})(?!\d)", re.IGNORECASE)
     found = set()
-    copied_count = 0
+    manifest: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(),
+        "source_dir": source_dir,
+        "destination_dir": destination_dir,
+        "incremental": incremental,
+        "files": {},
+        "missing": [],
+    }
 
     try:
-        log_copied = open(os.path.join(destination_dir, "log_copied_files_local.txt"), "a", encoding="utf-8")
-        log_missing = open(os.path.join(destination_dir, "log_missing_numbers.txt"), "a", encoding="utf-8")
-
+        tasks = {}
         for entry in os.scandir(source_dir):
             if not entry.is_file():
                 continue
             m = pattern.search(entry.name)
             if m:
                 found.add(m.group(1))
-                dest_path = os.path.join(destination_dir, sanitize_filename(entry.name))
-                shutil.copy2(entry.path, dest_path)
-                log_copied.write(f"{datetime.now()}: Copied {entry.name}\n")
-                copied_count += 1
+                tasks[entry.name] = (entry.path, os.path.join(destination_dir, sanitize_filename(entry.name)))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks) or 1))) as executor:
+            futures = {name: executor.submit(_transfer_file, src, dest, incremental, verify_hash, link)
+                       for name, (src, dest) in tasks.items()}
+            for name, future in futures.items():
+                manifest["files"][name] = future.result()
 
         missing = set(numbers_to_find) - {n.lower() for n in found}
-        for num in sorted(missing):
-            log_missing.write(f"{datetime.now()}: Missing {num}\n")
+        manifest["missing"] = sorted(missing)
 
-        print(f"Copied {copied_count} files; {len(missing)} numbers not found.")
+        # Logs describe this run only
+        with open(os.path.join(destination_dir, "log_copied_files_local.txt"), "w", encoding="utf-8") as log_copied:
+            for name, info in sorted(manifest["files"].items()):
+                if info["action"] in ("copied", "linked"):
+                    log_copied.write(f"{datetime.now()}: {info['action'].capitalize()} {name}\n")
+        with open(os.path.join(destination_dir, "log_missing_numbers.txt"), "w", encoding="utf-8") as log_missing:
+            for num in manifest["missing"]:
+                log_missing.write(f"{datetime.now()}: Missing {num}\n")
+
+        actions = [info["action"] for info in manifest["files"].values()]
+        manifest["totals"] = {action: actions.count(action) for action in ("copied", "linked", "skipped", "failed")}
+        for name, info in manifest["files"].items():
+            if info["action"] == "failed":
+                print(f"Error copying {name}: {info['error']}")
+        print(f"Copied {manifest['totals']['copied'] + manifest['totals']['linked']} files "
+              f"({manifest['totals']['skipped']} unchanged skipped, {manifest['totals']['failed']} failed); "
+              f"{len(missing)} numbers not found.")
     except Exception as e:
         print(f"Error during file copy operation: {e}")
+        manifest["error"] = str(e)
     finally:
-        if 'log_copied' in locals():
-            log_copied.close()
-        if 'log_missing' in locals():
-            log_missing.close()
+        manifest["finished_at"] = datetime.now().isoformat()
+        try:
+            with open(os.path.join(destination_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+        except OSError as e:
+            print(f"Could not write copy manifest: {e}")
+
+    return manifest
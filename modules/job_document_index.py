@@ -0,0 +1,91 @@
+"""
+Job Document Index
+Maps job IDs to the job description and notes files in a jobs folder. The folder
+is scanned once and rescanned only when its mtime changes; filenames are parsed
+with the same whole-number boundary rule as copy_files_with_numbers, so job 12
+never matches "8123 notes.pdf".
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Whole numbers only: digits not preceded or followed by another digit
+JOB_NUMBER_RX = re.compile(r"(?<!\d)(\d+)(?!\d)")
+
+
+def is_notes_file(filename: str) -> bool:
+    """HR notes files carry "note" in their name; everything else is a job description."""
+    return 'note' in filename.lower()
+
+
+class JobDocumentIndex:
+    """
+    Thread-safe job ID → filenames index for one folder.
+
+    Lookups stat the folder and rescan it only when its mtime changed (a file was
+    added, removed or renamed), so many worker threads share one directory read.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._filenames: List[str] = []
+        self._by_number: Dict[str, List[str]] = {}
+        self.scans = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan the folder if it changed since the last scan; returns True if it was rescanned."""
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        with self._lock:
+            if not force and self._mtime_ns is not None and mtime_ns == self._mtime_ns:
+                return False
+            filenames: List[str] = []
+            by_number: Dict[str, List[str]] = {}
+            if mtime_ns is not None:
+                for entry in os.scandir(self.folder):
+                    if not entry.is_file():
+                        continue
+                    filenames.append(entry.name)
+                    for number in set(JOB_NUMBER_RX.findall(entry.name)):
+                        by_number.setdefault(number, []).append(entry.name)
+            filenames.sort()
+            for names in by_number.values():
+                names.sort()
+            self._filenames, self._by_number, self._mtime_ns = filenames, by_number, mtime_ns
+            self.scans += 1
+            return True
+
+    def documents(self, job_id: str) -> List[str]:
+        """All filenames belonging to job_id (sorted)."""
+        self.refresh()
+        job_id = str(job_id).strip()
+        with self._lock:
+            if job_id.isdigit():
+                return list(self._by_number.get(job_id, []))
+            # Non-numeric IDs: same boundary rule, over the cached listing
+            pattern = re.compile(rf"(?<!\d){re.escape(job_id)}(?!\d)", re.IGNORECASE)
+            return [name for name in self._filenames if pattern.search(name)]
+
+    def split(self, job_id: str) -> Tuple[List[str], List[str]]:
+        """(job description files, notes files) for job_id."""
+        docs = self.documents(job_id)
+        return [d for d in docs if not is_notes_file(d)], [d for d in docs if is_notes_file(d)]
+
+
+_indexes: Dict[str, JobDocumentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_job_document_index(folder: str) -> JobDocumentIndex:
+    """Process-wide index for folder, shared by every processor and worker thread."""
+    key = os.path.abspath(folder)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = JobDocumentIndex(key)
+        return _indexes[key]
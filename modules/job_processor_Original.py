@@ -2,20 +2,149 @@ import os
 import sys
 import json
 import hashlib
+import functools
 from typing import List, Dict, Any, Optional
 import openai
 from openai import OpenAI
 import config
 from .utils import clean_api_output
-from .text_combiner import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+from .json_repair import loads_lenient, JSONRepairError
+from .ai_gateway import AIGateway, AIGatewayError, is_rejected_answer
+from .provider_health import check_provider
+from .ai_streaming import stream_chat_completion, JSONStreamValidator
+from .structured_output import create_structured, schema_from_template, template_from_prompt
+from .prompt_cache import prefix_messages, prompt_cache_kwargs, record_usage, cached_input_rate
+from .text_combiner import DocumentPrefetcher
+from .job_document_index import get_job_document_index
+from .tracing import span
+from .logging_setup import get_logger, log_payload, sample_payloads
 import pandas as pd
 import datetime
 import time
+import threading
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .gdrive_operations import authenticate_drive
 from .json_optimizer import JsonOptimizer
 
+logger = get_logger("job_processor")
+
+
+def _field_coverage(data: Dict[str, Any], prefix: str = "") -> tuple:
+    """(filled fields, missing field paths, total fields) of an extraction; nested objects count as fields too."""
+    filled, missing, total = 0, [], 0
+    for key, value in data.items():
+        total += 1
+        if isinstance(value, dict):
+            sub_filled, sub_missing, sub_total = _field_coverage(value, f"{prefix}{key}.")
+            filled += sub_filled
+            missing += sub_missing
+            total += sub_total
+        elif value if isinstance(value, list) else (value and str(value).strip()):
+            filled += 1
+        else:
+            missing.append(f"{prefix}{key}")
+    return filled, missing, total
+
+# Static part of the job extraction prompts. Kept free of per-job content so it is
+# byte-identical across calls and can be served from the provider's prompt cache.
+JOB_EXTRACTION_PREFIX_MINIMAL = """You are an expert in recruitment process automation. Your task is to extract key information from the provided job description text and structure it as a JSON object.
+
+IMPORTANT: This appears to be a MINIMAL or BRIEF job description. Be extra thorough in extracting every piece of information available, even if it's limited. Look for:
+- Any education requirements mentioned (even if brief)
+- Any experience requirements or preferences
+- Any skills, certifications, or qualifications mentioned
+- Any responsibilities or duties described
+- Any industry or regulatory information
+- Any compensation or work arrangement details
+
+If information is not explicitly mentioned, use empty strings/arrays rather than guessing. However, extract ALL available information from even brief descriptions.
+
+The JSON output must follow this structure:
+
+{
+  "required_education": {
+  "degree_level": "",
+  "field_of_study": "",
+  "required_coursework": []
+  },
+  "required_experience": {
+  "total_years_relevant": "",
+  "specific_industry_experience": [],
+  "function_specific_experience": []
+  },
+  "core_technical_skills": {
+  "tools_systems_software_machinery": [],
+  "hands_on_expertise": []
+  },
+  "required_soft_skills": {
+  "communication_teamwork_problem_solving_leadership": [],
+  "traits_for_success": []
+  },
+  "certifications_and_licenses": {
+  "professional_certifications": [],
+  "mandatory_licenses": []
+  },
+  "dealbreakers_disqualifiers": [],
+  "key_deliverables_responsibilities": [],
+  "industry_plant_environment": {
+  "facility_operational_model": "",
+  "safety_culture_regulatory_setting": []
+  },
+  "bonus_criteria": {
+  "culture_fit_work_style": "",
+  "language_requirements": [],
+  "travel_shift_remote_flexibility": ""
+  }
+}
+"""
+
+JOB_EXTRACTION_PREFIX = """You are an expert in recruitment process automation. Your task is to extract key information from the provided job description text and structure it as a JSON object based on the following criteria.
+
+Focus ONLY on the information present in the text. Do not infer or add data that is not explicitly mentioned. The goal is to capture the requirements as stated in the job description for later matching against a resume.
+
+The JSON output must follow this structure. If a field is not mentioned in the text, use an empty string, an empty array, or null.
+
+{
+  "required_education": {
+  "degree_level": "",
+  "field_of_study": "",
+  "required_coursework": []
+  },
+  "required_experience": {
+  "total_years_relevant": "",
+  "specific_industry_experience": [],
+  "function_specific_experience": []
+  },
+  "core_technical_skills": {
+  "tools_systems_software_machinery": [],
+  "hands_on_expertise": []
+  },
+  "required_soft_skills": {
+  "communication_teamwork_problem_solving_leadership": [],
+  "traits_for_success": []
+  },
+  "certifications_and_licenses": {
+  "professional_certifications": [],
+  "mandatory_licenses": []
+  },
+  "dealbreakers_disqualifiers": [],
+  "key_deliverables_responsibilities": [],
+  "industry_plant_environment": {
+  "facility_operational_model": "",
+  "safety_culture_regulatory_setting": []
+  },
+  "bonus_criteria": {
+  "culture_fit_work_style": "",
+  "language_requirements": [],
+  "travel_shift_remote_flexibility": ""
+  }
+}
+"""
+
+# Schema-constrained output for providers that support it; the template above is the single source
+JOB_EXTRACTION_SCHEMA = schema_from_template(template_from_prompt(JOB_EXTRACTION_PREFIX))
+
 class JobProcessor:
     def __init__(self, job_ids_to_process: List[str], folder_path: str = None, csv_path: str = None, ai_agent: str = config.DEFAULT_AI_AGENT, api_key: str = None, cache_dir: str = None):
         """
@@ -43,8 +172,11 @@ class JobProcessor:
             "cache_hits": 0,
             "cache_misses": 0,
             "ai_calls": 0,
+            "cached_input_tokens": 0,
+            "uncached_input_tokens": 0,
             "processing_time": 0
         }
+        self._stats_lock = threading.Lock()
         
         # Load existing cache
         self.cache_file = os.path.join(self.cache_dir, f"job_cache_{ai_agent}.json")
@@ -68,8 +200,17 @@ class JobProcessor:
             
         self.ai_agent = ai_agent.lower()
         self.api_key = api_key
+        
+        # Job ID → document filenames, shared across worker threads (rescanned when the folder changes)
+        self.doc_index = get_job_document_index(self.folder)
+        
+        # Extracts job documents in worker processes ahead of the AI stage (started in run())
+        self.prefetcher = DocumentPrefetcher(getattr(config, 'EXTRACTION_WORKERS', None))
          
         self._initialize_ai_client()
+        
+        # Hedging, circuit breakers and failover across the configured agents
+        self.gateway = AIGateway(self.ai_agent, self.client, self.model, max_workers=config.MAX_WORKERS * 3)
 
     def _initialize_ai_client(self):
         """
@@ -110,9 +251,9 @@ class JobProcessor:
         if not api_key:
             raise ValueError(f"No API key found for {self.ai_agent.upper()}. Please add it to credentials/api_keys.txt or set the {self.ai_agent.upper()}_API_KEY environment variable.")
 
-        # Test the AI agent before proceeding with job processing
-        print(f"Testing {self.ai_agent.upper()} connection before starting job processing...")
-        success, message = config.test_ai_agent(self.ai_agent)
+        # Check the AI agent before proceeding with job processing (probes only if the cached health has expired)
+        print(f"Checking {self.ai_agent.upper()} connection before starting job processing...")
+        success, message = check_provider(self.ai_agent, model)
         if not success:
             raise ValueError(f"AI agent test failed: {message}")
         
@@ -188,7 +329,8 @@ class JobProcessor:
 
         while job_retry_count < max_job_retries:
             try:
-                return self._process_job_single_attempt(jid, job_retry_count)
+                with span("job_processing", job_id=jid, attempt=job_retry_count + 1, agent=self.ai_agent):
+                    return self._process_job_single_attempt(jid, job_retry_count)
             except Exception as e:
                 job_retry_count += 1
                 timestamp = datetime.datetime.now().strftime("%H:%M:%S")
@@ -206,6 +348,23 @@ class JobProcessor:
 
         return None
 
+    def _start_document_prefetch(self) -> int:
+        """
+        Submit every document of this run to the prefetcher ahead of the AI stage.
+
+        Documents are submitted in job order, so the first jobs' text is ready first.
+        """
+        try:
+            paths = [os.path.join(self.folder, f) for jid in self.job_ids for f in self.doc_index.documents(jid)]
+        except OSError as e:
+            print(f"Document prefetch skipped: {e}")
+            return 0
+        submitted = self.prefetcher.start(paths)
+        if submitted:
+            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] Prefetching text for {submitted} documents using {self.prefetcher.max_workers} processes")
+        return submitted
+
     def _log_job_error(self, jid: str, error_message: str, error_type: str):
         """
         Log detailed error information for a failed job.
@@ -233,7 +392,7 @@ class JobProcessor:
 
                 # Add context about files that were found
                 try:
-                    all_docs = [f for f in os.listdir(self.folder) if jid in f]
+                    all_docs = self.doc_index.documents(jid)
                     f.write(f"Files found for job {jid}: {len(all_docs)}\n")
                     for doc in all_docs:
                         f.write(f"  - {doc}\n")
@@ -325,6 +484,8 @@ class JobProcessor:
         print(f"❌ Cache Misses: {stats['cache_misses']}")
         print(f"💰 Tokens Used: {stats['total_uploaded'] + stats['total_output']:,}")
         print(f"💾 Tokens from Cache: {stats['total_cached']:,}")
+        print(f"⚡ Input Tokens from Provider Prompt Cache: {stats['cached_input_tokens']:,} "
+              f"({cached_input_rate(stats):.1f}% of {stats['cached_input_tokens'] + stats['uncached_input_tokens']:,})")
         
         if stats['cache_hits'] + stats['cache_misses'] > 0:
             cache_hit_rate = (stats['cache_hits'] / (stats['cache_hits'] + stats['cache_misses'])) * 100
@@ -346,23 +507,22 @@ class JobProcessor:
         """
         start_time = time.time()
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        # Whether this job's prompt, response and quality report go to the debug payload log
+        debug_sampled = sample_payloads()
 
         if attempt_number > 0:
             print(f"[{timestamp}] [Job {jid}] Attempt {attempt_number + 1} starting...")
 
         try:
-            all_docs = [f for f in os.listdir(self.folder) if jid in f]
+            jd_docs, notes_docs = self.doc_index.split(jid)
 
-            if not all_docs:
+            if not jd_docs and not notes_docs:
                 error_msg = f"No documents found for job {jid} in folder {self.folder}"
                 print(f"[{timestamp}] [Job {jid}] {error_msg}")
                 raise FileNotFoundError(error_msg)
-
-            jd_docs = [doc for doc in all_docs if 'note' not in doc.lower()]
-            notes_docs = [doc for doc in all_docs if 'note' in doc.lower()]
                 
             def extract_text_from_files(file_list):
-                text_content = ""
+                texts = []
                 timestamp = datetime.datetime.now().strftime("%H:%M:%S")
                 for doc in file_list:
                     path = os.path.join(self.folder, doc)
@@ -371,26 +531,15 @@ class JobProcessor:
                             print(f"[{timestamp}] [Job {jid}] Warning: File {path} does not exist locally. Skipping.")
                             continue
                         
-                        file_lower = doc.lower()
-                        if file_lower.endswith(".pdf"):
-                            text_content += extract_text_from_pdf(path) + "\n\n"
-                        elif file_lower.endswith(".docx") or file_lower.endswith(".doc"):
-                            text_content += extract_text_from_docx(path) + "\n\n"
-                        elif file_lower.endswith(".txt"):
-                            text_content += extract_text_from_txt(path) + "\n\n"
-                        else:
-                            try:
-                                with open(path, "r", encoding="utf-8") as rd:
-                                    text_content += rd.read() + "\n\n"
-                            except UnicodeDecodeError:
-                                with open(path, "r", encoding="latin-1") as rd:
-                                    text_content += rd.read() + "\n\n"
+                        texts.append(self.prefetcher.get(path))
                     except Exception as e:
                         print(f"[{timestamp}] [Job {jid}] Error reading file {path}: {e}")
-                return text_content.strip()
+                return "\n\n".join(texts).strip()
 
-            combined_jd_text = extract_text_from_files(jd_docs)
-            hr_notes_text = extract_text_from_files(notes_docs)
+            with span("text_extraction", documents=len(jd_docs) + len(notes_docs)) as extraction:
+                combined_jd_text = extract_text_from_files(jd_docs)
+                hr_notes_text = extract_text_from_files(notes_docs)
+                extraction.set_attribute("characters", len(combined_jd_text) + len(hr_notes_text))
             
             # Check cache first
             job_file = jd_docs[0] if jd_docs else None
@@ -400,7 +549,9 @@ class JobProcessor:
             if notes_file:
                 notes_file = os.path.join(self.folder, notes_file)
             
-            cached_result = self._get_cached_result(jid, job_file, notes_file)
+            with span("cache_lookup") as lookup:
+                cached_result = self._get_cached_result(jid, job_file, notes_file)
+                lookup.set_attribute("hit", bool(cached_result))
             if cached_result:
                 print(f"[{timestamp}] [Job {jid}] Using cached result")
                 return cached_result
@@ -420,60 +571,12 @@ class JobProcessor:
             content_length = len(text_for_ai.strip())
             is_minimal_content = content_length < 2000  # Less than ~2KB of content
 
+            # The static instructions and schema form a byte-identical prefix (sent as the
+            # system message) so providers can serve it from their prompt cache
             if is_minimal_content:
                 # Enhanced prompt for sparse/minimal job descriptions
-                prompt = f"""
-You are an expert in recruitment process automation. Your task is to extract key information from the provided job description text and structure it as a JSON object.
-
-IMPORTANT: This appears to be a MINIMAL or BRIEF job description. Be extra thorough in extracting every piece of information available, even if it's limited. Look for:
-- Any education requirements mentioned (even if brief)
-- Any experience requirements or preferences
-- Any skills, certifications, or qualifications mentioned
-- Any responsibilities or duties described
-- Any industry or regulatory information
-- Any compensation or work arrangement details
-
-If information is not explicitly mentioned, use empty strings/arrays rather than guessing. However, extract ALL available information from even brief descriptions.
-
-The JSON output must follow this structure:
-
-{{
-  "required_education": {{
-  "degree_level": "",
-  "field_of_study": "",
-  "required_coursework": []
-  }},
-  "required_experience": {{
-  "total_years_relevant": "",
-  "specific_industry_experience": [],
-  "function_specific_experience": []
-  }},
-  "core_technical_skills": {{
-  "tools_systems_software_machinery": [],
-  "hands_on_expertise": []
-  }},
-  "required_soft_skills": {{
-  "communication_teamwork_problem_solving_leadership": [],
-  "traits_for_success": []
-  }},
-  "certifications_and_licenses": {{
-  "professional_certifications": [],
-  "mandatory_licenses": []
-  }},
-  "dealbreakers_disqualifiers": [],
-  "key_deliverables_responsibilities": [],
-  "industry_plant_environment": {{
-  "facility_operational_model": "",
-  "safety_culture_regulatory_setting": []
-  }},
-  "bonus_criteria": {{
-  "culture_fit_work_style": "",
-  "language_requirements": [],
-  "travel_shift_remote_flexibility": ""
-  }}
-}}
-
-Job Description and Notes for Job ID '{jid}' (MINIMAL CONTENT - extract all available information):
+                prompt_prefix = JOB_EXTRACTION_PREFIX_MINIMAL
+                prompt = f"""Job Description and Notes for Job ID '{jid}' (MINIMAL CONTENT - extract all available information):
 ---------------------
 {text_for_ai}
 ---------------------
@@ -482,50 +585,8 @@ JSON Output:
 """
             else:
                 # Standard prompt for comprehensive job descriptions
-                prompt = f"""
-You are an expert in recruitment process automation. Your task is to extract key information from the provided job description text and structure it as a JSON object based on the following criteria.
-
-Focus ONLY on the information present in the text. Do not infer or add data that is not explicitly mentioned. The goal is to capture the requirements as stated in the job description for later matching against a resume.
-
-The JSON output must follow this structure. If a field is not mentioned in the text, use an empty string, an empty array, or null.
-
-{{
-  "required_education": {{
-  "degree_level": "",
-  "field_of_study": "",
-  "required_coursework": []
-  }},
-  "required_experience": {{
-  "total_years_relevant": "",
-  "specific_industry_experience": [],
-  "function_specific_experience": []
-  }},
-  "core_technical_skills": {{
-  "tools_systems_software_machinery": [],
-  "hands_on_expertise": []
-  }},
-  "required_soft_skills": {{
-  "communication_teamwork_problem_solving_leadership": [],
-  "traits_for_success": []
-  }},
-  "certifications_and_licenses": {{
-  "professional_certifications": [],
-  "mandatory_licenses": []
-  }},
-  "dealbreakers_disqualifiers": [],
-  "key_deliverables_responsibilities": [],
-  "industry_plant_environment": {{
-  "facility_operational_model": "",
-  "safety_culture_regulatory_setting": []
-  }},
-  "bonus_criteria": {{
-  "culture_fit_work_style": "",
-  "language_requirements": [],
-  "travel_shift_remote_flexibility": ""
-  }}
-}}
-
-Job Description and Notes for Job ID '{jid}':
+                prompt_prefix = JOB_EXTRACTION_PREFIX
+                prompt = f"""Job Description and Notes for Job ID '{jid}':
 ---------------------
 {text_for_ai}
 ---------------------
@@ -550,125 +611,73 @@ JSON Output:
                         if retry_count > 0:
                             current_prompt += f"\n\nPlease ensure the response is valid JSON. Previous attempt failed. Attempt {retry_count + 1} of {max_retries}."
                         
-                        # Add timeout handling for AI requests using threading
-                        import threading
-
-                        response = None
-                        timeout_error = None
-
-                        def make_request():
-                            nonlocal response, timeout_error
-                            try:
-                                response = self.client.chat.completions.create(
-                                    model=self.model,
-                                    messages=[{"role": "user", "content": current_prompt}]
-                                )
-                            except Exception as e:
-                                timeout_error = e
-
-                        # Create and start the request thread
-                        request_thread = threading.Thread(target=make_request)
-                        request_thread.daemon = True
-                        request_thread.start()
-
-                        # Wait for the request to complete with timeout (5 minutes)
-                        request_thread.join(timeout=300)
-
-                        if request_thread.is_alive():
-                            # Thread is still running, request timed out
-                            raise TimeoutError(f"AI request timed out after 5 minutes for job {jid}")
-                        elif timeout_error:
-                            # Request completed but with an error
-                            raise timeout_error
-                        elif not response:
-                            # No response and no error - this shouldn't happen
-                            raise RuntimeError(f"AI request failed silently for job {jid}")
+                        # Stream the completion: degenerate or off-schema output is aborted as it
+                        # arrives, and token gaps are caught by the stall deadline
+                        def request(client, provider, model):
+                            result = stream_chat_completion(
+                                functools.partial(create_structured, client.chat.completions.create,
+                                                  provider, "job_extraction", JOB_EXTRACTION_SCHEMA),
+                                provider,
+                                JSONStreamValidator(JOB_EXTRACTION_SCHEMA["properties"]),
+                                total_timeout=300,
+                                model=model,
+                                messages=prefix_messages(prompt_prefix, current_prompt),
+                                **prompt_cache_kwargs(provider, prompt_prefix)
+                            )
+                            loads_lenient(clean_api_output(result.content))  # Only a parsable answer wins
+                            return result
+
+                        # Hedged after the provider's p95 latency; fails over to the next configured agent
+                        with span("ai_request", attempt=retry_count + 1) as ai_span:
+                            provider, response = self.gateway.call(request, f"[Job {jid}]")
+                            usage = record_usage(self.token_stats, response.usage, self._stats_lock)
+                            ai_span.set_attributes(provider=provider, input_tokens=usage["input_tokens"],
+                                                   output_tokens=usage["output_tokens"],
+                                                   cached_input_tokens=usage["cached_input_tokens"],
+                                                   first_token_seconds=response.first_token_seconds or 0.0)
                         
                         api_duration = time.time() - api_start_time
                         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                        print(f"[{timestamp}] [Job {jid}] AI model response received in {api_duration:.2f} seconds")
+                        print(f"[{timestamp}] [Job {jid}] AI model response received in {api_duration:.2f} seconds "
+                              f"from {provider} (first token {response.first_token_seconds or 0:.2f}s; "
+                              f"{usage['cached_input_tokens']:,}/{usage['input_tokens']:,} input tokens from prompt cache)")
                         
-                        text = clean_api_output(response.choices[0].message.content)
+                        text = clean_api_output(response.content)
                         
                         # Check if the response is empty or lacks JSON structure
                         if not text.strip():
                             raise ValueError("Empty response from AI model")
-                        if "{" not in text or "}" not in text:
+                        if "{" not in text:
                             raise ValueError("Response does not appear to be valid JSON (missing braces)")
 
-                        # Log the raw AI response for debugging
-                        debug_log_path = os.path.join(os.getenv("DATA_DIR", "/app/data"), "output", f"{jid}_ai_response_debug.txt")
-                        os.makedirs(os.path.dirname(debug_log_path), exist_ok=True)
-                        with open(debug_log_path, "w", encoding="utf-8") as debug_file:
-                            debug_file.write(f"Job ID: {jid}\n")
-                            debug_file.write(f"Timestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                            debug_file.write(f"AI Agent: {self.ai_agent}\n")
-                            debug_file.write(f"Model: {self.model}\n")
-                            debug_file.write(f"Text length: {len(text)}\n\n")
-            
-                            # Log the actual text content that was sent to AI
-                            debug_file.write("TEXT SENT TO AI:\n")
-                            debug_file.write("="*50 + "\n")
-                            debug_file.write(text_for_ai)
-                            debug_file.write("\n" + "="*50 + "\n\n")
-            
-                            debug_file.write("RAW AI RESPONSE:\n")
-                            debug_file.write("="*50 + "\n")
-                            debug_file.write(text)
-                            debug_file.write("\n" + "="*50 + "\n")
-
-                        # Attempt to extract JSON content if it's embedded in text
-                        json_start = text.find("{")
-                        json_end = text.rfind("}")
-                        if json_start >= 0 and json_end > json_start:
-                            potential_json = text[json_start:json_end+1]
-                            try:
-                                job_data = json.loads(potential_json)
-                                success = True
-
-                                # Log successful parsing
-                                with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                                    debug_file.write("\nSUCCESSFULLY PARSED JSON:\n")
-                                    debug_file.write("="*30 + "\n")
-                                    debug_file.write(json.dumps(job_data, indent=2))
-                                    debug_file.write("\n" + "="*30 + "\n")
-
-                            except json.JSONDecodeError as json_err:
-                                # Log the parsing error
-                                with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                                    debug_file.write(f"\nJSON PARSING ERROR: {json_err}\n")
-                                    debug_file.write("EXTRACTED JSON TEXT:\n")
-                                    debug_file.write(potential_json)
-                                    debug_file.write("\n" + "="*30 + "\n")
-        
-                                # If extraction fails, try the full text as a last resort
-                                try:
-                                    job_data = json.loads(text)
-                                    success = True
-        
-                                    with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                                        debug_file.write("SUCCESSFULLY PARSED FULL TEXT AS JSON\n")
-                                        debug_file.write("="*30 + "\n")
-                                        debug_file.write(json.dumps(job_data, indent=2))
-                                        debug_file.write("\n" + "="*30 + "\n")
-        
-                                except json.JSONDecodeError:
-                                    with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                                        debug_file.write("FAILED TO PARSE FULL TEXT AS JSON\n")
-                                    raise ValueError(f"Could not parse JSON from AI response for job {jid}: {json_err}")
-                        else:
-                            # Log the issue with JSON structure
-                            with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                                debug_file.write("\nNO VALID JSON STRUCTURE FOUND\n")
-                                debug_file.write(f"JSON start: {json_start}, JSON end: {json_end}\n")
-                            raise ValueError("Could not find valid JSON structure in response")
+                        # Prompt and raw response are kept for a sample of jobs (all at LOG_LEVEL=DEBUG)
+                        # in the rotating payload log instead of a debug file per job
+                        log_payload("job_ai_response", {"text_sent_to_ai": text_for_ai, "raw_ai_response": text},
+                                    debug_sampled, job_id=jid, agent=provider, model=self.model)
+
+                        # Parse locally, repairing fences, stray text, bad commas/quotes and truncation;
+                        # only output with no recoverable JSON costs another request
+                        try:
+                            with span("json_parse", characters=len(text)):
+                                job_data = loads_lenient(text)
+                        except JSONRepairError as repair_err:
+                            logger.warning("Unparsable AI response: %s", repair_err, extra={"job_id": jid, "agent": provider})
+                            raise ValueError(f"Could not parse JSON from AI response for job {jid}: {repair_err}")
+                        if not isinstance(job_data, dict):
+                            raise ValueError(f"AI response for job {jid} is not a JSON object")
+                        success = True
                         
-                    except (json.JSONDecodeError, ValueError) as e:
+                    except (json.JSONDecodeError, ValueError, AIGatewayError) as e:
                         retry_count += 1
                         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                        if isinstance(e, AIGatewayError) and e.partial:
+                            text = e.partial  # Keep the aborted answer for the error file
+                        bad_answer = is_rejected_answer(e) or (isinstance(e, AIGatewayError) and e.bad_answers_only)
                         if retry_count < max_retries:
                             print(f"[{timestamp}] [Job {jid}] Error parsing AI response: {e}. Retrying ({retry_count}/{max_retries})...")
-                            time.sleep(2 * retry_count)  # Exponential backoff for retries
+                            # Aborted or unparsable answers are retried at once; other failures back off
+                            if not bad_answer:
+                                time.sleep(2 * retry_count)  # Exponential backoff for retries
                         else:
                             print(f"[{timestamp}] [Job {jid}] Failed to get valid JSON after {max_retries} attempts: {e}")
                             # Save the raw text for debugging with detailed error info
@@ -682,111 +691,28 @@ JSON Output:
                 # If we got here, we have valid JSON data from the AI
                 ai_job_data = job_data
 
-                # Log the quality of extracted information and assess content completeness
-                with open(debug_log_path, "a", encoding="utf-8") as debug_file:
-                    debug_file.write("\nEXTRACTION QUALITY ANALYSIS:\n")
-                    debug_file.write("="*40 + "\n")
-
-                    # Count non-empty fields
-                    total_fields = 0
-                    filled_fields = 0
-                    content_quality_score = 0
-
-                    def analyze_dict(data, prefix=""):
-                        nonlocal total_fields, filled_fields, content_quality_score
-                        for key, value in data.items():
-                            total_fields += 1
-                            if isinstance(value, dict):
-                                analyze_dict(value, f"{prefix}{key}.")
-                            elif isinstance(value, list):
-                                if value:  # Non-empty list
-                                    filled_fields += 1
-                                    content_quality_score += 1
-                                    debug_file.write(f"✓ {prefix}{key}: {len(value)} items\n")
-                                else:
-                                    debug_file.write(f"✗ {prefix}{key}: empty list\n")
-                            else:
-                                if value and str(value).strip():
-                                    filled_fields += 1
-                                    content_quality_score += 1
-                                    debug_file.write(f"✓ {prefix}{key}: '{value}'\n")
-                                else:
-                                    debug_file.write(f"✗ {prefix}{key}: empty/null\n")
-
-                    analyze_dict(ai_job_data)
-                    extraction_rate = (filled_fields / total_fields * 100) if total_fields > 0 else 0
-
-                    # Assess content quality
-                    quality_assessment = "UNKNOWN"
-                    if extraction_rate >= 50:
-                        quality_assessment = "EXCELLENT"
-                    elif extraction_rate >= 30:
-                        quality_assessment = "GOOD"
-                    elif extraction_rate >= 15:
-                        quality_assessment = "FAIR"
-                    else:
-                        quality_assessment = "POOR"
-
-                    debug_file.write(f"\nSUMMARY: {filled_fields}/{total_fields} fields filled ({extraction_rate:.1f}%)\n")
-                    debug_file.write(f"CONTENT QUALITY: {quality_assessment}\n")
-
-                    # Flag jobs that need attention
-                    if extraction_rate < 30:
-                        debug_file.write("⚠️  WARNING: Low extraction rate - job description may be incomplete\n")
-                        debug_file.write("   Recommendations:\n")
-                        debug_file.write("   - Review original job description document\n")
-                        debug_file.write("   - Check if JD contains sufficient detail\n")
-                        debug_file.write("   - Consider manual data entry for critical fields\n")
-
-                    # Create a quality report file for jobs that need attention
-                    if extraction_rate < 50:
-                        quality_report_path = os.path.join(os.getenv("DATA_DIR", "/app/data"), "output", f"{jid}_quality_report.txt")
-                        with open(quality_report_path, "w", encoding="utf-8") as qr:
-                            qr.write(f"JOB QUALITY REPORT - Job ID {jid}\n")
-                            qr.write("="*50 + "\n")
-                            qr.write(f"Extraction Rate: {extraction_rate:.1f}%\n")
-                            qr.write(f"Quality Assessment: {quality_assessment}\n")
-                            qr.write(f"Text Length: {len(text_for_ai)} characters\n")
-                            qr.write(f"Timestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-                            if extraction_rate < 30:
-                                qr.write("CRITICAL ISSUES:\n")
-                                qr.write("- Very low extraction rate indicates incomplete job description\n")
-                                qr.write("- May need manual review and data entry\n\n")
-
-                            qr.write("MISSING FIELDS:\n")
-                            missing_fields = []
-                            def find_missing(data, prefix=""):
-                                for key, value in data.items():
-                                    if isinstance(value, dict):
-                                        find_missing(value, f"{prefix}{key}.")
-                                    elif isinstance(value, list):
-                                        if not value:
-                                            missing_fields.append(f"{prefix}{key}")
-                                    else:
-                                        if not value or not str(value).strip():
-                                            missing_fields.append(f"{prefix}{key}")
-
-                            find_missing(ai_job_data)
-                            if missing_fields:
-                                for field in missing_fields[:10]:  # Show first 10
-                                    qr.write(f"- {field}\n")
-                                if len(missing_fields) > 10:
-                                    qr.write(f"- ... and {len(missing_fields) - 10} more\n")
-                            else:
-                                qr.write("None\n")
-
-                            qr.write("\nRECOMMENDATIONS:\n")
-                            if extraction_rate < 15:
-                                qr.write("- HIGH PRIORITY: Review job description document\n")
-                                qr.write("- Consider manual data entry for critical fields\n")
-                            elif extraction_rate < 30:
-                                qr.write("- MEDIUM PRIORITY: Verify job description completeness\n")
-                                qr.write("- Check if additional documentation exists\n")
-                            else:
-                                qr.write("- LOW PRIORITY: Monitor for future improvements\n")
-
-                        print(f"[QUALITY] Created quality report: {quality_report_path}")
+                # Assess how complete the extraction is; low-quality jobs are flagged in the log
+                filled_fields, missing_fields, total_fields = _field_coverage(ai_job_data)
+                extraction_rate = (filled_fields / total_fields * 100) if total_fields > 0 else 0
+                if extraction_rate >= 50:
+                    quality_assessment = "EXCELLENT"
+                elif extraction_rate >= 30:
+                    quality_assessment = "GOOD"
+                elif extraction_rate >= 15:
+                    quality_assessment = "FAIR"
+                else:
+                    quality_assessment = "POOR"
+                quality = {"job_id": jid, "extraction_rate": round(extraction_rate, 1), "quality": quality_assessment}
+                if extraction_rate < 30:
+                    logger.warning("Low extraction rate - job description may be incomplete; review the JD or enter "
+                                   "critical fields manually", extra=dict(quality, missing=", ".join(missing_fields[:10])))
+                else:
+                    logger.debug("Extraction quality", extra=quality)
+                if extraction_rate < 50:
+                    log_payload("job_quality_report", {
+                        "missing_fields": "\n".join(missing_fields) or "None",
+                        "extracted_json": json.dumps(ai_job_data, indent=2),
+                    }, debug_sampled, text_length=len(text_for_ai), **quality)
 
                 # Initialize a clean dictionary for the final, merged data
                 final_job_data = {}
@@ -851,7 +777,8 @@ JSON Output:
                 optimizer = JsonOptimizer(input_file=self.csv)
                 # Pass the combined text to the optimizer for better salary extraction
                 combined_text_for_optimizer = (combined_jd_text or "") + ("\n" + hr_notes_text if hr_notes_text else "")
-                optimized_data = optimizer.optimize_job(ai_job_data, mtb_row or {}, jid, hr_notes_text, combined_text_for_optimizer)
+                with span("optimize"):
+                    optimized_data = optimizer.optimize_job(ai_job_data, mtb_row or {}, jid, hr_notes_text, combined_text_for_optimizer)
 
                 duration = time.time() - start_time
                 timestamp = datetime.datetime.now().strftime("%H:%M:%S")
@@ -895,6 +822,15 @@ JSON Output:
         """
         Process all job IDs in parallel and generate a single JSON output file.
         """
+        try:
+            return self._run_jobs()
+        finally:
+            # The extraction process pool and idle gateway threads would otherwise outlive
+            # the run in the long-running API (also when processing raises)
+            self.prefetcher.shutdown()
+            self.gateway.shutdown()
+
+    def _run_jobs(self) -> str:
         overall_start_time = time.time()
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{timestamp}] Starting job processing")
@@ -959,6 +895,9 @@ JSON Output:
         max_workers = min(max_workers, 12)  # Upper limit to prevent overloading
         print(f"[{timestamp}] Using {max_workers} parallel workers (based on {'config' if hasattr(config, 'MAX_WORKERS') else 'CPU count'})")
         
+        # Parse all job documents in worker processes while the threads below wait on AI calls
+        self._start_document_prefetch()
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all jobs to the executor
             future_to_jid = {executor.submit(self._process_job, jid): jid for jid in self.job_ids}
@@ -0,0 +1,250 @@
+"""
+Tolerant JSON Parsing
+Parses model output that is almost JSON: code fences and prose around the
+object, trailing or missing commas, single/smart quotes, unquoted keys,
+Python literals (True/False/None), comments, raw newlines and stray quotes
+inside strings, and output truncated mid-object. Well-formed JSON takes the
+json.loads fast path; everything else is repaired locally so a malformed
+response does not cost another model round trip.
+"""
+
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+_NUMBER_RX = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+_WORD_RX = re.compile(r"[A-Za-z_$][\w$-]*")
+_FENCE_RX = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+
+_OPEN_QUOTES = {'"': '"', "'": "'", "“": "”", "‘": "’"}
+_CLOSE_QUOTES = {'"', "'", "”", "’"}
+_LITERALS = {"true": "true", "false": "false", "null": "null",
+             "none": "null", "nan": "null", "infinity": "null", "undefined": "null"}
+_ESCAPES = set('"\\/bfnrtu')
+
+_stats_lock = threading.Lock()
+_stats = {"parsed": 0, "repaired": 0, "failed": 0}
+
+
+class JSONRepairError(ValueError):
+    """The text does not contain anything that can be repaired into JSON."""
+
+
+class _Frame:
+    """One open container; state is what the container expects next."""
+    __slots__ = ("closer", "state")
+
+    def __init__(self, closer: str):
+        self.closer = closer
+        self.state = "key" if closer == "}" else "value"
+
+
+def _closes_string(text: str, i: int) -> bool:
+    """True if the quote at text[i] ends the string rather than being a stray quote inside it."""
+    j = i + 1
+    while j < len(text) and text[j] in " \t\r\n":
+        if text[j] == "\n":
+            return True
+        j += 1
+    return j >= len(text) or text[j] in ',:}]"'
+
+
+def _read_string(text: str, i: int, out: List[str], is_key: bool = False) -> int:
+    """
+    Copy the string starting at text[i] into out as a valid JSON string; returns the
+    index after it. Keys end at their first closing quote; values only at a quote
+    followed by a delimiter, so unescaped quotes inside values are kept.
+    """
+    quote = text[i]
+    closer = _OPEN_QUOTES[quote]
+    out.append('"')
+    i += 1
+    while i < len(text):
+        c = text[i]
+        if c == "\\" and i + 1 < len(text):
+            nxt = text[i + 1]
+            if nxt in _ESCAPES:
+                out.append(c + nxt)
+            elif nxt == "'":
+                out.append("'")
+            else:
+                out.append("\\\\" + nxt)
+            i += 2
+            continue
+        if (c == closer or (closer == '"' and c in _CLOSE_QUOTES and c != "'")) and (is_key or _closes_string(text, i)):
+            out.append('"')
+            return i + 1
+        if c == '"':
+            out.append('\\"')
+        elif c == "\n":
+            out.append("\\n")
+        elif c == "\r":
+            out.append("\\r")
+        elif c == "\t":
+            out.append("\\t")
+        elif ord(c) < 0x20:
+            out.append(f"\\u{ord(c):04x}")
+        else:
+            out.append(c)
+        i += 1
+    out.append('"')  # Truncated inside a string
+    return i
+
+
+def _start_token(stack: List[_Frame], out: List[str]) -> Optional[str]:
+    """
+    Emit the separator the enclosing container is missing before a new token and
+    return the token's role ("key" or "value").
+    """
+    if not stack:
+        return "value"
+    frame = stack[-1]
+    if frame.state == "comma":
+        out.append(",")
+        frame.state = "key" if frame.closer == "}" else "value"
+    elif frame.state == "colon":
+        out.append(":")
+        frame.state = "value"
+    return frame.state
+
+
+def _end_value(stack: List[_Frame]) -> None:
+    if stack:
+        stack[-1].state = "comma"
+
+
+def _close_frame(stack: List[_Frame], out: List[str]) -> str:
+    """Close the innermost container (supplying a missing value) and return its closer."""
+    frame = stack.pop()
+    if frame.state == "colon":
+        out.append(":null")
+    elif frame.state == "value" and frame.closer == "}":
+        out.append("null")
+    out.append(frame.closer)
+    _end_value(stack)
+    return frame.closer
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite the first JSON object or array in text as valid JSON.
+
+    Raises:
+        JSONRepairError: No object or array in text
+    """
+    text = text or ""
+    starts = [p for p in (text.find("{"), text.find("[")) if p >= 0]
+    if not starts:
+        raise JSONRepairError("No JSON object or array found")
+    i = min(starts)
+    out: List[str] = []
+    stack: List[_Frame] = []
+
+    while i < len(text):
+        c = text[i]
+        if c in " \t\r\n":
+            i += 1
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end < 0 else end + 2
+        elif c in "{[":
+            role = _start_token(stack, out)
+            if role == "key":
+                # A container where a key belongs: the key was lost, keep the data under a placeholder
+                out.append('"_":')
+            out.append(c)
+            stack.append(_Frame("}" if c == "{" else "]"))
+            i += 1
+        elif c in "}]":
+            if any(f.closer == c for f in stack):
+                while _close_frame(stack, out) != c:
+                    pass
+                if not stack:
+                    break
+            i += 1
+        elif c == ",":
+            i += 1  # Commas are emitted before the next token, which drops trailing commas
+        elif c == ":":
+            if stack and stack[-1].state == "colon":
+                out.append(":")
+                stack[-1].state = "value"
+            i += 1
+        elif c in _OPEN_QUOTES:
+            role = _start_token(stack, out)
+            i = _read_string(text, i, out, is_key=(role == "key"))
+            if role == "key":
+                stack[-1].state = "colon"
+            else:
+                _end_value(stack)
+        elif _NUMBER_RX.match(text, i):
+            m = _NUMBER_RX.match(text, i)
+            role = _start_token(stack, out)
+            number = m.group(0).lstrip("+")
+            if role == "key":
+                out.append(json.dumps(number))
+                stack[-1].state = "colon"
+            else:
+                number = re.sub(r"^(-?)\.", r"\g<1>0.", number)
+                number = re.sub(r"\.(?=$|[eE])", ".0", number)
+                out.append(number)
+                _end_value(stack)
+            i = m.end()
+        elif _WORD_RX.match(text, i):
+            m = _WORD_RX.match(text, i)
+            word = m.group(0)
+            role = _start_token(stack, out)
+            if role == "key":
+                out.append(json.dumps(word))
+                stack[-1].state = "colon"
+            else:
+                out.append(_LITERALS.get(word.lower(), json.dumps(word)))
+                _end_value(stack)
+            i = m.end()
+        else:
+            i += 1  # Stray character outside any string
+
+    # Truncated output: close whatever is still open
+    while stack:
+        _close_frame(stack, out)
+    return "".join(out)
+
+
+def _record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Parse model output as JSON, repairing it locally when json.loads fails.
+
+    Raises:
+        JSONRepairError: Nothing JSON-like in text
+    """
+    candidate = (text or "").strip()
+    fence = None if candidate[:1] in "{[" else _FENCE_RX.search(candidate)
+    if fence:
+        candidate = fence.group(1).strip()
+    try:
+        value = json.loads(candidate)
+        _record("parsed")
+        return value
+    except (json.JSONDecodeError, TypeError):
+        pass
+    try:
+        value = json.loads(repair_json(candidate))
+    except (json.JSONDecodeError, JSONRepairError) as e:
+        _record("failed")
+        raise JSONRepairError(f"Could not repair JSON: {e}") from e
+    _record("repaired")
+    return value
+
+
+def get_repair_stats() -> Dict[str, int]:
+    """Counts of responses parsed directly, repaired locally, and unrecoverable."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,223 @@
+"""
+Shared LLM HTTP Transport
+One pooled, keep-alive HTTP client for every scoring request (HTTP/2 via httpx
+when the h2 package is installed, otherwise a requests Session), so calls reuse
+open TCP/TLS connections. Retries only transient failures (connection errors,
+timeouts, 408/425/429/5xx), honouring Retry-After, and records per-provider
+latency histograms.
+"""
+
+import os
+import time
+import random
+import threading
+import importlib.util
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+# httpx only needs the h2 package to be installed for http2=True
+HTTP2_AVAILABLE = HTTPX_AVAILABLE and importlib.util.find_spec("h2") is not None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    requests = None
+    HTTPAdapter = None
+    REQUESTS_AVAILABLE = False
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LLMHttpError(RuntimeError):
+    """An LLM HTTP call failed; retryable tells whether a retry could succeed."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class LatencyHistogram:
+    """Per-bucket call latency counts plus outcome (HTTP status / network error) counts."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.outcomes: Dict[str, int] = {}
+
+    def observe(self, seconds: float, outcome: str) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th percentile (None when empty or in the overflow bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target:
+                return float(bound)
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": dict(zip(labels, self.buckets)),
+            "outcomes": dict(self.outcomes),
+        }
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(tz=when.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMTransport:
+    """Thread-safe pooled HTTP client shared by all LLM provider clients."""
+
+    def __init__(self, max_attempts: Optional[int] = None, pool_size: Optional[int] = None,
+                 max_retry_wait: float = 60.0, prefer_httpx: Optional[bool] = None):
+        self.max_attempts = max_attempts or int(os.getenv("LLM_HTTP_MAX_ATTEMPTS", "3"))
+        self.pool_size = pool_size or int(os.getenv("LLM_HTTP_POOL_SIZE", "32"))
+        self.max_retry_wait = max_retry_wait
+        if prefer_httpx is None:
+            prefer_httpx = os.getenv("LLM_HTTP_CLIENT", "auto").lower() != "requests"
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.retries = 0
+
+        if prefer_httpx and HTTPX_AVAILABLE:
+            self.backend = "httpx"
+            self.http2 = HTTP2_AVAILABLE
+            self._client = httpx.Client(
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        elif REQUESTS_AVAILABLE:
+            self.backend = "requests"
+            self.http2 = False
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.pool_size)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+        else:
+            raise ImportError("Neither httpx nor requests is installed")
+
+    def _send(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]], timeout: float):
+        """One HTTP attempt; transport failures are raised as retryable LLMHttpError."""
+        if self.backend == "httpx":
+            try:
+                return self._client.post(url, json=payload, headers=headers, timeout=timeout)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                raise LLMHttpError(f"{type(e).__name__}: {e}", retryable=True) from e
+        try:
+            return self._client.post(url, json=payload, headers=headers, timeout=timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            raise LLMHttpError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+    def _observe(self, provider: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self._histograms.setdefault(provider, LatencyHistogram()).observe(seconds, outcome)
+
+    def post_json(self, provider: str, url: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> Dict[str, Any]:
+        """
+        POST a JSON payload and return the decoded JSON response.
+
+        Raises:
+            LLMHttpError: Non-retryable status, or retries exhausted
+        """
+        label = {"openai": "OpenAI", "gemini": "Gemini", "grok": "Grok"}.get(provider, provider)
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                response = self._send(url, payload, headers, timeout)
+            except LLMHttpError as e:
+                self._observe(provider, time.perf_counter() - started, "network_error")
+                error = e
+            else:
+                status = response.status_code
+                self._observe(provider, time.perf_counter() - started, str(status))
+                if status < 400:
+                    return response.json()
+                error = LLMHttpError(
+                    f"{label} error {status}: {response.text[:300]}",
+                    status_code=status,
+                    retryable=status in RETRYABLE_STATUSES,
+                    retry_after=_retry_after_seconds(response.headers.get("Retry-After")),
+                )
+            if not error.retryable or attempt == self.max_attempts:
+                raise error
+            wait = error.retry_after if error.retry_after is not None else min(10.0, 2 ** (attempt - 1)) + random.uniform(0, 0.5)
+            wait = min(wait, self.max_retry_wait)
+            with self._lock:
+                self.retries += 1
+            print(f"[LLM_HTTP] {label} attempt {attempt} failed ({error}); retrying in {wait:.1f}s")
+            time.sleep(wait)
+        raise LLMHttpError(f"{label} request failed")  # not reached
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Transport settings, retry count and per-provider latency histograms."""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "http2": self.http2,
+                "pool_size": self.pool_size,
+                "retries": self.retries,
+                "providers": {name: h.snapshot() for name, h in self._histograms.items()},
+            }
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_transport: Optional[LLMTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport() -> LLMTransport:
+    """Process-wide LLMTransport."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = LLMTransport()
+        return _transport
@@ -0,0 +1,206 @@
+"""
+Logging Setup
+Structured, leveled logging for the API and the processing pipeline. Records
+are handed to a non-blocking QueueHandler; a listener thread writes them to the
+console and to a size-bounded rotating log file (text or JSON lines). Debug
+payloads (prompts, raw AI responses, extraction quality reports) are sampled
+and go to their own rotating file instead of one file per job or resume.
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.getenv("DATA_DIR", "/app/data"), "logs"))
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "5"))
+# Share of jobs/resumes whose debug payloads are kept (1.0 when LOG_LEVEL=DEBUG)
+DEBUG_PAYLOAD_SAMPLE_RATE = float(os.getenv("DEBUG_PAYLOAD_SAMPLE_RATE", "1.0" if LOG_LEVEL == "DEBUG" else "0.02"))
+DEBUG_PAYLOAD_MAX_CHARS = int(os.getenv("DEBUG_PAYLOAD_MAX_CHARS", "20000"))
+DEBUG_PAYLOAD_MAX_BYTES = int(os.getenv("DEBUG_PAYLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+DEBUG_PAYLOAD_BACKUPS = int(os.getenv("DEBUG_PAYLOAD_BACKUPS", "2"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER = "recruiter"
+PAYLOAD_LOGGER = f"{ROOT_LOGGER}.payload"
+
+# Attributes every LogRecord has; anything else was passed via extra= and is structured context
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _context(record: logging.LogRecord) -> Dict[str, Any]:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS and not k.startswith("_")}
+
+
+class TextFormatter(logging.Formatter):
+    """'time LEVEL logger: message key=value ...'"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = _context(record)
+        if context:
+            line += " " + " ".join(f"{k}={v}" for k, v in context.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the extra= context as top-level fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_context(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class PayloadFormatter(logging.Formatter):
+    """Header line with the context, then the payload sections."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        context = _context(record)
+        sections = context.pop("sections", {})
+        header = " ".join(f"{k}={v}" for k, v in context.items())
+        body = "".join(f"\n--- {name} ---\n{text}" for name, text in sections.items())
+        return f"===== {self.formatTime(record, '%Y-%m-%d %H:%M:%S')} {record.getMessage()} {header}{body}\n"
+
+
+class _PayloadFilter(logging.Filter):
+    def __init__(self, payloads: bool):
+        super().__init__()
+        self.payloads = payloads
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name.startswith(PAYLOAD_LOGGER) == self.payloads
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, so redirect_stdout (e.g. the benchmarks' quiet mode) applies."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the listener falls behind, records are counted and dropped."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def _rotating_handler(filename: str, max_bytes: int, backups: int) -> Optional[logging.Handler]:
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        return logging.handlers.RotatingFileHandler(os.path.join(LOG_DIR, filename), maxBytes=max_bytes,
+                                                    backupCount=backups, encoding="utf-8", delay=True)
+    except OSError as e:
+        print(f"[LOGGING] File logging disabled ({LOG_DIR}): {e}")
+        return None
+
+
+def configure_logging() -> None:
+    """Install the queue handler and start the listener thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    with _configure_lock:
+        if _listener is not None:
+            return
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter()
+        handlers = []
+        console = _StdoutHandler()
+        handlers.append(console)
+        log_file = _rotating_handler("recruiter.log", LOG_FILE_MAX_BYTES, LOG_FILE_BACKUPS)
+        if log_file is not None:
+            handlers.append(log_file)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            handler.addFilter(_PayloadFilter(payloads=False))
+        payload_file = _rotating_handler("debug_payloads.log", DEBUG_PAYLOAD_MAX_BYTES, DEBUG_PAYLOAD_BACKUPS)
+        if payload_file is not None:
+            payload_file.setFormatter(PayloadFormatter())
+            payload_file.addFilter(_PayloadFilter(payloads=True))
+            handlers.append(payload_file)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+        root.addHandler(_DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE)))
+        logging.getLogger(PAYLOAD_LOGGER).setLevel(logging.DEBUG)
+        _listener = logging.handlers.QueueListener(root.handlers[0].queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the 'recruiter' hierarchy, e.g. get_logger("upload") -> recruiter.upload."""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def sample_payloads() -> bool:
+    """Decide once per job/resume whether its debug payloads are kept."""
+    return DEBUG_PAYLOAD_SAMPLE_RATE >= 1.0 or random.random() < DEBUG_PAYLOAD_SAMPLE_RATE
+
+
+def log_payload(kind: str, sections: Dict[str, str], sampled: bool, **context: Any) -> None:
+    """
+    Queue a debug payload for the rotating payload log when sampled.
+
+    Args:
+        kind: Payload type, e.g. "job_ai_response" or "matcher_prompt"
+        sections: Named text blocks (each truncated to DEBUG_PAYLOAD_MAX_CHARS)
+        sampled: Result of sample_payloads() (pass True for failures worth keeping)
+        context: Identifiers such as job_id or filename
+    """
+    if not sampled:
+        return
+    trimmed = {name: text if len(text) <= DEBUG_PAYLOAD_MAX_CHARS
+               else text[:DEBUG_PAYLOAD_MAX_CHARS] + f"\n... [{len(text) - DEBUG_PAYLOAD_MAX_CHARS} chars truncated]"
+               for name, text in sections.items()}
+    get_logger(f"payload.{kind}").debug(kind, extra=dict(context, sections=trimmed))
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Logging configuration and the number of records dropped because the queue was full."""
+    return {
+        "level": LOG_LEVEL,
+        "format": LOG_FORMAT,
+        "log_dir": LOG_DIR,
+        "file_max_bytes": LOG_FILE_MAX_BYTES,
+        "file_backups": LOG_FILE_BACKUPS,
+        "payload_sample_rate": DEBUG_PAYLOAD_SAMPLE_RATE,
+        "payload_max_bytes": DEBUG_PAYLOAD_MAX_BYTES,
+        "dropped_records": _DroppingQueueHandler.dropped,
+    }
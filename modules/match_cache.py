@@ -0,0 +1,340 @@
+"""
+Resume ↔ Job Match Cache
+Persists LLM match results keyed on (resume content hash, job criteria hash, model,
+prompt version) so repeat matching runs only score new or changed pairs.
+
+Results are stored in the backend's jobmatch table when a PostgreSQL DATABASE_URL
+is reachable, otherwise in a JSON file under DATA_DIR/cache. Results for resume
+content that has not been scored for MATCH_CACHE_MAX_AGE_DAYS (superseded
+resume versions) are pruned periodically; the file cache is also size-capped.
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from sqlalchemy import create_engine, text, bindparam
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+# Results for a resume content hash whose newest result is older than this are pruned
+MATCH_CACHE_MAX_AGE_DAYS = int(os.getenv("MATCH_CACHE_MAX_AGE_DAYS", "90"))
+MATCH_CACHE_PRUNE_INTERVAL = float(os.getenv("MATCH_CACHE_PRUNE_INTERVAL", str(6 * 3600)))
+# JSON fallback: entry cap (oldest evicted first) and the minimum gap between file writes
+MATCH_CACHE_MAX_FILE_ENTRIES = int(os.getenv("MATCH_CACHE_MAX_FILE_ENTRIES", "20000"))
+MATCH_CACHE_FLUSH_INTERVAL = float(os.getenv("MATCH_CACHE_FLUSH_INTERVAL", "10"))
+
+_engines: Dict[str, Any] = {}
+_engines_lock = threading.Lock()
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def hash_text(text_value: str) -> str:
+    """SHA-256 of resume text (whitespace-normalised so re-extraction noise does not invalidate)."""
+    normalized = " ".join((text_value or "").split())
+    return hashlib.sha256(normalized.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def hash_job_criteria(job_payload: Dict[str, Any]) -> str:
+    """SHA-256 of the job fields that are sent to the model."""
+    return hashlib.sha256(_canonical_json(job_payload).encode("utf-8")).hexdigest()
+
+
+def prompt_version_for(name: str, prompt_text: str) -> str:
+    """Prompt version tag; changes automatically whenever the prompt text changes."""
+    return f"{name}:{hashlib.sha1(prompt_text.encode('utf-8')).hexdigest()[:12]}"
+
+
+def make_cache_key(resume_hash: str, job_hash: str, model: str, prompt_version: str) -> str:
+    return hashlib.sha256(f"{resume_hash}|{job_hash}|{model}|{prompt_version}".encode("utf-8")).hexdigest()
+
+
+def _get_engine(database_url: str):
+    with _engines_lock:
+        if database_url not in _engines:
+            _engines[database_url] = create_engine(database_url, pool_pre_ping=True)
+        return _engines[database_url]
+
+
+class MatchCache:
+    """
+    Cache of match results for resume/job pairs.
+
+    Each entry is a dict with: cache_key, resume_content_hash, job_criteria_hash,
+    job_ref, model, prompt_version, rating, hard_no, disqualifiers, reasons,
+    result (arbitrary JSON-serialisable matcher output).
+    """
+
+    def __init__(self, database_url: Optional[str] = None, cache_dir: Optional[str] = None):
+        """
+        Args:
+            database_url: Database URL (defaults to DATABASE_URL; only PostgreSQL is used)
+            cache_dir: Directory for the JSON fallback (defaults to DATA_DIR/cache)
+        """
+        self.database_url = database_url if database_url is not None else os.getenv("DATABASE_URL", "")
+        self.cache_dir = cache_dir or os.path.join(os.getenv("DATA_DIR", "/app/data"), "cache")
+        self.cache_file = os.path.join(self.cache_dir, "match_cache.json")
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        self._lock = threading.Lock()
+        self._file_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        # (resume hash, job ref, model, prompt version) -> cache key, for O(1) invalidation
+        self._file_index: Dict[tuple, str] = {}
+        self._file_dirty = False
+        self._last_flush = 0.0
+        self._last_prune = 0.0
+
+        self.engine = None
+        if SQLALCHEMY_AVAILABLE and self.database_url.startswith("postgresql"):
+            try:
+                engine = _get_engine(self.database_url)
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT cache_key FROM jobmatch LIMIT 1"))
+                self.engine = engine
+            except Exception as e:
+                print(f"[MATCH_CACHE] Database cache unavailable, using file cache: {e}")
+        if self.engine is None:
+            atexit.register(self.flush)
+
+    @property
+    def backend(self) -> str:
+        return "database" if self.engine is not None else "file"
+
+    # ----------------------------
+    # Lookup
+    # ----------------------------
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return cached entries for the given cache keys (missing keys are omitted)."""
+        keys = list(dict.fromkeys(k for k in keys if k))
+        if not keys:
+            return {}
+        found: Dict[str, Dict[str, Any]] = {}
+        if self.engine is not None:
+            try:
+                stmt = text(
+                    "SELECT cache_key, job_ref, rating, hard_no, disqualifiers, reasons, result_json "
+                    "FROM jobmatch WHERE cache_key IN :keys"
+                ).bindparams(bindparam("keys", expanding=True))
+                with self.engine.connect() as conn:
+                    for row in conn.execute(stmt, {"keys": keys}):
+                        found[row[0]] = {
+                            "cache_key": row[0],
+                            "job_ref": row[1],
+                            "rating": row[2],
+                            "hard_no": bool(row[3]),
+                            "disqualifiers": json.loads(row[4]) if row[4] else [],
+                            "reasons": json.loads(row[5]) if row[5] else [],
+                            "result": json.loads(row[6]) if row[6] else None,
+                        }
+            except Exception as e:
+                print(f"[MATCH_CACHE] Lookup failed: {e}")
+        else:
+            cache = self._load_file_cache()
+            for key in keys:
+                if key in cache:
+                    found[key] = cache[key]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    # ----------------------------
+    # Store / invalidate
+    # ----------------------------
+    def put_many(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Store entries and invalidate superseded results for the same
+        (resume, job, model, prompt version) whose job criteria changed.
+        """
+        if not entries:
+            return
+        now = datetime.utcnow()
+        if self.engine is not None:
+            try:
+                upsert = text(
+                    "INSERT INTO jobmatch (cache_key, resume_content_hash, job_criteria_hash, job_ref, model, "
+                    "prompt_version, rating, hard_no, disqualifiers, reasons, result_json, created_at) "
+                    "VALUES (:cache_key, :resume_content_hash, :job_criteria_hash, :job_ref, :model, "
+                    ":prompt_version, :rating, :hard_no, :disqualifiers, :reasons, :result_json, :created_at) "
+                    "ON CONFLICT (cache_key) DO UPDATE SET rating = EXCLUDED.rating, hard_no = EXCLUDED.hard_no, "
+                    "disqualifiers = EXCLUDED.disqualifiers, reasons = EXCLUDED.reasons, "
+                    "result_json = EXCLUDED.result_json, created_at = EXCLUDED.created_at"
+                )
+                invalidate = text(
+                    "DELETE FROM jobmatch WHERE resume_content_hash = :resume_content_hash "
+                    "AND job_ref = :job_ref AND model = :model AND prompt_version = :prompt_version "
+                    "AND cache_key <> :cache_key"
+                )
+                rows = [self._row(e, now) for e in entries]
+                with self.engine.begin() as conn:
+                    conn.execute(invalidate, [
+                        {k: r[k] for k in ("resume_content_hash", "job_ref", "model", "prompt_version", "cache_key")}
+                        for r in rows
+                    ])
+                    conn.execute(upsert, rows)
+            except Exception as e:
+                print(f"[MATCH_CACHE] Store failed: {e}")
+            self._maybe_prune()
+            return
+
+        with self._lock:
+            cache = self._load_file_cache()
+            for entry in entries:
+                identity = self._identity(entry)
+                superseded = self._file_index.get(identity)
+                if superseded is not None and superseded != entry["cache_key"]:
+                    cache.pop(superseded, None)
+                # Re-inserted at the end, so dict order stays oldest-first for eviction
+                cache.pop(entry["cache_key"], None)
+                cache[entry["cache_key"]] = dict(entry, created_at=now.isoformat())
+                self._file_index[identity] = entry["cache_key"]
+            while len(cache) > MATCH_CACHE_MAX_FILE_ENTRIES:
+                self._drop_file_entry(next(iter(cache)))
+                self.pruned += 1
+            self._file_dirty = True
+        self._maybe_prune()
+        if time.monotonic() - self._last_flush >= MATCH_CACHE_FLUSH_INTERVAL:
+            self.flush()
+
+    @staticmethod
+    def _identity(entry: Dict[str, Any]) -> tuple:
+        return (entry.get("resume_content_hash"), entry.get("job_ref"), entry.get("model"), entry.get("prompt_version"))
+
+    def _drop_file_entry(self, key: str) -> None:
+        entry = self._file_cache.pop(key)
+        identity = self._identity(entry)
+        if self._file_index.get(identity) == key:
+            del self._file_index[identity]
+
+    # ----------------------------
+    # Pruning
+    # ----------------------------
+    def _maybe_prune(self) -> None:
+        """Run prune() at most once per MATCH_CACHE_PRUNE_INTERVAL per process."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_prune and now - self._last_prune < MATCH_CACHE_PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        self.prune()
+
+    def prune(self, max_age_days: Optional[int] = None) -> int:
+        """
+        Delete results for resume content hashes whose newest result is older than
+        max_age_days. jobmatch has no resume identity, so a superseded resume version
+        is recognised by its content hash no longer being scored.
+
+        Returns:
+            Number of results deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days if max_age_days is not None else MATCH_CACHE_MAX_AGE_DAYS)
+        deleted = 0
+        if self.engine is not None:
+            try:
+                stmt = text(
+                    "DELETE FROM jobmatch WHERE cache_key IS NOT NULL AND resume_content_hash IN ("
+                    "SELECT resume_content_hash FROM jobmatch WHERE cache_key IS NOT NULL "
+                    "GROUP BY resume_content_hash HAVING MAX(created_at) < :cutoff)"
+                )
+                with self.engine.begin() as conn:
+                    deleted = conn.execute(stmt, {"cutoff": cutoff}).rowcount or 0
+            except Exception as e:
+                print(f"[MATCH_CACHE] Prune failed: {e}")
+        else:
+            with self._lock:
+                cache = self._load_file_cache()
+                newest: Dict[str, str] = {}
+                for entry in cache.values():
+                    resume_hash = entry.get("resume_content_hash")
+                    newest[resume_hash] = max(newest.get(resume_hash, ""), entry.get("created_at") or "")
+                stale = {h for h, created in newest.items() if created < cutoff.isoformat()}
+                for key in [k for k, v in cache.items() if v.get("resume_content_hash") in stale]:
+                    self._drop_file_entry(key)
+                    deleted += 1
+                if deleted:
+                    self._file_dirty = True
+        if deleted:
+            self.pruned += deleted
+            print(f"[MATCH_CACHE] Pruned {deleted} results for resume versions not scored in {MATCH_CACHE_MAX_AGE_DAYS} days")
+        return deleted
+
+    def _row(self, entry: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        return {
+            "cache_key": entry["cache_key"],
+            "resume_content_hash": entry["resume_content_hash"],
+            "job_criteria_hash": entry["job_criteria_hash"],
+            "job_ref": str(entry["job_ref"])[:64],
+            "model": entry["model"],
+            "prompt_version": entry["prompt_version"],
+            "rating": float(entry.get("rating") or 0.0),
+            "hard_no": bool(entry.get("hard_no", False)),
+            "disqualifiers": json.dumps(entry.get("disqualifiers") or [], ensure_ascii=False),
+            "reasons": json.dumps(entry.get("reasons") or [], ensure_ascii=False),
+            "result_json": _canonical_json(entry["result"]) if entry.get("result") is not None else None,
+            "created_at": now,
+        }
+
+    # ----------------------------
+    # JSON file fallback
+    # ----------------------------
+    def _load_file_cache(self) -> Dict[str, Dict[str, Any]]:
+        if self._file_cache is None:
+            self._file_cache = {}
+            if os.path.exists(self.cache_file):
+                try:
+                    with open(self.cache_file, "r", encoding="utf-8") as f:
+                        self._file_cache = json.load(f)
+                except Exception as e:
+                    print(f"[MATCH_CACHE] Error loading {self.cache_file}: {e}")
+            self._file_index = {self._identity(v): k for k, v in self._file_cache.items()}
+        return self._file_cache
+
+    def flush(self) -> None:
+        """Write pending file cache changes (puts are batched; also runs at exit)."""
+        with self._lock:
+            if not self._file_dirty:
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self.cache_file + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._file_cache or {}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_file)
+                self._file_dirty = False
+            except Exception as e:
+                print(f"[MATCH_CACHE] Error saving {self.cache_file}: {e}")
+            self._last_flush = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+            "pruned": self.pruned,
+        }
+
+
+_shared_cache: Optional[MatchCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_match_cache() -> MatchCache:
+    """Process-wide MatchCache (the database probe and file load happen once)."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = MatchCache()
+        return _shared_cache
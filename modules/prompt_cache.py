@@ -0,0 +1,89 @@
+"""
+Prompt Prefix Caching
+Prompts are sent as a byte-identical prefix (instructions, rubric, JSON schema)
+followed by the per-call content, so providers with automatic prefix caching
+(OpenAI, xAI Grok, DeepSeek, Qwen, Gemini implicit caching) can reuse the
+prefix instead of re-reading it on every call. Also normalises each provider's
+usage block into cached / uncached input token counts.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def prefix_messages(prefix: str, suffix: str) -> List[Dict[str, str]]:
+    """Chat messages with the stable prefix as the system message and the variable part as the user message."""
+    return [{"role": "system", "content": prefix}, {"role": "user", "content": suffix}]
+
+
+def prefix_key(prefix: str) -> str:
+    """Short stable identifier of a prompt prefix."""
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_cache_kwargs(provider: str, prefix: str) -> Dict[str, Any]:
+    """
+    Extra chat.completions.create() arguments that improve prefix-cache hit rates.
+
+    OpenAI routes requests with the same prompt_cache_key to the same cache;
+    other OpenAI-compatible providers cache automatically and may reject unknown
+    fields, so nothing is added for them.
+    """
+    if (provider or "").lower() == "openai":
+        return {"extra_body": {"prompt_cache_key": f"recruiter-{prefix_key(prefix)}"}}
+    return {}
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def usage_tokens(usage: Any) -> Dict[str, int]:
+    """
+    Input, cached input and output tokens from an OpenAI-compatible `usage`
+    object/dict or a Gemini `usageMetadata` dict.
+    """
+    input_tokens = (_field(usage, "prompt_tokens") or _field(usage, "input_tokens")
+                    or _field(usage, "promptTokenCount") or 0)
+    output_tokens = (_field(usage, "completion_tokens") or _field(usage, "output_tokens")
+                     or _field(usage, "candidatesTokenCount") or 0)
+    cached = (_field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+              or _field(_field(usage, "input_tokens_details"), "cached_tokens")
+              or _field(usage, "prompt_cache_hit_tokens")          # DeepSeek
+              or _field(usage, "cachedContentTokenCount")          # Gemini
+              or 0)
+    input_tokens, output_tokens, cached = int(input_tokens), int(output_tokens), int(cached)
+    return {
+        "input_tokens": input_tokens,
+        "cached_input_tokens": min(cached, input_tokens) if input_tokens else cached,
+        "uncached_input_tokens": max(0, input_tokens - cached),
+        "output_tokens": output_tokens,
+    }
+
+
+def record_usage(token_stats: Dict[str, Any], usage: Any, lock: Optional[threading.Lock] = None) -> Dict[str, int]:
+    """
+    Add one call's usage to token_stats (ai_calls, total_uploaded, total_output,
+    cached_input_tokens, uncached_input_tokens) and return the call's counts.
+    """
+    tokens = usage_tokens(usage)
+    if lock is None:
+        lock = threading.Lock()
+    with lock:
+        token_stats["ai_calls"] = token_stats.get("ai_calls", 0) + 1
+        token_stats["total_uploaded"] = token_stats.get("total_uploaded", 0) + tokens["input_tokens"]
+        token_stats["total_output"] = token_stats.get("total_output", 0) + tokens["output_tokens"]
+        token_stats["cached_input_tokens"] = token_stats.get("cached_input_tokens", 0) + tokens["cached_input_tokens"]
+        token_stats["uncached_input_tokens"] = token_stats.get("uncached_input_tokens", 0) + tokens["uncached_input_tokens"]
+    return tokens
+
+
+def cached_input_rate(token_stats: Dict[str, Any]) -> float:
+    """Percentage of input tokens served from the provider's prompt cache."""
+    total = token_stats.get("cached_input_tokens", 0) + token_stats.get("uncached_input_tokens", 0)
+    return round(token_stats.get("cached_input_tokens", 0) / total * 100, 1) if total else 0.0
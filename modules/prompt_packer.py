@@ -0,0 +1,325 @@
+"""
+Prompt Packer for batched LLM job scoring
+Packs as many shortlisted jobs into each model call as the context window allows,
+and reuses a cached compact resume summary instead of re-sending raw resume text.
+"""
+
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# Context windows (input + output tokens) by model-name prefix. Longest prefix wins.
+MODEL_CONTEXT_TOKENS = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1000000,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "grok-4": 256000,
+    "grok": 131072,
+    "gemini": 1000000,
+    "deepseek": 64000,
+    "qwen": 131072,
+    "glm": 128000,
+    "claude": 200000,
+}
+DEFAULT_CONTEXT_TOKENS = 32768
+
+# Per-call ceiling regardless of the advertised window: very long prompts degrade
+# answer quality and time-to-first-token long before the hard limit.
+DEFAULT_MAX_PROMPT_TOKENS = 24000
+
+_encoding_cache: Dict[str, Any] = {}
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding(model: Optional[str]):
+    """Return a tiktoken encoding for the model, or None when tiktoken is unavailable."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    key = model or "default"
+    with _encoding_lock:
+        if key not in _encoding_cache:
+            try:
+                _encoding_cache[key] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding_cache[key] = tiktoken.get_encoding("cl100k_base")
+        return _encoding_cache[key]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count prompt tokens for a piece of text.
+
+    Uses tiktoken when installed; otherwise falls back to the ~4 chars/token
+    estimate used elsewhere in the codebase.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        try:
+            return len(encoding.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    return len(text) // 4 + 1
+
+
+def context_window_for(model: Optional[str]) -> int:
+    """Return the context window for a model name using longest-prefix matching."""
+    if not model:
+        return DEFAULT_CONTEXT_TOKENS
+    name = model.lower()
+    best = None
+    for prefix in MODEL_CONTEXT_TOKENS:
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return MODEL_CONTEXT_TOKENS[best] if best else DEFAULT_CONTEXT_TOKENS
+
+
+# ---------------------------
+# Resume summaries
+# ---------------------------
+
+_SUMMARY_KEYWORDS = re.compile(
+    r"\b(skills?|certif\w*|licen[cs]e\w*|education|degree|b\.?s\.?|m\.?s\.?|bachelor|master|mba|"
+    r"engineer\w*|manager|supervisor|superintendent|director|maintenance|reliability|operations|"
+    r"cement|aggregate\w*|mining|quarry|lime|ready[- ]?mix|kiln|plc\w*|vfd\w*|sap|msha|osha|"
+    r"citizen\w*|visa|relocat\w*|present|current)\b",
+    re.IGNORECASE,
+)
+
+
+def resume_content_hash(resume_text: str) -> str:
+    """Stable hash of the resume text, used as the summary cache key."""
+    return hashlib.sha256((resume_text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def build_resume_summary(resume_text: str, max_chars: int = 3000, header_lines: int = 8) -> str:
+    """
+    Build a compact resume summary for scoring prompts.
+
+    Keeps the header (name/contact/headline), then prefers lines that carry
+    matching signal (roles, skills, certifications, education, dates), drops
+    blank and duplicate lines, and stops at max_chars.
+
+    Args:
+        resume_text: Full resume text
+        max_chars: Maximum summary length in characters
+        header_lines: Number of leading non-empty lines always kept
+
+    Returns:
+        Compact summary text (original line order preserved)
+    """
+    if not resume_text:
+        return ""
+    if len(resume_text) <= max_chars:
+        return resume_text
+
+    lines: List[str] = []
+    seen = set()
+    for raw in resume_text.splitlines():
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line:
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+
+    keep = set(range(min(header_lines, len(lines))))
+    budget = max_chars - sum(len(lines[i]) + 1 for i in keep)
+
+    # Lines with matching signal first (in order), then everything else, until full.
+    signal = [i for i in range(len(lines)) if i not in keep and (_SUMMARY_KEYWORDS.search(lines[i]) or re.search(r"\b(19|20)\d{2}\b", lines[i]))]
+    rest = [i for i in range(len(lines)) if i not in keep and i not in set(signal)]
+    for i in signal + rest:
+        cost = len(lines[i]) + 1
+        if cost > budget:
+            continue
+        keep.add(i)
+        budget -= cost
+
+    return "\n".join(lines[i] for i in sorted(keep))
+
+
+class ResumeSummaryCache:
+    """
+    Thread-safe in-memory LRU cache of resume summaries keyed by resume content hash.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resume_text: str, builder: Optional[Callable[[str], str]] = None) -> str:
+        """
+        Return the cached summary for resume_text, building it on first use.
+
+        Args:
+            resume_text: Full resume text
+            builder: Optional summary builder (defaults to build_resume_summary)
+        """
+        key = resume_content_hash(resume_text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        summary = (builder or build_resume_summary)(resume_text)
+
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return summary
+
+
+RESUME_SUMMARY_CACHE = ResumeSummaryCache()
+
+
+# ---------------------------
+# Packing
+# ---------------------------
+
+class PromptPacker:
+    """
+    Greedy token-budget packer for multi-job scoring prompts.
+
+    The budget for each call is the model's context window (capped at
+    max_prompt_tokens) minus the fixed prompt parts (system prompt, resume
+    summary, instructions) and the output tokens the jobs in the batch will need.
+    """
+
+    def __init__(self, model: Optional[str] = None, context_tokens: Optional[int] = None,
+                 max_prompt_tokens: int = DEFAULT_MAX_PROMPT_TOKENS, output_tokens_per_job: int = 150,
+                 base_output_tokens: int = 400, max_output_tokens: int = 8192,
+                 safety_margin: float = 0.1, max_jobs_per_call: Optional[int] = None):
+        """
+        Args:
+            model: Model name (used for the context window and tokenizer)
+            context_tokens: Override for the model context window
+            max_prompt_tokens: Upper bound on input tokens per call
+            output_tokens_per_job: Expected output tokens per scored job (0 when the
+                output does not grow with the batch, e.g. a fixed-size shortlist)
+            base_output_tokens: Output tokens reserved per call regardless of batch size
+            max_output_tokens: Maximum completion tokens the model will produce per call
+            safety_margin: Fraction of the budget held back for tokenizer drift
+            max_jobs_per_call: Optional hard cap on jobs per call
+        """
+        self.model = model
+        self.context_tokens = context_tokens or context_window_for(model)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.output_tokens_per_job = output_tokens_per_job
+        self.base_output_tokens = base_output_tokens
+        self.max_output_tokens = max_output_tokens
+        self.safety_margin = safety_margin
+        self.max_jobs_per_call = max_jobs_per_call
+        self.last_stats: Dict[str, Any] = {}
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def output_budget(self, job_count: int) -> int:
+        """Completion tokens to request for a batch of job_count jobs."""
+        return min(self.max_output_tokens, self.base_output_tokens + job_count * self.output_tokens_per_job)
+
+    def pack(self, fixed_parts: Sequence[str], items: Sequence[Any]) -> List[List[int]]:
+        """
+        Split items into batches that each fit the token budget.
+
+        Args:
+            fixed_parts: Prompt text sent with every call (system prompt, resume summary, instructions)
+            items: Per-job payloads (dicts are measured as compact JSON)
+
+        Returns:
+            List of batches, each a list of indexes into items (input order preserved)
+        """
+        fixed_tokens = sum(self.count(p) for p in fixed_parts if p)
+        usable = int(min(self.context_tokens, self.max_prompt_tokens + self.max_output_tokens) * (1 - self.safety_margin))
+        if self.output_tokens_per_job > 0:
+            max_jobs_by_output = max(1, (self.max_output_tokens - self.base_output_tokens) // self.output_tokens_per_job)
+        else:
+            # Output size does not grow with the batch (e.g. a fixed-size shortlist)
+            max_jobs_by_output = max(1, len(items))
+        job_cap = min(self.max_jobs_per_call or max_jobs_by_output, max_jobs_by_output)
+
+        item_tokens = []
+        for item in items:
+            text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str)
+            item_tokens.append(self.count(text))
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for idx, tokens in enumerate(item_tokens):
+            projected = fixed_tokens + current_tokens + tokens + self.output_budget(len(current) + 1)
+            input_projected = fixed_tokens + current_tokens + tokens
+            if current and (projected > usable or input_projected > self.max_prompt_tokens or len(current) >= job_cap):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+
+        self.last_stats = {
+            "items": len(items),
+            "calls": len(batches),
+            "fixed_tokens": fixed_tokens,
+            "item_tokens": sum(item_tokens),
+            "input_tokens": fixed_tokens * len(batches) + sum(item_tokens),
+        }
+        return batches
+
+
+def merge_ranked(results: Sequence[Sequence[Dict[str, Any]]], score_key: str, limit: Optional[int] = None,
+                 id_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Merge per-batch ranked lists into one list ordered by score_key (descending).
+
+    Duplicate ids (id_key) keep the highest-scoring entry.
+    """
+    merged: Dict[Any, Dict[str, Any]] = {}
+    ordered: List[Dict[str, Any]] = []
+
+    def _score(item: Dict[str, Any]) -> float:
+        try:
+            return float(item.get(score_key) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    for batch in results:
+        for item in batch or []:
+            if not isinstance(item, dict):
+                continue
+            if id_key is None:
+                ordered.append(item)
+                continue
+            key = str(item.get(id_key))
+            if key not in merged or _score(item) > _score(merged[key]):
+                merged[key] = item
+    ordered.extend(merged.values())
+    ordered.sort(key=_score, reverse=True)
+    return ordered[:limit] if limit else ordered
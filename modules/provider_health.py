@@ -0,0 +1,146 @@
+"""
+Provider Health Registry
+Process-wide cache of AI provider health keyed by (agent, model). A live
+connectivity probe (config.test_ai_agent) only runs when the cached result is
+missing or older than its TTL; real traffic keeps the cache fresh, so creating
+a processor for a healthy provider no longer costs an extra AI round trip.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import config
+
+# Seconds a probe or traffic result stays valid; failures are re-probed sooner
+HEALTH_TTL = float(os.getenv("PROVIDER_HEALTH_TTL", "600"))
+FAILURE_TTL = float(os.getenv("PROVIDER_HEALTH_FAILURE_TTL", "30"))
+
+
+class ProviderHealth:
+    """Last known health of one agent/model pair."""
+
+    def __init__(self, healthy: bool, message: str, source: str):
+        self.healthy = healthy
+        self.message = message
+        self.source = source
+        self.checked_at = time.monotonic()
+        self.checked_at_wall = datetime.now().isoformat()
+        self.last_error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.checked_at
+
+    def fresh(self) -> bool:
+        return self.age < (HEALTH_TTL if self.healthy else FAILURE_TTL)
+
+
+_lock = threading.Lock()
+_entries: Dict[Tuple[str, str], ProviderHealth] = {}
+_probe_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_counters = {"cache_hits": 0, "probes": 0, "traffic_successes": 0, "traffic_failures": 0}
+
+
+def _key(agent: str, model: Optional[str] = None) -> Tuple[str, str]:
+    """(agent, model) with the model resolved the same way test_ai_agent resolves it."""
+    agent = (agent or "").lower()
+    if not model and agent in config.AI_AGENT_SETTINGS:
+        model = config.resolve_ai_agent(agent)[2]
+    return agent, model or ""
+
+
+def _count(event: str) -> None:
+    with _lock:
+        _counters[event] += 1
+
+
+def check_provider(agent: str, model: Optional[str] = None, force: bool = False) -> Tuple[bool, str]:
+    """
+    Health of an AI agent, probing it only if the cached result has expired.
+
+    Concurrent callers for the same agent/model wait for a single probe instead
+    of each running their own.
+
+    Returns:
+        (success, message) as returned by config.test_ai_agent
+    """
+    key = _key(agent, model)
+    with _lock:
+        probe_lock = _probe_locks.setdefault(key, threading.Lock())
+    with probe_lock:
+        with _lock:
+            entry = _entries.get(key)
+        if entry is not None and entry.fresh() and not force:
+            _count("cache_hits")
+            return entry.healthy, f"{entry.message} (cached, checked {entry.age:.0f}s ago)"
+        _count("probes")
+        success, message = config.test_ai_agent(key[0], model)
+        with _lock:
+            _entries[key] = ProviderHealth(success, message, "probe")
+        return success, message
+
+
+def record_success(agent: str, model: Optional[str] = None) -> None:
+    """Passive update: a real request to this agent/model succeeded."""
+    key = _key(agent, model)
+    _count("traffic_successes")
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.healthy:
+            # Refresh in place so the last probe message is kept
+            entry.checked_at = time.monotonic()
+            entry.checked_at_wall = datetime.now().isoformat()
+            entry.source = "traffic"
+        else:
+            _entries[key] = ProviderHealth(True, f"{key[0].upper()} served a request successfully", "traffic")
+
+
+def record_failure(agent: str, model: Optional[str], error: Any) -> None:
+    """
+    Passive update: a real request failed at the transport/provider level.
+
+    One failed request is not proof of an outage, so the entry is only expired:
+    the next check_provider() probes again instead of trusting the cache.
+    """
+    key = _key(agent, model)
+    _count("traffic_failures")
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            entry.checked_at = time.monotonic() - max(HEALTH_TTL, FAILURE_TTL)
+            entry.last_error = str(error)
+
+
+def invalidate(agent: Optional[str] = None) -> None:
+    """Forget cached health for one agent (all models), or for every agent."""
+    with _lock:
+        for key in [k for k in _entries if agent is None or k[0] == agent.lower()]:
+            del _entries[key]
+
+
+def get_health_snapshot() -> Dict[str, Any]:
+    """Cached health per agent/model plus cache hit and probe counts."""
+    with _lock:
+        providers = {
+            f"{agent}:{model}" if model else agent: {
+                "agent": agent,
+                "model": model or None,
+                "healthy": entry.healthy,
+                "fresh": entry.fresh(),
+                "source": entry.source,
+                "message": entry.message,
+                "last_error": entry.last_error,
+                "age_seconds": round(entry.age, 1),
+                "checked_at": entry.checked_at_wall,
+            }
+            for (agent, model), entry in sorted(_entries.items())
+        }
+        return {
+            "ttl_seconds": HEALTH_TTL,
+            "failure_ttl_seconds": FAILURE_TTL,
+            "counts": dict(_counters),
+            "providers": providers,
+        }
@@ -10,6 +10,7 @@ import datetime
 from typing import Dict, Any, Optional, Tuple, List
 from pathlib import Path
 import config
+from .tracing import span
 
 class SmartCacheManager:
     def __init__(self, cache_dir: str = "/app/data/cache", ai_agent: str = "openai"):
@@ -342,14 +343,18 @@ class SmartCacheManager:
         """
         print(f"\n[SMART CACHE] Processing job {job_id} with hybrid caching")
         
-        # Step 1: Check for cached combined analysis first
-        combined_cache = self.get_combined_analysis_cache(job_id, job_file, notes_file)
-        if combined_cache:
-            return combined_cache
-        
-        # Step 2: Check individual component caches
-        job_desc_cache = self.get_job_description_cache(job_id, job_file)
-        notes_cache = self.get_notes_cache(job_id, notes_file)
+        with span("cache_lookup", cache="smart") as lookup:
+            # Step 1: Check for cached combined analysis first
+            combined_cache = self.get_combined_analysis_cache(job_id, job_file, notes_file)
+            lookup.set_attribute("hit", "combined" if combined_cache else "none")
+            if combined_cache:
+                return combined_cache
+            
+            # Step 2: Check individual component caches
+            job_desc_cache = self.get_job_description_cache(job_id, job_file)
+            notes_cache = self.get_notes_cache(job_id, notes_file)
+            if job_desc_cache is not None or notes_cache is not None:
+                lookup.set_attribute("hit", "components")
         
         # Step 3: Determine what needs AI processing
         needs_job_desc_ai = job_desc_cache is None
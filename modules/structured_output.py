@@ -0,0 +1,98 @@
+"""
+Structured Output
+JSON-schema response modes for the OpenAI-compatible providers. Schemas are
+derived from the JSON templates already embedded in the extraction prompts, so
+the prompt and the constraint cannot drift apart. Providers that only support
+JSON mode get {"type": "json_object"}; a provider that rejects response_format
+is remembered and the call is retried once without it.
+"""
+
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# response_format support per provider (OpenAI-compatible chat completions)
+STRUCTURED_OUTPUT_MODES = {
+    "openai": "json_schema",
+    "grok": "json_schema",
+    "gemini": "json_schema",
+    "deepseek": "json_object",
+    "qwen": "json_object",
+    "zai": "json_object",
+}
+
+_unsupported_lock = threading.Lock()
+_unsupported: set = set()
+
+
+def template_from_prompt(prompt: str) -> Dict[str, Any]:
+    """The JSON template embedded in a prompt (first '{' to last '}')."""
+    return json.loads(prompt[prompt.index("{"):prompt.rindex("}") + 1])
+
+
+def schema_from_template(template: Any, field_types: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Strict JSON schema for a prompt template: objects keep exactly the template's
+    keys (all required), lists take the schema of their first element, and leaf
+    values are strings unless field_types maps the key to another JSON type.
+    """
+    def build(value: Any, key: Optional[str] = None) -> Dict[str, Any]:
+        if isinstance(value, dict):
+            return {
+                "type": "object",
+                "properties": {k: build(v, k) for k, v in value.items()},
+                "required": list(value.keys()),
+                "additionalProperties": False,
+            }
+        if isinstance(value, list):
+            return {"type": "array", "items": build(value[0]) if value else {"type": "string"}}
+        if field_types and key in field_types:
+            return {"type": field_types[key]}
+        if isinstance(value, bool):
+            return {"type": "boolean"}
+        if isinstance(value, (int, float)):
+            return {"type": "number"}
+        return {"type": "string"}
+
+    return build(template)
+
+
+def structured_output_enabled() -> bool:
+    return os.getenv("STRUCTURED_OUTPUT", "on").lower() not in ("0", "off", "false", "no")
+
+
+def response_format_kwargs(provider: str, name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """chat.completions.create() arguments requesting schema-constrained (or plain JSON) output."""
+    provider = (provider or "").lower()
+    mode = STRUCTURED_OUTPUT_MODES.get(provider)
+    if not mode or not structured_output_enabled() or provider in _unsupported:
+        return {}
+    if mode == "json_schema":
+        return {"response_format": {"type": "json_schema",
+                                    "json_schema": {"name": name, "schema": schema, "strict": True}}}
+    return {"response_format": {"type": "json_object"}}
+
+
+def _rejects_response_format(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(term in message for term in ("response_format", "json_schema", "response format", "structured output"))
+
+
+def create_structured(create: Callable[..., Any], provider: str, name: str, schema: Dict[str, Any], **kwargs) -> Any:
+    """
+    Call create(**kwargs) with the provider's response_format. If the provider
+    rejects the parameter, stop sending it to that provider and call again without it.
+    """
+    format_kwargs = response_format_kwargs(provider, name, schema)
+    if not format_kwargs:
+        return create(**kwargs)
+    try:
+        return create(**kwargs, **format_kwargs)
+    except Exception as e:
+        if not _rejects_response_format(e):
+            raise
+        with _unsupported_lock:
+            _unsupported.add((provider or "").lower())
+        print(f"[STRUCTURED_OUTPUT] {provider} rejected response_format ({e}); continuing without it")
+        return create(**kwargs)
@@ -1,8 +1,10 @@
 import os
 import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Tuple, Optional
-from docx import Document
-import fitz  # PyMuPDF
+from .document_text import extract_document_text
 
 def extract_text_from_pdf(path: str) -> str:
     """
@@ -15,18 +17,14 @@ def extract_text_from_pdf(path: str) -> str:
         Extracted text as a string
     """
     try:
-        txt = ""
-        with fitz.open(path) as doc:
-            for p in doc:
-                txt += p.get_text("text") + "\n"
-        return txt
+        return extract_document_text(path)
     except Exception as e:
         print(f"Error extracting text from PDF {path}: {e}")
         return f"[Error extracting PDF content: {e}]"
 
 def extract_text_from_docx(path: str) -> str:
     """
-    Extract text from a DOCX file with comprehensive content extraction.
+    Extract text from a DOCX file (paragraphs, tables, headers and footers).
 
     Args:
         path: Path to the DOCX file
@@ -35,62 +33,15 @@ def extract_text_from_docx(path: str) -> str:
         Extracted text as a string
     """
     try:
-        doc = Document(path)
-        text_parts = []
-
-        # Extract from paragraphs
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text.strip())
-
-        # Extract from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph.text.strip():
-                            text_parts.append(paragraph.text.strip())
-
-        # Extract from headers
-        if hasattr(doc, 'sections'):
-            for section in doc.sections:
-                if hasattr(section, 'header') and section.header:
-                    for paragraph in section.header.paragraphs:
-                        if paragraph.text.strip():
-                            text_parts.append(f"Header: {paragraph.text.strip()}")
-
-        # Extract from footers
-        if hasattr(doc, 'sections'):
-            for section in doc.sections:
-                if hasattr(section, 'footer') and section.footer:
-                    for paragraph in section.footer.paragraphs:
-                        if paragraph.text.strip():
-                            text_parts.append(f"Footer: {paragraph.text.strip()}")
-
-        # Join all text parts
-        full_text = "\n".join(text_parts)
-
-        # Debug logging for empty extractions
+        full_text = extract_document_text(path)
         if not full_text.strip():
             print(f"Warning: No text extracted from DOCX {path}")
-            print(f"Document has {len(doc.paragraphs)} paragraphs, {len(doc.tables)} tables")
-            # Try to get any text at all, even if empty
-            all_text = []
-            for p in doc.paragraphs:
-                all_text.append(f"[Para: '{p.text}']")
-            for i, table in enumerate(doc.tables):
-                all_text.append(f"[Table {i}: {len(table.rows)} rows]")
-            if all_text:
-                print(f"Document structure: {' | '.join(all_text[:10])}")
         else:
             print(f"Successfully extracted {len(full_text)} characters from DOCX {os.path.basename(path)}")
-
         return full_text
 
     except Exception as e:
         print(f"Error extracting text from DOCX {path}: {e}")
-        import traceback
-        traceback.print_exc()
         return f"[Error extracting DOCX content: {e}]"
 
 def extract_text_from_txt(path: str) -> str:
@@ -104,19 +55,117 @@ def extract_text_from_txt(path: str) -> str:
         File content as a string
     """
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return extract_document_text(path)
+    except Exception as e:
+        print(f"Error reading text file {path}: {e}")
+        return f"[Error reading text file: {e}]"
+
+def extract_text_for_file(path: str) -> str:
+    """
+    Extract text from any job/resume document, dispatching on the file extension.
+
+    Module-level (picklable) so it can run in a ProcessPoolExecutor worker.
+    Unknown extensions are read as text.
+
+    Args:
+        path: Path to the document
+
+    Returns:
+        Extracted text, or an "[Error ...]" marker string as returned by the
+        per-type extractors
+    """
+    file_lower = path.lower()
+    if file_lower.endswith(".pdf"):
+        return extract_text_from_pdf(path)
+    if file_lower.endswith(".docx") or file_lower.endswith(".doc"):
+        return extract_text_from_docx(path)
+    if file_lower.endswith(".txt"):
+        return extract_text_from_txt(path)
+    try:
+        with open(path, "r", encoding="utf-8") as rd:
+            return rd.read()
     except UnicodeDecodeError:
+        with open(path, "r", encoding="latin-1") as rd:
+            return rd.read()
+
+def _extraction_workers() -> int:
+    return max(1, min(os.cpu_count() or 1, int(os.getenv("DOCUMENT_EXTRACTION_WORKERS", "4"))))
+
+def _extract_serial(paths: List[str]) -> List[object]:
+    results: List[object] = []
+    for path in paths:
         try:
-            # Try with a different encoding if utf-8 fails
-            with open(path, 'r', encoding='latin-1') as f:
-                return f.read()
+            results.append(extract_text_for_file(path))
         except Exception as e:
-            print(f"Error reading text file {path}: {e}")
-            return f"[Error reading text file: {e}]"
+            results.append(e)
+    return results
+
+def _extract_many(paths: List[str]) -> List[object]:
+    """Extract several documents in a process pool (text or the exception, in input order)."""
+    if len(paths) < 2:
+        return _extract_serial(paths)
+    try:
+        with ProcessPoolExecutor(max_workers=min(_extraction_workers(), len(paths)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(extract_text_for_file, path) for path in paths]
+            results: List[object] = []
+            for path, future in zip(paths, futures):
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool:
+                    results.extend(_extract_serial([path]))
+                except Exception as e:
+                    results.append(e)
+            return results
     except Exception as e:
-        print(f"Error reading text file {path}: {e}")
-        return f"[Error reading text file: {e}]"
+        # Pool could not start: extract in this process
+        print(f"Parallel extraction unavailable, extracting serially: {e}")
+        return _extract_serial(paths)
+
+class DocumentPrefetcher:
+    """
+    Extracts documents in a process pool ahead of the stage that needs them.
+
+    CPU-bound PDF/DOCX parsing runs in worker processes while the caller's I/O
+    threads wait on network calls; get() returns the prefetched text as soon as
+    it is ready, or extracts in the calling thread if the path was not prefetched.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or _extraction_workers()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, object] = {}
+
+    def start(self, paths: List[str]) -> int:
+        """Submit paths (in the order they will be needed); returns how many were submitted."""
+        paths = [p for p in dict.fromkeys(paths) if p not in self._futures]
+        if not paths:
+            return 0
+        try:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            for path in paths:
+                self._futures[path] = self._pool.submit(extract_text_for_file, path)
+        except Exception as e:
+            print(f"Document prefetch unavailable, extracting on demand: {e}")
+            return 0
+        return len(paths)
+
+    def get(self, path: str) -> str:
+        future = self._futures.get(path)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception as e:
+                print(f"Prefetch failed for {os.path.basename(path)} ({e}); extracting in thread")
+        return extract_text_for_file(path)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._futures = {}
 
 def combine_texts(source_dir: str, output_file: str) -> None:
     """
@@ -135,44 +184,33 @@ def combine_texts(source_dir: str, output_file: str) -> None:
     skipped_count = 0
     
     try:
+        # Collect the files first, then parse them in parallel worker processes
+        pending: List[Tuple[str, str, str]] = []
         for root, _, files in os.walk(source_dir):
             for fn in files:
-                try:
-                    # Extract group ID from filename
-                    m = re.search(r'(?<!\d)(\d{4})(?!\d)', fn)
-                    if not m:
-                        print(f"Skipping {fn} - no group ID found in filename")
-                        skipped_count += 1
-                        continue
-                        
-                    grp = m.group(1)
-                    file_path = os.path.join(root, fn)
-                    
-                    # Extract text based on file extension
-                    content = ""
-                    file_lower = fn.lower()
-                    
-                    if file_lower.endswith(".pdf"):
-                        content = extract_text_from_pdf(file_path)
-                    elif file_lower.endswith(".docx") or file_lower.endswith(".doc"):
-                        content = extract_text_from_docx(file_path)
-                    elif file_lower.endswith(".txt"):
-                        content = extract_text_from_txt(file_path)
-                    else:
-                        print(f"Skipping unsupported file type: {fn}")
-                        skipped_count += 1
-                        continue
-                        
-                    if content:
-                        groups.setdefault(grp, []).append((fn, content))
-                        processed_count += 1
-                    else:
-                        print(f"No content extracted from {fn}")
-                        skipped_count += 1
-                        
-                except Exception as e:
-                    print(f"Error processing file {fn}: {e}")
+                # Extract group ID from filename
+                m = re.search(r'(?<!\d)(\d{4})(?!\d)', fn)
+                if not m:
+                    print(f"Skipping {fn} - no group ID found in filename")
                     skipped_count += 1
+                    continue
+                if not fn.lower().endswith((".pdf", ".docx", ".doc", ".txt")):
+                    print(f"Skipping unsupported file type: {fn}")
+                    skipped_count += 1
+                    continue
+                pending.append((m.group(1), fn, os.path.join(root, fn)))
+
+        contents = _extract_many([path for _, _, path in pending])
+        for (grp, fn, _), content in zip(pending, contents):
+            if isinstance(content, Exception):
+                print(f"Error processing file {fn}: {content}")
+                skipped_count += 1
+            elif content:
+                groups.setdefault(grp, []).append((fn, content))
+                processed_count += 1
+            else:
+                print(f"No content extracted from {fn}")
+                skipped_count += 1
 
         # Write combined text to output file
         if not groups:
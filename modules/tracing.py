@@ -0,0 +1,329 @@
+"""
+Pipeline Tracing
+OpenTelemetry-style spans for the hot paths (text extraction, cache lookup, AI
+request, JSON parse, optimize, DB write). Every finished span is counted in a
+per-process Prometheus duration histogram (served by /api/metrics); sampled
+spans are also exported in batches from a background thread to a JSON-lines
+file (TRACE_EXPORT_FILE) and/or an OTLP/HTTP collector
+(OTEL_EXPORTER_OTLP_ENDPOINT), so a production run can be followed per job.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import random
+import threading
+import contextlib
+import contextvars
+import functools
+import urllib.request
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "xai-recruiter")
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").rstrip("/")
+# Share of traces exported (decided at the root span); histograms always see every span
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "4096"))
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "2.0"))
+TRACE_EXPORT_BATCH = 256
+
+# Histogram bucket upper bounds, in seconds (cache lookups are sub-millisecond, AI requests minutes)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_CURRENT = object()
+
+
+class Span:
+    """One timed operation; children started while it is current share its trace."""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, start_time: Optional[float] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.root_name = parent.root_name if parent else name
+        self.sampled = parent.sampled if parent else _exporter_enabled() and random.random() < TRACE_SAMPLE_RATIO
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time() if start_time is None else start_time
+        # Durations come from the monotonic clock unless the caller supplied the start
+        self._started = time.perf_counter() - (time.time() - self.start_time)
+        self.end_time: Optional[float] = None
+        self.duration: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = str(error)[:500]
+
+    def end(self) -> float:
+        """Finish the span (idempotent) and return its duration in seconds."""
+        if self.duration is None:
+            self.duration = max(0.0, time.perf_counter() - self._started)
+            self.end_time = self.start_time + self.duration
+            SPAN_DURATIONS.observe(self.duration, span=self.name, root=self.root_name, status=self.status)
+            if self.sampled:
+                _get_processor().enqueue(self)
+        return self.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat record written by the file exporter."""
+        return {
+            "service": SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Any = _CURRENT, start_time: Optional[float] = None, **attributes: Any) -> Span:
+    """Start a span without making it current; the caller must end() it."""
+    return Span(name, _current_span.get() if parent is _CURRENT else parent, start_time, attributes)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the block as a child of the current span; exceptions mark it as an error and propagate."""
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def record_span(name: str, started: float, parent: Any = _CURRENT, **attributes: Any) -> float:
+    """Record a finished step that began at wall-clock time started (time.time()); returns its duration."""
+    return start_span(name, parent, started, **attributes).end()
+
+
+def bind_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Run fn (typically in a worker thread) with the caller's current span as its parent."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+class Histogram:
+    """Prometheus histogram with labels; cumulative buckets are produced when rendered."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            # Per-bucket counts (last slot is +Inf), then sum and count
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {values[-1]}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, total and mean seconds per label set (for JSON stats endpoints)."""
+        with self._lock:
+            return {
+                "/".join(key): {"count": v[-1], "total_seconds": round(v[-2], 3),
+                                "avg_ms": round(v[-2] / v[-1] * 1000, 2) if v[-1] else 0.0}
+                for key, v in self._series.items()
+            }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+SPAN_DURATIONS = Histogram("recruiter_span_duration_seconds", "Duration of traced pipeline stages.",
+                           ("span", "root", "status"), DURATION_BUCKETS)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON (ExportTraceServiceRequest) for a batch of finished spans."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "recruiter.tracing"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent.span_id if s.parent else "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(int(s.start_time * 1e9)),
+                "endTimeUnixNano": str(int(s.end_time * 1e9)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2 if s.status == "error" else 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class FileExporter:
+    """Appends one JSON line per span."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+class OTLPHttpExporter:
+    """Posts span batches to an OpenTelemetry collector's /v1/traces (OTLP/HTTP JSON)."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(self.url, data=json.dumps(otlp_payload(spans)).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class BatchSpanProcessor:
+    """Bounded queue drained by a daemon thread, so exporting never blocks the traced code."""
+
+    def __init__(self, exporters: List[Any]):
+        self.exporters = exporters
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def enqueue(self, finished: Span) -> None:
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(TRACE_EXPORT_INTERVAL)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            while True:
+                batch: List[Span] = []
+                while len(batch) < TRACE_EXPORT_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                for exporter in self.exporters:
+                    try:
+                        exporter.export(batch)
+                    except Exception as e:
+                        self.export_errors += 1
+                        print(f"[TRACING] {type(exporter).__name__} failed to export {len(batch)} spans: {e}")
+                self.exported += len(batch)
+
+
+_processor: Optional[BatchSpanProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def _exporter_enabled() -> bool:
+    return bool(TRACE_EXPORT_FILE or OTLP_ENDPOINT)
+
+
+def _get_processor() -> BatchSpanProcessor:
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            exporters: List[Any] = []
+            if TRACE_EXPORT_FILE:
+                exporters.append(FileExporter(TRACE_EXPORT_FILE))
+            if OTLP_ENDPOINT:
+                exporters.append(OTLPHttpExporter(OTLP_ENDPOINT))
+            _processor = BatchSpanProcessor(exporters)
+        return _processor
+
+
+def get_tracing_stats() -> Dict[str, Any]:
+    """Exporter configuration and counts, plus per-span duration totals."""
+    return {
+        "service": SERVICE_NAME,
+        "file_exporter": TRACE_EXPORT_FILE or None,
+        "otlp_endpoint": OTLP_ENDPOINT or None,
+        "sample_ratio": TRACE_SAMPLE_RATIO,
+        "exported": _processor.exported if _processor else 0,
+        "dropped": _processor.dropped if _processor else 0,
+        "export_errors": _processor.export_errors if _processor else 0,
+        "spans": SPAN_DURATIONS.snapshot(),
+    }
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition (format 0.0.4) of the span histograms and exporter counters."""
+    lines = SPAN_DURATIONS.render()
+    for name, help_text, value in (
+        ("recruiter_spans_exported_total", "Spans handed to the trace exporters.", _processor.exported if _processor else 0),
+        ("recruiter_spans_dropped_total", "Spans dropped because the export queue was full.", _processor.dropped if _processor else 0),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,299 @@
+"""
+AI Stub Server
+Local OpenAI-compatible chat completions (streaming and non-streaming) and
+Gemini generateContent endpoint for offline, reproducible benchmarks of the
+job processors, resume matchers and resume extractor.
+
+Modes:
+    synthetic  answer every request from its JSON schema / prompt template
+    record     forward to the real provider and store each answer in the cassette
+    replay     answer from the cassette (--fallback synthetic for misses)
+
+The first path segment names the provider; the rest is the provider's real
+path, so record mode knows where to forward. Point the app at the stub, e.g.:
+
+    GROK_BASE_URL=http://127.0.0.1:8765/grok/v1
+    XAI_BASE_URL=http://127.0.0.1:8765/grok/v1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/openai/v1
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8765/deepseek/v1
+    QWEN_BASE_URL=http://127.0.0.1:8765/qwen/compatible-mode/v1
+    ZAI_BASE_URL=http://127.0.0.1:8765/zai/api/paas/v4
+    GEMINI_BASE_URL=http://127.0.0.1:8765/gemini
+
+Examples:
+    python scripts/ai_stub_server.py --mode record --cassette ai_cassettes
+    python scripts/ai_stub_server.py --mode replay --cassette ai_cassettes --replay-latency recorded
+    python scripts/ai_stub_server.py --latency-ms 1500 --jitter-ms 500 --tokens-per-second 80 \\
+        --rate-limit-rate 0.05 --error-rate 0.02 --stall-rate 0.01 --seed 7
+
+GET /health and GET /stats report the mode, cassette hits/misses and injected faults.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+# Ensure project root (parent of scripts/) is on sys.path for 'modules' imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ai_replay import (
+    Cassette, StubBehaviour, request_key, request_text, synthetic_content, estimate_tokens,
+    chat_completion, chat_completion_chunks, gemini_response, response_content, replace_content,
+    malformed, sse_lines,
+)
+
+# Real provider hosts; the provider's own path follows the prefix in the request
+UPSTREAM_ROOTS = {
+    "grok": "https://api.x.ai",
+    "openai": "https://api.openai.com",
+    "deepseek": "https://api.deepseek.com",
+    "qwen": "https://dashscope-intl.aliyuncs.com",
+    "zai": "https://api.z.ai",
+    "gemini": "https://generativelanguage.googleapis.com",
+}
+
+FORWARDED_HEADERS = ("Authorization", "x-goog-api-key")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], args: argparse.Namespace):
+        super().__init__(address, StubHandler)
+        self.mode = args.mode
+        self.fallback = args.fallback
+        self.replay_latency = args.replay_latency
+        self.chunk_chars = args.chunk_chars
+        self.verbose = args.verbose
+        self.upstreams = dict(UPSTREAM_ROOTS)
+        for item in args.upstream or []:
+            provider, _, url = item.partition("=")
+            self.upstreams[provider.strip().lower()] = url.strip().rstrip("/")
+        self.cassette = Cassette(args.cassette) if args.mode in ("record", "replay") else None
+        self.behaviour = StubBehaviour(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, first_token_ms=args.first_token_ms,
+            tokens_per_second=args.tokens_per_second, rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate, stall_rate=args.stall_rate, malformed_rate=args.malformed_rate,
+            stall_seconds=args.stall_seconds, seed=args.seed,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"mode": self.mode, "behaviour": self.behaviour.get_stats()}
+        if self.cassette:
+            stats["cassette"] = dict(self.cassette.stats, directory=self.cassette.directory,
+                                     entries=len(self.cassette))
+        return stats
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- responses -------------------------------------------------------
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, kind: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": status}}, headers)
+
+    def _send_stream(self, completion: Dict[str, Any], include_usage: bool, stall: bool) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        delay = self.server.behaviour.chunk_delay(self.server.chunk_chars)
+        chunks = chat_completion_chunks(completion, self.server.chunk_chars, include_usage)
+        for i, line in enumerate(sse_lines(chunks)):
+            if stall and i == 2:
+                time.sleep(self.server.behaviour.stall_seconds)
+            elif i and delay:
+                time.sleep(delay)
+            self.wfile.write(line)
+            self.wfile.flush()
+
+    # ---- routing ---------------------------------------------------------
+
+    def _route(self) -> Tuple[str, str, str]:
+        """(provider, path after the provider prefix incl. query, route without query)."""
+        head, _, rest = self.path.lstrip("/").partition("/")
+        if head.lower() in self.server.upstreams:
+            provider, path = head.lower(), "/" + rest
+        else:
+            provider, path = "", self.path
+        return provider, path, path.split("?", 1)[0]
+
+    def do_GET(self) -> None:
+        _, _, route = self._route()
+        if route in ("/health", "/"):
+            self._send_json(200, {"status": "ok", "mode": self.server.mode})
+        elif route == "/stats":
+            self._send_json(200, self.server.get_stats())
+        elif route.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+        else:
+            self._send_error(404, f"Unknown path {self.path}", "not_found")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_error(400, f"Invalid JSON body: {e}", "invalid_request_error")
+            return
+        provider, path, route = self._route()
+        if ":generateContent" in route:
+            gemini = True
+        elif route.endswith("/chat/completions"):
+            gemini = False
+        else:
+            self._send_error(404, f"Unknown path {self.path}", "not_found")
+            return
+        try:
+            self._complete(provider, path, route, body, gemini)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (timeout or aborted stream)
+
+    # ---- completions -----------------------------------------------------
+
+    def _forward(self, provider: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any, float]:
+        """Send the request to the real provider without streaming; returns (status, JSON body, seconds)."""
+        upstream = self.server.upstreams.get(provider)
+        if not upstream:
+            return 502, {"error": {"message": f"No upstream for provider '{provider}'", "type": "stub_error"}}, 0.0
+        payload = {k: v for k, v in body.items() if k not in ("stream", "stream_options")}
+        headers = {"Content-Type": "application/json"}
+        headers.update({h: self.headers[h] for h in FORWARDED_HEADERS if self.headers.get(h)})
+        request = urllib.request.Request(upstream + path, data=json.dumps(payload).encode("utf-8"),
+                                         headers=headers, method="POST")
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return response.status, json.loads(response.read() or b"{}"), time.monotonic() - started
+        except urllib.error.HTTPError as e:
+            try:
+                error_body = json.loads(e.read() or b"{}")
+            except json.JSONDecodeError:
+                error_body = {"error": {"message": str(e), "type": "upstream_error"}}
+            return e.code, error_body, time.monotonic() - started
+        except (urllib.error.URLError, TimeoutError) as e:
+            return 502, {"error": {"message": f"Upstream unreachable: {e}", "type": "upstream_error"}}, 0.0
+
+    def _synthesize(self, body: Dict[str, Any], gemini: bool) -> Dict[str, Any]:
+        content = synthetic_content(body)
+        prompt_tokens = estimate_tokens(request_text(body))
+        if gemini:
+            return gemini_response(content, prompt_tokens)
+        return chat_completion(body.get("model") or "stub-model", content, prompt_tokens)
+
+    def _deliver(self, response: Dict[str, Any], body: Dict[str, Any], gemini: bool, stall: bool = False) -> None:
+        if body.get("stream") and not gemini:
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._send_stream(response, include_usage, stall)
+            return
+        if stall:
+            time.sleep(self.server.behaviour.stall_seconds)
+        self._send_json(200, response)
+
+    def _complete(self, provider: str, path: str, route: str, body: Dict[str, Any], gemini: bool) -> None:
+        server = self.server
+        key = request_key(provider, route, body)
+
+        if server.mode == "record":
+            status, response, seconds = self._forward(provider, path, body)
+            if status == 200:
+                server.cassette.put(key, {"provider": provider, "route": route, "model": body.get("model"),
+                                          "latency_seconds": round(seconds, 3), "response": response})
+                self._deliver(response, body, gemini)
+            else:
+                self._send_json(status, response)
+            return
+
+        rng = server.behaviour.rng(key)
+        recorded = None
+        if server.mode == "replay":
+            entry = server.cassette.get(key)
+            if entry is not None:
+                response = entry["response"]
+                if server.replay_latency == "recorded":
+                    recorded = entry.get("latency_seconds")
+            elif server.fallback == "synthetic":
+                response = self._synthesize(body, gemini)
+            else:
+                self._send_error(404, f"No cassette entry for request {key}", "cassette_miss")
+                return
+        else:
+            response = self._synthesize(body, gemini)
+
+        fault = server.behaviour.fault(rng)
+        time.sleep(server.behaviour.latency(rng, recorded, streaming=bool(body.get("stream")) and not gemini))
+        if fault == "rate_limit":
+            self._send_error(429, "Rate limit exceeded (injected)", "rate_limit_exceeded", {"Retry-After": "1"})
+        elif fault == "server_error":
+            self._send_error(500, "Internal server error (injected)", "server_error")
+        elif fault == "malformed":
+            self._deliver(replace_content(response, malformed(response_content(response))), body, gemini)
+        else:
+            self._deliver(response, body, gemini, stall=fault == "stall")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible AI stub with record/replay")
+    parser.add_argument("--host", default=os.getenv("AI_STUB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("AI_STUB_PORT", "8765")))
+    parser.add_argument("--mode", choices=("synthetic", "record", "replay"), default="synthetic")
+    parser.add_argument("--cassette", default=os.getenv("AI_CASSETTE_DIR", "ai_cassettes"),
+                        help="Directory of recorded responses (record/replay modes)")
+    parser.add_argument("--fallback", choices=("none", "synthetic"), default="none",
+                        help="Replay mode: answer cassette misses synthetically instead of with 404")
+    parser.add_argument("--replay-latency", choices=("configured", "recorded"), default="configured",
+                        help="Replay mode: wait the recorded provider latency instead of --latency-ms")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on every latency")
+    parser.add_argument("--first-token-ms", type=float, default=None, help="Time to first chunk when streaming")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming rate (0 = no pacing)")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of answers with broken JSON")
+    parser.add_argument("--stall-seconds", type=float, default=600.0, help="How long a stalled request hangs")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and fault draws")
+    parser.add_argument("--upstream", action="append", metavar="PROVIDER=URL",
+                        help="Override a provider's upstream host for record mode")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), args)
+    print(f"[AI_STUB] {args.mode} mode on http://{args.host}:{args.port}"
+          + (f" (cassette: {args.cassette})" if server.cassette else ""))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[AI_STUB] {json.dumps(server.get_stats())}")
+
+
+if __name__ == "__main__":
+    main()